@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import json
 import logging
 import threading
 import time
@@ -19,22 +18,28 @@ from core.validation.validator import ContractError, SchemaValidator
 from observability.metrics import Metrics, create_metrics, start_metrics_server
 from runtime.command_bus import CommandBus
 from runtime.fxcm.history_budget import build_history_budget
+from runtime.fxcm.history_chunk_planner import HistoryChunkPlanner
 from runtime.fxcm.history_provider import FxcmForexConnectHistoryAdapter, FxcmHistoryProvider
 from runtime.fxcm_forexconnect import FxcmForexConnectHandle, FxcmForexConnectStream
 from runtime.handlers_p3 import handle_backfill_command, handle_warmup_command
-from runtime.history_provider import HistoryProvider, ProviderNotConfiguredError
+from runtime.history_provider import HistoryProvider, ProviderNotConfiguredError, unwrap_history_provider
+from runtime.history_response_cache import CachedHistoryProvider
+from runtime.htf_derivation import HtfDerivationEngine
 from runtime.http_server import HttpServer
+from runtime.maintenance import MaintenanceExecutor
 from runtime.no_mix import NoMixDetector
-from runtime.ohlcv_preview import PreviewCandleBuilder, select_closed_bars_for_archive
-from runtime.preview_builder import OhlcvCache
+from runtime.ohlcv_preview import PreviewCandleBuilder, PreviewCloseTimer, select_closed_bars_for_archive
+from runtime.preview_builder import ClosedPreviewBar, OhlcvCache
 from runtime.publisher import RedisPublisher
-from runtime.reconcile_finalizer import reconcile_final_tail
+from runtime.reconcile_finalizer import prefetch_reconcile_window, reconcile_final_tail
+from runtime.reconcile_scheduler import PREFETCH_CMD, ReconcileScheduler
 from runtime.replay_ticks import ReplayTickHandle, ReplayTickStream
 from runtime.republish import republish_tail
 from runtime.status import StatusManager
 from runtime.tail_guard import run_tail_guard
 from runtime.tick_feed import TickPublisher
 from store.file_cache import FileCache
+from store.tick_archive import TickArchiveWriter
 from ui_lite.server import UiLiteHandle, start_ui_lite
 
 log = logging.getLogger("fxcm_p0")
@@ -50,6 +55,11 @@ class RuntimeHandles:
     fxcm_handle: Optional[FxcmForexConnectHandle]
     replay_handle: Optional[ReplayTickHandle]
     mode: BackendMode
+    history_provider: Optional[HistoryProvider] = None
+    tick_archive: Optional[TickArchiveWriter] = None
+    maintenance: Optional[MaintenanceExecutor] = None
+    preview_close_timer: Optional[PreviewCloseTimer] = None
+    reconcile_scheduler: Optional[ReconcileScheduler] = None
 
 
 def _resolve_mode(config: Config) -> BackendMode:
@@ -74,70 +84,21 @@ def _ensure_tick_mode(config: Config) -> None:
         raise SystemExit("tick_mode=fxcm потребує fxcm_backend=forexconnect")
 
 
-def _is_15m_boundary(close_time_ms: int) -> bool:
-    if close_time_ms <= 0:
-        return False
-    return (int(close_time_ms) + 1) % TF_TO_MS["15m"] == 0
-
-
-def _build_reconcile_command_payload(symbols: List[str], end_ms: int, ts_ms: int, req_id: str) -> Dict[str, Any]:
-    return {
-        "cmd": "fxcm_reconcile_tail",
-        "req_id": str(req_id),
-        "ts": int(ts_ms),
-        "args": {
-            "symbols": list(symbols),
-            "end_ms": int(end_ms),
-        },
-    }
-
-
-def _publish_reconcile_command(
-    *,
-    redis_client: Optional[Any],
-    config: Config,
-    validator: SchemaValidator,
-    status: StatusManager,
-    end_ms: int,
-) -> bool:
-    if not config.reconcile_enable:
-        return False
-    if not _is_15m_boundary(int(end_ms)):
-        return False
-    last_end_ms = status.get_reconcile_last_end_ms()
-    if int(last_end_ms) == int(end_ms):
-        return False
-    if redis_client is None:
-        status.append_error(
-            code="reconcile_command_publish_error",
-            severity="error",
-            message="Redis недоступний для publish reconcile",
-            context={"end_ms": int(end_ms)},
-        )
-        status.mark_degraded("reconcile_command_publish_error")
-        return False
-    ts_ms = int(time.time() * 1000)
-    payload = _build_reconcile_command_payload(
-        symbols=list(config.reconcile_active_symbols),
-        end_ms=int(end_ms),
-        ts_ms=ts_ms,
-        req_id=f"auto_reconcile:{int(end_ms)}",
+def _build_history_chunk_planner(config: Config, metrics: Optional[Metrics]) -> Optional[HistoryChunkPlanner]:
+    if not config.history_chunk_adaptive:
+        return None
+    state_path: Optional[Path] = None
+    if config.cache_enabled and config.history_chunk_state_file:
+        state_path = Path(config.cache_root) / str(config.history_chunk_state_file)
+    return HistoryChunkPlanner(
+        initial_minutes=int(config.history_chunk_minutes),
+        min_minutes=int(config.history_chunk_min_minutes),
+        max_minutes=int(config.history_chunk_max_minutes),
+        fast_ms=int(config.history_chunk_fast_ms),
+        slow_ms=int(config.history_chunk_slow_ms),
+        state_path=state_path,
+        metrics=metrics,
     )
-    try:
-        validator.validate_commands_v1(payload)
-        json_str = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
-        redis_client.publish(config.ch_commands(), json_str)
-        status.record_reconcile_trigger(int(end_ms))
-        return True
-    except Exception as exc:  # noqa: BLE001
-        status.append_error(
-            code="reconcile_command_publish_error",
-            severity="error",
-            message=str(exc),
-            context={"end_ms": int(end_ms)},
-        )
-        status.mark_degraded("reconcile_command_publish_error")
-        return False
 
 
 def build_history_provider_for_runtime(
@@ -146,14 +107,28 @@ def build_history_provider_for_runtime(
     metrics: Optional[Metrics],
 ) -> Optional[HistoryProvider]:
     if config.history_provider_kind == "fxcm_forexconnect":
-        history_budget = build_history_budget(int(config.max_requests_per_minute))
-        return FxcmHistoryProvider(
-            adapter=FxcmForexConnectHistoryAdapter(config=config),
+        history_budget = build_history_budget(
+            int(config.max_requests_per_minute),
+            max_inflight=int(config.history_max_inflight),
+            metrics=metrics,
+        )
+        provider = FxcmHistoryProvider(
+            adapter=FxcmForexConnectHistoryAdapter(config=config, metrics=metrics),
             budget=history_budget,
             status=status,
             metrics=metrics,
             chunk_minutes=int(config.history_chunk_minutes),
             min_sleep_ms=int(config.history_min_sleep_ms),
+            chunk_planner=_build_history_chunk_planner(config, metrics),
+        )
+        if not config.history_response_cache_enabled:
+            return provider
+        return CachedHistoryProvider(
+            inner=provider,
+            safety_lag_ms=int(config.history_response_cache_safety_lag_s) * 1000,
+            recent_ttl_ms=int(config.history_response_cache_recent_ttl_s) * 1000,
+            max_minutes=int(config.history_response_cache_max_minutes),
+            metrics=metrics,
         )
     if config.history_provider_kind == "none":
         return None
@@ -328,6 +303,26 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
                 metrics.ohlcv_final_validation_errors_total.inc()
         status.publish_snapshot()
 
+    maintenance = MaintenanceExecutor(max_workers=int(config.maintenance_max_workers), status=status, metrics=metrics)
+    htf_derivation: Optional[HtfDerivationEngine] = None
+    if file_cache is not None and config.htf_derive_enabled:
+        htf_derivation = HtfDerivationEngine(
+            file_cache=file_cache,
+            calendar=calendar,
+            publisher=publisher,
+            validator=validator,
+            status=status,
+            metrics=metrics,
+            tfs=config.derived_rebuild_default_tfs,
+        )
+
+    def _rebuild_htf(symbol: str, start_ms: int, end_ms: int, tfs: List[str]) -> None:
+        # Набір TF — config.derived_rebuild_default_tfs (SSOT для всіх шляхів деривації).
+        if htf_derivation is not None:
+            htf_derivation.derive_range(symbol, start_ms, end_ms)
+
+    rebuild_callback = _rebuild_htf if htf_derivation is not None else None
+
     def _handle_warmup(payload: dict) -> None:
         args = payload.get("args", {})
         provider_name = str(args.get("provider", ""))
@@ -342,7 +337,8 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
             status=status,
             metrics=metrics,
             publish_tail=_publish_final_tail,
-            rebuild_callback=None,
+            rebuild_callback=rebuild_callback,
+            maintenance=maintenance,
         )
 
     def _handle_backfill(payload: dict) -> None:
@@ -359,7 +355,8 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
             status=status,
             metrics=metrics,
             publish_tail=_publish_final_tail,
-            rebuild_callback=None,
+            rebuild_callback=rebuild_callback,
+            maintenance=maintenance,
         )
 
     def _handle_tail_guard(payload: dict) -> None:
@@ -383,17 +380,18 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
         if not isinstance(tfs, list) or not tfs:
             raise ValueError("tfs має бути list[str]")
         provider_name = str(args.get("provider", ""))
-        for symbol in symbols:
-            started_ms = int(time.time() * 1000)
-            summary = {
-                "windows_repaired": 0,
-                "bars_ingested": 0,
-                "rebuild_tfs": [],
-                "republish_window_hours": 0,
-                "duration_ms": 0,
-                "result": "ok",
-            }
-            near_window_hours = int(config.tail_guard_window_hours)
+        near_window_hours = int(config.tail_guard_window_hours)
+        command_summary: Dict[str, Any] = {
+            "windows_repaired": 0,
+            "bars_ingested": 0,
+            "rebuild_tfs": [],
+            "republish_window_hours": 0,
+            "duration_ms": 0,
+            "result": "ok",
+        }
+        summary_lock = threading.Lock()
+
+        def _tail_guard_symbol(symbol: str) -> None:
             if near_window_hours > 0 and near_window_hours != window_hours:
                 run_tail_guard(
                     config=config,
@@ -414,38 +412,57 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
                     tier="near",
                 )
             provider = _select_provider(provider_name)
-            try:
-                result = run_tail_guard(
-                    config=config,
-                    file_cache=file_cache,
-                    calendar=calendar,
-                    provider=provider,
-                    redis_client=redis_client,
-                    publisher=publisher,
-                    validator=validator,
-                    status=status,
-                    metrics=metrics,
-                    symbol=symbol,
-                    window_hours=window_hours,
-                    repair=repair,
-                    republish_after_repair=republish_after_repair,
-                    republish_force=republish_force,
-                    tfs=[str(tf) for tf in tfs],
-                    tier="far",
-                )
-                if repair and result.repair_summary is not None:
-                    summary["windows_repaired"] = int(result.repair_summary.windows_repaired)
-                    summary["bars_ingested"] = int(result.repair_summary.bars_ingested)
+            result = run_tail_guard(
+                config=config,
+                file_cache=file_cache,
+                calendar=calendar,
+                provider=provider,
+                redis_client=redis_client,
+                publisher=publisher,
+                validator=validator,
+                status=status,
+                metrics=metrics,
+                symbol=symbol,
+                window_hours=window_hours,
+                repair=repair,
+                republish_after_repair=republish_after_repair,
+                republish_force=republish_force,
+                tfs=[str(tf) for tf in tfs],
+                tier="far",
+            )
+            if repair and result.repair_summary is not None:
+                if htf_derivation is not None and result.repair_summary.windows_repaired > 0:
+                    htf_derivation.derive_ranges(symbol, result.tf_states["1m"].missing_ranges)
+                with summary_lock:
+                    command_summary["windows_repaired"] += int(result.repair_summary.windows_repaired)
+                    command_summary["bars_ingested"] += int(result.repair_summary.bars_ingested)
                     if result.repair_summary.windows_repaired > 0:
-                        summary["rebuild_tfs"] = ["15m", "1h", "4h", "1d"]
+                        command_summary["rebuild_tfs"] = ["15m", "1h", "4h", "1d"]
                         if republish_after_repair:
-                            summary["republish_window_hours"] = int(window_hours)
-            except Exception:
-                summary["result"] = "error"
-                raise
-            finally:
-                summary["duration_ms"] = int(time.time() * 1000) - started_ms
-                status.update_last_command_result(summary)
+                            command_summary["republish_window_hours"] = int(window_hours)
+            if repair and htf_derivation is not None:
+                # Точковий rebuild лише відсутніх/розбіжних HTF бакетів (з final 1m, без history).
+                htf_ranges = {
+                    tf: state.missing_ranges + state.mismatched_buckets
+                    for tf, state in result.tf_states.items()
+                    if tf != "1m" and (state.missing_ranges or state.mismatched_buckets)
+                }
+                for tf, ranges in htf_ranges.items():
+                    htf_derivation.derive_ranges(symbol, ranges, tfs=[tf])
+                if htf_ranges:
+                    with summary_lock:
+                        rebuild_tfs = set(command_summary["rebuild_tfs"]) | set(htf_ranges)
+                        command_summary["rebuild_tfs"] = sorted(rebuild_tfs, key=lambda tf: TF_TO_MS[tf])
+
+        started_ms = int(time.time() * 1000)
+        try:
+            maintenance.run("tail_guard", [str(symbol) for symbol in symbols], _tail_guard_symbol)
+        except Exception:
+            command_summary["result"] = "error"
+            raise
+        finally:
+            command_summary["duration_ms"] = int(time.time() * 1000) - started_ms
+            status.update_last_command_result(command_summary)
             status.publish_snapshot()
 
     def _handle_republish_tail(payload: dict) -> None:
@@ -493,8 +510,9 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
         end_ms = int(args.get("end_ms", 0))
         close_ms = int(args.get("close_ms", 0))
         target_close_ms = end_ms if end_ms > 0 else (close_ms if close_ms > 0 else None)
-        for symbol in symbols:
-            reconcile_final_tail(
+
+        def _reconcile_symbol(symbol: str) -> None:
+            summary = reconcile_final_tail(
                 config=config,
                 file_cache=file_cache,
                 provider=provider,
@@ -502,12 +520,45 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
                 validator=validator,
                 status=status,
                 metrics=metrics,
-                symbol=str(symbol),
+                symbol=symbol,
                 lookback_minutes=lookback_minutes,
                 req_id=str(payload.get("req_id", "")),
                 target_close_ms=target_close_ms,
             )
-        status.publish_snapshot()
+            if htf_derivation is not None:
+                htf_derivation.derive_range(
+                    symbol,
+                    summary.bucket_close_ms - summary.lookback_minutes * 60_000 + 1,
+                    summary.bucket_close_ms,
+                )
+
+        try:
+            maintenance.run("reconcile", [str(symbol) for symbol in symbols], _reconcile_symbol)
+        finally:
+            status.publish_snapshot()
+
+    def _handle_reconcile_prefetch(payload: dict) -> None:
+        if file_cache is None:
+            return
+        args = payload.get("args", {})
+        lookback_minutes = int(args.get("lookback_minutes", config.reconcile_lookback_minutes_default))
+
+        def _prefetch_symbol(symbol: str) -> None:
+            # Best-effort: помилку prefetch виправить сам reconcile на boundary.
+            try:
+                prefetch_reconcile_window(
+                    file_cache=file_cache,
+                    provider=_select_provider(""),
+                    status=status,
+                    metrics=metrics,
+                    symbol=symbol,
+                    lookback_minutes=lookback_minutes,
+                    target_close_ms=int(args.get("end_ms", 0)),
+                )
+            except Exception as exc:  # noqa: BLE001
+                log.warning("reconcile prefetch symbol=%s error=%s", symbol, exc)
+
+        maintenance.run("reconcile_prefetch", [str(symbol) for symbol in args.get("symbols", [])], _prefetch_symbol)
 
     def _handle_bootstrap(payload: dict) -> None:
         if not config.bootstrap_enable:
@@ -535,7 +586,8 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
                     status=status,
                     metrics=metrics,
                     publish_tail=_publish_final_tail,
-                    rebuild_callback=None,
+                    rebuild_callback=rebuild_callback,
+                    maintenance=maintenance,
                 )
                 status.record_bootstrap_step(step=current_step, state="ok")
                 log.info("bootstrap step=warmup ok")
@@ -554,7 +606,8 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
                     status=status,
                     metrics=metrics,
                     publish_tail=_publish_final_tail,
-                    rebuild_callback=None,
+                    rebuild_callback=rebuild_callback,
+                    maintenance=maintenance,
                 )
                 status.record_bootstrap_step(step=current_step, state="ok")
                 log.info("bootstrap step=backfill ok")
@@ -635,6 +688,21 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
         handlers=handlers,
     )
 
+    reconcile_scheduler: Optional[ReconcileScheduler] = None
+    if config.reconcile_auto_enable and config.reconcile_enable and file_cache is not None:
+        reconcile_scheduler = ReconcileScheduler(
+            config=config,
+            calendar=calendar,
+            status=status,
+            submit=lambda payload: command_bus.submit_internal(
+                payload,
+                _handle_reconcile_prefetch if payload.get("cmd") == PREFETCH_CMD else None,
+            ),
+            prefetch_lead_ms=int(config.reconcile_prefetch_lead_s) * 1000,
+            metrics=metrics,
+        )
+        reconcile_scheduler.start()
+
     if config.commands_enabled:
         started = command_bus.start()
         if not started:
@@ -659,6 +727,21 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
         metrics=metrics,
     )
 
+    tick_archive: Optional[TickArchiveWriter] = None
+    if config.tick_archive_enabled:
+        tick_archive = TickArchiveWriter(
+            root=Path(config.cache_root) / str(config.tick_archive_dir),
+            retention_days=int(config.tick_archive_retention_days),
+            max_bytes=int(config.tick_archive_max_bytes),
+            batch_max=int(config.tick_archive_batch_max),
+            flush_interval_s=float(config.tick_archive_flush_interval_s),
+            queue_max=int(config.tick_archive_queue_max),
+            metrics=metrics,
+            on_stats=status.record_tick_archive,
+        )
+        tick_archive.start()
+        status.record_tick_archive(tick_archive.stats())
+
     last_ohlcv_log_by_tf: dict = {}
     last_ohlcv_summary_log_ms = 0
     last_ohlcv_summary_info_ms = 0
@@ -669,6 +752,68 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
     ohlcv_prev_open_by_tf: dict = {}
     last_preview_rails = (0, 0, 0)
     last_archived_open_by_tf: dict = {}
+    preview_lock = threading.Lock()
+
+    def _archive_closed_bars(symbol: str, tf_name: str, closed_bars: List[Dict[str, Any]]) -> None:
+        """Закриті preview бари → FileCache (1m stream_close) + auto reconcile; кожен бар один раз."""
+        last_archived = int(last_archived_open_by_tf.get(tf_name, 0))
+        closed_bars = [bar for bar in closed_bars if int(bar.get("open_time", 0)) > last_archived]
+        if not closed_bars:
+            return
+        last_archived_open_by_tf[tf_name] = int(closed_bars[-1].get("open_time", last_archived))
+        if tf_name != "1m":
+            return
+        if file_cache is None:
+            status.append_error(
+                code="cache_disabled",
+                severity="warn",
+                message="File cache вимкнений у конфігу",
+            )
+            status.mark_degraded("cache_disabled")
+        else:
+            try:
+                cache_bars = []
+                for bar in closed_bars:
+                    cache_bars.append(
+                        {
+                            "open_time": bar.get("open_time"),
+                            "close_time": bar.get("close_time"),
+                            "open": bar.get("open"),
+                            "high": bar.get("high"),
+                            "low": bar.get("low"),
+                            "close": bar.get("close"),
+                            "volume": bar.get("volume"),
+                            "tick_count": bar.get("tick_count", 0),
+                            "complete": True,
+                            "source": "stream_close",
+                        }
+                    )
+                result = file_cache.append_complete_bars(
+                    symbol=str(symbol),
+                    tf="1m",
+                    bars=cache_bars,
+                    now_utc=None,
+                    source="stream_close",
+                )
+                if result.duplicates > 0:
+                    status.append_error(
+                        code="cache_duplicate",
+                        severity="warn",
+                        message="File cache дубль open_time_ms",
+                        context={"symbol": symbol, "tf": "1m", "duplicates": result.duplicates},
+                    )
+                    status.mark_degraded("cache_duplicate")
+            except Exception as exc:  # noqa: BLE001
+                status.append_error(
+                    code="cache_write_failed",
+                    severity="error",
+                    message=str(exc),
+                    context={"symbol": symbol, "tf": "1m"},
+                )
+                status.mark_degraded("cache_write_failed")
+        if reconcile_scheduler is not None:
+            for bar in closed_bars:
+                reconcile_scheduler.enqueue(int(bar.get("close_time") or 0))
 
     def _handle_fxcm_tick(
         symbol: str,
@@ -677,6 +822,18 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
         mid: float,
         tick_ts_ms: int,
         snap_ts_ms: int,
+    ) -> None:
+        # Спільний lock з таймером закриття барів (PreviewCloseTimer).
+        with preview_lock:
+            _handle_fxcm_tick_locked(symbol, bid, ask, mid, tick_ts_ms, snap_ts_ms)
+
+    def _handle_fxcm_tick_locked(
+        symbol: str,
+        bid: float,
+        ask: float,
+        mid: float,
+        tick_ts_ms: int,
+        snap_ts_ms: int,
     ) -> None:
         nonlocal last_ohlcv_summary_log_ms, last_ohlcv_summary_info_ms, last_preview_rails, first_ok_summary_logged
         if config.tick_mode == "fxcm":
@@ -691,6 +848,15 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
                 )
             except ContractError:
                 return
+        if tick_archive is not None:
+            tick_archive.submit(
+                symbol=symbol,
+                bid=bid,
+                ask=ask,
+                mid=mid,
+                tick_ts_ms=tick_ts_ms,
+                snap_ts_ms=snap_ts_ms,
+            )
         if status.is_preview_paused():
             status.publish_snapshot()
             return
@@ -711,69 +877,11 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
                         validator=validator,
                     )
                     tf_name = str(payload.get("tf"))
-                    last_archived = int(last_archived_open_by_tf.get(tf_name, 0))
-                    closed_bars = select_closed_bars_for_archive(bars, last_archived)
-                    if closed_bars:
-                        last_archived_open_by_tf[tf_name] = int(closed_bars[-1].get("open_time", last_archived))
-                    if tf_name == "1m" and closed_bars:
-                        if file_cache is None:
-                            status.append_error(
-                                code="cache_disabled",
-                                severity="warn",
-                                message="File cache вимкнений у конфігу",
-                            )
-                            status.mark_degraded("cache_disabled")
-                        else:
-                            try:
-                                cache_bars = []
-                                for bar in closed_bars:
-                                    cache_bars.append(
-                                        {
-                                            "open_time": bar.get("open_time"),
-                                            "close_time": bar.get("close_time"),
-                                            "open": bar.get("open"),
-                                            "high": bar.get("high"),
-                                            "low": bar.get("low"),
-                                            "close": bar.get("close"),
-                                            "volume": bar.get("volume"),
-                                            "tick_count": bar.get("tick_count", 0),
-                                            "complete": True,
-                                            "source": "stream_close",
-                                        }
-                                    )
-                                result = file_cache.append_complete_bars(
-                                    symbol=str(symbol),
-                                    tf="1m",
-                                    bars=cache_bars,
-                                    now_utc=None,
-                                    source="stream_close",
-                                )
-                                if result.duplicates > 0:
-                                    status.append_error(
-                                        code="cache_duplicate",
-                                        severity="warn",
-                                        message="File cache дубль open_time_ms",
-                                        context={"symbol": symbol, "tf": "1m", "duplicates": result.duplicates},
-                                    )
-                                    status.mark_degraded("cache_duplicate")
-                            except Exception as exc:  # noqa: BLE001
-                                status.append_error(
-                                    code="cache_write_failed",
-                                    severity="error",
-                                    message=str(exc),
-                                    context={"symbol": symbol, "tf": "1m"},
-                                )
-                                status.mark_degraded("cache_write_failed")
-                        if config.reconcile_auto_enable and config.reconcile_enable:
-                            for bar in closed_bars:
-                                end_ms = int(bar.get("close_time") or 0)
-                                _publish_reconcile_command(
-                                    redis_client=redis_client,
-                                    config=config,
-                                    validator=validator,
-                                    status=status,
-                                    end_ms=end_ms,
-                                )
+                    _archive_closed_bars(
+                        str(symbol),
+                        tf_name,
+                        select_closed_bars_for_archive(bars, int(last_archived_open_by_tf.get(tf_name, 0))),
+                    )
                     last_open = int(bars[-1]["open_time"])
                     status.record_ohlcv_publish(
                         tf=str(payload.get("tf")),
@@ -819,8 +927,8 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
                         parts = []
                         top_delay_parts = []
                         market_open = True
-                        if calendar is not None:
-                            market_open = bool(calendar.is_open(now_ms))
+                        if status.market_cache is not None:
+                            market_open = bool(status.market_cache.is_open(now_ms))
                         for tf_key, count in sorted(ohlcv_publish_counts_by_tf.items()):
                             tf_ms = TF_TO_MS.get(str(tf_key))
                             if tf_ms is None:
@@ -917,6 +1025,44 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
             preview_builder.mark_published(now_ms)
             status.publish_snapshot()
 
+    def _on_preview_bars_closed(closed: List[ClosedPreviewBar]) -> None:
+        now_ms = int(time.time() * 1000)
+        for item in closed:
+            try:
+                publisher.publish_ohlcv_batch(
+                    symbol=item.symbol,
+                    tf=item.tf,
+                    bars=[item.bar],
+                    source="stream",
+                    validator=validator,
+                )
+            except ContractError as exc:
+                status.append_error(
+                    code="ohlcv_preview_contract_error",
+                    severity="error",
+                    message=str(exc),
+                    context={"symbol": item.symbol, "tf": item.tf},
+                )
+                status.record_ohlcv_error()
+                continue
+            status.record_ohlcv_publish(tf=item.tf, bar_open_time_ms=int(item.bar["open_time"]), publish_ts_ms=now_ms)
+            _archive_closed_bars(item.symbol, item.tf, [item.bar])
+        status.publish_snapshot()
+
+    preview_close_timer: Optional[PreviewCloseTimer] = None
+    # Лише live FXCM: replay тіки мають історичні ts, wall clock для них не застосовний.
+    live_ticks = mode == BackendMode.FOREXCONNECT and config.tick_mode == "fxcm"
+    if live_ticks and config.ohlcv_preview_enabled and config.ohlcv_preview_close_timer_enabled:
+        preview_close_timer = PreviewCloseTimer(
+            builder=preview_builder,
+            on_closed=_on_preview_bars_closed,
+            lock=preview_lock,
+            poll_ms=int(config.ohlcv_preview_close_poll_ms),
+            is_paused=status.is_preview_paused,
+            metrics=metrics,
+        )
+        preview_close_timer.start()
+
     fxcm_handle = None
     replay_handle = None
     if mode == BackendMode.FOREXCONNECT and config.tick_mode == "fxcm":
@@ -937,7 +1083,7 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
 
     ui_lite_handle = None
     if config.ui_lite_enabled:
-        ui_lite_handle = start_ui_lite(config=config, redis_client=redis_client)
+        ui_lite_handle = start_ui_lite(config=config, redis_client=redis_client, market_cache=status.market_cache)
         log.info("UI Lite запущено на %s:%s", config.ui_lite_host, config.ui_lite_port)
 
     def _coverage_days_from_rows(rows: List[Dict[str, Any]]) -> int:
@@ -985,14 +1131,15 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
         if not symbols:
             if config.preview_symbol:
                 symbols = [str(config.preview_symbol)]
-        for symbol in symbols:
-            if not _should_auto_warmup(str(symbol)):
-                continue
+
+        def _auto_warmup_symbol(symbol: str) -> None:
+            if not _should_auto_warmup(symbol):
+                return
             try:
                 handle_warmup_command(
                     payload={
                         "args": {
-                            "symbols": [str(symbol)],
+                            "symbols": [symbol],
                             "lookback_days": int(config.warmup_lookback_days),
                             "publish": False,
                         }
@@ -1003,7 +1150,8 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
                     status=status,
                     metrics=metrics,
                     publish_tail=_publish_final_tail,
-                    rebuild_callback=None,
+                    rebuild_callback=rebuild_callback,
+                    maintenance=maintenance,
                 )
                 republish_tail(
                     config=config,
@@ -1013,7 +1161,7 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
                     validator=validator,
                     status=status,
                     metrics=metrics,
-                    symbol=str(symbol),
+                    symbol=symbol,
                     timeframes=["1m"],
                     window_hours=int(config.republish_tail_window_hours_default),
                     force=True,
@@ -1024,12 +1172,14 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
                     code="auto_warmup_error",
                     severity="error",
                     message=str(exc),
-                    context={"symbol": str(symbol)},
+                    context={"symbol": symbol},
                 )
                 status.mark_degraded("auto_warmup_error")
             finally:
                 status.publish_snapshot()
 
+        maintenance.run("auto_warmup", [str(symbol) for symbol in symbols], _auto_warmup_symbol)
+
     if config.auto_warmup_on_start:
         threading.Thread(target=_auto_warmup_worker, name="auto_warmup", daemon=True).start()
 
@@ -1050,20 +1200,21 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
         if not symbols:
             if config.preview_symbol:
                 symbols = [str(config.preview_symbol)]
-        for symbol in symbols:
-            rows, meta = file_cache.load(str(symbol), "1m")
+
+        def _auto_republish_symbol(symbol: str) -> None:
+            rows, meta = file_cache.load(symbol, "1m")
             if not rows:
-                continue
+                return
             last_write_source = str(meta.get("last_write_source", ""))
             if last_write_source not in {"history", "history_agg"}:
                 status.append_error(
                     code="auto_republish_skipped",
                     severity="warn",
                     message="auto_republish пропущено: last_write_source не final",
-                    context={"symbol": str(symbol), "last_write_source": last_write_source},
+                    context={"symbol": symbol, "last_write_source": last_write_source},
                 )
                 status.publish_snapshot()
-                continue
+                return
             try:
                 republish_tail(
                     config=config,
@@ -1073,7 +1224,7 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
                     validator=validator,
                     status=status,
                     metrics=metrics,
-                    symbol=str(symbol),
+                    symbol=symbol,
                     timeframes=["1m"],
                     window_hours=int(config.republish_tail_window_hours_default),
                     force=False,
@@ -1084,12 +1235,14 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
                     code="auto_republish_error",
                     severity="error",
                     message=str(exc),
-                    context={"symbol": str(symbol)},
+                    context={"symbol": symbol},
                 )
                 status.mark_degraded("auto_republish_error")
             finally:
                 status.publish_snapshot()
 
+        maintenance.run("auto_republish", [str(symbol) for symbol in symbols], _auto_republish_symbol)
+
     if config.auto_republish_on_start:
         threading.Thread(target=_auto_republish_worker, name="auto_republish", daemon=True).start()
 
@@ -1102,10 +1255,17 @@ def build_runtime(config: Config, fxcm_preview: bool) -> RuntimeHandles:
         fxcm_handle=fxcm_handle,
         replay_handle=replay_handle,
         mode=mode,
+        history_provider=history_provider,
+        tick_archive=tick_archive,
+        maintenance=maintenance,
+        preview_close_timer=preview_close_timer,
+        reconcile_scheduler=reconcile_scheduler,
     )
 
 
 def stop_runtime(handles: RuntimeHandles) -> None:
+    if handles.reconcile_scheduler is not None:
+        handles.reconcile_scheduler.stop()
     if handles.command_bus and handles.config.commands_enabled:
         handles.command_bus.stop()
     if handles.mode == BackendMode.FOREXCONNECT:
@@ -1113,6 +1273,16 @@ def stop_runtime(handles: RuntimeHandles) -> None:
             handles.fxcm_handle.stop()
     if handles.replay_handle is not None:
         handles.replay_handle.stop()
+    if handles.preview_close_timer is not None:
+        handles.preview_close_timer.stop()
+    if handles.tick_archive is not None:
+        handles.tick_archive.stop()
+    if handles.maintenance is not None:
+        handles.maintenance.shutdown(wait_running=False)
     handles.http_server.stop()
     if handles.ui_lite_handle is not None:
         handles.ui_lite_handle.stop()
+    if handles.history_provider is not None:
+        base_provider = unwrap_history_provider(handles.history_provider)
+        if isinstance(base_provider, FxcmHistoryProvider):
+            base_provider.close()
@@ -9,6 +9,7 @@ from pathlib import Path
 from app.composition import build_runtime, stop_runtime
 from config.config import load_config
 from core.env_loader import load_env
+from runtime.command_stream import command_target
 from runtime.fxcm_forexconnect import check_fxcm_environment
 
 
@@ -48,7 +49,7 @@ def main() -> None:
     log.debug(
         "Redis channels: status=%s commands=%s price_tik=%s ohlcv=%s",
         config.ch_status(),
-        config.ch_commands(),
+        command_target(config),
         config.ch_price_tik(),
         config.ch_ohlcv(),
     )
@@ -70,7 +71,7 @@ def main() -> None:
     )
     handles = build_runtime(config=config, fxcm_preview=args.fxcm_preview)
 
-    log.info("Слухаю команди у %s", config.ch_commands())
+    log.info("Слухаю команди у %s (transport=%s)", command_target(config), config.command_transport)
     stop_event = None
     if handles.fxcm_handle is not None:
         stop_event = handles.fxcm_handle.stop_event
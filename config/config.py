@@ -55,6 +55,7 @@ class Config:
     reconcile_auto_enable: bool = False  # auto-trigger reconcile на 15m close
     reconcile_active_symbols: List[str] = field(default_factory=lambda: ["XAUUSD"])
     reconcile_lookback_minutes_default: int = 20
+    reconcile_prefetch_lead_s: int = 0  # prefetch history вікна reconcile за N секунд до 15m boundary; 0 → вимкнено
 
     calendar_tag: str = "fxcm_calendar_v1_utc_overrides"
     calendar_path: str = "config/calendar_overrides.json"
@@ -74,8 +75,29 @@ class Config:
     auto_republish_on_start: bool = True  # auto republish tail при рестарті (hot start)
     history_chunk_minutes: int = 24  # розмір чанку історії при запиті
     history_chunk_limit: int = 1000  # макс кількість чанків за один запит
+    history_chunk_adaptive: bool = True  # адаптивний розмір чанку per symbol (стартує з history_chunk_minutes)
+    history_chunk_min_minutes: int = 5  # нижня межа адаптивного чанку
+    history_chunk_max_minutes: int = 1000  # верхня межа адаптивного чанку (додатково обмежена history_chunk_limit)
+    history_chunk_fast_ms: int = 2000  # відповідь швидша за це → чанк росте
+    history_chunk_slow_ms: int = 10_000  # відповідь повільніша за це → чанк зменшується
+    history_chunk_state_file: str = "history_chunk_plan.json"  # вивчені розміри чанків (відносно cache_root)
+    history_ingest_max_buffer_bars: int = 50_000  # warmup/backfill: барів у пам'яті до проміжного запису FileCache
+    history_ingest_publish_interval_s: int = 30  # проміжний запис+publish tail не частіше; 0 → лише в кінці
+    history_pipeline_depth: int = 2  # warmup/backfill/repair: чанків history у польоті наперед; 0 → послідовно
+    history_checkpoint_file: str = "history_checkpoints.json"  # checkpoints warmup/backfill (відносно cache_root)
+    history_checkpoint_interval_s: int = 15  # flush FileCache + checkpoint раз на N секунд; 0 → лише в кінці
+    history_checkpoint_ttl_s: int = 24 * 60 * 60  # незавершений checkpoint, старший за це, ігнорується
+    history_response_cache_enabled: bool = True  # локальний кеш відповідей history (reconcile/repair/tail_guard/warmup)
+    history_response_cache_safety_lag_s: int = 10 * 60  # хвилини, старші за це на момент fetch, незмінні (без TTL)
+    history_response_cache_recent_ttl_s: int = 60  # TTL свіжих хвилин (ближчих до now, ніж safety lag)
+    history_response_cache_max_minutes: int = 7 * 24 * 60  # макс хвилин у кеші на символ
     max_requests_per_minute: int = 30  # макс кількість запитів до історії за хвилину
     history_min_sleep_ms: int = 250  # мінімальна пауза між запитами до історії в ms
+    history_max_inflight: int = 1  # макс паралельних history запитів (різні символи); 1 → послідовно
+    maintenance_max_workers: int = 4  # tail_guard/reconcile/republish/auto warmup: символів паралельно; 1 → послідовно
+    history_session_pool_size: int = 1  # макс залогінених history сесій ForexConnect (не менше history_max_inflight)
+    history_session_idle_timeout_s: int = 300  # idle сесія закривається (logout) після цього часу
+    history_session_health_check_s: int = 60  # health check сесії перед reuse не частіше, ніж раз на N секунд
     tail_guard_window_hours: int = 24  # вікно перевірки tail guard у годинах
     tail_guard_ttl_ms: int = 15 * 60 * 1000  # TTL для збереження стану tail guard у ms
     tail_guard_ttl_minutes: int = 15  # TTL для збереження стану tail guard у хвилинах
@@ -93,6 +115,7 @@ class Config:
     republish_tail_window_hours_default: int = 48  # вікно за замовчуванням для republish tail у годинах
     derived_rebuild_default_tfs: List[str] = field(default_factory=lambda: ["5m", "15m", "1h", "4h", "1d"])
     derived_rebuild_window_hours_default: int = 48  # вікно за замовчуванням для rebuild derived у годинах
+    htf_derive_enabled: bool = True  # інкрементальна деривація HTF final з final 1m (TF — derived_rebuild_default_tfs)
 
     commands_enabled: bool = True  # чи увімкнено обробку команд
     commands_channel: str = ""
@@ -101,6 +124,14 @@ class Config:
     ohlcv_channel: str = ""
     heartbeat_channel: str = ""
     command_bus_heartbeat_period_s: int = 2
+    command_transport: str = "pubsub"  # pubsub | streams (durable {NS}:commands:stream + consumer group)
+    command_stream_key: str = ""
+    command_stream_group: str = "connector"
+    command_stream_consumer: str = ""  # порожньо → hostname:ns (стабільно між рестартами)
+    command_stream_batch: int = 64  # XREADGROUP COUNT (drain burst за один round-trip)
+    command_stream_block_ms: int = 1000  # XREADGROUP BLOCK
+    command_stream_maxlen: int = 10_000  # XADD MAXLEN ~
+    command_stream_claim_idle_ms: int = 60_000  # XAUTOCLAIM pending інших consumer після idle
     max_command_payload_bytes: int = 16_384  # hard-rail для payload команд (bytes)
     command_rate_limit_enable: bool = True  # глобальний rate-limit для команд (default OFF)
     command_rate_limit_raw_per_s: int = 20  # raw rate-limit до JSON parse
@@ -110,12 +141,28 @@ class Config:
     command_coalesce_enable: bool = True  # coalesce помилок команд (default OFF)
     command_coalesce_window_s: int = 30
     command_heavy_collapse_enable: bool = True  # collapse-to-latest для heavy команд
-    command_heavy_cmds: List[str] = field(default_factory=lambda: ["backfill", "warmup", "tail_guard", "reconcile"])
+    command_heavy_cmds: List[str] = field(
+        default_factory=lambda: [
+            "backfill",
+            "warmup",
+            "tail_guard",
+            "reconcile",
+            "fxcm_backfill",
+            "fxcm_warmup",
+            "fxcm_tail_guard",
+            "fxcm_reconcile_tail",
+            "fxcm_republish_tail",
+            "fxcm_bootstrap",
+        ]
+    )
+    command_heavy_workers: int = 2  # worker pool для heavy команд (0 → виконання на command_bus thread)
+    command_heavy_queue_max: int = 16  # межа черги heavy команд (понад → command_queue_full)
     command_auth_enable: bool = True  # HMAC auth для команд (rolling mode)
     command_auth_required: bool = False  # якщо True → auth обов'язковий
     command_auth_max_skew_ms: int = 300_000  # допуск на skew часу (ms)
     command_auth_replay_ttl_ms: int = 300_000  # TTL для anti-replay (ms)
     command_auth_allowed_kids: List[str] = field(default_factory=list)
+    command_auth_nonce_cache_max: int = 4096  # локальний LRU nonce (0 → лише Redis SET NX)
 
     status_publish_period_ms: int = 1000
     status_fresh_warn_ms: int = 3000
@@ -132,6 +179,13 @@ class Config:
     tick_sim_interval_ms: int = 500  # інтервал симуляції тіків у ms
     tick_sim_bid: float = 2000.0
     tick_sim_ask: float = 2000.2
+    tick_archive_enabled: bool = False  # локальний архів тіків з runtime (ground truth для 1m без FXCM history)
+    tick_archive_dir: str = "tick_archive"  # денні сегменти SYMBOL/YYYY-MM-DD.ticks|.idx (відносно cache_root)
+    tick_archive_retention_days: int = 7  # сегменти, старші за N днів, видаляються; 0 → без обмеження
+    tick_archive_max_bytes: int = 2 * 1024 * 1024 * 1024  # ліміт розміру архіву (найстаріші дні першими); 0 → без
+    tick_archive_batch_max: int = 1000  # тіків в одному записі
+    tick_archive_flush_interval_s: float = 1.0  # запис черги не рідше, ніж раз на N секунд
+    tick_archive_queue_max: int = 200_000  # bounded черга; понад ліміт тік відкидається (tick path не блокується)
 
     replay_ticks_path: str = "data/replay_ticks.jsonl"
 
@@ -143,6 +197,11 @@ class Config:
     ohlcv_preview_symbols: List[str] = field(default_factory=lambda: ["XAUUSD"])
     ohlcv_preview_tfs: List[str] = field(default_factory=lambda: ["1m", "5m", "15m", "1h", "4h", "1d"])
     ohlcv_preview_publish_interval_ms: int = 250
+    ohlcv_preview_close_timer_enabled: bool = (
+        True  # закриття preview бару за wall clock, без очікування наступного тіку
+    )
+    ohlcv_preview_close_grace_ms: int = 1500  # бар закривається о close_time + grace (запізнілі тіки після — late drop)
+    ohlcv_preview_close_poll_ms: int = 250  # максимальний крок таймера закриття
     ohlcv_sim_enabled: bool = False  # чи увімкнено симуляцію OHLCV прев'ю
 
     http_port: int = 8088
@@ -164,6 +223,11 @@ class Config:
             return self.commands_channel
         return f"{self.ns}:commands"
 
+    def key_commands_stream(self) -> str:
+        if self.command_stream_key:
+            return self.command_stream_key
+        return f"{self.ns}:commands:stream"
+
     def ch_price_tik(self) -> str:
         if self.price_channel:
             return self.price_channel
@@ -186,6 +250,9 @@ def _env_overrides_from_env(env: Mapping[str, str]) -> Dict[str, Any]:
     commands_channel = env.get("FXCM_COMMANDS_CHANNEL", "").strip()
     if commands_channel:
         overrides["commands_channel"] = commands_channel
+    command_transport = env.get("FXCM_COMMAND_TRANSPORT", "").strip().lower()
+    if command_transport:
+        overrides["command_transport"] = command_transport
     status_channel = env.get("FXCM_STATUS_CHANNEL", "").strip()
     if status_channel:
         overrides["status_channel"] = status_channel
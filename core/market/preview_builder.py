@@ -86,6 +86,15 @@ class PreviewStreamState:
     last_tick_ts_ms: int = 0
     last_bucket_open_ms: int = 0
     last_late_tick: Dict[str, int] = field(default_factory=dict)
+    closed_bucket_open_ms: int = 0
+
+
+@dataclass
+class ClosedPreviewBar:
+    symbol: str
+    tf: str
+    bar: Dict[str, Any]
+    due_ms: int
 
 
 @dataclass
@@ -99,6 +108,7 @@ class PreviewBuilder:
     last_publish_ms: int = 0
     _current_bars: Dict[Tuple[str, str], OhlcvBar] = field(default_factory=dict)
     _stream_state: Dict[Tuple[str, str], PreviewStreamState] = field(default_factory=dict)
+    _close_due_ms: Dict[Tuple[str, str], int] = field(default_factory=dict)
 
     def on_tick(self, symbol: str, mid: float, tick_ts_ms: int) -> None:
         for tf in self.config.ohlcv_preview_tfs:
@@ -126,6 +136,9 @@ class PreviewBuilder:
             is_late_tick = False
             if int(state.last_bucket_open_ms) and int(bucket_start) < int(state.last_bucket_open_ms):
                 is_late_tick = True
+            # Bucket уже закрито таймером: тік після close_time + grace не мутує бар.
+            if int(state.closed_bucket_open_ms) and int(bucket_start) <= int(state.closed_bucket_open_ms):
+                is_late_tick = True
             if is_late_tick:
                 state.late_ticks_dropped_total += 1
                 state.past_mutations_total += 1
@@ -173,6 +186,7 @@ class PreviewBuilder:
                     tick_count=1,
                 )
                 self._current_bars[key] = bar
+                self._close_due_ms[key] = self._effective_close_ms(symbol, int(tick_ts_ms), int(bucket_close))
             else:
                 current.high = max(current.high, mid)
                 current.low = min(current.low, mid)
@@ -184,6 +198,31 @@ class PreviewBuilder:
             self.cache.update_bar(symbol, tf, bar_dict)
             self._sync_preview_rail(tf, state)
 
+    def close_due(self, now_ms: int, grace_ms: int) -> List[ClosedPreviewBar]:
+        """Закриває поточні бари, для яких effective close + grace <= now_ms (wall clock).
+
+        Закритий бар лишається у cache, а bucket стає watermark для late drop.
+        """
+        closed: List[ClosedPreviewBar] = []
+        for key, close_ms in sorted(self._close_due_ms.items(), key=lambda item: item[1]):
+            due_ms = int(close_ms) + int(grace_ms)
+            if due_ms > int(now_ms):
+                continue
+            symbol, tf = key
+            current = self._current_bars.pop(key)
+            del self._close_due_ms[key]
+            bar_dict = current.to_dict(source="stream", complete=False, synthetic=False)
+            self.cache.update_bar(symbol, tf, bar_dict)
+            state = self._get_stream_state(symbol, tf)
+            state.closed_bucket_open_ms = max(int(state.closed_bucket_open_ms), int(current.open_time))
+            closed.append(ClosedPreviewBar(symbol=symbol, tf=tf, bar=bar_dict, due_ms=due_ms))
+        return closed
+
+    def next_close_due_ms(self, grace_ms: int) -> Optional[int]:
+        if not self._close_due_ms:
+            return None
+        return min(self._close_due_ms.values()) + int(grace_ms)
+
     def build_payloads(self, symbol: str, limit: int) -> List[Dict[str, Any]]:
         payloads: List[Dict[str, Any]] = []
         for tf in self.config.ohlcv_preview_tfs:
@@ -222,6 +261,15 @@ class PreviewBuilder:
     def get_stream_state(self, symbol: str, tf: str) -> Optional[PreviewStreamState]:
         return self._stream_state.get((symbol, tf))
 
+    def _effective_close_ms(self, symbol: str, tick_ts_ms: int, bucket_close_ms: int) -> int:
+        """close_time бару з урахуванням календаря: ринок закривається всередині bucket → pause - 1."""
+        if self.calendar is None:
+            return bucket_close_ms
+        intervals = self.calendar.open_intervals_ms(tick_ts_ms, bucket_close_ms, symbol=symbol)
+        if not intervals:
+            return bucket_close_ms
+        return min(bucket_close_ms, int(intervals[-1][1]))
+
     def _sync_preview_rail(self, tf: str, state: PreviewStreamState) -> None:
         if self.status is None:
             return
@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.time.buckets import TF_TO_MS, get_bucket_close_ms, get_bucket_open_ms
+from core.time.calendar import Calendar
+
+_MINUTE_MS = TF_TO_MS["1m"]
+_NUMPY_STATE: Dict[str, Any] = {}
+
+Bounds = Tuple[List[int], List[int]]
+
+
+def _try_import_numpy() -> Optional[Any]:
+    """NumPy опційний: без нього працює pure-Python шлях з ідентичним результатом."""
+    if "module" not in _NUMPY_STATE:
+        try:
+            import numpy  # type: ignore[import]
+
+            _NUMPY_STATE["module"] = numpy
+        except Exception:  # noqa: BLE001
+            _NUMPY_STATE["module"] = None
+    return _NUMPY_STATE["module"]
+
+
+@dataclass
+class OhlcvColumns:
+    """Колонкове представлення 1m барів (відсортовано за open_time_ms, без дублікатів)."""
+
+    open_time_ms: List[int]
+    open: List[float]
+    high: List[float]
+    low: List[float]
+    close: List[float]
+    volume: List[float]
+    tick_count: List[int]
+    _arrays: Dict[str, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "OhlcvColumns":
+        ordered = sorted(rows, key=lambda row: int(row["open_time_ms"]))
+        return cls(
+            open_time_ms=[int(row["open_time_ms"]) for row in ordered],
+            open=[float(row["open"]) for row in ordered],
+            high=[float(row["high"]) for row in ordered],
+            low=[float(row["low"]) for row in ordered],
+            close=[float(row["close"]) for row in ordered],
+            volume=[float(row.get("volume", 0.0)) for row in ordered],
+            tick_count=[int(row.get("tick_count", 0)) for row in ordered],
+        )
+
+    def __len__(self) -> int:
+        return len(self.open_time_ms)
+
+    def arrays(self, np: Any) -> Dict[str, Any]:
+        """NumPy колонки (конвертуються один раз: resampling у кілька TF їх перевикористовує)."""
+        if not self._arrays:
+            self._arrays = {
+                "open_time_ms": np.asarray(self.open_time_ms, dtype="int64"),
+                "open": np.asarray(self.open, dtype="float64"),
+                "high": np.asarray(self.high, dtype="float64"),
+                "low": np.asarray(self.low, dtype="float64"),
+                "close": np.asarray(self.close, dtype="float64"),
+                "volume": np.asarray(self.volume, dtype="float64"),
+                "tick_count": np.asarray(self.tick_count, dtype="int64"),
+            }
+        return self._arrays
+
+
+@dataclass
+class ResampledOhlcv:
+    """Результат resampling: лише непорожні бакети, у порядку open_time.
+
+    count — кількість 1m у бакеті; expected — скільки хвилин має бути (повний TF або
+    відкриті за календарем хвилини); complete — усі очікувані хвилини присутні.
+    """
+
+    tf: str
+    open_time: List[int] = field(default_factory=list)
+    close_time: List[int] = field(default_factory=list)
+    open: List[float] = field(default_factory=list)
+    high: List[float] = field(default_factory=list)
+    low: List[float] = field(default_factory=list)
+    close: List[float] = field(default_factory=list)
+    volume: List[float] = field(default_factory=list)
+    tick_count: List[int] = field(default_factory=list)
+    count: List[int] = field(default_factory=list)
+    expected: List[int] = field(default_factory=list)
+    complete: List[bool] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.open_time)
+
+    def bars(self, source: str = "history_agg", complete_only: bool = True) -> List[Dict[str, Any]]:
+        """Бари у форматі final OHLCV (event_ts = close_time)."""
+        result: List[Dict[str, Any]] = []
+        for idx in range(len(self.open_time)):
+            if complete_only and not self.complete[idx]:
+                continue
+            result.append(
+                {
+                    "open_time": self.open_time[idx],
+                    "close_time": self.close_time[idx],
+                    "open": self.open[idx],
+                    "high": self.high[idx],
+                    "low": self.low[idx],
+                    "close": self.close[idx],
+                    "volume": self.volume[idx],
+                    "tick_count": self.tick_count[idx],
+                    "complete": True,
+                    "synthetic": False,
+                    "source": source,
+                    "event_ts": self.close_time[idx],
+                }
+            )
+        return result
+
+    def incomplete_opens(self) -> List[int]:
+        return [self.open_time[idx] for idx in range(len(self.open_time)) if not self.complete[idx]]
+
+
+def bucket_bounds(tf: str, first_ms: int, last_ms: int, calendar: Optional[Calendar] = None) -> Bounds:
+    """Межі (open, close) бакетів TF, що покривають [first_ms, last_ms]; 1d — через Calendar."""
+    if tf not in TF_TO_MS:
+        raise ValueError("Невідомий TF для resampling: " + str(tf))
+    if last_ms < first_ms:
+        return [], []
+    if tf != "1d":
+        tf_ms = TF_TO_MS[tf]
+        opens = list(range(int(first_ms) - int(first_ms) % tf_ms, int(last_ms) + 1, tf_ms))
+        return opens, [open_ms + tf_ms - 1 for open_ms in opens]
+    opens = []
+    closes = []
+    open_ms = int(get_bucket_open_ms(tf, int(first_ms), calendar))
+    while open_ms <= last_ms:
+        close_ms = int(get_bucket_close_ms(tf, open_ms, calendar))
+        opens.append(open_ms)
+        closes.append(close_ms)
+        open_ms = close_ms + 1
+    return opens, closes
+
+
+def open_minutes(open_intervals: Sequence[Tuple[int, int]], start_ms: int, end_ms: int) -> int:
+    """Кількість відкритих хвилин (open_time) у [start_ms, end_ms] за інтервалами календаря."""
+    minutes = _OpenMinutes(open_intervals)
+    return minutes.before(int(end_ms) + 1) - minutes.before(int(start_ms))
+
+
+def resample_ohlcv(
+    columns: OhlcvColumns,
+    tf: str,
+    calendar: Optional[Calendar] = None,
+    bounds: Optional[Bounds] = None,
+    open_intervals: Optional[Sequence[Tuple[int, int]]] = None,
+) -> ResampledOhlcv:
+    """1m колонки → бакети tf: first/last/max/min/sum + маска повноти.
+
+    bounds — явні межі бакетів (напр. лише зачеплені); рядки поза ними відкидаються.
+    open_intervals — відкриті інтервали календаря: тоді повнота рахується лише по
+    відкритих хвилинах, інакше очікується кожна хвилина бакета. NumPy шлях і
+    pure-Python шлях дають однакові значення (суми — послідовно, як у Python).
+    """
+    result = ResampledOhlcv(tf=str(tf))
+    if len(columns) == 0:
+        return result
+    if bounds is None:
+        bounds = bucket_bounds(tf, columns.open_time_ms[0], columns.open_time_ms[-1], calendar)
+    if not bounds[0]:
+        return result
+    minutes = _OpenMinutes(open_intervals) if open_intervals is not None else None
+    np = _try_import_numpy()
+    if np is not None:
+        _resample_numpy(np, columns, bounds, minutes, result)
+    else:
+        _resample_python(columns, bounds, minutes, result)
+    return result
+
+
+def diff_buckets(expected: ResampledOhlcv, actual: OhlcvColumns) -> Tuple[List[int], List[int]]:
+    """Порівняння повних бакетів expected з наявними барами actual: (відсутні, розбіжні) open_time.
+
+    Неповні бакети expected не перевіряються. Порівняння точне по OHLCV і tick_count
+    (той самий kernel дає ті самі значення, див. resample_ohlcv).
+    """
+    np = _try_import_numpy()
+    if np is not None:
+        return _diff_numpy(np, expected, actual)
+    return _diff_python(expected, actual)
+
+
+def _diff_python(expected: ResampledOhlcv, actual: OhlcvColumns) -> Tuple[List[int], List[int]]:
+    index = {open_ms: idx for idx, open_ms in enumerate(actual.open_time_ms)}
+    missing: List[int] = []
+    mismatched: List[int] = []
+    for idx, open_ms in enumerate(expected.open_time):
+        if not expected.complete[idx]:
+            continue
+        pos = index.get(open_ms)
+        if pos is None:
+            missing.append(open_ms)
+        elif (
+            actual.open[pos] != expected.open[idx]
+            or actual.high[pos] != expected.high[idx]
+            or actual.low[pos] != expected.low[idx]
+            or actual.close[pos] != expected.close[idx]
+            or actual.volume[pos] != expected.volume[idx]
+            or actual.tick_count[pos] != expected.tick_count[idx]
+        ):
+            mismatched.append(open_ms)
+    return missing, mismatched
+
+
+def _diff_numpy(np: Any, expected: ResampledOhlcv, actual: OhlcvColumns) -> Tuple[List[int], List[int]]:
+    complete = np.asarray(expected.complete, dtype=bool)
+    if not complete.any():
+        return [], []
+    opens = np.asarray(expected.open_time, dtype="int64")[complete]
+    if len(actual) == 0:
+        return opens.tolist(), []
+    arrays = actual.arrays(np)
+    actual_opens = arrays["open_time_ms"]
+    pos = np.minimum(np.searchsorted(actual_opens, opens), actual_opens.size - 1)
+    found = actual_opens[pos] == opens
+    differs = np.zeros(opens.size, dtype=bool)
+    for name in ("open", "high", "low", "close", "volume", "tick_count"):
+        values = np.asarray(getattr(expected, name), dtype=arrays[name].dtype)[complete]
+        differs |= arrays[name][pos] != values
+    return opens[~found].tolist(), opens[found & differs].tolist()
+
+
+class _OpenMinutes:
+    """before(x) — кількість відкритих хвилин з open_time < x (префіксні суми по інтервалах)."""
+
+    def __init__(self, intervals: Sequence[Tuple[int, int]]) -> None:
+        firsts: List[int] = []
+        counts: List[int] = []
+        for start_ms, end_ms in sorted((int(start), int(end)) for start, end in intervals):
+            first = start_ms + (-start_ms) % _MINUTE_MS
+            last = end_ms - end_ms % _MINUTE_MS
+            if last >= first:
+                firsts.append(first)
+                counts.append((last - first) // _MINUTE_MS + 1)
+        self.firsts = firsts
+        self.counts = counts
+        self.cumulative = [0] * len(counts)
+        for idx in range(1, len(counts)):
+            self.cumulative[idx] = self.cumulative[idx - 1] + counts[idx - 1]
+
+    def before(self, ts_ms: int) -> int:
+        pos = bisect_left(self.firsts, ts_ms) - 1
+        if pos < 0:
+            return 0
+        inside = (ts_ms - self.firsts[pos] + _MINUTE_MS - 1) // _MINUTE_MS
+        return self.cumulative[pos] + min(self.counts[pos], inside)
+
+    def before_array(self, np: Any, values: Any) -> Any:
+        if not self.firsts:
+            return np.zeros(len(values), dtype="int64")
+        firsts = np.asarray(self.firsts, dtype="int64")
+        pos = np.searchsorted(firsts, values, side="left") - 1
+        safe = np.maximum(pos, 0)
+        inside = (values - firsts[safe] + _MINUTE_MS - 1) // _MINUTE_MS
+        counts = np.asarray(self.counts, dtype="int64")[safe]
+        total = np.asarray(self.cumulative, dtype="int64")[safe] + np.minimum(counts, inside)
+        return np.where(pos < 0, 0, total)
+
+
+def _resample_python(
+    columns: OhlcvColumns,
+    bounds: Bounds,
+    minutes: Optional[_OpenMinutes],
+    result: ResampledOhlcv,
+) -> None:
+    opens_b, closes_b = bounds
+    times = columns.open_time_ms
+    size = len(times)
+    bucket = 0
+    idx = 0
+    while idx < size and bucket < len(opens_b):
+        ts_ms = times[idx]
+        if ts_ms > closes_b[bucket]:
+            bucket += 1
+            continue
+        if ts_ms < opens_b[bucket]:
+            idx += 1
+            continue
+        first = idx
+        high = columns.high[idx]
+        low = columns.low[idx]
+        volume = columns.volume[idx]
+        ticks = columns.tick_count[idx]
+        idx += 1
+        while idx < size and times[idx] <= closes_b[bucket]:
+            high = max(high, columns.high[idx])
+            low = min(low, columns.low[idx])
+            volume += columns.volume[idx]
+            ticks += columns.tick_count[idx]
+            idx += 1
+        open_ms = opens_b[bucket]
+        close_ms = closes_b[bucket]
+        count = idx - first
+        if minutes is None:
+            expected = (close_ms - open_ms + 1) // _MINUTE_MS
+            present = count
+        else:
+            expected = minutes.before(close_ms + 1) - minutes.before(open_ms)
+            present = sum(minutes.before(ts + 1) - minutes.before(ts) for ts in times[first:idx])
+        result.open_time.append(open_ms)
+        result.close_time.append(close_ms)
+        result.open.append(columns.open[first])
+        result.high.append(high)
+        result.low.append(low)
+        result.close.append(columns.close[idx - 1])
+        result.volume.append(volume)
+        result.tick_count.append(ticks)
+        result.count.append(count)
+        result.expected.append(expected)
+        result.complete.append(expected > 0 and present == expected)
+        bucket += 1
+
+
+def _resample_numpy(
+    np: Any,
+    columns: OhlcvColumns,
+    bounds: Bounds,
+    minutes: Optional[_OpenMinutes],
+    result: ResampledOhlcv,
+) -> None:
+    arrays = columns.arrays(np)
+    times = arrays["open_time_ms"]
+    opens_b = np.asarray(bounds[0], dtype="int64")
+    closes_b = np.asarray(bounds[1], dtype="int64")
+    bucket = np.searchsorted(opens_b, times, side="right") - 1
+    inside = bucket >= 0
+    inside[inside] = times[inside] <= closes_b[bucket[inside]]
+    rows = np.flatnonzero(inside)
+    if rows.size == 0:
+        return
+    bucket = bucket[rows]
+    starts = np.flatnonzero(np.concatenate(([True], bucket[1:] != bucket[:-1])))
+    ends = np.append(starts[1:], rows.size)
+    lengths = ends - starts
+
+    high = arrays["high"][rows]
+    low = arrays["low"][rows]
+    volume = arrays["volume"][rows]
+    ticks = arrays["tick_count"][rows]
+    # Суми накопичуються зліва направо (як у pure-Python), а не попарно як add.reduceat:
+    # інакше float volume розходився б в останньому знаку між шляхами.
+    volume_sum = volume[starts].copy()
+    for offset in range(1, int(lengths.max())):
+        active = np.flatnonzero(lengths > offset)
+        volume_sum[active] += volume[starts[active] + offset]
+
+    bucket_open = opens_b[bucket[starts]]
+    bucket_close = closes_b[bucket[starts]]
+    if minutes is None:
+        expected = (bucket_close - bucket_open + 1) // _MINUTE_MS
+        present = lengths
+    else:
+        expected = minutes.before_array(np, bucket_close + 1) - minutes.before_array(np, bucket_open)
+        present = np.add.reduceat(_open_mask(np, columns, minutes)[rows], starts)
+
+    result.open_time = bucket_open.tolist()
+    result.close_time = bucket_close.tolist()
+    result.open = arrays["open"][rows[starts]].tolist()
+    result.high = np.maximum.reduceat(high, starts).tolist()
+    result.low = np.minimum.reduceat(low, starts).tolist()
+    result.close = arrays["close"][rows[ends - 1]].tolist()
+    result.volume = volume_sum.tolist()
+    result.tick_count = np.add.reduceat(ticks, starts).tolist()
+    result.count = lengths.tolist()
+    result.expected = expected.tolist()
+    result.complete = ((expected > 0) & (present == expected)).tolist()
+
+
+def _open_mask(np: Any, columns: OhlcvColumns, minutes: _OpenMinutes) -> Any:
+    """1 для рядків у відкриту хвилину; кешується на колонках для тих самих інтервалів."""
+    arrays = columns.arrays(np)
+    key = (tuple(minutes.firsts), tuple(minutes.counts))
+    if arrays.get("open_mask_key") != key:
+        times = arrays["open_time_ms"]
+        arrays["open_mask"] = minutes.before_array(np, times + 1) - minutes.before_array(np, times)
+        arrays["open_mask_key"] = key
+    return arrays["open_mask"]
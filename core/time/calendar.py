@@ -130,6 +130,43 @@ class Calendar:
             return int(end_dt.astimezone(timezone.utc).timestamp() * 1000) - 1
         return ts_ms
 
+    def open_intervals_ms(
+        self,
+        start_ms: int,
+        end_ms: int,
+        symbol: Optional[str] = None,
+        fail_open: bool = True,
+    ) -> List[Tuple[int, int]]:
+        """Відкриті інтервали ринку [start, end] (включно) у межах [start_ms, end_ms].
+
+        При помилці календаря повертає весь діапазон (fail-open: краще зайвий запит,
+        ніж пропущені бари); fail_open=False → порожньо, як is_open().
+        """
+        if end_ms < start_ms:
+            return []
+        if self._init_error:
+            return [(int(start_ms), int(end_ms))] if fail_open else []
+        intervals: List[Tuple[int, int]] = []
+        t = int(start_ms)
+        while t <= end_ms:
+            if self.is_open(t, symbol=symbol):
+                pause_ms = int(self._calendar.next_trading_pause_ms(t))
+                if pause_ms <= t:
+                    intervals.append((t, int(end_ms)))
+                    break
+                seg_end = min(pause_ms - 1, int(end_ms))
+                if intervals and intervals[-1][1] + 1 >= t:
+                    intervals[-1] = (intervals[-1][0], seg_end)
+                else:
+                    intervals.append((t, seg_end))
+                t = pause_ms
+            else:
+                open_ms = int(self._calendar.next_trading_open_ms(t))
+                if open_ms <= t:
+                    break
+                t = open_ms
+        return intervals
+
     def explain(self, ts_ms: int, symbol: Optional[str] = None) -> List[str]:
         if self._init_error:
             return ["calendar_error"]
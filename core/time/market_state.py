@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from core.time.calendar import Calendar
+from core.time.sessions import _to_utc_iso
+
+
+@dataclass(frozen=True)
+class _MarketStateEntry:
+    valid_from_ms: int
+    valid_until_ms: int
+    is_open: bool
+    next_open_ms: int
+    next_pause_ms: int
+    state: Dict[str, object]
+
+
+@dataclass
+class MarketStateCache:
+    """Мемоізований market_state поверх Calendar SSOT.
+
+    Відповідь календаря змінюється лише на session transitions (open/pause),
+    тому результат кешується до найближчого transition і перераховується
+    один раз на перехід, а не на кожен виклик.
+    """
+
+    calendar: Calendar
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _entry: Optional[_MarketStateEntry] = field(default=None, init=False, repr=False)
+    hits_total: int = field(default=0, init=False)
+    misses_total: int = field(default=0, init=False)
+
+    def market_state(self, ts_ms: int, symbol: Optional[str] = None) -> Dict[str, object]:
+        entry = self._entry_for(int(ts_ms))
+        if entry is None:
+            return self.calendar.market_state(int(ts_ms), symbol=symbol)
+        return dict(entry.state)
+
+    def is_open(self, ts_ms: int, symbol: Optional[str] = None) -> bool:
+        entry = self._entry_for(int(ts_ms))
+        if entry is None:
+            return self.calendar.is_open(int(ts_ms), symbol=symbol)
+        return entry.is_open
+
+    def next_open_ms(self, ts_ms: int, symbol: Optional[str] = None) -> int:
+        entry = self._entry_for(int(ts_ms))
+        if entry is None:
+            return self.calendar.next_open_ms(int(ts_ms), symbol=symbol)
+        return entry.next_open_ms
+
+    def next_pause_ms(self, ts_ms: int, symbol: Optional[str] = None) -> int:
+        entry = self._entry_for(int(ts_ms))
+        if entry is None:
+            return self.calendar.next_pause_ms(int(ts_ms), symbol=symbol)
+        return entry.next_pause_ms
+
+    def next_transition_ms(self, ts_ms: int) -> int:
+        """Повертає ts наступного session transition (до нього кеш валідний)."""
+        entry = self._entry_for(int(ts_ms))
+        if entry is None:
+            return int(ts_ms)
+        return entry.valid_until_ms
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entry = None
+
+    def _entry_for(self, ts_ms: int) -> Optional[_MarketStateEntry]:
+        with self._lock:
+            entry = self._entry
+            if entry is not None and entry.valid_from_ms <= ts_ms < entry.valid_until_ms:
+                self.hits_total += 1
+                return entry
+            self.misses_total += 1
+            entry = self._compute(ts_ms)
+            self._entry = entry
+            return entry
+
+    def _compute(self, ts_ms: int) -> Optional[_MarketStateEntry]:
+        if self.calendar.health_error():
+            return None
+        is_open = bool(self.calendar.is_open(ts_ms))
+        next_open_ms = int(self.calendar.next_open_ms(ts_ms))
+        next_pause_ms = int(self.calendar.next_pause_ms(ts_ms))
+        transition_ms = next_pause_ms if is_open else next_open_ms
+        if transition_ms <= ts_ms:
+            return None
+        tc = self.calendar.tc
+        state: Dict[str, object] = {
+            "is_open": is_open,
+            "next_open_utc": _to_utc_iso(next_open_ms),
+            "next_pause_utc": _to_utc_iso(next_pause_ms),
+            "calendar_tag": tc.calendar_tag,
+            "tz_backend": tc.tz_backend,
+        }
+        return _MarketStateEntry(
+            valid_from_ms=ts_ms,
+            valid_until_ms=transition_ms,
+            is_open=is_open,
+            next_open_ms=next_open_ms,
+            next_pause_ms=next_pause_ms,
+            state=state,
+        )
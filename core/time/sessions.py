@@ -311,6 +311,9 @@ class TradingCalendar:
         if self._is_closed_interval(ts_ms):
             end_ms = self._closed_interval_end(ts_ms)
             if end_ms is not None:
+                # Closed interval (свято) може закінчуватись посеред звичайної сесії.
+                if self.is_trading_time(end_ms):
+                    return int(end_ms)
                 ts_ms = end_ms + 1
         dt_local = self._to_local(ts_ms)
         for day_offset in range(0, 8):
@@ -327,7 +330,7 @@ class TradingCalendar:
                 if self._is_closed_interval(candidate_ms):
                     end_ms = self._closed_interval_end(candidate_ms)
                     if end_ms is not None:
-                        return self.next_trading_open_ms(end_ms + 1)
+                        return self.next_trading_open_ms(end_ms - 1)
                 return candidate_ms
         return ts_ms
 
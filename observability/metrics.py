@@ -3,7 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional
 
-from prometheus_client import CollectorRegistry, Counter, Gauge, start_http_server
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
 
 
 @dataclass
@@ -14,6 +14,11 @@ class Metrics:
     commands_dropped_total: Counter
     commands_rate_limited_total: Counter
     commands_coalesced_total: Counter
+    command_heavy_queue_depth: Gauge
+    command_heavy_running: Gauge
+    command_heavy_wait_ms: Gauge
+    command_queue_wait_ms: Gauge
+    command_yields_total: Counter
     errors_total: Counter
     uptime_seconds: Gauge
     last_status_ts_ms: Gauge
@@ -37,6 +42,25 @@ class Metrics:
     fxcm_history_throttled_total: Counter
     fxcm_history_not_ready_total: Counter
     fxcm_history_backoff_active: Gauge
+    fxcm_history_logins_total: Counter
+    fxcm_history_session_reuse_total: Counter
+    fxcm_history_sessions_idle: Gauge
+    fxcm_history_requests_total: Counter
+    fxcm_history_chunk_minutes: Gauge
+    history_plan_minutes_total: Counter
+    history_ingest_writes_total: Counter
+    history_resumes_total: Counter
+    history_response_cache_requests_total: Counter
+    history_response_cache_saved_minutes_total: Counter
+    history_budget_wait_seconds: Histogram
+    history_pipeline_seconds_total: Counter
+    history_pipeline_items_total: Counter
+    tick_archive_ticks_total: Counter
+    tick_archive_lag_ms: Gauge
+    maintenance_symbol_seconds: Histogram
+    htf_derived_bars_total: Counter
+    ohlcv_preview_close_delay_seconds: Histogram
+    reconcile_scheduled_total: Counter
     ohlcv_preview_total: Counter
     ohlcv_preview_errors_total: Counter
     ohlcv_preview_batches_total: Counter
@@ -51,6 +75,8 @@ class Metrics:
     tail_guard_missing_total: Counter
     tail_guard_runs_total: Counter
     tail_guard_repairs_total: Counter
+    tail_guard_audited_bars_total: Counter
+    tail_guard_htf_mismatch_total: Counter
     republish_runs_total: Counter
     republish_skipped_total: Counter
     republish_forced_total: Counter
@@ -86,6 +112,34 @@ def create_metrics(registry: Optional[CollectorRegistry] = None) -> Metrics:
         ["reason"],
         registry=registry,
     )
+    command_heavy_queue_depth = Gauge(
+        "connector_command_heavy_queue_depth",
+        "Глибина черги heavy команд",
+        registry=registry,
+    )
+    command_heavy_running = Gauge(
+        "connector_command_heavy_running",
+        "Кількість heavy команд у виконанні",
+        registry=registry,
+    )
+    command_heavy_wait_ms = Gauge(
+        "connector_command_heavy_wait_ms",
+        "Час очікування heavy команди у черзі (ms)",
+        ["cmd"],
+        registry=registry,
+    )
+    command_queue_wait_ms = Gauge(
+        "connector_command_queue_wait_ms",
+        "Час очікування heavy команди у черзі по класу пріоритету (ms)",
+        ["priority"],
+        registry=registry,
+    )
+    command_yields_total = Counter(
+        "connector_command_yields_total",
+        "Кількість поступок довгої задачі командам вищого класу",
+        ["priority"],
+        registry=registry,
+    )
     errors_total = Counter(
         "connector_errors_total",
         "Кількість помилок",
@@ -206,6 +260,118 @@ def create_metrics(registry: Optional[CollectorRegistry] = None) -> Metrics:
         "Чи активний history backoff",
         registry=registry,
     )
+    fxcm_history_logins_total = Counter(
+        "connector_fxcm_history_logins_total",
+        "Кількість login history сесій FXCM",
+        registry=registry,
+    )
+    fxcm_history_session_reuse_total = Counter(
+        "connector_fxcm_history_session_reuse_total",
+        "Кількість повторних використань history сесії FXCM",
+        registry=registry,
+    )
+    fxcm_history_sessions_idle = Gauge(
+        "connector_fxcm_history_sessions_idle",
+        "Кількість idle history сесій FXCM у пулі",
+        registry=registry,
+    )
+    fxcm_history_requests_total = Counter(
+        "connector_fxcm_history_requests_total",
+        "Кількість history запитів FXCM за результатом чанку",
+        ["symbol", "outcome"],
+        registry=registry,
+    )
+    fxcm_history_chunk_minutes = Gauge(
+        "connector_fxcm_history_chunk_minutes",
+        "Поточний адаптивний розмір history чанку (хвилини)",
+        ["symbol"],
+        registry=registry,
+    )
+    history_plan_minutes_total = Counter(
+        "connector_history_plan_minutes_total",
+        "Хвилини history плану: fetch | cached | closed",
+        ["context", "kind"],
+        registry=registry,
+    )
+    history_ingest_writes_total = Counter(
+        "connector_history_ingest_writes_total",
+        "Записи FileCache з warmup/backfill ingest сесій",
+        ["context"],
+        registry=registry,
+    )
+    history_resumes_total = Counter(
+        "connector_history_resumes_total",
+        "Warmup/backfill, відновлені з checkpoint",
+        ["context"],
+        registry=registry,
+    )
+    history_response_cache_requests_total = Counter(
+        "connector_history_response_cache_requests_total",
+        "Запити history через локальний кеш: hit (запит до FXCM заощаджено) | partial | miss",
+        ["result"],
+        registry=registry,
+    )
+    history_response_cache_saved_minutes_total = Counter(
+        "connector_history_response_cache_saved_minutes_total",
+        "Хвилини history, віддані з локального кешу замість FXCM",
+        registry=registry,
+    )
+    history_budget_wait_seconds = Histogram(
+        "connector_history_budget_wait_seconds",
+        "Очікування допуску HistoryBudget за класом пріоритету",
+        ["priority"],
+        buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0),
+        registry=registry,
+    )
+    history_pipeline_seconds_total = Counter(
+        "connector_history_pipeline_seconds_total",
+        "Час стадій history конвеєра (fetch | normalize | persist): busy | idle",
+        ["context", "stage", "state"],
+        registry=registry,
+    )
+    history_pipeline_items_total = Counter(
+        "connector_history_pipeline_items_total",
+        "Чанки, оброблені стадією history конвеєра",
+        ["context", "stage"],
+        registry=registry,
+    )
+    tick_archive_ticks_total = Counter(
+        "connector_tick_archive_ticks_total",
+        "Тіки локального архіву: queued | written | dropped",
+        ["result"],
+        registry=registry,
+    )
+    tick_archive_lag_ms = Gauge(
+        "connector_tick_archive_lag_ms",
+        "Вік найстарішого тіку в черзі запису архіву (ms)",
+        registry=registry,
+    )
+    maintenance_symbol_seconds = Histogram(
+        "connector_maintenance_symbol_seconds",
+        "Тривалість maintenance job per symbol (tail_guard | reconcile | republish | warmup)",
+        ["job", "result"],
+        buckets=(0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+        registry=registry,
+    )
+    htf_derived_bars_total = Counter(
+        "connector_htf_derived_bars_total",
+        "HTF бакети інкрементальної деривації з final 1m: published | unchanged | incomplete",
+        ["tf", "result"],
+        registry=registry,
+    )
+    ohlcv_preview_close_delay_seconds = Histogram(
+        "connector_ohlcv_preview_close_delay_seconds",
+        "Затримка закриття preview бару таймером відносно close_time (з grace)",
+        ["tf"],
+        buckets=(0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0, 60.0),
+        registry=registry,
+    )
+    reconcile_scheduled_total = Counter(
+        "connector_reconcile_scheduled_total",
+        "In-process auto reconcile jobs (reconcile | prefetch) за результатом submit",
+        ["kind", "result"],
+        registry=registry,
+    )
     ohlcv_preview_total = Counter(
         "connector_ohlcv_preview_total",
         "Кількість preview OHLCV batch",
@@ -279,6 +445,18 @@ def create_metrics(registry: Optional[CollectorRegistry] = None) -> Metrics:
         ["tf"],
         registry=registry,
     )
+    tail_guard_audited_bars_total = Counter(
+        "connector_tail_guard_audited_bars_total",
+        "Кількість барів, перевірених tail_guard (mode=full|incremental)",
+        ["tf", "mode"],
+        registry=registry,
+    )
+    tail_guard_htf_mismatch_total = Counter(
+        "connector_tail_guard_htf_mismatch_total",
+        "Кількість HTF final бакетів, що не збігаються з агрегатом final 1m",
+        ["tf"],
+        registry=registry,
+    )
     republish_runs_total = Counter(
         "connector_republish_runs_total",
         "Кількість запусків republish",
@@ -331,6 +509,11 @@ def create_metrics(registry: Optional[CollectorRegistry] = None) -> Metrics:
         commands_dropped_total=commands_dropped_total,
         commands_rate_limited_total=commands_rate_limited_total,
         commands_coalesced_total=commands_coalesced_total,
+        command_heavy_queue_depth=command_heavy_queue_depth,
+        command_heavy_running=command_heavy_running,
+        command_heavy_wait_ms=command_heavy_wait_ms,
+        command_queue_wait_ms=command_queue_wait_ms,
+        command_yields_total=command_yields_total,
         errors_total=errors_total,
         uptime_seconds=uptime_seconds,
         last_status_ts_ms=last_status_ts_ms,
@@ -354,6 +537,25 @@ def create_metrics(registry: Optional[CollectorRegistry] = None) -> Metrics:
         fxcm_history_throttled_total=fxcm_history_throttled_total,
         fxcm_history_not_ready_total=fxcm_history_not_ready_total,
         fxcm_history_backoff_active=fxcm_history_backoff_active,
+        fxcm_history_logins_total=fxcm_history_logins_total,
+        fxcm_history_session_reuse_total=fxcm_history_session_reuse_total,
+        fxcm_history_sessions_idle=fxcm_history_sessions_idle,
+        fxcm_history_requests_total=fxcm_history_requests_total,
+        fxcm_history_chunk_minutes=fxcm_history_chunk_minutes,
+        history_plan_minutes_total=history_plan_minutes_total,
+        history_ingest_writes_total=history_ingest_writes_total,
+        history_resumes_total=history_resumes_total,
+        history_response_cache_requests_total=history_response_cache_requests_total,
+        history_response_cache_saved_minutes_total=history_response_cache_saved_minutes_total,
+        history_budget_wait_seconds=history_budget_wait_seconds,
+        history_pipeline_seconds_total=history_pipeline_seconds_total,
+        history_pipeline_items_total=history_pipeline_items_total,
+        tick_archive_ticks_total=tick_archive_ticks_total,
+        tick_archive_lag_ms=tick_archive_lag_ms,
+        maintenance_symbol_seconds=maintenance_symbol_seconds,
+        htf_derived_bars_total=htf_derived_bars_total,
+        ohlcv_preview_close_delay_seconds=ohlcv_preview_close_delay_seconds,
+        reconcile_scheduled_total=reconcile_scheduled_total,
         ohlcv_preview_total=ohlcv_preview_total,
         ohlcv_preview_errors_total=ohlcv_preview_errors_total,
         ohlcv_preview_batches_total=ohlcv_preview_batches_total,
@@ -368,6 +570,8 @@ def create_metrics(registry: Optional[CollectorRegistry] = None) -> Metrics:
         tail_guard_missing_total=tail_guard_missing_total,
         tail_guard_runs_total=tail_guard_runs_total,
         tail_guard_repairs_total=tail_guard_repairs_total,
+        tail_guard_audited_bars_total=tail_guard_audited_bars_total,
+        tail_guard_htf_mismatch_total=tail_guard_htf_mismatch_total,
         republish_runs_total=republish_runs_total,
         republish_skipped_total=republish_skipped_total,
         republish_forced_total=republish_forced_total,
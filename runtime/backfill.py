@@ -8,7 +8,10 @@ from config.config import Config
 from core.time.buckets import bucket_close_ms
 from observability.metrics import Metrics
 from runtime.fxcm.history_provider import FxcmForexConnectHistoryAdapter, FxcmHistoryProvider
-from runtime.history_provider import HistoryProvider, guard_history_ready
+from runtime.history_ingest import HistoryIngestJob
+from runtime.history_plan import build_history_fetch_plan, record_history_plan
+from runtime.history_provider import HistoryProvider, guard_history_ready, run_per_symbol, unwrap_history_provider
+from runtime.maintenance import MaintenanceExecutor
 from runtime.status import StatusManager
 from store.file_cache import FileCache
 
@@ -37,65 +40,94 @@ def run_backfill(
     publish_callback: Optional[Callable[[str], None]],
     rebuild_timeframes: Optional[List[str]] = None,
     rebuild_callback: Optional[Callable[[str, int, int, List[str]], None]] = None,
+    force: bool = False,
 ) -> None:
     log = logging.getLogger("backfill")
+    base_provider = unwrap_history_provider(provider)
     safe_end_ms = _resolve_history_end_ms(int(time.time() * 1000), status)
     end_ms = min(int(end_ms), int(safe_end_ms))
     end_ms = end_ms - (end_ms % 60_000) - 1
     if end_ms < start_ms:
         raise ValueError("end_ms має бути >= start_ms після календарного clamp")
-    chunk_ms = config.history_chunk_minutes * 60 * 1000
-    limit = config.history_chunk_limit
 
-    t = start_ms
-    if isinstance(provider, FxcmHistoryProvider) and isinstance(provider.adapter, FxcmForexConnectHistoryAdapter):
-        log.info("FXCM login component=history reason=backfill symbol=%s", symbol)
-    guard_history_ready(
-        provider=provider,
-        calendar=status.calendar,
-        status=status,
-        metrics=metrics,
-        symbol=str(symbol),
-        now_ms=int(time.time() * 1000),
-        context="backfill",
+    if isinstance(base_provider, FxcmHistoryProvider) and isinstance(
+        base_provider.adapter, FxcmForexConnectHistoryAdapter
+    ):
+        log.info("FXCM history session component=history reason=backfill symbol=%s", symbol)
+    session = file_cache.ingest_session(
+        symbol, "1m", source="history", max_buffer_bars=int(config.history_ingest_max_buffer_bars)
     )
-    while t <= end_ms:
-        end_chunk = min(t + chunk_ms - 1, end_ms)
-        if metrics is not None:
-            metrics.backfill_requests_total.inc()
-        bars = provider.fetch_1m_final(symbol, t, end_chunk, limit)
-        for bar in bars:
-            bar["ingest_ts_ms"] = int(time.time() * 1000)
-            bar["complete"] = True
-        file_cache.append_complete_bars(symbol=symbol, tf="1m", bars=bars, source="history")
-        if metrics is not None:
-            metrics.store_upserts_total.inc(len(bars))
-        rows, _meta = file_cache.load(symbol, "1m")
-        if rows:
-            first_open = int(rows[0]["open_time_ms"])
-            last_close = int(rows[-1]["close_time_ms"])
-            bars_total = len(rows)
-            coverage_days = int(max(0, last_close - first_open + 1) / (24 * 60 * 60 * 1000))
-            status.record_final_1m_coverage(
-                first_open_ms=first_open,
-                last_close_ms=last_close,
-                bars=int(bars_total),
-                coverage_days=int(coverage_days),
-                retention_target_days=int(config.retention_target_days),
+    with session:
+        # force=True → перезапит навіть тих хвилин, що вже є у FileCache (календар враховується завжди).
+        plan = build_history_fetch_plan(
+            start_ms,
+            end_ms,
+            status.calendar,
+            [] if force else session.cached_open_ms(),
+            symbol=str(symbol),
+        )
+        record_history_plan(metrics, plan, str(symbol), "backfill")
+        # Checkpoint продовжує лише повтор того самого діапазону, а не інший (force) backfill.
+        ingest = HistoryIngestJob(
+            config, status, metrics, session, plan, str(symbol), "backfill", start_ms, end_ms, exact_range=True
+        )
+        if plan.missing:
+            guard_history_ready(
+                provider=provider,
+                calendar=status.calendar,
+                status=status,
+                metrics=metrics,
+                symbol=str(symbol),
+                now_ms=int(time.time() * 1000),
+                context="backfill",
             )
-        if publish_callback is not None:
-            publish_callback(symbol)
-        t = end_chunk + 60_000
+        ingest.run(provider, publish_callback, metrics.backfill_requests_total if metrics is not None else None)
+    if publish_callback is not None:
+        publish_callback(symbol)
     span_days = max(1, int((end_ms - start_ms + 1) / (24 * 60 * 60 * 1000)))
-    rows, _meta = file_cache.load(symbol, "1m")
-    bars_total_est = len(rows)
-    last_close_ms = int(rows[-1]["close_time_ms"]) if rows else 0
+    coverage = session.coverage()
     status.record_final_publish(
-        last_complete_bar_ms=last_close_ms,
+        last_complete_bar_ms=coverage[1] if coverage else 0,
         now_ms=int(time.time() * 1000),
         lookback_days=span_days,
-        bars_total_est=bars_total_est,
+        bars_total_est=coverage[2] if coverage else 0,
     )
     if rebuild_callback is not None:
         tfs = rebuild_timeframes or ["15m", "1h", "4h", "1d"]
         rebuild_callback(symbol, start_ms, end_ms, tfs)
+
+
+def run_backfill_symbols(
+    config: Config,
+    file_cache: FileCache,
+    provider: HistoryProvider,
+    status: StatusManager,
+    metrics: Optional[Metrics],
+    symbols: List[str],
+    start_ms: int,
+    end_ms: int,
+    publish_callback: Optional[Callable[[str], None]],
+    force: bool = False,
+    rebuild_callback: Optional[Callable[[str, int, int, List[str]], None]] = None,
+    maintenance: Optional[MaintenanceExecutor] = None,
+) -> None:
+    """Backfill кількох символів паралельно (до history_max_inflight)."""
+
+    def _backfill_symbol(symbol: str) -> None:
+        run_backfill(
+            config=config,
+            file_cache=file_cache,
+            provider=provider,
+            status=status,
+            metrics=metrics,
+            symbol=symbol,
+            start_ms=start_ms,
+            end_ms=end_ms,
+            publish_callback=publish_callback,
+            rebuild_callback=rebuild_callback,
+            force=force,
+        )
+
+    run_per_symbol(
+        list(symbols), _backfill_symbol, int(config.history_max_inflight), maintenance=maintenance, job="backfill"
+    )
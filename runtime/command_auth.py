@@ -3,7 +3,9 @@ from __future__ import annotations
 import hmac
 import json
 import os
+import threading
 import time
+from collections import OrderedDict
 from hashlib import sha256
 from typing import Any, Dict, Optional, Tuple
 
@@ -46,6 +48,68 @@ def _resolve_secrets(config: Config) -> Tuple[Dict[str, str], Optional[str]]:
     return merged, default_kid
 
 
+class CommandAuthState:
+    """Кеш секретів + локальний LRU nonce для anti-replay.
+
+    Секрети резолвляться один раз (повторно — лише через reload() або при зміні
+    FXCM_HMAC_* у env). LRU відсікає очевидні replay без Redis round-trip;
+    Redis SET NX лишається cross-process авторитетом.
+    """
+
+    def __init__(self, nonce_cache_max: int = 4096) -> None:
+        self._lock = threading.Lock()
+        self._nonce_cache_max = max(0, int(nonce_cache_max))
+        self._nonces: OrderedDict[str, int] = OrderedDict()
+        self._secrets: Optional[Dict[str, str]] = None
+        self._default_kid: Optional[str] = None
+        self._profile = ""
+        self._env_fingerprint: Tuple[str, str] = ("", "")
+
+    def reload(self) -> None:
+        with self._lock:
+            self._secrets = None
+            self._default_kid = None
+
+    def secrets(self, config: Config) -> Tuple[Dict[str, str], Optional[str]]:
+        env_fingerprint = (
+            os.environ.get("FXCM_HMAC_SECRET", "").strip(),
+            os.environ.get("FXCM_HMAC_KID", "").strip(),
+        )
+        with self._lock:
+            if (
+                self._secrets is not None
+                and self._profile == config.profile
+                and self._env_fingerprint == env_fingerprint
+            ):
+                return self._secrets, self._default_kid
+        secrets, default_kid = _resolve_secrets(config)
+        with self._lock:
+            self._secrets = secrets
+            self._default_kid = default_kid
+            self._profile = config.profile
+            self._env_fingerprint = env_fingerprint
+        return secrets, default_kid
+
+    def nonce_seen(self, key: str, now_ms: int) -> bool:
+        with self._lock:
+            expires_ms = self._nonces.get(key)
+            if expires_ms is None:
+                return False
+            if expires_ms <= now_ms:
+                self._nonces.pop(key, None)
+                return False
+            return True
+
+    def remember_nonce(self, key: str, expires_ms: int) -> None:
+        if self._nonce_cache_max <= 0:
+            return
+        with self._lock:
+            self._nonces[key] = int(expires_ms)
+            self._nonces.move_to_end(key)
+            while len(self._nonces) > self._nonce_cache_max:
+                self._nonces.popitem(last=False)
+
+
 def _canonical_payload(payload: Dict[str, Any], kid: str, nonce: str) -> str:
     data = {
         "cmd": str(payload.get("cmd", "")),
@@ -62,6 +126,7 @@ def verify_command_auth(
     payload: Dict[str, Any],
     config: Config,
     redis_client: Optional[Any],
+    state: Optional[CommandAuthState] = None,
 ) -> Tuple[bool, str]:
     auth = payload.get("auth")
     if not isinstance(auth, dict):
@@ -86,7 +151,10 @@ def verify_command_auth(
     if max_skew >= 0 and abs(now_ms - ts_ms) > max_skew:
         return False, "auth_ts_skew"
 
-    secrets, _default = _resolve_secrets(config)
+    if state is not None:
+        secrets, _default = state.secrets(config)
+    else:
+        secrets, _default = _resolve_secrets(config)
     secret = secrets.get(kid, "")
     if not secret:
         return False, "auth_failed"
@@ -101,10 +169,14 @@ def verify_command_auth(
 
     key = f"{config.ns}:cmd_replay:{kid}:{nonce}"
     ttl_ms = int(config.command_auth_replay_ttl_ms)
+    if state is not None and state.nonce_seen(key, now_ms):
+        return False, "replay_rejected"
     try:
         ok = redis_client.set(key, "1", nx=True, px=ttl_ms)
     except Exception:
         return False, "auth_failed"
+    if state is not None:
+        state.remember_nonce(key, now_ms + ttl_ms)
     if not ok:
         return False, "replay_rejected"
     return True, "ok"
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
+import functools
 import json
 import logging
 import threading
 import time
-from typing import Any, Callable, Dict, Mapping, Optional, Set
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set
 
 from config.config import Config
 from core.validation.validator import ContractError, SchemaValidator
 from observability.metrics import Metrics
-from runtime.command_auth import verify_command_auth
+from runtime.command_auth import CommandAuthState, verify_command_auth
+from runtime.command_executor import HeavyCommandExecutor, HeavyJob
+from runtime.command_stream import CommandStreamTransport, StreamEntry
 from runtime.history_provider import ProviderNotConfiguredError
 from runtime.status import StatusManager
 
@@ -56,7 +59,8 @@ class CommandBus:
         self._metrics = metrics
         self._allowlist = allowlist or set()
         self._handlers = dict(handlers or {})
-        self._channel = self._config.ch_commands()
+        self._streams = self._config.command_transport == "streams"
+        self._channel = self._config.key_commands_stream() if self._streams else self._config.ch_commands()
         self._pubsub = None
         self._stop_event = threading.Event()
         self._thread: Optional[threading.Thread] = None
@@ -66,6 +70,19 @@ class CommandBus:
         self._heavy_inflight: Set[str] = set()
         self._heavy_pending: Dict[str, Dict[str, Any]] = {}
         self._heavy_cmds = set(self._config.command_heavy_cmds)
+        self._stream_transport: Optional[CommandStreamTransport] = None
+        self._stream_lock = threading.Lock()
+        self._stream_inflight: Set[str] = set()
+        self._auth_state = CommandAuthState(nonce_cache_max=int(self._config.command_auth_nonce_cache_max))
+        self._heavy_executor: Optional[HeavyCommandExecutor] = None
+        if int(self._config.command_heavy_workers) > 0:
+            self._heavy_executor = HeavyCommandExecutor(
+                workers=int(self._config.command_heavy_workers),
+                max_queue=int(self._config.command_heavy_queue_max),
+                run_job=self._run_heavy_job,
+                on_state=self._record_heavy_state,
+                metrics=self._metrics,
+            )
         if self._config.command_rate_limit_enable:
             self._raw_rate_bucket = TokenBucket(
                 rate_per_s=float(self._config.command_rate_limit_raw_per_s),
@@ -75,6 +92,8 @@ class CommandBus:
     def start(self) -> bool:
         try:
             self._stop_event.clear()
+            if self._heavy_executor is not None:
+                self._heavy_executor.start()
             self._thread = threading.Thread(target=self._run_loop, name="command_bus", daemon=True)
             self._thread.start()
         except Exception as exc:
@@ -96,12 +115,18 @@ class CommandBus:
         self._stop_event.set()
         if self._thread is not None:
             self._thread.join(timeout=2.0)
+        if self._heavy_executor is not None:
+            self._heavy_executor.stop(timeout_s=2.0)
         if self._pubsub is not None:
             try:
                 self._pubsub.close()
             except Exception:
                 pass
 
+    def reload_auth_secrets(self) -> None:
+        """Явний reload HMAC секретів (rotation без рестарту)."""
+        self._auth_state.reload()
+
     def _run_loop(self) -> None:
         if self._redis is None:
             self._status.append_error(
@@ -116,6 +141,9 @@ class CommandBus:
             )
             self._status.publish_snapshot()
             return
+        if self._streams:
+            self._run_stream_loop()
+            return
         try:
             pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
             pubsub.subscribe(self._channel)
@@ -178,6 +206,112 @@ class CommandBus:
                 except Exception:
                     pass
 
+    def _run_stream_loop(self) -> None:
+        transport = CommandStreamTransport(self._redis, self._config)
+        self._stream_transport = transport
+        try:
+            transport.ensure_group()
+        except Exception as exc:
+            self._status.append_error(
+                code="command_bus_error",
+                severity="error",
+                message=f"Не вдалося створити consumer group для {self._channel}: {exc}",
+            )
+            self._status.update_command_bus_error(
+                channel=self._channel,
+                code="command_bus_error",
+                message=f"XGROUP CREATE fail: {exc}",
+            )
+            self._status.publish_snapshot()
+            return
+
+        self._last_heartbeat_ts = time.time()
+        self._status.update_command_bus_heartbeat(self._channel)
+        self._status.publish_snapshot()
+
+        claim_period_s = max(1.0, int(self._config.command_stream_claim_idle_ms) / 1000.0)
+        last_claim_ts = 0.0
+        recovered = False
+        while not self._stop_event.is_set():
+            self._maybe_heartbeat()
+            try:
+                if not recovered:
+                    # Власні pending після рестарту: доробляємо до нових записів.
+                    entries = transport.read_own_pending()
+                    recovered = len(entries) < int(self._config.command_stream_batch)
+                elif time.monotonic() - last_claim_ts >= claim_period_s:
+                    last_claim_ts = time.monotonic()
+                    entries = transport.claim_stale()
+                else:
+                    entries = transport.read_new(block_ms=int(self._config.command_stream_block_ms))
+            except Exception as exc:
+                self._status.append_error(
+                    code="command_bus_error",
+                    severity="error",
+                    message=f"Помилка Redis Streams: {exc}",
+                )
+                self._status.update_command_bus_error(
+                    channel=self._channel,
+                    code="command_bus_error",
+                    message=f"Streams error: {exc}",
+                )
+                self._status.publish_snapshot()
+                time.sleep(0.5)
+                continue
+            self._drain_stream_entries(transport, entries)
+
+    def _drain_stream_entries(self, transport: CommandStreamTransport, entries: List[StreamEntry]) -> None:
+        """Обробляє batch і робить batched XACK.
+
+        Heavy записи, поставлені в executor, лишаються pending до завершення job
+        (ACK з on_done); записи, обробка яких впала, не ACK-аються (XAUTOCLAIM/recovery).
+        """
+        processed: List[str] = []
+        try:
+            for entry_id, data in entries:
+                if not data:
+                    processed.append(entry_id)
+                    continue
+                if self._stream_entry_inflight(entry_id):
+                    # Повторна доставка запису, чий heavy job ще виконується.
+                    continue
+                raw = data.decode("utf-8", errors="replace")
+                try:
+                    self.handle_raw_message(raw, raw_bytes_len=len(data), entry_id=entry_id)
+                except Exception as exc:
+                    self._status.append_error(
+                        code="command_bus_error",
+                        severity="error",
+                        message=f"Обробка запису {entry_id} впала, лишається pending: {exc}",
+                    )
+                    continue
+                if not self._stream_entry_inflight(entry_id):
+                    processed.append(entry_id)
+        finally:
+            self._ack_stream_entries(transport, processed)
+
+    def _stream_entry_inflight(self, entry_id: str) -> bool:
+        with self._stream_lock:
+            return entry_id in self._stream_inflight
+
+    def _finish_stream_entry(self, entry_id: str) -> None:
+        with self._stream_lock:
+            self._stream_inflight.discard(entry_id)
+        if self._stream_transport is not None:
+            self._ack_stream_entries(self._stream_transport, [entry_id])
+
+    def _ack_stream_entries(self, transport: CommandStreamTransport, entry_ids: List[str]) -> None:
+        if not entry_ids:
+            return
+        try:
+            transport.ack(entry_ids)
+        except Exception as exc:
+            self._status.append_error(
+                code="command_bus_error",
+                severity="error",
+                message=f"XACK fail: {exc}",
+            )
+
     def _maybe_heartbeat(self) -> None:
         now = time.time()
         period = max(1, int(self._config.command_bus_heartbeat_period_s))
@@ -210,7 +344,12 @@ class CommandBus:
             raw = str(data)
             self.handle_raw_message(raw)
 
-    def handle_raw_message(self, raw: str, raw_bytes_len: Optional[int] = None) -> None:
+    def handle_raw_message(
+        self,
+        raw: str,
+        raw_bytes_len: Optional[int] = None,
+        entry_id: Optional[str] = None,
+    ) -> None:
         if self._is_raw_rate_limited():
             self._append_public_error_coalesced(
                 code="rate_limited",
@@ -261,9 +400,9 @@ class CommandBus:
                 self._metrics.commands_dropped_total.labels(reason="invalid_json").inc()
             self._status.publish_snapshot()
             return
-        self.handle_payload(payload)
+        self.handle_payload(payload, entry_id=entry_id)
 
-    def handle_payload(self, payload: Dict[str, Any]) -> None:
+    def handle_payload(self, payload: Dict[str, Any], entry_id: Optional[str] = None) -> None:
         try:
             self._validator.validate_commands_v1(payload)
         except ContractError:
@@ -304,7 +443,7 @@ class CommandBus:
                     self._status.publish_snapshot()
                     return
             else:
-                ok, code = verify_command_auth(payload, self._config, self._redis)
+                ok, code = verify_command_auth(payload, self._config, self._redis, state=self._auth_state)
                 if not ok:
                     self._append_public_error_coalesced(
                         code=code,
@@ -357,6 +496,10 @@ class CommandBus:
                 self._metrics.commands_total.labels(cmd=cmd, state="error").inc()
             return
 
+        if self._heavy_executor is not None and cmd in self._heavy_cmds:
+            self._submit_heavy_command(payload, handler, entry_id=entry_id)
+            return
+
         if self._config.command_heavy_collapse_enable and cmd in self._heavy_cmds:
             self._handle_heavy_command(payload, handler, log)
             return
@@ -443,6 +586,83 @@ class CommandBus:
                 break
             current_payload = pending
 
+    def submit_internal(
+        self,
+        payload: Dict[str, Any],
+        handler: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> str:
+        """In-process job (напр. auto reconcile) без Redis round-trip.
+
+        Пропускає JSON/schema/auth/rate limit (payload формує сам runtime), але йде через
+        той самий heavy executor: пріоритет, серіалізація per symbol, collapse-to-latest.
+        Без executor → виконання у потоці викликача. Повертає queued | collapsed | rejected | done.
+        """
+        cmd = str(payload.get("cmd", "unknown"))
+        job_handler = handler or self._handlers.get(cmd)
+        if job_handler is None:
+            raise ValueError(f"невідомий internal job: {cmd}")
+        if self._heavy_executor is not None:
+            return self._submit_heavy_command(payload, job_handler)
+        self._execute_handler(payload, job_handler, logging.getLogger("command_bus"))
+        return "done"
+
+    def _submit_heavy_command(
+        self,
+        payload: Dict[str, Any],
+        handler: Callable[[Dict[str, Any]], None],
+        entry_id: Optional[str] = None,
+    ) -> str:
+        executor = self._heavy_executor
+        if executor is None:
+            return "rejected"
+        executor.start()
+        cmd = str(payload.get("cmd", "unknown"))
+        req_id = str(payload.get("req_id", "unknown"))
+        on_done: Optional[Callable[[], None]] = None
+        if entry_id is not None:
+            # Stream запис лишається pending, доки job не завершиться (crash → recovery).
+            with self._stream_lock:
+                self._stream_inflight.add(entry_id)
+            on_done = functools.partial(self._finish_stream_entry, entry_id)
+        result = executor.submit(payload, handler, on_done=on_done)
+        if result != "queued" and entry_id is not None:
+            # collapsed/rejected: запис більше не несе роботи → ACK одразу.
+            with self._stream_lock:
+                self._stream_inflight.discard(entry_id)
+        if result == "collapsed":
+            self._append_public_error_coalesced(
+                code="command_collapsed",
+                public_message=PUBLIC_MSG_LIMIT,
+                coalesce_key=f"command_collapsed:{cmd}",
+            )
+            if self._metrics is not None:
+                self._metrics.commands_dropped_total.labels(reason="heavy_collapsed").inc()
+            self._status.publish_snapshot()
+        elif result == "rejected":
+            self._append_public_error_coalesced(
+                code="command_queue_full",
+                public_message=PUBLIC_MSG_LIMIT,
+                coalesce_key=f"command_queue_full:{cmd}",
+            )
+            self._status.set_last_command_error(cmd, req_id, int(payload.get("ts", 0)))
+            if self._metrics is not None:
+                self._metrics.commands_dropped_total.labels(reason="heavy_queue_full").inc()
+                self._metrics.commands_total.labels(cmd=cmd, state="error").inc()
+            self._status.publish_snapshot()
+        return result
+
+    def _run_heavy_job(self, job: HeavyJob) -> None:
+        self._execute_handler(job.payload, job.handler, logging.getLogger("command_bus"))
+
+    def _record_heavy_state(self, state: Dict[str, Any]) -> None:
+        self._status.record_command_bus_heavy(
+            workers=int(state.get("workers", 0)),
+            queue_depth=int(state.get("queue_depth", 0)),
+            running=list(state.get("running", [])),
+            last_wait_ms=int(state.get("last_wait_ms", 0)),
+            max_wait_ms=int(state.get("max_wait_ms", 0)),
+        )
+
     def _append_public_error_coalesced(
         self,
         code: str,
@@ -477,6 +697,8 @@ class CommandBus:
             return False
         if self._config.command_heavy_collapse_enable and cmd in self._heavy_cmds and cmd in self._heavy_inflight:
             return False
+        if self._heavy_executor is not None and cmd in self._heavy_cmds and self._heavy_executor.is_busy(cmd):
+            return False
         bucket = self._cmd_rate_buckets.get(cmd)
         if bucket is None:
             bucket = TokenBucket(
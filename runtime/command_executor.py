@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterator, List, Optional
+
+from observability.metrics import Metrics
+
+log = logging.getLogger("command_bus")
+
+ALL_SYMBOLS = "*"
+
+# Класи пріоритету: менше → важливіше.
+PRIORITY_CLASSES = ("reconcile", "repair", "republish", "bulk")
+_CMD_PRIORITY_CLASS = {
+    "reconcile": "reconcile",
+    "fxcm_reconcile_tail": "reconcile",
+    "fxcm_reconcile_prefetch": "reconcile",
+    "tail_guard": "repair",
+    "fxcm_tail_guard": "repair",
+    "republish": "republish",
+    "fxcm_republish_tail": "republish",
+}
+
+_LOCAL = threading.local()
+
+
+def command_priority_class(cmd: str) -> str:
+    """reconcile > repair > republish > bulk (warmup/backfill/bootstrap)."""
+    return _CMD_PRIORITY_CLASS.get(str(cmd), "bulk")
+
+
+def current_priority_class() -> str:
+    """Клас пріоритету поточного потоку: явний priority_scope або heavy job executor; інакше bulk."""
+    explicit = getattr(_LOCAL, "priority_class", None)
+    if explicit:
+        return str(explicit)
+    stack = getattr(_LOCAL, "stack", None)
+    if stack:
+        return str(stack[-1].priority_class)
+    return PRIORITY_CLASSES[-1]
+
+
+@contextmanager
+def priority_scope(priority_class: str) -> Iterator[None]:
+    """Задає клас пріоритету для коду поза executor (напр. помічники MaintenanceExecutor)."""
+    previous = getattr(_LOCAL, "priority_class", None)
+    _LOCAL.priority_class = priority_class if priority_class in PRIORITY_CLASSES else PRIORITY_CLASSES[-1]
+    try:
+        yield
+    finally:
+        _LOCAL.priority_class = previous
+
+
+def cooperative_yield() -> None:
+    """Точка поступки між чанками довгих задач.
+
+    Якщо поточний потік виконує heavy job і у черзі чекає задача вищого класу,
+    вона виконується тут же (inline), після чого довга задача продовжується.
+    Поза executor — no-op.
+    """
+    executor = getattr(_LOCAL, "executor", None)
+    if executor is None:
+        return
+    executor.yield_point()
+
+
+def heavy_command_symbols(payload: Dict[str, Any]) -> FrozenSet[str]:
+    """Символи heavy-команди з args (порожньо → усі символи)."""
+    args = payload.get("args")
+    if not isinstance(args, dict):
+        return frozenset([ALL_SYMBOLS])
+    raw = args.get("symbols")
+    if raw is None:
+        raw = args.get("symbol")
+    if isinstance(raw, str):
+        raw = [raw]
+    if not isinstance(raw, list):
+        return frozenset([ALL_SYMBOLS])
+    symbols = {str(item) for item in raw if str(item)}
+    if not symbols:
+        return frozenset([ALL_SYMBOLS])
+    return frozenset(symbols)
+
+
+def heavy_command_key(payload: Dict[str, Any]) -> str:
+    """Ключ конкурентності heavy-команди: (cmd, symbol)."""
+    cmd = str(payload.get("cmd", "unknown"))
+    symbols = heavy_command_symbols(payload)
+    return f"{cmd}:{','.join(sorted(symbols))}"
+
+
+def _symbols_overlap(left: FrozenSet[str], right: FrozenSet[str]) -> bool:
+    if ALL_SYMBOLS in left or ALL_SYMBOLS in right:
+        return True
+    return bool(left & right)
+
+
+@dataclass
+class HeavyJob:
+    key: str
+    cmd: str
+    symbols: FrozenSet[str]
+    payload: Dict[str, Any]
+    handler: Callable[[Dict[str, Any]], None]
+    enqueued_mono: float
+    priority: int = len(PRIORITY_CLASSES) - 1
+    on_done: Optional[Callable[[], None]] = None
+
+    @property
+    def priority_class(self) -> str:
+        return PRIORITY_CLASSES[self.priority]
+
+
+class HeavyCommandExecutor:
+    """Bounded worker pool для heavy команд з collapse-to-latest по (cmd, symbol).
+
+    Задачі з однаковим ключем не виконуються паралельно; задачі, що торкаються
+    того самого символу, теж серіалізуються (FileCache SSOT per symbol).
+    Черга пріоритетна (PRIORITY_CLASSES), FIFO в межах класу; довгі задачі
+    поступаються вищим класам через cooperative_yield().
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int,
+        run_job: Callable[[HeavyJob], None],
+        on_state: Optional[Callable[[Dict[str, Any]], None]] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self._workers = max(1, int(workers))
+        self._max_queue = max(1, int(max_queue))
+        self._run_job = run_job
+        self._on_state = on_state
+        self._metrics = metrics
+        self._cond = threading.Condition(threading.Lock())
+        self._queue: Deque[str] = deque()
+        self._queued: Dict[str, HeavyJob] = {}
+        self._running: Dict[str, HeavyJob] = {}
+        self._pending: Dict[str, HeavyJob] = {}
+        self._threads: List[threading.Thread] = []
+        self._stop_event = threading.Event()
+        self._last_wait_ms = 0
+        self._max_wait_ms = 0
+
+    def start(self) -> None:
+        with self._cond:
+            if self._threads:
+                return
+            self._stop_event.clear()
+            for idx in range(self._workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"command_heavy_{idx}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+        self._emit_state()
+
+    def stop(self, timeout_s: float = 2.0) -> None:
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+            threads = list(self._threads)
+            self._threads = []
+        for thread in threads:
+            thread.join(timeout=timeout_s)
+
+    def submit(
+        self,
+        payload: Dict[str, Any],
+        handler: Callable[[Dict[str, Any]], None],
+        on_done: Optional[Callable[[], None]] = None,
+    ) -> str:
+        """Ставить задачу у чергу. Повертає queued | collapsed | rejected.
+
+        on_done викликається після завершення задачі (успіх або термінальна помилка)
+        лише для queued; при collapse новий payload успадковує on_done замінної задачі.
+        """
+        cmd = str(payload.get("cmd", "unknown"))
+        job = HeavyJob(
+            key=heavy_command_key(payload),
+            cmd=cmd,
+            symbols=heavy_command_symbols(payload),
+            payload=payload,
+            handler=handler,
+            enqueued_mono=time.monotonic(),
+            priority=PRIORITY_CLASSES.index(command_priority_class(cmd)),
+        )
+        with self._cond:
+            if job.key in self._running:
+                replaced = self._pending.get(job.key)
+                job.on_done = replaced.on_done if replaced is not None else None
+                self._pending[job.key] = job
+                result = "collapsed"
+            elif job.key in self._queued:
+                job.enqueued_mono = self._queued[job.key].enqueued_mono
+                job.on_done = self._queued[job.key].on_done
+                self._queued[job.key] = job
+                result = "collapsed"
+            elif len(self._queue) >= self._max_queue:
+                result = "rejected"
+            else:
+                job.on_done = on_done
+                self._queue.append(job.key)
+                self._queued[job.key] = job
+                result = "queued"
+                self._cond.notify()
+        self._emit_state()
+        return result
+
+    def is_busy(self, cmd: str) -> bool:
+        with self._cond:
+            for job in list(self._running.values()) + list(self._queued.values()):
+                if job.cmd == cmd:
+                    return True
+        return False
+
+    def state(self) -> Dict[str, Any]:
+        with self._cond:
+            return self._state_locked()
+
+    def _state_locked(self) -> Dict[str, Any]:
+        return {
+            "workers": int(self._workers),
+            "queue_depth": int(len(self._queue)),
+            "running": sorted(self._running.keys()),
+            "last_wait_ms": int(self._last_wait_ms),
+            "max_wait_ms": int(self._max_wait_ms),
+        }
+
+    def _emit_state(self) -> None:
+        state = self.state()
+        if self._metrics is not None:
+            self._metrics.command_heavy_queue_depth.set(int(state["queue_depth"]))
+            self._metrics.command_heavy_running.set(len(state["running"]))
+        if self._on_state is not None:
+            try:
+                self._on_state(state)
+            except Exception as exc:  # noqa: BLE001
+                log.debug("heavy executor state callback помилка: %s", exc)
+
+    def _take_runnable_locked(
+        self,
+        below_priority: Optional[int] = None,
+        paused: Optional[HeavyJob] = None,
+    ) -> Optional[HeavyJob]:
+        running_symbols = [job.symbols for job in self._running.values() if job is not paused]
+        best: Optional[HeavyJob] = None
+        for key in self._queue:
+            job = self._queued[key]
+            if below_priority is not None and job.priority >= below_priority:
+                continue
+            if best is not None and job.priority >= best.priority:
+                continue
+            if any(_symbols_overlap(job.symbols, symbols) for symbols in running_symbols):
+                continue
+            best = job
+        if best is None:
+            return None
+        self._queue.remove(best.key)
+        self._queued.pop(best.key, None)
+        self._running[best.key] = best
+        wait_ms = int(max(0.0, time.monotonic() - best.enqueued_mono) * 1000)
+        self._last_wait_ms = wait_ms
+        self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+        if self._metrics is not None:
+            self._metrics.command_heavy_wait_ms.labels(cmd=best.cmd).set(wait_ms)
+            self._metrics.command_queue_wait_ms.labels(priority=best.priority_class).set(wait_ms)
+        return best
+
+    def yield_point(self) -> None:
+        stack = getattr(_LOCAL, "stack", None)
+        if not stack:
+            return
+        current = stack[-1]
+        while not self._stop_event.is_set():
+            with self._cond:
+                job = self._take_runnable_locked(below_priority=current.priority, paused=current)
+            if job is None:
+                return
+            log.info(
+                "COMMAND yield cmd=%s class=%s -> cmd=%s class=%s",
+                current.cmd,
+                current.priority_class,
+                job.cmd,
+                job.priority_class,
+            )
+            if self._metrics is not None:
+                self._metrics.command_yields_total.labels(priority=current.priority_class).inc()
+            self._execute(job)
+
+    def _execute(self, job: HeavyJob) -> None:
+        self._emit_state()
+        stack = getattr(_LOCAL, "stack", None)
+        if stack is None:
+            stack = []
+            _LOCAL.stack = stack
+        stack.append(job)
+        _LOCAL.executor = self
+        try:
+            self._run_job(job)
+        except SystemExit as exc:
+            # provider_not_configured: помилку вже записано в status; падає лише ця задача, workers живі.
+            log.error("heavy команда завершилась SystemExit: cmd=%s err=%s", job.cmd, exc)
+        except Exception as exc:  # noqa: BLE001
+            log.exception("heavy команда впала поза handler: cmd=%s err=%s", job.cmd, exc)
+        finally:
+            stack.pop()
+            if not stack:
+                _LOCAL.executor = None
+            with self._cond:
+                self._running.pop(job.key, None)
+                pending = self._pending.pop(job.key, None)
+                if pending is not None:
+                    self._queue.appendleft(pending.key)
+                    self._queued[pending.key] = pending
+                self._cond.notify_all()
+            self._emit_state()
+            if job.on_done is not None:
+                try:
+                    job.on_done()
+                except Exception as exc:  # noqa: BLE001
+                    log.warning("heavy on_done помилка: cmd=%s err=%s", job.cmd, exc)
+
+    def _worker_loop(self) -> None:
+        while not self._stop_event.is_set():
+            with self._cond:
+                job = self._take_runnable_locked()
+                while job is None and not self._stop_event.is_set():
+                    self._cond.wait(timeout=1.0)
+                    job = self._take_runnable_locked()
+                if job is None:
+                    return
+            self._execute(job)
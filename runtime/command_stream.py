@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import os
+import socket
+from typing import Any, List, Optional, Sequence, Tuple
+
+from config.config import Config
+
+STREAM_FIELD = "payload"
+
+StreamEntry = Tuple[str, bytes]
+
+
+def _as_str(value: Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return str(value)
+
+
+def _as_bytes(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+def default_stream_consumer(config: Config) -> str:
+    if config.command_stream_consumer:
+        return str(config.command_stream_consumer)
+    try:
+        host = socket.gethostname() or "local"
+    except Exception:  # noqa: BLE001
+        host = f"pid{os.getpid()}"
+    return f"{host}:{config.ns}"
+
+
+def command_target(config: Config) -> str:
+    """Куди йдуть команди в активному транспорті: stream key (streams) або pubsub канал."""
+    if config.command_transport == "streams":
+        return config.key_commands_stream()
+    return config.ch_commands()
+
+
+def publish_command(redis_client: Any, config: Config, json_str: str) -> None:
+    """Публікує команду у транспорт command_bus (pubsub | streams)."""
+    if config.command_transport == "streams":
+        redis_client.xadd(
+            config.key_commands_stream(),
+            {STREAM_FIELD: json_str},
+            maxlen=int(config.command_stream_maxlen),
+            approximate=True,
+        )
+        return
+    redis_client.publish(config.ch_commands(), json_str)
+
+
+class CommandStreamTransport:
+    """Redis Streams транспорт команд: XREADGROUP (block) + batched XACK + recovery pending."""
+
+    def __init__(self, redis_client: Any, config: Config) -> None:
+        self._redis = redis_client
+        self._config = config
+        self.stream = config.key_commands_stream()
+        self.group = str(config.command_stream_group)
+        self.consumer = default_stream_consumer(config)
+        self._claim_cursor = "0-0"
+
+    def ensure_group(self) -> None:
+        try:
+            self._redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as exc:  # noqa: BLE001
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    def read_own_pending(self, count: Optional[int] = None) -> List[StreamEntry]:
+        """Повертає pending записи цього consumer (після рестарту з тим самим ім'ям)."""
+        return self._read("0", count=count, block_ms=None)
+
+    def read_new(self, count: Optional[int] = None, block_ms: Optional[int] = None) -> List[StreamEntry]:
+        return self._read(">", count=count, block_ms=block_ms)
+
+    def claim_stale(self, count: Optional[int] = None) -> List[StreamEntry]:
+        """XAUTOCLAIM записів інших consumer, що зависли довше claim_idle_ms."""
+        limit = int(count or self._config.command_stream_batch)
+        result = self._redis.xautoclaim(
+            self.stream,
+            self.group,
+            self.consumer,
+            min_idle_time=int(self._config.command_stream_claim_idle_ms),
+            start_id=self._claim_cursor,
+            count=limit,
+        )
+        if not result:
+            return []
+        next_cursor = _as_str(result[0])
+        self._claim_cursor = next_cursor if next_cursor else "0-0"
+        messages = result[1] if len(result) > 1 else []
+        return _entries_from_messages(messages)
+
+    def ack(self, entry_ids: Sequence[str]) -> int:
+        if not entry_ids:
+            return 0
+        return int(self._redis.xack(self.stream, self.group, *entry_ids) or 0)
+
+    def _read(self, last_id: str, count: Optional[int], block_ms: Optional[int]) -> List[StreamEntry]:
+        limit = int(count or self._config.command_stream_batch)
+        response = self._redis.xreadgroup(
+            self.group,
+            self.consumer,
+            {self.stream: last_id},
+            count=limit,
+            block=block_ms,
+        )
+        entries: List[StreamEntry] = []
+        for _stream, messages in response or []:
+            entries.extend(_entries_from_messages(messages))
+        return entries
+
+
+def _entries_from_messages(messages: Any) -> List[StreamEntry]:
+    entries: List[StreamEntry] = []
+    for item in messages or []:
+        if not item:
+            continue
+        entry_id = _as_str(item[0])
+        fields = item[1] if len(item) > 1 else None
+        if not isinstance(fields, dict):
+            # Запис видалений з stream (XAUTOCLAIM/XPENDING повертають None) — лише ACK.
+            entries.append((entry_id, b""))
+            continue
+        raw = fields.get(STREAM_FIELD)
+        if raw is None:
+            raw = fields.get(STREAM_FIELD.encode("utf-8"))
+        entries.append((entry_id, _as_bytes(raw) if raw is not None else b""))
+    return entries
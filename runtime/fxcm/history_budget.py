@@ -1,57 +1,165 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 import threading
 import time
 from dataclasses import dataclass, field
-from typing import Set
+from typing import Any, Callable, Iterator, List, Optional, Set
+
+from observability.metrics import Metrics
+from runtime.command_executor import PRIORITY_CLASSES, current_priority_class
+
+
+@dataclass
+class _Waiter:
+    symbol: str
+    priority: int
+    seq: int
+    enqueued_mono: float
+    granted: bool = False
+    on_grant: Optional[Callable[[], None]] = None
 
 
 @dataclass
 class HistoryBudget:
-    """Token bucket + global/per-symbol inflight для history (1m)."""
+    """Token bucket + global/per-symbol inflight для history (1m).
+
+    max_inflight обмежує кількість паралельних запитів (1 → строго послідовно);
+    на один символ одночасно допускається лише один запит.
+
+    Допуск — через чергу: вищий клас пріоритету (PRIORITY_CLASSES, напр. reconcile
+    раніше за warmup) іде першим, у межах класу FIFO. Очікувачі прокидаються
+    на release або рівно тоді, коли має з'явитися токен (без polling).
+    """
 
     capacity: int
     refill_per_sec: float
     tokens: float = 0.0
     last_refill: float = field(default_factory=time.time)
-    _global_inflight: bool = False
+    max_inflight: int = 1
+    metrics: Optional[Metrics] = None
     _inflight: Set[str] = field(default_factory=set)
+    _waiters: List[_Waiter] = field(default_factory=list)
+    _seq: Iterator[int] = field(default_factory=itertools.count, repr=False)
     _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
     _cond: threading.Condition = field(init=False, repr=False)
 
     def __post_init__(self) -> None:
         self._cond = threading.Condition(self._lock)
 
-    def acquire(self, symbol: str) -> bool:
-        waited = False
+    def acquire(self, symbol: str, priority_class: Optional[str] = None) -> bool:
+        """Блокує до допуску; повертає True, якщо довелося чекати.
+
+        priority_class=None → клас поточного потоку (heavy job / priority_scope).
+        """
+        with self._cond:
+            waiter = self._enqueue_locked(symbol, priority_class)
+            self._dispatch_locked()
+            waited = not waiter.granted
+            while not waiter.granted:
+                self._cond.wait(timeout=self._next_token_delay_locked())
+                if not waiter.granted:
+                    self._dispatch_locked()
+            return waited
+
+    async def acquire_async(self, symbol: str, priority_class: Optional[str] = None) -> bool:
+        """asyncio-варіант acquire: не блокує event loop; скасування знімає очікувача з черги."""
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[None]" = loop.create_future()
+
+        def _on_grant() -> None:
+            loop.call_soon_threadsafe(_resolve_future, future)
+
         with self._cond:
+            waiter = self._enqueue_locked(symbol, priority_class, on_grant=_on_grant)
+            self._dispatch_locked()
+            if waiter.granted:
+                return False
+        try:
             while True:
-                if self._global_inflight:
-                    waited = True
-                    self._cond.wait(timeout=0.05)
-                    continue
-                if symbol in self._inflight:
-                    waited = True
-                    self._cond.wait(timeout=0.05)
-                    continue
-                self._refill()
-                if self.tokens >= 1.0:
-                    self.tokens -= 1.0
-                    self._global_inflight = True
-                    self._inflight.add(symbol)
-                    return waited
-                waited = True
-                sleep_s = 0.1
-                if self.refill_per_sec > 0:
-                    sleep_s = max(0.01, (1.0 - self.tokens) / self.refill_per_sec)
-                self._cond.wait(timeout=sleep_s)
+                with self._cond:
+                    delay = self._next_token_delay_locked()
+                try:
+                    await asyncio.wait_for(asyncio.shield(future), timeout=delay)
+                    return True
+                except asyncio.TimeoutError:
+                    with self._cond:
+                        self._dispatch_locked()
+        except asyncio.CancelledError:
+            with self._cond:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                granted = waiter.granted
+            if granted:
+                self.release(symbol)
+            raise
 
     def release(self, symbol: str) -> None:
         with self._cond:
             self._inflight.discard(symbol)
-            self._global_inflight = False
+            self._dispatch_locked()
             self._cond.notify_all()
 
+    def inflight_count(self) -> int:
+        with self._cond:
+            return len(self._inflight)
+
+    def waiting_count(self) -> int:
+        with self._cond:
+            return len(self._waiters)
+
+    def _enqueue_locked(
+        self,
+        symbol: str,
+        priority_class: Optional[str],
+        on_grant: Optional[Callable[[], None]] = None,
+    ) -> _Waiter:
+        cls = priority_class or current_priority_class()
+        priority = PRIORITY_CLASSES.index(cls) if cls in PRIORITY_CLASSES else len(PRIORITY_CLASSES) - 1
+        waiter = _Waiter(
+            symbol=str(symbol),
+            priority=priority,
+            seq=next(self._seq),
+            enqueued_mono=time.monotonic(),
+            on_grant=on_grant,
+        )
+        self._waiters.append(waiter)
+        self._waiters.sort(key=lambda item: (item.priority, item.seq))
+        return waiter
+
+    def _dispatch_locked(self) -> None:
+        granted_any = False
+        while self._waiters and len(self._inflight) < max(1, int(self.max_inflight)):
+            waiter = next((item for item in self._waiters if item.symbol not in self._inflight), None)
+            if waiter is None:
+                break
+            self._refill()
+            if self.tokens < 1.0:
+                break
+            self.tokens -= 1.0
+            self._inflight.add(waiter.symbol)
+            self._waiters.remove(waiter)
+            waiter.granted = True
+            granted_any = True
+            if self.metrics is not None:
+                self.metrics.history_budget_wait_seconds.labels(priority=PRIORITY_CLASSES[waiter.priority]).observe(
+                    max(0.0, time.monotonic() - waiter.enqueued_mono)
+                )
+            if waiter.on_grant is not None:
+                waiter.on_grant()
+        if granted_any:
+            self._cond.notify_all()
+
+    def _next_token_delay_locked(self) -> Optional[float]:
+        """Скільки чекати до наступного токена; None → чекаємо release (токен уже є)."""
+        self._refill()
+        if self.tokens >= 1.0:
+            return None
+        if self.refill_per_sec <= 0:
+            return 0.1
+        return max(0.001, (1.0 - self.tokens) / self.refill_per_sec)
+
     def _refill(self) -> None:
         now = time.time()
         elapsed = max(0.0, now - self.last_refill)
@@ -59,7 +167,22 @@ class HistoryBudget:
         self.last_refill = now
 
 
-def build_history_budget(max_requests_per_minute: int) -> HistoryBudget:
+def _resolve_future(future: "asyncio.Future[Any]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def build_history_budget(
+    max_requests_per_minute: int,
+    max_inflight: int = 1,
+    metrics: Optional[Metrics] = None,
+) -> HistoryBudget:
     capacity = max(1, int(max_requests_per_minute))
     refill = float(max_requests_per_minute) / 60.0
-    return HistoryBudget(capacity=capacity, refill_per_sec=refill, tokens=capacity)
+    return HistoryBudget(
+        capacity=capacity,
+        refill_per_sec=refill,
+        tokens=capacity,
+        max_inflight=max(1, int(max_inflight)),
+        metrics=metrics,
+    )
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+from observability.metrics import Metrics
+from store.file_cache.cache_utils import atomic_write_json
+
+log = logging.getLogger("fxcm_history")
+
+OUTCOME_OK = "ok"
+OUTCOME_STEADY = "steady"
+OUTCOME_SLOW = "slow"
+OUTCOME_TRUNCATED = "truncated"
+OUTCOME_ERROR = "error"
+
+
+@dataclass
+class HistoryChunkPlanner:
+    """Адаптивний розмір history чанку (хвилини) per symbol.
+
+    Швидка і повна відповідь → чанк росте (x grow_factor), повільна/обрізана
+    відповідь або помилка → чанк зменшується вдвічі. Верхня межа — limit барів
+    (1 бар = 1 хвилина), нижня — min_minutes. Вивчений розмір зберігається у
+    state_path і переживає рестарт.
+    """
+
+    initial_minutes: int
+    min_minutes: int = 5
+    max_minutes: int = 1000
+    fast_ms: int = 2_000
+    slow_ms: int = 10_000
+    grow_factor: float = 1.5
+    state_path: Optional[Path] = None
+    metrics: Optional[Metrics] = None
+    _sizes: Dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self) -> None:
+        self.min_minutes = max(1, int(self.min_minutes))
+        self.max_minutes = max(self.min_minutes, int(self.max_minutes))
+        self.initial_minutes = self._clamp(int(self.initial_minutes), self.max_minutes)
+        self._load()
+
+    def chunk_minutes(self, symbol: str, limit: Optional[int] = None) -> int:
+        with self._lock:
+            size = self._sizes.get(symbol, self.initial_minutes)
+        return self._clamp(size, self._upper(limit))
+
+    def chunk_ms(self, symbol: str, limit: Optional[int] = None) -> int:
+        return int(self.chunk_minutes(symbol, limit)) * 60_000
+
+    def record(self, symbol: str, chunk_minutes: int, outcome: str, limit: Optional[int] = None) -> int:
+        """Фіксує результат запиту і повертає новий розмір чанку (хвилини)."""
+        upper = self._upper(limit)
+        target: Optional[int] = None
+        if outcome == OUTCOME_OK:
+            target = int(max(chunk_minutes + 1, chunk_minutes * float(self.grow_factor)))
+        elif outcome in (OUTCOME_SLOW, OUTCOME_TRUNCATED, OUTCOME_ERROR):
+            target = int(chunk_minutes // 2)
+        elif outcome != OUTCOME_STEADY:
+            raise ValueError(f"Невідомий outcome history чанку: {outcome}")
+        with self._lock:
+            current = self._sizes.get(symbol, self.initial_minutes)
+            if target is None:
+                size = self._clamp(current, upper)
+            elif outcome == OUTCOME_OK:
+                size = self._clamp(max(current, target), upper)
+            else:
+                size = self._clamp(min(current, target), upper)
+            changed = size != current
+            self._sizes[symbol] = size
+            snapshot = dict(self._sizes) if changed else None
+        if self.metrics is not None:
+            self.metrics.fxcm_history_requests_total.labels(symbol=symbol, outcome=outcome).inc()
+            self.metrics.fxcm_history_chunk_minutes.labels(symbol=symbol).set(size)
+        if snapshot is not None:
+            log.info("history chunk %s: %s → %s хв (%s)", symbol, current, size, outcome)
+            self._save(snapshot)
+        return size
+
+    def classify(self, elapsed_ms: int, truncated: bool) -> str:
+        if truncated:
+            return OUTCOME_TRUNCATED
+        if elapsed_ms >= int(self.slow_ms):
+            return OUTCOME_SLOW
+        if elapsed_ms <= int(self.fast_ms):
+            return OUTCOME_OK
+        return OUTCOME_STEADY
+
+    def _upper(self, limit: Optional[int]) -> int:
+        if limit is None or int(limit) <= 0:
+            return self.max_minutes
+        return max(self.min_minutes, min(self.max_minutes, int(limit)))
+
+    def _clamp(self, value: int, upper: int) -> int:
+        return max(self.min_minutes, min(int(upper), int(value)))
+
+    def _load(self) -> None:
+        if self.state_path is None or not self.state_path.exists():
+            return
+        try:
+            payload = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except Exception as exc:  # noqa: BLE001
+            log.warning("history chunk plan не прочитано: %s", exc)
+            return
+        sizes = payload.get("chunk_minutes") if isinstance(payload, dict) else None
+        if not isinstance(sizes, dict):
+            return
+        for symbol, value in sizes.items():
+            if isinstance(value, int) and not isinstance(value, bool):
+                self._sizes[str(symbol)] = self._clamp(value, self.max_minutes)
+
+    def _save(self, sizes: Dict[str, int]) -> None:
+        if self.state_path is None:
+            return
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(self.state_path, {"chunk_minutes": sizes})
+        except Exception as exc:  # noqa: BLE001
+            log.warning("history chunk plan не збережено: %s", exc)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import logging
+import threading
 import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
@@ -10,10 +12,58 @@ from core.time.timestamps import to_epoch_ms_utc
 from core.validation.validator import ContractError
 from observability.metrics import Metrics
 from runtime.fxcm.history_budget import HistoryBudget, build_history_budget
+from runtime.fxcm.history_chunk_planner import (
+    OUTCOME_ERROR,
+    OUTCOME_OK,
+    OUTCOME_STEADY,
+    HistoryChunkPlanner,
+)
+from runtime.fxcm.history_session_pool import ForexConnectSessionPool
 from runtime.fxcm_forexconnect import _try_import_forexconnect, denormalize_symbol
 from runtime.history_provider import HistoryProvider
 from runtime.status import StatusManager
 
+log = logging.getLogger("fxcm_history")
+
+
+_OPEN_TIME_KEYS = (
+    "open_time",
+    "time",
+    "timestamp",
+    "date",
+    "Date",
+    "DATE",
+    "datetime",
+    "DATETIME",
+    "DateTime",
+    "Datetime",
+    "open_time_utc",
+    "date_utc",
+    "open_time_ms",
+)
+_CLOSE_TIME_KEYS = ("close_time", "time_close", "close_time_utc")
+_OPEN_KEYS = ("open", "bidopen", "askopen", "BidOpen", "AskOpen")
+_HIGH_KEYS = ("high", "bidhigh", "askhigh", "BidHigh", "AskHigh")
+_LOW_KEYS = ("low", "bidlow", "asklow", "BidLow", "AskLow")
+_CLOSE_KEYS = ("close", "bidclose", "askclose", "BidClose", "AskClose")
+_VOLUME_KEYS = ("volume", "vol", "tick_volume", "Volume")
+
+_NUMPY_STATE: Dict[str, Any] = {}
+
+# Ознаки збою, спричиненого розміром запиту (timeout / завеликий payload).
+_CHUNK_SIZE_ERROR_MARKERS = ("timeout", "timed out", "too large", "too many", "payload")
+
+
+class HistoryChunkSizeError(ContractError):
+    """History чанк впав через розмір запиту (timeout/payload): можна повторити меншим чанком."""
+
+
+def _is_chunk_size_failure(exc: BaseException) -> bool:
+    if isinstance(exc, TimeoutError):
+        return True
+    text = str(exc).lower()
+    return any(marker in text for marker in _CHUNK_SIZE_ERROR_MARKERS)
+
 
 class FxcmHistoryAdapter:
     """Низькорівневий адаптер FXCM history (1m)."""
@@ -25,8 +75,16 @@ class FxcmHistoryAdapter:
 class FxcmForexConnectHistoryAdapter(FxcmHistoryAdapter):
     """FXCM ForexConnect history adapter (1m)."""
 
-    def __init__(self, config: Config) -> None:
+    def __init__(
+        self,
+        config: Config,
+        metrics: Optional[Metrics] = None,
+        session_pool: Optional[ForexConnectSessionPool] = None,
+    ) -> None:
         self._config = config
+        self._metrics = metrics
+        self._pool = session_pool
+        self._pool_lock = threading.Lock()
 
     def is_ready(self) -> Tuple[bool, str]:
         if self._config.fxcm_backend != "forexconnect":
@@ -38,50 +96,90 @@ class FxcmForexConnectHistoryAdapter(FxcmHistoryAdapter):
             return False, f"fxcm_sdk_missing: {err or 'unknown'}"
         return True, ""
 
+    def session_pool(self) -> ForexConnectSessionPool:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ForexConnectSessionPool(
+                    login=self._login,
+                    # Кожен паралельний символ (history_max_inflight) має власну сесію, інакше
+                    # слоти budget тримаються в черзі на одну сесію і блокують reconcile.
+                    max_sessions=max(
+                        int(self._config.history_session_pool_size), int(self._config.history_max_inflight)
+                    ),
+                    idle_timeout_s=float(self._config.history_session_idle_timeout_s),
+                    health_check_s=float(self._config.history_session_health_check_s),
+                    metrics=self._metrics,
+                )
+            return self._pool
+
+    def close(self) -> None:
+        with self._pool_lock:
+            pool = self._pool
+        if pool is not None:
+            pool.close()
+
     def fetch_1m(self, symbol: str, start_ms: int, end_ms: int, limit: int) -> List[Dict[str, Any]]:
         ready, reason = self.is_ready()
         if not ready:
             raise ContractError(reason or "fxcm_history_not_ready")
-        fx_class, err = _try_import_forexconnect()
-        if fx_class is None:
-            raise ContractError(f"fxcm_sdk_missing: {err or 'unknown'}")
-        fx = fx_class()
         instrument = denormalize_symbol(symbol)
         start_dt = datetime.fromtimestamp(start_ms / 1000.0, tz=timezone.utc)
         end_dt = datetime.fromtimestamp(end_ms / 1000.0, tz=timezone.utc)
+        pool = self.session_pool()
         try:
-            fx.login(
-                self._config.fxcm_username,
-                self._config.fxcm_password,
-                self._config.fxcm_host_url,
-                self._config.fxcm_connection,
-                "",
-                "",
-            )
-            history = fx.get_history(instrument, "m1", start_dt, end_dt)
-            if history is None:
-                rows = []
-            elif hasattr(history, "columns") and hasattr(history, "values"):
-                try:
-                    columns = [str(col) for col in list(history.columns)]
-                    rows = [dict(zip(columns, row)) for row in list(history.values)]
-                except Exception:
-                    rows = []
-            elif hasattr(history, "to_dict"):
-                try:
-                    rows = list(history.to_dict("records"))
-                except Exception:
-                    rows = list(history)
-            else:
-                rows = list(history)
-            return _rows_to_bars(symbol, rows, limit)
+            # Одна повторна спроба: якщо перевикористана сесія впала (обрив/таймаут),
+            # вона закривається і запит повторюється на свіжому login.
+            for attempt in range(2):
+                with pool.lease() as session:
+                    try:
+                        history = session.fx.get_history(instrument, "m1", start_dt, end_dt)
+                    except Exception as exc:  # noqa: BLE001
+                        pool.discard(session)
+                        if attempt == 0 and session.uses > 1:
+                            log.warning("FXCM history session впала, re-login: symbol=%s err=%s", symbol, exc)
+                            continue
+                        raise
+                return _history_to_bars(symbol, history, limit)
+        except ContractError:
+            raise
         except Exception as exc:  # noqa: BLE001
+            if _is_chunk_size_failure(exc):
+                raise HistoryChunkSizeError(f"fxcm history fetch failed: {exc}")
             raise ContractError(f"fxcm history fetch failed: {exc}")
-        finally:
-            try:
-                fx.logout()
-            except Exception:
-                pass
+        raise ContractError("fxcm history fetch failed: retries exhausted")
+
+    def _login(self) -> Any:
+        fx_class, err = _try_import_forexconnect()
+        if fx_class is None:
+            raise ContractError(f"fxcm_sdk_missing: {err or 'unknown'}")
+        fx = fx_class()
+        log.info("FXCM login component=history reason=session_pool")
+        fx.login(
+            self._config.fxcm_username,
+            self._config.fxcm_password,
+            self._config.fxcm_host_url,
+            self._config.fxcm_connection,
+            "",
+            "",
+        )
+        return fx
+
+
+def _history_rows(history: Any) -> List[Any]:
+    if history is None:
+        return []
+    if hasattr(history, "columns") and hasattr(history, "values"):
+        try:
+            columns = [str(col) for col in list(history.columns)]
+            return [dict(zip(columns, row)) for row in list(history.values)]
+        except Exception:
+            return []
+    if hasattr(history, "to_dict"):
+        try:
+            return list(history.to_dict("records"))
+        except Exception:
+            return list(history)
+    return list(history)
 
 
 def _row_value(row: Any, keys: Iterable[str]) -> Any:
@@ -264,30 +362,219 @@ def _to_ms(value: Any) -> Optional[int]:
         return None
 
 
+def _try_import_numpy() -> Optional[Any]:
+    """NumPy опційний: без нього колонки конвертуються pure-Python шляхом."""
+    if "module" not in _NUMPY_STATE:
+        try:
+            import numpy  # type: ignore[import]
+
+            _NUMPY_STATE["module"] = numpy
+        except Exception:  # noqa: BLE001
+            _NUMPY_STATE["module"] = None
+    return _NUMPY_STATE["module"]
+
+
+def _history_to_bars(symbol: str, history: Any, limit: int) -> List[Dict[str, Any]]:
+    columns = _history_columns(history)
+    if columns is not None:
+        bars = _columns_to_bars(symbol, columns[0], columns[1], limit)
+        if bars is not None:
+            return bars
+    return _rows_to_bars(symbol, _history_rows(history), limit)
+
+
+def _history_columns(history: Any) -> Optional[Tuple[Dict[str, Any], int]]:
+    """Колонки відповіді SDK без побудови рядків (structured array / DataFrame)."""
+    if history is None:
+        return None
+    names = getattr(getattr(history, "dtype", None), "names", None)
+    try:
+        if names:
+            return {str(name): history[name] for name in names}, len(history)
+        if hasattr(history, "columns") and hasattr(history, "values"):
+            labels = list(history.columns)
+            if len({str(label) for label in labels}) != len(labels):
+                return None
+            return {str(label): history[label].values for label in labels}, len(history)
+    except Exception:  # noqa: BLE001
+        return None
+    return None
+
+
+def _dict_rows_columns(rows: List[Any]) -> Optional[Tuple[Dict[str, Any], int]]:
+    if not rows or not isinstance(rows[0], dict):
+        return None
+    keys = rows[0].keys()
+    for row in rows:
+        if not isinstance(row, dict) or row.keys() != keys:
+            return None
+    names = list(keys)
+    columns = {str(name): [row[name] for row in rows] for name in names}
+    if len(columns) != len(names):
+        return None
+    return columns, len(rows)
+
+
+def _resolve_sources(names: List[str], keys: Iterable[str]) -> List[str]:
+    """Порядок колонок-кандидатів як у _row_value: точний ключ, далі case-insensitive."""
+    sources: List[str] = []
+    for key in keys:
+        if key in names and key not in sources:
+            sources.append(key)
+        key_lower = str(key).lower()
+        for name in names:
+            if name.lower() == key_lower:
+                if name not in sources:
+                    sources.append(name)
+                break
+    return sources
+
+
+def _merged_column(columns: Dict[str, Any], sources: List[str]) -> Optional[Any]:
+    """Перше не-None значення серед колонок-кандидатів (None → колонки нема)."""
+    if not sources:
+        return None
+    first = columns[sources[0]]
+    if len(sources) == 1:
+        return first
+    merged = list(first)
+    for name in sources[1:]:
+        if all(value is not None for value in merged):
+            break
+        other = columns[name]
+        merged = [other[idx] if value is None else value for idx, value in enumerate(merged)]
+    return merged
+
+
+def _ms_column(values: Any, np: Optional[Any]) -> Optional[List[int]]:
+    """Колонка часу → epoch ms (None → є значення, яке треба віддати построковому шляху)."""
+    kind = getattr(getattr(values, "dtype", None), "kind", "")
+    if np is not None and kind == "M":
+        if bool(np.isnat(values).any()):
+            return None
+        return [int(item) for item in values.astype("datetime64[ms]").astype("int64").tolist()]
+    if np is not None and kind in ("i", "u", "f"):
+        if kind == "f" and not bool(np.isfinite(values).all()):
+            return None
+        raw = values.astype("int64")
+        ms = np.where(
+            raw < 10**11,
+            raw * 1000,
+            np.where(
+                raw > 9_999_999_999_999_999, raw // 1_000_000, np.where(raw > 9_999_999_999_999, raw // 1_000, raw)
+            ),
+        )
+        return [int(item) for item in ms.tolist()]
+    result: List[int] = []
+    for value in list(values):
+        ms_value = _to_ms(value)
+        if ms_value is None:
+            return None
+        result.append(ms_value)
+    return result
+
+
+def _float_column(values: Any, np: Optional[Any]) -> List[Optional[float]]:
+    kind = getattr(getattr(values, "dtype", None), "kind", "")
+    if np is not None and kind in ("b", "i", "u", "f"):
+        return [float(item) for item in values.astype("float64").tolist()]
+    items = list(values)
+    if np is not None and all(value is not None for value in items):
+        return [float(item) for item in np.asarray(items, dtype="float64").tolist()]
+    return [float(value) if value is not None else None for value in items]
+
+
+def _columns_to_bars(symbol: str, columns: Dict[str, Any], size: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+    """Векторна нормалізація відповіді: мапа колонок один раз, конвертація цілими колонками.
+
+    Повертає None, якщо відповідь містить щось, що має пройти построковий шлях
+    (відсутня/невалідна дата, нечислові OHLC тощо) — тоді помилки та evidence
+    формує _rows_to_bars_per_row, як і раніше.
+    """
+    if size <= 0:
+        return []
+    np = _try_import_numpy()
+    names = list(columns.keys())
+    open_time_sources = _resolve_sources(names, _OPEN_TIME_KEYS)
+    if not open_time_sources:
+        return None
+    try:
+        if len(open_time_sources) == 1:
+            open_ms = _ms_column(columns[open_time_sources[0]], np)
+        else:
+            merged_time = _merged_column(columns, open_time_sources)
+            if merged_time is None or any(value is None for value in merged_time):
+                return None
+            open_ms = _ms_column(merged_time, None)
+        if open_ms is None:
+            return None
+        close_raw = _merged_column(columns, _resolve_sources(names, _CLOSE_TIME_KEYS))
+        close_ms: List[Optional[int]] = []
+        if close_raw is None:
+            close_ms = [None] * size
+        else:
+            for value in list(close_raw):
+                close_ms.append(_to_ms(value) if value is not None else None)
+        ohlc: List[List[Optional[float]]] = []
+        for keys in (_OPEN_KEYS, _HIGH_KEYS, _LOW_KEYS, _CLOSE_KEYS):
+            merged = _merged_column(columns, _resolve_sources(names, keys))
+            if merged is None:
+                return []
+            ohlc.append(_float_column(merged, np))
+        volume_raw = _merged_column(columns, _resolve_sources(names, _VOLUME_KEYS))
+        volume = _float_column(volume_raw, np) if volume_raw is not None else [None] * size
+    except (TypeError, ValueError, OverflowError):
+        return None
+    opens, highs, lows, closes = ohlc
+    bars: List[Dict[str, Any]] = []
+    for idx in range(size):
+        if len(bars) >= limit:
+            break
+        open_val, high_val, low_val, close_val = opens[idx], highs[idx], lows[idx], closes[idx]
+        if open_val is None or high_val is None or low_val is None or close_val is None:
+            continue
+        open_time_ms = open_ms[idx]
+        close_time_ms = close_ms[idx]
+        if close_time_ms is None:
+            close_time_ms = open_time_ms + 60_000 - 1
+        volume_val = volume[idx]
+        bars.append(
+            {
+                "symbol": symbol,
+                "open_time_ms": open_time_ms,
+                "close_time_ms": int(close_time_ms),
+                "open": open_val,
+                "high": high_val,
+                "low": low_val,
+                "close": close_val,
+                "volume": volume_val if volume_val is not None else 0.0,
+                "complete": 1,
+                "synthetic": 0,
+                "source": "history",
+                "event_ts_ms": int(close_time_ms),
+            }
+        )
+    return bars
+
+
 def _rows_to_bars(symbol: str, rows: Iterable[Any], limit: int) -> List[Dict[str, Any]]:
+    rows_list = rows if isinstance(rows, list) else list(rows)
+    columns = _dict_rows_columns(rows_list)
+    if columns is not None:
+        bars = _columns_to_bars(symbol, columns[0], columns[1], limit)
+        if bars is not None:
+            return bars
+    return _rows_to_bars_per_row(symbol, rows_list, limit)
+
+
+def _rows_to_bars_per_row(symbol: str, rows: Iterable[Any], limit: int) -> List[Dict[str, Any]]:
+    """Еталонний построковий шлях; він же формує evidence для помилок."""
     bars: List[Dict[str, Any]] = []
     for row in rows:
         row = _coerce_row_dict(row)
         if len(bars) >= limit:
             break
-        open_time_raw = _row_value(
-            row,
-            [
-                "open_time",
-                "time",
-                "timestamp",
-                "date",
-                "Date",
-                "DATE",
-                "datetime",
-                "DATETIME",
-                "DateTime",
-                "Datetime",
-                "open_time_utc",
-                "date_utc",
-                "open_time_ms",
-            ],
-        )
+        open_time_raw = _row_value(row, _OPEN_TIME_KEYS)
         if open_time_raw is None:
             row_keys = _row_keys(row)
             evidence = _row_evidence(row)
@@ -303,17 +590,17 @@ def _rows_to_bars(symbol: str, rows: Iterable[Any], limit: int) -> List[Dict[str
             raise ContractError(
                 "history_row_date_invalid: " f"value_type={type(open_time_raw).__name__} value_repr={value_repr}"
             )
-        close_time_raw = _row_value(row, ["close_time", "time_close", "close_time_utc"])
+        close_time_raw = _row_value(row, _CLOSE_TIME_KEYS)
         close_time_ms = _to_ms(close_time_raw) if close_time_raw is not None else None
         if close_time_ms is None:
             close_time_ms = int(open_time_ms) + 60_000 - 1
-        open_val = _row_value(row, ["open", "bidopen", "askopen", "BidOpen", "AskOpen"])
-        high_val = _row_value(row, ["high", "bidhigh", "askhigh", "BidHigh", "AskHigh"])
-        low_val = _row_value(row, ["low", "bidlow", "asklow", "BidLow", "AskLow"])
-        close_val = _row_value(row, ["close", "bidclose", "askclose", "BidClose", "AskClose"])
+        open_val = _row_value(row, _OPEN_KEYS)
+        high_val = _row_value(row, _HIGH_KEYS)
+        low_val = _row_value(row, _LOW_KEYS)
+        close_val = _row_value(row, _CLOSE_KEYS)
         if open_val is None or high_val is None or low_val is None or close_val is None:
             continue
-        volume = _row_value(row, ["volume", "vol", "tick_volume", "Volume"])
+        volume = _row_value(row, _VOLUME_KEYS)
         bar = {
             "symbol": symbol,
             "open_time_ms": int(open_time_ms),
@@ -348,10 +635,14 @@ class FxcmHistoryProvider(HistoryProvider):
     history_retry_after_ms: int = 0
     history_backoff_ms: int = 60_000
     history_backoff_max_ms: int = 15 * 60_000
+    chunk_planner: Optional[HistoryChunkPlanner] = None
+    chunk_error_retries: int = 2
 
     def fetch_1m_final(self, symbol: str, start_ms: int, end_ms: int, limit: int) -> List[Dict[str, Any]]:
         if end_ms < start_ms:
             raise ContractError("history range має бути коректним")
+        if self.chunk_planner is not None:
+            return self._fetch_adaptive(symbol, start_ms, end_ms, limit, self.chunk_planner)
         chunk_ms = max(60_000, int(self.chunk_minutes) * 60 * 1000)
         range_ms = end_ms - start_ms
         if range_ms > chunk_ms:
@@ -370,6 +661,53 @@ class FxcmHistoryProvider(HistoryProvider):
             t = chunk_end + 60_000
         return rows
 
+    def _fetch_adaptive(
+        self,
+        symbol: str,
+        start_ms: int,
+        end_ms: int,
+        limit: int,
+        planner: HistoryChunkPlanner,
+    ) -> List[Dict[str, Any]]:
+        if end_ms - start_ms > planner.chunk_ms(symbol, limit):
+            self._probe_first(symbol, start_ms, end_ms, limit)
+        rows: List[Dict[str, Any]] = []
+        t = start_ms
+        last_req_ms = 0
+        errors_left = max(0, int(self.chunk_error_retries))
+        while t <= end_ms:
+            chunk_minutes = planner.chunk_minutes(symbol, limit)
+            chunk_end = min(t + chunk_minutes * 60_000 - 1, end_ms)
+            if self.min_sleep_ms > 0 and last_req_ms > 0:
+                elapsed_ms = int(time.time() * 1000) - last_req_ms
+                if elapsed_ms < self.min_sleep_ms:
+                    time.sleep((self.min_sleep_ms - elapsed_ms) / 1000.0)
+            started = time.monotonic()
+            try:
+                bars = self._fetch_chunk(symbol, t, chunk_end, limit)
+            except HistoryChunkSizeError:
+                # Лише timeout/payload лікується меншим чанком; not-ready, SDK, auth — одразу вгору.
+                last_req_ms = int(time.time() * 1000)
+                planner.record(symbol, chunk_minutes, OUTCOME_ERROR, limit)
+                if errors_left <= 0 or chunk_minutes <= planner.min_minutes:
+                    raise
+                errors_left -= 1
+                continue
+            last_req_ms = int(time.time() * 1000)
+            elapsed_ms = int((time.monotonic() - started) * 1000)
+            errors_left = max(0, int(self.chunk_error_retries))
+            last_open_ms = max((int(bar["open_time_ms"]) for bar in bars), default=-1)
+            # Обрізана відповідь: досягнуто limit, а останній бар не дійшов до кінця чанку.
+            truncated = limit > 0 and len(bars) >= limit and 0 <= last_open_ms < chunk_end - 59_999
+            outcome = planner.classify(elapsed_ms, truncated)
+            if outcome == OUTCOME_OK and chunk_end < t + chunk_minutes * 60_000 - 1:
+                # Хвостовий неповний чанк нічого не каже про більший розмір.
+                outcome = OUTCOME_STEADY
+            planner.record(symbol, chunk_minutes, outcome, limit)
+            rows.extend(bars)
+            t = last_open_ms + 60_000 if truncated else chunk_end + 60_000
+        return rows
+
     def fetch_history(self, symbol: str, tf: str, start_ms: int, end_ms: int, limit: int) -> List[Dict[str, Any]]:
         if tf != "1m":
             raise ContractError("history TF дозволений лише 1m")
@@ -380,6 +718,12 @@ class FxcmHistoryProvider(HistoryProvider):
             return self.adapter.is_ready()
         return bool(self.history_ready), str(self.history_not_ready_reason or "")
 
+    def close(self) -> None:
+        """Закриває history сесії адаптера (logout)."""
+        close_fn = getattr(self.adapter, "close", None)
+        if callable(close_fn):
+            close_fn()
+
     def should_backoff(self, now_ms: int) -> bool:
         return int(now_ms) < int(self.history_retry_after_ms or 0)
 
@@ -421,14 +765,14 @@ class FxcmHistoryProvider(HistoryProvider):
                 self.status.append_error_throttled(
                     code="history_inflight_wait",
                     severity="warning",
-                    message="history запит очікує через single in-flight",
+                    message="history запит очікує через in-flight ліміт",
                     context={"symbol": symbol, "start_ms": start_ms, "end_ms": end_ms},
                     throttle_key=f"history_inflight_wait:{symbol}",
                     throttle_ms=60_000,
                     now_ms=int(time.time() * 1000),
                 )
             if self.metrics is not None:
-                self.metrics.fxcm_history_inflight.set(1)
+                self.metrics.fxcm_history_inflight.set(budget.inflight_count())
                 if waited:
                     self.metrics.fxcm_history_throttled_total.inc()
             return self.adapter.fetch_1m(symbol, start_ms, end_ms, limit)
@@ -459,7 +803,7 @@ class FxcmHistoryProvider(HistoryProvider):
         finally:
             budget.release(symbol)
             if self.metrics is not None:
-                self.metrics.fxcm_history_inflight.set(0)
+                self.metrics.fxcm_history_inflight.set(budget.inflight_count())
 
     def _append_error(
         self,
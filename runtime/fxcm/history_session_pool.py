@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional
+
+from observability.metrics import Metrics
+
+log = logging.getLogger("fxcm_history")
+
+
+@dataclass
+class HistorySession:
+    """Залогінена ForexConnect сесія для history запитів."""
+
+    fx: Any
+    created_mono: float
+    last_used_mono: float
+    last_check_mono: float
+    uses: int = 0
+    broken: bool = False
+
+
+class ForexConnectSessionPool:
+    """Пул залогінених history сесій ForexConnect.
+
+    Замість login/logout на кожен чанк сесія перевикористовується між запитами
+    (warmup/backfill/repair/reconcile). Idle сесії закриваються після idle_timeout_s
+    фоновим reaper (daemon, живе лише поки є idle сесії), навіть без нових lease;
+    перед видачею старої сесії виконується health check; зламана сесія
+    закривається, а наступний lease робить прозорий re-login.
+    """
+
+    def __init__(
+        self,
+        login: Callable[[], Any],
+        max_sessions: int = 1,
+        idle_timeout_s: float = 300.0,
+        health_check_s: float = 60.0,
+        metrics: Optional[Metrics] = None,
+        clock: Callable[[], float] = time.monotonic,
+        reap_interval_s: Optional[float] = None,
+    ) -> None:
+        self._login = login
+        self._max_sessions = max(1, int(max_sessions))
+        self._idle_timeout_s = max(0.0, float(idle_timeout_s))
+        self._health_check_s = max(0.0, float(health_check_s))
+        self._metrics = metrics
+        self._clock = clock
+        if reap_interval_s is None:
+            reap_interval_s = min(self._idle_timeout_s / 2.0, 30.0)
+        self._reap_interval_s = max(0.01, float(reap_interval_s))
+        self._reaper: Optional[threading.Thread] = None
+        self._reaper_stop = threading.Event()
+        self._cond = threading.Condition(threading.Lock())
+        self._idle: List[HistorySession] = []
+        self._leased = 0
+        self._closed = False
+        self.logins_total = 0
+        self.reuses_total = 0
+
+    @contextmanager
+    def lease(self) -> Iterator[HistorySession]:
+        """Видає сесію на час одного history запиту.
+
+        Якщо запит впав, код, що викликає, позначає сесію через discard(),
+        і вона не повертається у пул.
+        """
+        session = self._acquire()
+        try:
+            yield session
+        finally:
+            self._release(session)
+
+    def discard(self, session: HistorySession) -> None:
+        session.broken = True
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._reaper_stop.set()
+            idle = list(self._idle)
+            self._idle = []
+            self._cond.notify_all()
+        for session in idle:
+            self._logout(session)
+        self._set_idle_metric(0)
+
+    def idle_count(self) -> int:
+        with self._cond:
+            return len(self._idle)
+
+    def reap_idle(self) -> int:
+        """Закриває idle сесії, що простояли довше idle_timeout_s. Повертає кількість закритих."""
+        if self._idle_timeout_s <= 0:
+            return 0
+        now = self._clock()
+        with self._cond:
+            expired = [item for item in self._idle if now - item.last_used_mono > self._idle_timeout_s]
+            if not expired:
+                return 0
+            self._idle = [item for item in self._idle if all(item is not stale for stale in expired)]
+            idle_left = len(self._idle)
+        self._set_idle_metric(idle_left)
+        for stale in expired:
+            log.info("FXCM history session idle timeout: uses=%s", stale.uses)
+            self._logout(stale)
+        return len(expired)
+
+    def _ensure_reaper_locked(self) -> None:
+        if self._idle_timeout_s <= 0 or self._closed or self._reaper is not None:
+            return
+        self._reaper = threading.Thread(target=self._reap_loop, name="fxcm_history_session_reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        while not self._reaper_stop.wait(self._reap_interval_s):
+            self.reap_idle()
+            with self._cond:
+                if not self._idle or self._closed:
+                    self._reaper = None
+                    return
+        with self._cond:
+            self._reaper = None
+
+    def _acquire(self) -> HistorySession:
+        expired: List[HistorySession] = []
+        session: Optional[HistorySession] = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("history session pool закрито")
+                now = self._clock()
+                while self._idle:
+                    candidate = self._idle.pop()
+                    if self._idle_timeout_s > 0 and now - candidate.last_used_mono > self._idle_timeout_s:
+                        expired.append(candidate)
+                        continue
+                    session = candidate
+                    break
+                if session is not None or self._leased < self._max_sessions:
+                    self._leased += 1
+                    break
+                self._cond.wait(timeout=1.0)
+            idle_left = len(self._idle)
+        self._set_idle_metric(idle_left)
+        for stale in expired:
+            log.info("FXCM history session idle timeout: uses=%s", stale.uses)
+            self._logout(stale)
+        try:
+            if session is not None and not self._is_healthy(session):
+                log.warning("FXCM history session health check failed → re-login")
+                self._logout(session)
+                session = None
+            if session is None:
+                session = self._open()
+            else:
+                self.reuses_total += 1
+                if self._metrics is not None:
+                    self._metrics.fxcm_history_session_reuse_total.inc()
+        except Exception:
+            with self._cond:
+                self._leased -= 1
+                self._cond.notify()
+            raise
+        session.uses += 1
+        return session
+
+    def _release(self, session: HistorySession) -> None:
+        session.last_used_mono = self._clock()
+        drop = False
+        with self._cond:
+            self._leased -= 1
+            if session.broken or self._closed:
+                drop = True
+            else:
+                self._idle.append(session)
+                self._ensure_reaper_locked()
+            idle_left = len(self._idle)
+            self._cond.notify()
+        self._set_idle_metric(idle_left)
+        if drop:
+            self._logout(session)
+
+    def _open(self) -> HistorySession:
+        fx = self._login()
+        self.logins_total += 1
+        if self._metrics is not None:
+            self._metrics.fxcm_history_logins_total.inc()
+        now = self._clock()
+        return HistorySession(fx=fx, created_mono=now, last_used_mono=now, last_check_mono=now)
+
+    def _is_healthy(self, session: HistorySession) -> bool:
+        now = self._clock()
+        if now - session.last_check_mono < self._health_check_s:
+            return True
+        session.last_check_mono = now
+        return _fx_is_connected(session.fx)
+
+    def _logout(self, session: HistorySession) -> None:
+        try:
+            session.fx.logout()
+        except Exception as exc:  # noqa: BLE001
+            log.debug("FXCM history logout помилка: %s", exc)
+
+    def _set_idle_metric(self, value: int) -> None:
+        if self._metrics is not None:
+            self._metrics.fxcm_history_sessions_idle.set(int(value))
+
+
+def _fx_is_connected(fx: Any) -> bool:
+    """Best-effort health check сесії ForexConnect (без мережевого запиту)."""
+    is_connected = getattr(fx, "is_connected", None)
+    if callable(is_connected):
+        try:
+            return bool(is_connected())
+        except Exception:
+            return False
+    session = getattr(fx, "session", None)
+    if session is None:
+        return True
+    status_fn = getattr(session, "session_status", None)
+    try:
+        status = status_fn() if callable(status_fn) else status_fn
+    except Exception:
+        return False
+    if status is None:
+        return True
+    return "CONNECTED" in str(status).upper() and "DISCONNECTED" not in str(status).upper()
@@ -481,10 +481,17 @@ class FxcmForexConnectStream:
             next_retry_ts_ms=0,
         )
 
+    def _market(self) -> Any:
+        """Спільний MarketStateCache зі StatusManager (fallback: Calendar SSOT)."""
+        market_cache = getattr(self.status, "market_cache", None)
+        if market_cache is not None:
+            return market_cache
+        return self.status.calendar
+
     def _calendar_next_open_ms(self, now_ms: int) -> int:
         fallback_ms = int(now_ms + 60_000)
         try:
-            next_open_ms_raw = self.status.calendar.next_open_ms(now_ms)
+            next_open_ms_raw = self._market().next_open_ms(now_ms)
         except Exception as exc:  # noqa: BLE001
             self.status.append_error(
                 code="fxcm_calendar_next_open_invalid",
@@ -584,7 +591,7 @@ class FxcmForexConnectStream:
         )
         while not self._stop_event.is_set():
             now_ms = int(time.time() * 1000)
-            if not self.status.calendar.is_open(now_ms):
+            if not self._market().is_open(now_ms):
                 self.status.clear_degraded("fxcm_stale_no_ticks")
                 next_open_ms = self._calendar_next_open_ms(now_ms)
                 reconnect_attempt += 1
@@ -696,6 +703,7 @@ class FxcmForexConnectStream:
                 self.status.publish_snapshot()
                 log.info("FXCM login успішний component=stream reason=%s", login_reason)
                 last_tick_ts_ms = 0
+                market = self._market()
 
                 class _LiveAdapter(FxcmAdapter):
                     def __init__(self, subscription: FXCMOfferSubscription, status: StatusManager) -> None:
@@ -710,7 +718,7 @@ class FxcmForexConnectStream:
                         return True
 
                     def is_market_open(self, now_ms: int) -> bool:
-                        return self._status.calendar.is_open(now_ms)
+                        return bool(market.is_open(now_ms))
 
                 session: Optional[FxcmSessionManager] = None
 
@@ -782,7 +790,7 @@ class FxcmForexConnectStream:
 
                 while not self._stop_event.is_set():
                     now_ms = int(time.time() * 1000)
-                    if not self.status.calendar.is_open(now_ms):
+                    if not self._market().is_open(now_ms):
                         self.status.clear_degraded("fxcm_stale_no_ticks")
                         next_open_ms = self._calendar_next_open_ms(now_ms)
                         retry_ms = max(next_open_ms, int(now_ms + 1000))
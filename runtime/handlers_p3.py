@@ -7,8 +7,9 @@ from dateutil import parser as dateutil_parser, tz as dateutil_tz
 
 from config.config import Config
 from observability.metrics import Metrics
-from runtime.backfill import run_backfill
+from runtime.backfill import run_backfill_symbols
 from runtime.history_provider import HistoryProvider
+from runtime.maintenance import MaintenanceExecutor
 from runtime.status import StatusManager
 from runtime.warmup import run_warmup
 from store.file_cache import FileCache
@@ -30,6 +31,7 @@ def handle_warmup_command(
     metrics: Optional[Metrics],
     publish_tail: Callable[[str, int], None],
     rebuild_callback: Optional[Callable[[str, int, int, List[str]], None]] = None,
+    maintenance: Optional[MaintenanceExecutor] = None,
 ) -> None:
     args = payload.get("args", {}) if isinstance(payload, dict) else {}
     symbols = args.get("symbols", ["XAUUSD"])
@@ -53,6 +55,8 @@ def handle_warmup_command(
         symbols=symbols,
         lookback_days=lookback_days,
         publish_callback=(lambda sym: publish_tail(sym, window_hours)) if publish else None,
+        rebuild_callback=rebuild_callback,
+        maintenance=maintenance,
     )
 
 
@@ -65,10 +69,15 @@ def handle_backfill_command(
     metrics: Optional[Metrics],
     publish_tail: Callable[[str, int], None],
     rebuild_callback: Optional[Callable[[str, int, int, List[str]], None]] = None,
+    maintenance: Optional[MaintenanceExecutor] = None,
 ) -> None:
     args = payload.get("args", {}) if isinstance(payload, dict) else {}
-    symbol = str(args.get("symbol", ""))
-    if not symbol:
+    symbols = args.get("symbols")
+    if symbols is None:
+        symbols = [str(args.get("symbol", ""))]
+    if isinstance(symbols, str):
+        symbols = [symbols]
+    if not isinstance(symbols, list) or not symbols or not all(str(item) for item in symbols):
         raise ValueError("symbol є обов'язковим")
     start_ms = int(args.get("start_ms", 0))
     end_ms = int(args.get("end_ms", 0))
@@ -82,16 +91,17 @@ def handle_backfill_command(
         raise ValueError("start_ms/end_ms мають бути коректними")
     publish = bool(args.get("publish", True))
     window_hours = int(args.get("window_hours", 24))
-    run_backfill(
+    run_backfill_symbols(
         config=config,
         file_cache=file_cache,
         provider=provider,
         status=status,
         metrics=metrics,
-        symbol=symbol,
+        symbols=[str(item) for item in symbols],
         start_ms=start_ms,
         end_ms=end_ms,
         publish_callback=(lambda sym: publish_tail(sym, window_hours)) if publish else None,
-        rebuild_timeframes=None,
-        rebuild_callback=None,
+        force=bool(args.get("force", False)),
+        rebuild_callback=rebuild_callback,
+        maintenance=maintenance,
     )
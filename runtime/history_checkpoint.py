@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from store.file_cache.cache_utils import atomic_write_json
+
+log = logging.getLogger("history_checkpoint")
+
+# Один файл на процес: warmup і backfill можуть писати його з різних потоків.
+_FILE_LOCK = threading.Lock()
+
+
+@dataclass
+class HistoryCheckpoint:
+    """Прогрес history job (symbol, job): done_until_ms — кінець останнього чанку, вже записаного у FileCache."""
+
+    symbol: str
+    job: str
+    start_ms: int
+    end_ms: int
+    done_until_ms: int = 0
+    bars: int = 0
+    completed: bool = False
+    updated_ms: int = 0
+
+
+class HistoryCheckpointStore:
+    """JSON checkpoints warmup/backfill: {"jobs": {"SYMBOL:job": {...}}}.
+
+    Кожне збереження перечитує файл і оновлює лише свій ключ, тож кілька
+    store (warmup і backfill) не затирають checkpoints одне одного.
+    """
+
+    def __init__(self, path: Optional[Path]) -> None:
+        self.path = path
+
+    def get(self, symbol: str, job: str) -> Optional[HistoryCheckpoint]:
+        with _FILE_LOCK:
+            raw = self._read().get(_key(symbol, job))
+        if not isinstance(raw, dict):
+            return None
+        try:
+            return HistoryCheckpoint(
+                symbol=str(raw["symbol"]),
+                job=str(raw["job"]),
+                start_ms=int(raw["start_ms"]),
+                end_ms=int(raw["end_ms"]),
+                done_until_ms=int(raw.get("done_until_ms", 0)),
+                bars=int(raw.get("bars", 0)),
+                completed=bool(raw.get("completed", False)),
+                updated_ms=int(raw.get("updated_ms", 0)),
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            log.warning("history checkpoint %s пошкоджений: %s", _key(symbol, job), exc)
+            return None
+
+    def resume_point(
+        self,
+        symbol: str,
+        job: str,
+        start_ms: int,
+        end_ms: int,
+        now_ms: int,
+        ttl_ms: int,
+        exact_range: bool = False,
+    ) -> Optional[HistoryCheckpoint]:
+        """Незавершений і не прострочений checkpoint, що перекриває [start_ms, end_ms]; інакше None.
+
+        exact_range=True (backfill) — лише повтор тієї самої команди: інший діапазон не
+        успадковує done_until_ms чужого запуску. Warmup (ковзне вікно) — перекриття.
+        """
+        checkpoint = self.get(symbol, job)
+        if checkpoint is None or checkpoint.completed:
+            return None
+        if ttl_ms > 0 and int(now_ms) - checkpoint.updated_ms > int(ttl_ms):
+            return None
+        if exact_range and (checkpoint.start_ms != int(start_ms) or checkpoint.end_ms != int(end_ms)):
+            return None
+        if checkpoint.start_ms > int(end_ms):
+            return None
+        if checkpoint.done_until_ms < int(start_ms) or checkpoint.done_until_ms < checkpoint.start_ms:
+            return None
+        return checkpoint
+
+    def save(self, checkpoint: HistoryCheckpoint) -> None:
+        if self.path is None:
+            return
+        checkpoint.updated_ms = int(time.time() * 1000)
+        with _FILE_LOCK:
+            jobs = self._read()
+            jobs[_key(checkpoint.symbol, checkpoint.job)] = asdict(checkpoint)
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                atomic_write_json(self.path, {"jobs": jobs})
+            except Exception as exc:  # noqa: BLE001
+                log.warning("history checkpoint не збережено: %s", exc)
+
+    def _read(self) -> Dict[str, Any]:
+        if self.path is None or not self.path.exists():
+            return {}
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception as exc:  # noqa: BLE001
+            log.warning("history checkpoints не прочитано: %s", exc)
+            return {}
+        jobs = payload.get("jobs") if isinstance(payload, dict) else None
+        return dict(jobs) if isinstance(jobs, dict) else {}
+
+
+class HistoryJobProgress:
+    """Прогрес job для status: percent / ETA / bars per second.
+
+    Відсоток рахується від хвилин плану поточного запуску разом із хвилинами,
+    пропущеними через checkpoint; ETA і швидкість — лише по поточному запуску.
+    """
+
+    def __init__(self, symbol: str, job: str, total_minutes: int, skipped_minutes: int = 0) -> None:
+        self.symbol = str(symbol)
+        self.job = str(job)
+        self.total_minutes = max(0, int(total_minutes))
+        self.skipped_minutes = max(0, int(skipped_minutes))
+        self.fetched_minutes = 0
+        self.bars = 0
+        self.started_mono = time.monotonic()
+
+    def advance(self, remaining_minutes: int, bars: int) -> None:
+        done = self.total_minutes - self.skipped_minutes - max(0, int(remaining_minutes))
+        self.fetched_minutes = max(0, done)
+        self.bars += max(0, int(bars))
+
+    def snapshot(self, state: str, done_until_ms: int) -> Dict[str, Any]:
+        elapsed_s = max(1e-3, time.monotonic() - self.started_mono)
+        done = self.skipped_minutes + self.fetched_minutes
+        remaining = max(0, self.total_minutes - done)
+        percent = 100.0 if self.total_minutes <= 0 else min(100.0, done * 100.0 / self.total_minutes)
+        eta_s = 0.0
+        if remaining > 0 and self.fetched_minutes > 0:
+            eta_s = remaining * elapsed_s / self.fetched_minutes
+        return {
+            "job": self.job,
+            "symbol": self.symbol,
+            "state": str(state),
+            "percent": round(percent, 2),
+            "eta_s": round(eta_s, 1),
+            "bars": int(self.bars),
+            "bars_per_s": round(self.bars / elapsed_s, 2),
+            "done_until_ms": int(done_until_ms),
+            "resumed": self.skipped_minutes > 0,
+            "updated_ts_ms": int(time.time() * 1000),
+        }
+
+
+def _key(symbol: str, job: str) -> str:
+    return f"{symbol}:{job}"
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.config import Config
+from observability.metrics import Metrics
+from runtime.command_executor import cooperative_yield
+from runtime.history_checkpoint import HistoryCheckpoint, HistoryCheckpointStore, HistoryJobProgress
+from runtime.history_pipeline import HistoryFetchPipeline
+from runtime.history_plan import HistoryFetchPlan, record_ingest_coverage
+from runtime.history_provider import HistoryProvider, planned_chunk_ms
+from runtime.status import StatusManager
+from store.file_cache import FileCacheIngestSession
+
+log = logging.getLogger("history_ingest")
+
+
+class HistoryIngestJob:
+    """Виконання HistoryFetchPlan для (symbol, job) з checkpoint/resume і прогресом у status.
+
+    Конструктор застосовує checkpoint попереднього незавершеного запуску (прибирає
+    вже записані хвилини з плану). Checkpoint зберігається лише після flush сесії,
+    тож він ніколи не випереджає дані у FileCache; merge у FileCache idempotent (keep last).
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        status: StatusManager,
+        metrics: Optional[Metrics],
+        session: FileCacheIngestSession,
+        plan: HistoryFetchPlan,
+        symbol: str,
+        job: str,
+        start_ms: int,
+        end_ms: int,
+        exact_range: bool = False,
+    ) -> None:
+        self.config = config
+        self.status = status
+        self.metrics = metrics
+        self.session = session
+        self.plan = plan
+        self.symbol = str(symbol)
+        self.job = str(job)
+        self.store = HistoryCheckpointStore(
+            session.cache.root / str(config.history_checkpoint_file) if config.history_checkpoint_file else None
+        )
+        total_minutes = plan.missing_minutes
+        resume = self.store.resume_point(
+            self.symbol,
+            self.job,
+            start_ms=int(start_ms),
+            end_ms=int(end_ms),
+            now_ms=int(time.time() * 1000),
+            ttl_ms=int(config.history_checkpoint_ttl_s) * 1000,
+            exact_range=exact_range,
+        )
+        skipped = 0
+        if resume is not None:
+            skipped = plan.skip_range(max(int(start_ms), resume.start_ms), resume.done_until_ms)
+            log.info(
+                "history resume %s symbol=%s done_until_ms=%s skipped_min=%s",
+                self.job,
+                self.symbol,
+                resume.done_until_ms,
+                skipped,
+            )
+            if metrics is not None:
+                metrics.history_resumes_total.labels(context=self.job).inc()
+        self.checkpoint = HistoryCheckpoint(
+            symbol=self.symbol,
+            job=self.job,
+            start_ms=resume.start_ms if resume is not None else int(start_ms),
+            end_ms=int(end_ms),
+            done_until_ms=resume.done_until_ms if resume is not None else 0,
+            bars=resume.bars if resume is not None else 0,
+        )
+        self.progress = HistoryJobProgress(self.symbol, self.job, total_minutes, skipped_minutes=skipped)
+        self._bars_saved = 0
+
+    def run(
+        self,
+        provider: HistoryProvider,
+        publish_callback: Optional[Callable[[str], None]],
+        request_counter: Optional[Any] = None,
+    ) -> None:
+        """Fetch (конвеєр, history_pipeline_depth чанків наперед) → session.add; періодично flush + checkpoint."""
+        chunk_ms = int(self.config.history_chunk_minutes) * 60 * 1000
+        limit = int(self.config.history_chunk_limit)
+        checkpoint_interval_s = float(self.config.history_checkpoint_interval_s)
+        publish_interval_s = float(self.config.history_ingest_publish_interval_s)
+        last_checkpoint_mono = last_publish_mono = time.monotonic()
+        done_until_ms = self.checkpoint.done_until_ms
+        completed = False
+        remaining_after: Dict[Tuple[int, int], int] = {}
+
+        def _next_request() -> Optional[Tuple[int, int]]:
+            request = self.plan.next_request(planned_chunk_ms(provider, self.symbol, chunk_ms, limit))
+            if request is not None:
+                remaining_after[request] = self.plan.missing_minutes
+                if request_counter is not None:
+                    request_counter.inc()
+            return request
+
+        def _fetch(start_ms: int, end_ms: int) -> List[Dict[str, Any]]:
+            return provider.fetch_1m_final(self.symbol, start_ms, end_ms, limit)
+
+        pipeline = HistoryFetchPipeline(
+            _next_request,
+            _fetch,
+            depth=int(self.config.history_pipeline_depth),
+            context=self.job,
+            metrics=self.metrics,
+        )
+        self._record_progress("running", done_until_ms)
+        try:
+            cooperative_yield()
+            for request, bars in pipeline:
+                with pipeline.stage("normalize"):
+                    for bar in bars:
+                        bar["ingest_ts_ms"] = int(time.time() * 1000)
+                        bar["complete"] = True
+                    self.session.add(bars)
+                    done_until_ms = int(request[1])
+                    self.progress.advance(remaining_after.pop(request, 0), len(bars))
+                    if self.metrics is not None:
+                        self.metrics.store_upserts_total.inc(len(bars))
+                    record_ingest_coverage(self.status, self.session, int(self.config.retention_target_days))
+                now_mono = time.monotonic()
+                checkpoint_due = checkpoint_interval_s > 0 and now_mono - last_checkpoint_mono >= checkpoint_interval_s
+                # Проміжний publish (з записом у FileCache) — не частіше за publish_interval_s.
+                publish_due = (
+                    publish_callback is not None
+                    and publish_interval_s > 0
+                    and now_mono - last_publish_mono >= publish_interval_s
+                )
+                if checkpoint_due or publish_due:
+                    with pipeline.stage("persist"):
+                        self.session.flush()
+                        self._save_checkpoint(done_until_ms, completed=False)
+                    self._record_progress("running", done_until_ms)
+                    last_checkpoint_mono = now_mono
+                if publish_due and publish_callback is not None:
+                    publish_callback(self.symbol)
+                    last_publish_mono = now_mono
+                cooperative_yield()
+            completed = True
+        finally:
+            pipeline.close()
+            # flush до checkpoint: якщо запис у FileCache впав, checkpoint не просувається.
+            with pipeline.stage("persist"):
+                self.session.flush()
+            self._save_checkpoint(done_until_ms, completed=completed)
+            self._record_progress("done" if completed else "failed", done_until_ms)
+            if self.metrics is not None:
+                self.metrics.history_ingest_writes_total.labels(context=self.job).inc(self.session.flushes)
+
+    def _save_checkpoint(self, done_until_ms: int, completed: bool) -> None:
+        self.checkpoint.done_until_ms = max(self.checkpoint.done_until_ms, int(done_until_ms))
+        self.checkpoint.bars += self.progress.bars - self._bars_saved
+        self._bars_saved = self.progress.bars
+        self.checkpoint.completed = bool(completed)
+        self.store.save(self.checkpoint)
+
+    def _record_progress(self, state: str, done_until_ms: int) -> None:
+        self.status.record_history_progress(self.progress.snapshot(state, done_until_ms))
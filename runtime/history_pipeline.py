@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from observability.metrics import Metrics
+from runtime.command_executor import current_priority_class, priority_scope
+
+log = logging.getLogger("history_pipeline")
+
+Request = Tuple[int, int]
+Bars = List[Dict[str, Any]]
+
+_DONE = object()
+
+
+class HistoryFetchPipeline:
+    """Конвеєр history: fetch у фоновому потоці → bounded queue → normalize/persist у викликачі.
+
+    Поки викликач нормалізує і пише чанк N, чанк N+1 уже в польоті (до depth чанків
+    наперед). HistoryBudget не обходиться: fetch викликає той самий provider, а клас
+    пріоритету потоку-викликача передається у фоновий потік. depth <= 0 → послідовно
+    в поточному потоці (як раніше).
+
+    Метрики: connector_history_pipeline_seconds_total{context,stage,state=busy|idle}
+    і connector_history_pipeline_items_total{context,stage}.
+    """
+
+    def __init__(
+        self,
+        next_request: Callable[[], Optional[Request]],
+        fetch: Callable[[int, int], Bars],
+        depth: int,
+        context: str,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self._next_request = next_request
+        self._fetch = fetch
+        self.depth = max(0, int(depth))
+        self.context = str(context)
+        self.metrics = metrics
+        self._stop = threading.Event()
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, self.depth))
+        self._thread: Optional[threading.Thread] = None
+
+    def __iter__(self) -> Iterator[Tuple[Request, Bars]]:
+        if self.depth <= 0:
+            yield from self._iter_sequential()
+            return
+        priority_class = current_priority_class()
+        self._thread = threading.Thread(
+            target=self._producer,
+            args=(priority_class,),
+            name=f"history_fetch_{self.context}",
+            daemon=True,
+        )
+        self._thread.start()
+        try:
+            while True:
+                started = time.monotonic()
+                item = self._queue.get()
+                self._observe("normalize", "idle", time.monotonic() - started)
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            self.close()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Облік busy часу стадії викликача (normalize / persist)."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._observe(name, "busy", time.monotonic() - started)
+            self._count(name)
+
+    def close(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is None:
+            return
+        # Звільняємо місце в черзі, щоб producer не завис на put().
+        while thread.is_alive():
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            thread.join(timeout=0.05)
+        self._thread = None
+
+    def _iter_sequential(self) -> Iterator[Tuple[Request, Bars]]:
+        while True:
+            request = self._next_request()
+            if request is None:
+                return
+            yield request, self._timed_fetch(request)
+
+    def _producer(self, priority_class: str) -> None:
+        with priority_scope(priority_class):
+            try:
+                while not self._stop.is_set():
+                    request = self._next_request()
+                    if request is None:
+                        break
+                    item: Any = (request, self._timed_fetch(request))
+                    if not self._put(item):
+                        return
+            except BaseException as exc:  # noqa: BLE001
+                self._put(exc)
+                return
+            self._put(_DONE)
+
+    def _put(self, item: Any) -> bool:
+        started = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self._observe("fetch", "idle", time.monotonic() - started)
+
+    def _timed_fetch(self, request: Request) -> Bars:
+        started = time.monotonic()
+        try:
+            return self._fetch(request[0], request[1])
+        finally:
+            self._observe("fetch", "busy", time.monotonic() - started)
+            self._count("fetch")
+
+    def _observe(self, stage: str, state: str, seconds: float) -> None:
+        if self.metrics is None or seconds <= 0:
+            return
+        self.metrics.history_pipeline_seconds_total.labels(context=self.context, stage=stage, state=state).inc(seconds)
+
+    def _count(self, stage: str) -> None:
+        if self.metrics is None:
+            return
+        self.metrics.history_pipeline_items_total.labels(context=self.context, stage=stage).inc()
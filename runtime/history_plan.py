@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+from core.time.calendar import Calendar
+from observability.metrics import Metrics
+from runtime.status import StatusManager
+from store.file_cache import FileCacheIngestSession
+
+log = logging.getLogger("history_plan")
+
+_MINUTE_MS = 60_000
+
+
+@dataclass
+class HistoryFetchPlan:
+    """План history запитів: лише відкриті хвилини, яких немає у FileCache.
+
+    missing — діапазони open_time хвилин [first_open, last_open] (включно).
+    """
+
+    first_open_ms: int
+    last_open_ms: int
+    total_minutes: int = 0
+    closed_minutes: int = 0
+    cached_minutes: int = 0
+    missing: List[Tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def missing_minutes(self) -> int:
+        return sum(int((last - first) // _MINUTE_MS) + 1 for first, last in self.missing)
+
+    def skip_range(self, first_ms: int, last_ms: int) -> int:
+        """Прибирає з missing хвилини [first_ms, last_ms] (resume з checkpoint); повертає кількість хвилин."""
+        before = self.missing_minutes
+        first = int(first_ms) + (-int(first_ms)) % _MINUTE_MS
+        last = int(last_ms) - int(last_ms) % _MINUTE_MS
+        if last < first:
+            return 0
+        self.missing = _subtract_cached(self.missing, [(first, last)])
+        return before - self.missing_minutes
+
+    def next_request(self, chunk_ms: int) -> Optional[Tuple[int, int]]:
+        """Наступний запит (start_ms, end_ms) розміром <= chunk_ms.
+
+        Дрібні сусідні діапазони об'єднуються в один запит, якщо вміщуються у chunk;
+        закриті періоди між ними не додають запитів.
+        """
+        if not self.missing:
+            return None
+        chunk_minutes = max(1, int(chunk_ms) // _MINUTE_MS)
+        req_start, first_last = self.missing[0]
+        max_last = req_start + (chunk_minutes - 1) * _MINUTE_MS
+        if first_last > max_last:
+            self.missing[0] = (max_last + _MINUTE_MS, first_last)
+            return req_start, max_last + _MINUTE_MS - 1
+        self.missing.pop(0)
+        req_last = first_last
+        while self.missing and self.missing[0][1] <= max_last:
+            req_last = self.missing.pop(0)[1]
+        return req_start, req_last + _MINUTE_MS - 1
+
+
+def build_history_fetch_plan(
+    start_ms: int,
+    end_ms: int,
+    calendar: Optional[Calendar],
+    cached_open_ms: Iterable[int],
+    symbol: Optional[str] = None,
+) -> HistoryFetchPlan:
+    """Diff [start_ms, end_ms] проти відкритих інтервалів календаря і покриття FileCache."""
+    first = int(start_ms) - int(start_ms) % _MINUTE_MS
+    last = int(end_ms) - int(end_ms) % _MINUTE_MS
+    plan = HistoryFetchPlan(first_open_ms=first, last_open_ms=last)
+    if last < first:
+        return plan
+    plan.total_minutes = int((last - first) // _MINUTE_MS) + 1
+    if calendar is None:
+        open_ranges = [(first, last)]
+    else:
+        open_ranges = []
+        for open_start, open_end in calendar.open_intervals_ms(first, last + _MINUTE_MS - 1, symbol=symbol):
+            range_first = open_start + (-open_start) % _MINUTE_MS
+            range_last = min(last, open_end - open_end % _MINUTE_MS)
+            if range_last >= range_first:
+                open_ranges.append((range_first, range_last))
+    open_minutes = sum(int((b - a) // _MINUTE_MS) + 1 for a, b in open_ranges)
+    plan.closed_minutes = plan.total_minutes - open_minutes
+    plan.missing = _subtract_cached(open_ranges, _cached_runs(cached_open_ms, first, last))
+    plan.cached_minutes = open_minutes - plan.missing_minutes
+    return plan
+
+
+def record_history_plan(metrics: Optional[Metrics], plan: HistoryFetchPlan, symbol: str, context: str) -> None:
+    log.info(
+        "history plan %s symbol=%s total_min=%s closed_min=%s cached_min=%s fetch_min=%s ranges=%s",
+        context,
+        symbol,
+        plan.total_minutes,
+        plan.closed_minutes,
+        plan.cached_minutes,
+        plan.missing_minutes,
+        len(plan.missing),
+    )
+    if metrics is None:
+        return
+    metrics.history_plan_minutes_total.labels(context=context, kind="fetch").inc(plan.missing_minutes)
+    metrics.history_plan_minutes_total.labels(context=context, kind="cached").inc(plan.cached_minutes)
+    metrics.history_plan_minutes_total.labels(context=context, kind="closed").inc(plan.closed_minutes)
+
+
+def record_ingest_coverage(status: StatusManager, session: FileCacheIngestSession, retention_target_days: int) -> None:
+    """Покриття final 1m у status з ingest сесії (без перечитування CSV)."""
+    coverage = session.coverage()
+    if coverage is None:
+        return
+    first_open, last_close, bars_total = coverage
+    coverage_days = int(max(0, last_close - first_open + 1) / (24 * 60 * 60 * 1000))
+    status.record_final_1m_coverage(
+        first_open_ms=first_open,
+        last_close_ms=last_close,
+        bars=int(bars_total),
+        coverage_days=int(coverage_days),
+        retention_target_days=int(retention_target_days),
+    )
+
+
+def _cached_runs(cached_open_ms: Iterable[int], first: int, last: int) -> List[Tuple[int, int]]:
+    runs: List[Tuple[int, int]] = []
+    for value in sorted({int(item) for item in cached_open_ms}):
+        if value < first or value > last or value % _MINUTE_MS:
+            continue
+        if runs and runs[-1][1] + _MINUTE_MS == value:
+            runs[-1] = (runs[-1][0], value)
+        else:
+            runs.append((value, value))
+    return runs
+
+
+def _subtract_cached(ranges: List[Tuple[int, int]], cached: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    missing: List[Tuple[int, int]] = []
+    idx = 0
+    for range_first, range_last in ranges:
+        cursor = range_first
+        while idx < len(cached) and cached[idx][1] < cursor:
+            idx += 1
+        probe = idx
+        while probe < len(cached) and cached[probe][0] <= range_last:
+            cached_first, cached_last = cached[probe]
+            if cached_first > cursor:
+                missing.append((cursor, cached_first - _MINUTE_MS))
+            cursor = max(cursor, cached_last + _MINUTE_MS)
+            probe += 1
+        if cursor <= range_last:
+            missing.append((cursor, range_last))
+    return missing
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from typing_extensions import Protocol
 
 from core.time.calendar import Calendar
 from observability.metrics import Metrics
+from runtime.maintenance import MaintenanceExecutor
 from runtime.status import StatusManager
 
 
@@ -36,6 +37,30 @@ class HistoryNotReadyError(RuntimeError):
     """History not ready (loud)."""
 
 
+def _market_for(calendar: Calendar, status: StatusManager) -> Any:
+    market_cache = getattr(status, "market_cache", None)
+    if market_cache is not None and market_cache.calendar is calendar:
+        return market_cache
+    return calendar
+
+
+def unwrap_history_provider(provider: HistoryProvider) -> HistoryProvider:
+    """Базовий provider під декораторами (CachedHistoryProvider тощо) для isinstance перевірок."""
+    inner = getattr(provider, "inner", None)
+    while inner is not None:
+        provider = inner
+        inner = getattr(provider, "inner", None)
+    return provider
+
+
+def planned_chunk_ms(provider: HistoryProvider, symbol: str, default_ms: int, limit: int) -> int:
+    """Розмір вікна history запиту: адаптивний planner провайдера або статичний дефолт."""
+    planner = getattr(provider, "chunk_planner", None)
+    if planner is None:
+        return int(default_ms)
+    return int(planner.chunk_ms(symbol, limit))
+
+
 def guard_history_ready(
     provider: HistoryProvider,
     calendar: Calendar,
@@ -45,6 +70,7 @@ def guard_history_ready(
     now_ms: int,
     context: str,
 ) -> None:
+    market = _market_for(calendar, status)
     ready, reason = provider.is_history_ready()
     backoff_active = provider.should_backoff(int(now_ms))
     if ready and not backoff_active:
@@ -52,7 +78,7 @@ def guard_history_ready(
             ready=True,
             not_ready_reason="",
             history_retry_after_ms=0,
-            next_trading_open_ms=calendar.next_open_ms(int(now_ms), symbol=symbol),
+            next_trading_open_ms=market.next_open_ms(int(now_ms), symbol=symbol),
             backoff_ms=0,
             backoff_active=False,
         )
@@ -62,7 +88,7 @@ def guard_history_ready(
 
     reason_val = reason or "history_not_ready"
     retry_after_ms = int(provider.note_not_ready(int(now_ms), reason_val))
-    next_open_ms = calendar.next_open_ms(int(now_ms), symbol=symbol)
+    next_open_ms = market.next_open_ms(int(now_ms), symbol=symbol)
     backoff_ms = max(0, retry_after_ms - int(now_ms))
     status.record_history_state(
         ready=False,
@@ -99,3 +125,27 @@ def guard_history_ready(
         metrics.fxcm_history_not_ready_total.labels(reason=reason_val).inc()
         metrics.fxcm_history_backoff_active.set(1 if backoff_active or retry_after_ms > int(now_ms) else 0)
     raise HistoryNotReadyError("history not ready")
+
+
+def run_per_symbol(
+    symbols: List[str],
+    fn: Callable[[str], None],
+    max_workers: int,
+    maintenance: Optional[MaintenanceExecutor] = None,
+    job: str = "history",
+) -> None:
+    """Per-symbol fan-out history job (warmup/backfill) через MaintenanceExecutor.
+
+    Той самий механізм, що й у maintenance job: спільний пул (якщо передано maintenance),
+    паралельність обмежена max_workers (history_max_inflight), клас пріоритету викликача
+    переходить у помічники. Без maintenance — тимчасовий executor на виклик.
+    Піднімає першу помилку (за порядком символів) після завершення всіх символів.
+    """
+    if maintenance is not None:
+        maintenance.run(job, list(symbols), fn, max_workers=int(max_workers))
+        return
+    executor = MaintenanceExecutor(max_workers=int(max_workers))
+    try:
+        executor.run(job, list(symbols), fn)
+    finally:
+        executor.shutdown()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from observability.metrics import Metrics
+from runtime.history_provider import HistoryProvider
+
+_MINUTE_MS = 60_000
+_IMMUTABLE = float("inf")
+
+
+class CachedHistoryProvider(HistoryProvider):
+    """Декоратор HistoryProvider: локальний кеш відповідей per (symbol, хвилина).
+
+    Ключ — хвилина open_time у межах запитаного (вирівняного до хвилини) діапазону,
+    тому перекриті вікна reconcile/repair/tail_guard/warmup повторно не запитуються.
+    Хвилина, що старша за safety_lag_ms на момент fetch, незмінна (без TTL);
+    свіжіші хвилини живуть recent_ttl_ms. Порожні хвилини кешуються лише на
+    recent_ttl_ms: FXCM може віддати хвилину пізніше, і repair/tail_guard мають її
+    перезапитати (закритий ринок і так відсікає календар). Запит із частковим покриттям іде до provider
+    одним вікном [перша..остання відсутня хвилина].
+    """
+
+    def __init__(
+        self,
+        inner: HistoryProvider,
+        safety_lag_ms: int = 10 * 60_000,
+        recent_ttl_ms: int = 60_000,
+        max_minutes: int = 7 * 24 * 60,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.inner = inner
+        self.safety_lag_ms = max(0, int(safety_lag_ms))
+        self.recent_ttl_ms = max(0, int(recent_ttl_ms))
+        self.max_minutes = max(1, int(max_minutes))
+        self.metrics = metrics
+        self._bars: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self._expires: Dict[str, Dict[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        # chunk_planner, budget, adapter, close ... — від обгорнутого provider.
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def fetch_1m_final(self, symbol: str, start_ms: int, end_ms: int, limit: int) -> List[Dict[str, Any]]:
+        first = int(start_ms) - int(start_ms) % _MINUTE_MS
+        last = int(end_ms) - int(end_ms) % _MINUTE_MS
+        if end_ms < start_ms or last - first >= self.max_minutes * _MINUTE_MS:
+            # Вікно більше за кеш: напряму, інакше власний результат витіснявся б при збереженні.
+            self._record("miss", 0)
+            return self.inner.fetch_1m_final(symbol, start_ms, end_ms, limit)
+        now_ms = int(time.time() * 1000)
+        with self._lock:
+            missing = self._missing_span(symbol, first, last, now_ms)
+        if missing is None:
+            self._record("hit", last - first + _MINUTE_MS)
+            return self._collect(symbol, first, last)
+        miss_first, miss_last = missing
+        fetch_start = max(int(start_ms), miss_first)
+        bars = self.inner.fetch_1m_final(symbol, fetch_start, miss_last + _MINUTE_MS - 1, limit)
+        self._store(symbol, miss_first, miss_last, bars, limit, int(time.time() * 1000))
+        saved_ms = (last - first) - (miss_last - miss_first)
+        self._record("partial" if saved_ms > 0 else "miss", saved_ms)
+        return self._collect(symbol, first, last)
+
+    def is_history_ready(self) -> Tuple[bool, str]:
+        return self.inner.is_history_ready()
+
+    def should_backoff(self, now_ms: int) -> bool:
+        return self.inner.should_backoff(now_ms)
+
+    def note_not_ready(self, now_ms: int, reason: str) -> int:
+        return self.inner.note_not_ready(now_ms, reason)
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        with self._lock:
+            if symbol is None:
+                self._bars.clear()
+                self._expires.clear()
+                return
+            self._bars.pop(symbol, None)
+            self._expires.pop(symbol, None)
+
+    def _missing_span(self, symbol: str, first: int, last: int, now_ms: int) -> Optional[Tuple[int, int]]:
+        expires = self._expires.get(symbol, {})
+        miss_first: Optional[int] = None
+        miss_last = first
+        for open_ms in range(first, last + _MINUTE_MS, _MINUTE_MS):
+            if expires.get(open_ms, 0.0) > now_ms:
+                continue
+            if miss_first is None:
+                miss_first = open_ms
+            miss_last = open_ms
+        if miss_first is None:
+            return None
+        return miss_first, miss_last
+
+    def _store(
+        self,
+        symbol: str,
+        first: int,
+        last: int,
+        bars: List[Dict[str, Any]],
+        limit: int,
+        fetched_ms: int,
+    ) -> None:
+        in_range = [bar for bar in bars if first <= int(bar["open_time_ms"]) <= last]
+        covered_last = last
+        if limit > 0 and len(bars) >= limit and in_range:
+            # Відповідь могла бути обрізана limit: покриття лише до останнього отриманого бару.
+            covered_last = max(int(bar["open_time_ms"]) for bar in in_range)
+        immutable_before = fetched_ms - self.safety_lag_ms
+        recent_expiry = float(fetched_ms + self.recent_ttl_ms)
+        with self._lock:
+            cached = self._bars.setdefault(symbol, {})
+            expires = self._expires.setdefault(symbol, {})
+            for open_ms in range(first, covered_last + _MINUTE_MS, _MINUTE_MS):
+                cached.pop(open_ms, None)
+                expires[open_ms] = recent_expiry
+            for bar in in_range:
+                open_ms = int(bar["open_time_ms"])
+                if open_ms <= covered_last:
+                    cached[open_ms] = dict(bar)
+                    if open_ms + _MINUTE_MS - 1 < immutable_before:
+                        expires[open_ms] = _IMMUTABLE
+            if len(expires) > self.max_minutes:
+                for open_ms in sorted(expires)[: len(expires) - self.max_minutes]:
+                    expires.pop(open_ms, None)
+                    cached.pop(open_ms, None)
+
+    def _collect(self, symbol: str, first: int, last: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            cached = self._bars.get(symbol, {})
+            return [dict(cached[key]) for key in range(first, last + _MINUTE_MS, _MINUTE_MS) if key in cached]
+
+    def _record(self, result: str, saved_ms: int) -> None:
+        if self.metrics is None:
+            return
+        self.metrics.history_response_cache_requests_total.labels(result=result).inc()
+        if saved_ms > 0:
+            self.metrics.history_response_cache_saved_minutes_total.inc(saved_ms // _MINUTE_MS)
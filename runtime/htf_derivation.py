@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from typing_extensions import Protocol
+
+from core.market.resample import OhlcvColumns, open_minutes, resample_ohlcv
+from core.time.buckets import TF_TO_MS, get_bucket_close_ms, get_bucket_open_ms
+from core.time.calendar import Calendar
+from core.validation.validator import HTF_FINAL_ALLOWLIST, SchemaValidator
+from observability.metrics import Metrics
+from runtime.status import StatusManager
+from store.file_cache import FileCache
+from store.file_cache.cache_utils import final_rows_by_open, rows_in_open_range
+
+log = logging.getLogger("htf_derivation")
+
+_BAR_FIELDS = (
+    ("close_time_ms", "close_time"),
+    ("open", "open"),
+    ("high", "high"),
+    ("low", "low"),
+    ("close", "close"),
+    ("volume", "volume"),
+    ("tick_count", "tick_count"),
+)
+
+
+class HtfPublisherProtocol(Protocol):
+    def publish_ohlcv_final_htf(
+        self,
+        symbol: str,
+        tf: str,
+        bars: List[Dict[str, Any]],
+        validator: SchemaValidator,
+    ) -> None: ...
+
+
+@dataclass
+class HtfDerivationSummary:
+    symbol: str
+    start_ms: int
+    end_ms: int
+    buckets_touched: Dict[str, int] = field(default_factory=dict)
+    published: Dict[str, int] = field(default_factory=dict)
+    unchanged: Dict[str, int] = field(default_factory=dict)
+    incomplete: Dict[str, int] = field(default_factory=dict)
+
+
+class HtfDerivationEngine:
+    """Інкрементальна деривація final HTF (history_agg) з final 1m у FileCache.
+
+    На вхід — діапазони 1m, що щойно стали final (warmup/backfill/repair/reconcile).
+    Перераховуються лише бакети TF, які ці хвилини зачіпають (1d — через calendar
+    trading_day_boundary): агрегація і порівняння пропорційні кількості зачеплених
+    бакетів (зріз rows через bisect). Саме читання CSV FileCache лишається O(розміру
+    файлу) — індексу у FileCache немає. Бакет final, коли є всі відкриті за календарем
+    хвилини; stream_close 1m не використовуються. Новий або змінений бакет → FileCache
+    (source=history_agg) + publish_ohlcv_final_htf; незмінений не пишеться і не публікується повторно.
+    """
+
+    def __init__(
+        self,
+        file_cache: FileCache,
+        calendar: Calendar,
+        publisher: HtfPublisherProtocol,
+        validator: SchemaValidator,
+        status: Optional[StatusManager] = None,
+        metrics: Optional[Metrics] = None,
+        tfs: Sequence[str] = ("15m", "1h", "4h", "1d"),
+    ) -> None:
+        self.file_cache = file_cache
+        self.calendar = calendar
+        self.publisher = publisher
+        self.validator = validator
+        self.status = status
+        self.metrics = metrics
+        self.tfs = _normalize_tfs(tfs)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def derive_range(
+        self,
+        symbol: str,
+        start_ms: int,
+        end_ms: int,
+        tfs: Optional[Sequence[str]] = None,
+    ) -> HtfDerivationSummary:
+        return self.derive_ranges(symbol, [(int(start_ms), int(end_ms))], tfs)
+
+    def derive_ranges(
+        self,
+        symbol: str,
+        ranges: Iterable[Tuple[int, int]],
+        tfs: Optional[Sequence[str]] = None,
+    ) -> HtfDerivationSummary:
+        """Перераховує HTF бакети, які перетинають діапазони open_time 1m [start, end]."""
+        tf_list = self.tfs if tfs is None else _normalize_tfs(tfs)
+        spans = sorted((int(start), int(end)) for start, end in ranges if int(end) >= int(start))
+        buckets: Dict[str, List[Tuple[int, int]]] = {tf: self._touched_buckets(tf, spans) for tf in tf_list}
+        bounds = [item for items in buckets.values() for item in items]
+        if not bounds:
+            return HtfDerivationSummary(symbol=str(symbol), start_ms=0, end_ms=0)
+        span_start = min(open_ms for open_ms, _close_ms in bounds)
+        span_end = max(close_ms for _open_ms, close_ms in bounds)
+        summary = HtfDerivationSummary(symbol=str(symbol), start_ms=span_start, end_ms=span_end)
+        error: Optional[str] = None
+        try:
+            with self._symbol_lock(symbol):
+                self._derive(symbol, buckets, span_start, span_end, summary)
+        except Exception as exc:  # noqa: BLE001
+            error = str(exc) or type(exc).__name__
+            log.error("htf derivation symbol=%s error=%s", symbol, error)
+            raise
+        finally:
+            if self.status is not None:
+                self.status.record_derived_rebuild(
+                    state="error" if error else "ok",
+                    start_ms=span_start,
+                    end_ms=span_end,
+                    tfs=list(tf_list),
+                    last_error=error,
+                )
+        return summary
+
+    def _touched_buckets(self, tf: str, spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        touched: Dict[int, int] = {}
+        for start_ms, end_ms in spans:
+            open_ms = int(get_bucket_open_ms(tf, start_ms, self.calendar))
+            while open_ms <= end_ms:
+                close_ms = int(get_bucket_close_ms(tf, open_ms, self.calendar))
+                touched[open_ms] = close_ms
+                open_ms = close_ms + 1
+        return sorted(touched.items())
+
+    def _derive(
+        self,
+        symbol: str,
+        buckets: Dict[str, List[Tuple[int, int]]],
+        span_start: int,
+        span_end: int,
+        summary: HtfDerivationSummary,
+    ) -> None:
+        rows_1m, meta_1m = self.file_cache.load(symbol, "1m")
+        span_rows = rows_in_open_range(rows_1m, span_start, span_end)
+        columns = OhlcvColumns.from_rows(final_rows_by_open(span_rows, meta_1m, span_start, span_end).values())
+        intervals = self.calendar.open_intervals_ms(span_start, span_end, symbol=str(symbol))
+        for tf, tf_buckets in buckets.items():
+            bounds = ([open_ms for open_ms, _close_ms in tf_buckets], [close_ms for _open_ms, close_ms in tf_buckets])
+            resampled = resample_ohlcv(columns, tf, self.calendar, bounds=bounds, open_intervals=intervals)
+            bars = resampled.bars(source="history_agg")
+            existing: Dict[int, Dict[str, Any]] = {}
+            if bars:
+                existing_rows, _meta = self.file_cache.load(symbol, tf)
+                existing = _rows_in_buckets(existing_rows, tf_buckets)
+            derived: List[Dict[str, Any]] = []
+            unchanged = 0
+            for bar in bars:
+                if _same_bar(existing.get(int(bar["open_time"])), bar):
+                    unchanged += 1
+                else:
+                    derived.append(bar)
+            complete = len(derived) + unchanged
+            # Бакет, де ринок закритий увесь час (напр. щоденна пауза), бару не має і неповним не є.
+            incomplete = sum(1 for open_ms, close_ms in tf_buckets if open_minutes(intervals, open_ms, close_ms) > 0)
+            incomplete -= complete
+            summary.buckets_touched[tf] = len(tf_buckets)
+            summary.unchanged[tf] = unchanged
+            summary.incomplete[tf] = incomplete
+            summary.published[tf] = self._persist_and_publish(symbol, tf, derived)
+            if self.metrics is not None:
+                self.metrics.htf_derived_bars_total.labels(tf=tf, result="published").inc(len(derived))
+                self.metrics.htf_derived_bars_total.labels(tf=tf, result="unchanged").inc(unchanged)
+                self.metrics.htf_derived_bars_total.labels(tf=tf, result="incomplete").inc(incomplete)
+
+    def _persist_and_publish(self, symbol: str, tf: str, bars: List[Dict[str, Any]]) -> int:
+        if not bars:
+            return 0
+        # calendar: 1d бакет — торгова доба (не epoch 24h), geometry перевіряється по trading_day_boundary.
+        result = self.file_cache.append_complete_bars(
+            symbol=symbol, tf=tf, bars=bars, source="history_agg", calendar=self.calendar
+        )
+        self.publisher.publish_ohlcv_final_htf(symbol=symbol, tf=tf, bars=bars, validator=self.validator)
+        last_published = int(result.meta.get("last_published_open_time_ms", 0))
+        # Виправлений старий бакет теж публікується, але watermark назад не відкочується.
+        self.file_cache.mark_published(symbol, tf, max(last_published, int(bars[-1]["open_time"])))
+        return len(bars)
+
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(str(symbol))
+            if lock is None:
+                lock = threading.Lock()
+                self._locks[str(symbol)] = lock
+            return lock
+
+
+def _normalize_tfs(tfs: Iterable[str]) -> List[str]:
+    result = [str(tf) for tf in tfs if str(tf) in HTF_FINAL_ALLOWLIST]
+    return sorted(set(result), key=lambda tf: TF_TO_MS[tf])
+
+
+def _rows_in_buckets(rows: List[Dict[str, Any]], buckets: List[Tuple[int, int]]) -> Dict[int, Dict[str, Any]]:
+    if not buckets:
+        return {}
+    return {int(row["open_time_ms"]): row for row in rows_in_open_range(rows, buckets[0][0], buckets[-1][0])}
+
+
+def _same_bar(existing: Optional[Dict[str, Any]], bar: Dict[str, Any]) -> bool:
+    if existing is None:
+        return False
+    return all(existing.get(cache_key) == bar[key] for cache_key, key in _BAR_FIELDS)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional
+
+from observability.metrics import Metrics
+from runtime.command_executor import cooperative_yield, current_priority_class, priority_scope
+from runtime.status import StatusManager
+
+log = logging.getLogger("maintenance")
+
+_YIELD_POLL_S = 0.2
+
+
+@dataclass
+class MaintenanceSymbolResult:
+    symbol: str
+    state: str
+    duration_ms: int
+    error: Optional[str] = None
+
+
+class MaintenanceExecutor:
+    """Спільний bounded pool для per-symbol maintenance (tail_guard / reconcile / republish).
+
+    Job символу (напр. near → far tier) виконується послідовно, різні символи —
+    паралельно: викликач + до max_workers - 1 помічників зі спільного пулу
+    (один на процес). Кожен символ у run() — одна задача: FileCache SSOT per symbol
+    не пишеться з двох потоків одного job, а heavy executor уже серіалізує job
+    з перетином символів. HistoryBudget лишається спільним: клас пріоритету
+    викликача передається у помічники. Між символами і поки помічники працюють
+    викликач поступається вищим класам через cooperative_yield().
+
+    max_workers <= 1 або один символ → послідовно у поточному потоці; run(max_workers=...)
+    додатково обмежує паралельність окремого job (напр. history_max_inflight для warmup/backfill).
+    Результати (тривалість per symbol + summary) → status.maintenance[job].
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        status: Optional[StatusManager] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.status = status
+        self.metrics = metrics
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        job: str,
+        symbols: List[str],
+        fn: Callable[[str], None],
+        max_workers: Optional[int] = None,
+    ) -> List[MaintenanceSymbolResult]:
+        """fn(symbol) для кожного символу; після завершення всіх піднімає першу помилку (за порядком).
+
+        Збій самого помічника (BaseException або помилка поза per-symbol try) піднімається першим.
+        """
+        ordered = list(dict.fromkeys(str(symbol) for symbol in symbols))
+        started_ms = int(time.time() * 1000)
+        errors: Dict[str, BaseException] = {}
+        results: Dict[str, MaintenanceSymbolResult] = {}
+        queue: Deque[str] = deque(ordered)
+        queue_lock = threading.Lock()
+
+        def _next_symbol() -> Optional[str]:
+            with queue_lock:
+                return queue.popleft() if queue else None
+
+        def _drain(yield_between: bool) -> None:
+            symbol = _next_symbol()
+            while symbol is not None:
+                results[symbol] = self._run_symbol(job, symbol, fn, errors)
+                if yield_between:
+                    cooperative_yield()
+                symbol = _next_symbol()
+
+        priority_class = current_priority_class()
+
+        def _helper() -> None:
+            with priority_scope(priority_class):
+                _drain(False)
+
+        workers = self.max_workers if max_workers is None else max(1, min(self.max_workers, int(max_workers)))
+        helpers_count = min(workers, len(ordered)) - 1
+        helpers = [self._ensure_pool().submit(_helper) for _ in range(max(0, helpers_count))]
+        # Викликач теж бере символи з черги: зайнятий спільний пул (напр. довгий
+        # auto warmup) не блокує job, а лише зменшує його паралельність.
+        _drain(True)
+        # Черга порожня: помічники, що ще не стартували в пулі, вже не потрібні.
+        pending = {helper for helper in helpers if not helper.cancel()}
+        while pending:
+            _done, pending = wait(pending, timeout=_YIELD_POLL_S, return_when=FIRST_COMPLETED)
+            if pending:
+                cooperative_yield()
+        helper_errors = [helper.exception() for helper in helpers if not helper.cancelled()]
+        ordered_results = [results[symbol] for symbol in ordered if symbol in results]
+        self._record(job, ordered_results, started_ms, workers)
+        for helper_error in helper_errors:
+            if helper_error is not None:
+                raise helper_error
+        for symbol in ordered:
+            if symbol in errors:
+                raise errors[symbol]
+        return ordered_results
+
+    def shutdown(self, wait_running: bool = True) -> None:
+        with self._lock:
+            pool = self._pool
+            self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=wait_running)
+
+    def _ensure_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="maintenance")
+            return self._pool
+
+    def _run_symbol(
+        self,
+        job: str,
+        symbol: str,
+        fn: Callable[[str], None],
+        errors: Dict[str, BaseException],
+    ) -> MaintenanceSymbolResult:
+        started = time.monotonic()
+        state = "ok"
+        error: Optional[str] = None
+        try:
+            fn(symbol)
+        except Exception as exc:  # noqa: BLE001
+            errors[symbol] = exc
+            state = "error"
+            error = str(exc) or type(exc).__name__
+            log.error("maintenance %s symbol=%s error=%s", job, symbol, error)
+        duration_ms = int((time.monotonic() - started) * 1000)
+        if self.metrics is not None:
+            self.metrics.maintenance_symbol_seconds.labels(job=job, result=state).observe(duration_ms / 1000.0)
+        return MaintenanceSymbolResult(symbol=symbol, state=state, duration_ms=duration_ms, error=error)
+
+    def _record(self, job: str, results: List[MaintenanceSymbolResult], started_ms: int, workers: int) -> None:
+        if self.status is None:
+            return
+        self.status.record_maintenance(
+            job=job,
+            started_ms=started_ms,
+            duration_ms=int(time.time() * 1000) - started_ms,
+            workers=min(workers, max(1, len(results))),
+            symbol_ms={item.symbol: item.duration_ms for item in results},
+            failed={item.symbol: str(item.error) for item in results if item.state != "ok"},
+        )
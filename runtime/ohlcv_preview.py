@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import logging
+import threading
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, ContextManager, Dict, List, Optional
 
 from config.config import Config
 from core.time.calendar import Calendar
-from runtime.preview_builder import OhlcvCache, PreviewBuilder
+from observability.metrics import Metrics
+from runtime.preview_builder import ClosedPreviewBar, OhlcvCache, PreviewBuilder
 from runtime.status import StatusManager
 
+log = logging.getLogger("ohlcv_preview")
+
 
 @dataclass
 class PreviewCandleBuilder:
@@ -39,6 +45,82 @@ class PreviewCandleBuilder:
     def mark_published(self, now_ms: int) -> None:
         self._inner.mark_published(now_ms)
 
+    def close_due(self, now_ms: int) -> List[ClosedPreviewBar]:
+        return self._inner.close_due(now_ms=now_ms, grace_ms=int(self.config.ohlcv_preview_close_grace_ms))
+
+    def next_close_due_ms(self) -> Optional[int]:
+        return self._inner.next_close_due_ms(grace_ms=int(self.config.ohlcv_preview_close_grace_ms))
+
+
+class PreviewCloseTimer:
+    """Фоновий таймер закриття preview барів за wall clock (close_time + grace).
+
+    Бар закривається, навіть якщо наступний тік не прийшов (тиха хвилина, пауза ринку):
+    on_closed отримує закриті бари (publish + persist stream_close + reconcile trigger).
+    lock спільний з tick path, тож builder і watermark архіву не мутуються паралельно.
+    Таймер спить до найближчого due, але не довше за poll_ms.
+    """
+
+    def __init__(
+        self,
+        builder: PreviewCandleBuilder,
+        on_closed: Callable[[List[ClosedPreviewBar]], None],
+        lock: ContextManager[Any],
+        poll_ms: int = 250,
+        is_paused: Optional[Callable[[], bool]] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.builder = builder
+        self.on_closed = on_closed
+        self.lock = lock
+        self.poll_ms = max(10, int(poll_ms))
+        self.is_paused = is_paused
+        self.metrics = metrics
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ohlcv_preview_close", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 2.0) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout_s)
+        self._thread = None
+
+    def run_once(self, now_ms: int) -> List[ClosedPreviewBar]:
+        """Один крок таймера: закриває due бари і передає їх у on_closed."""
+        if self.is_paused is not None and self.is_paused():
+            return []
+        with self.lock:
+            closed = self.builder.close_due(now_ms)
+            if closed:
+                self.on_closed(closed)
+        if self.metrics is not None:
+            for item in closed:
+                delay_ms = max(0, int(now_ms) - int(item.bar.get("close_time", now_ms)))
+                self.metrics.ohlcv_preview_close_delay_seconds.labels(tf=item.tf).observe(delay_ms / 1000.0)
+        return closed
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now_ms = int(time.time() * 1000)
+            try:
+                self.run_once(now_ms)
+            except Exception as exc:  # noqa: BLE001
+                log.error("preview close timer error=%s", exc)
+            with self.lock:
+                next_due_ms = self.builder.next_close_due_ms()
+            wait_ms = self.poll_ms
+            if next_due_ms is not None:
+                wait_ms = min(wait_ms, max(0, next_due_ms - int(time.time() * 1000)))
+            self._stop.wait(max(wait_ms, 10) / 1000.0)
+
 
 def select_closed_bars_for_archive(
     bars: List[Dict[str, Any]],
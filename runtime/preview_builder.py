@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from core.market.preview_1m_builder import Preview1mBuilder
-from core.market.preview_builder import OhlcvBar, OhlcvCache, PreviewBuilder, PreviewStreamState
+from core.market.preview_builder import ClosedPreviewBar, OhlcvBar, OhlcvCache, PreviewBuilder, PreviewStreamState
 
 __all__ = [
+    "ClosedPreviewBar",
     "OhlcvBar",
     "OhlcvCache",
     "PreviewBuilder",
@@ -7,12 +7,15 @@ from typing import Any, Dict, Iterable, List, Optional, Tuple
 from typing_extensions import Protocol
 
 from config.config import Config
-from core.time.buckets import TF_TO_MS, get_bucket_close_ms, get_bucket_open_ms
+from core.market.resample import OhlcvColumns, resample_ohlcv
+from core.time.buckets import TF_TO_MS, get_bucket_open_ms
 from core.validation.validator import ContractError, SchemaValidator
 from observability.metrics import Metrics
+from runtime.history_plan import build_history_fetch_plan, record_history_plan
 from runtime.history_provider import HistoryNotReadyError, HistoryProvider, guard_history_ready
 from runtime.status import StatusManager
 from store.file_cache import FileCache
+from store.file_cache.cache_utils import final_rows_by_open
 
 
 class PublisherProtocol(Protocol):
@@ -80,30 +83,28 @@ def reconcile_final_tail(
     error: Optional[Dict[str, Any]] = None
 
     try:
-        guard_history_ready(
+        rows_1m, meta_1m = file_cache.load(symbol, "1m")
+        cached_bars = final_rows_by_open(rows_1m, meta_1m, start_ms, bucket_close_ms)
+        fetched = _fetch_missing_final(
+            file_cache=file_cache,
             provider=provider,
-            calendar=status.calendar,
             status=status,
             metrics=metrics,
             symbol=str(symbol),
-            now_ms=int(now_ms),
+            start_ms=start_ms,
+            end_ms=bucket_close_ms,
+            cached_opens=cached_bars.keys(),
+            lookback=lookback,
+            now_ms=now_ms,
             context="reconcile",
         )
-        limit = max(lookback + 5, 15)
-        rows = provider.fetch_1m_final(symbol, start_ms, bucket_close_ms, limit)
-        history_bars = _normalize_history_rows(rows, start_ms, bucket_close_ms)
-        if not history_bars:
+        for bar in fetched:
+            cached_bars[int(bar["open_time_ms"])] = bar
+        history_bars_sorted = [cached_bars[key] for key in sorted(cached_bars)]
+        if not history_bars_sorted:
             raise ContractError("reconcile_history_empty")
 
-        ingest_ts_ms = int(time.time() * 1000)
-        for bar in history_bars:
-            bar["ingest_ts_ms"] = ingest_ts_ms
-            bar["complete"] = True
-        file_cache.append_complete_bars(symbol=symbol, tf="1m", bars=history_bars, source="history")
-
-        _rows_1m, meta_1m = file_cache.load(symbol, "1m")
         last_published_1m = int(meta_1m.get("last_published_open_time_ms", 0))
-        history_bars_sorted = sorted(history_bars, key=lambda b: int(b["open_time_ms"]))
         publish_1m = [b for b in history_bars_sorted if int(b["open_time_ms"]) > last_published_1m]
         skipped_1m = max(0, len(history_bars_sorted) - len(publish_1m))
         if publish_1m:
@@ -120,10 +121,10 @@ def reconcile_final_tail(
             raise ContractError("reconcile_15m_missing")
 
         cache_15m = [_final_to_cache_bar(b) for b in aggregated_15m]
+        meta_15m: Dict[str, Any] = {}
         if cache_15m:
-            file_cache.append_complete_bars(symbol=symbol, tf="15m", bars=cache_15m, source="history_agg")
-
-        _rows_15m, meta_15m = file_cache.load(symbol, "15m")
+            result_15m = file_cache.append_complete_bars(symbol=symbol, tf="15m", bars=cache_15m, source="history_agg")
+            meta_15m = result_15m.meta
         last_published_15m = int(meta_15m.get("last_published_open_time_ms", 0))
         publish_15m = [b for b in aggregated_15m if int(b["open_time"]) > last_published_15m]
         skipped_15m = max(0, len(aggregated_15m) - len(publish_15m))
@@ -174,6 +175,90 @@ def reconcile_final_tail(
     )
 
 
+def prefetch_reconcile_window(
+    file_cache: FileCache,
+    provider: HistoryProvider,
+    status: StatusManager,
+    metrics: Optional[Metrics],
+    symbol: str,
+    lookback_minutes: int,
+    target_close_ms: int,
+    now_ms: Optional[int] = None,
+) -> int:
+    """Prefetch history для вікна майбутнього reconcile (до 15m boundary).
+
+    Завантажує лише вже закриті хвилини вікна, яких ще немає серед final 1m у FileCache,
+    і пише їх як history без publish. Reconcile на boundary тоді дозавантажує тільки
+    останні хвилини. Повертає кількість записаних барів.
+    """
+    ts_ms = int(time.time() * 1000) if now_ms is None else int(now_ms)
+    lookback = int(lookback_minutes)
+    start_ms = int(target_close_ms) - lookback * 60_000 + 1
+    last_closed_ms = min(int(target_close_ms), ts_ms - ts_ms % 60_000 - 1)
+    if last_closed_ms < start_ms:
+        return 0
+    rows_1m, meta_1m = file_cache.load(symbol, "1m")
+    cached_bars = final_rows_by_open(rows_1m, meta_1m, start_ms, last_closed_ms)
+    fetched = _fetch_missing_final(
+        file_cache=file_cache,
+        provider=provider,
+        status=status,
+        metrics=metrics,
+        symbol=str(symbol),
+        start_ms=start_ms,
+        end_ms=last_closed_ms,
+        cached_opens=cached_bars.keys(),
+        lookback=lookback,
+        now_ms=ts_ms,
+        context="reconcile_prefetch",
+    )
+    return len(fetched)
+
+
+def _fetch_missing_final(
+    file_cache: FileCache,
+    provider: HistoryProvider,
+    status: StatusManager,
+    metrics: Optional[Metrics],
+    symbol: str,
+    start_ms: int,
+    end_ms: int,
+    cached_opens: Iterable[int],
+    lookback: int,
+    now_ms: int,
+    context: str,
+) -> List[Dict[str, Any]]:
+    # Календар не застосовуємо: вікно коротке, а бакет reconcile має бути повним.
+    plan = build_history_fetch_plan(start_ms, end_ms, None, cached_opens)
+    record_history_plan(metrics, plan, symbol, context)
+    fetched: List[Dict[str, Any]] = []
+    if not plan.missing:
+        return fetched
+    guard_history_ready(
+        provider=provider,
+        calendar=status.calendar,
+        status=status,
+        metrics=metrics,
+        symbol=symbol,
+        now_ms=int(now_ms),
+        context=context,
+    )
+    limit = max(lookback + 5, 15)
+    # Один запит на все вікно: дірки між діапазонами дешевші за окремі запити.
+    request = plan.next_request(limit * 60_000)
+    while request is not None:
+        rows = provider.fetch_1m_final(symbol, request[0], request[1], limit)
+        fetched.extend(_normalize_history_rows(rows, request[0], request[1]))
+        request = plan.next_request(limit * 60_000)
+    if fetched:
+        ingest_ts_ms = int(time.time() * 1000)
+        for bar in fetched:
+            bar["ingest_ts_ms"] = ingest_ts_ms
+            bar["complete"] = True
+        file_cache.append_complete_bars(symbol=symbol, tf="1m", bars=fetched, source="history")
+    return fetched
+
+
 def _normalize_history_rows(
     rows: Iterable[Dict[str, Any]],
     start_ms: int,
@@ -244,50 +329,5 @@ def _aggregate_15m(
     rows: List[Dict[str, Any]],
     calendar: Any,
 ) -> Tuple[List[Dict[str, Any]], List[int]]:
-    bucketed: Dict[int, List[Dict[str, Any]]] = {}
-    for row in rows:
-        open_ms = int(row["open_time_ms"])
-        bucket_open = int(get_bucket_open_ms("15m", open_ms, calendar))
-        bucketed.setdefault(bucket_open, []).append(row)
-
-    expected = int(TF_TO_MS["15m"] / TF_TO_MS["1m"])
-    aggregated: List[Dict[str, Any]] = []
-    incomplete: List[int] = []
-    for bucket_open, items in sorted(bucketed.items()):
-        items_sorted = sorted(items, key=lambda b: int(b["open_time_ms"]))
-        if len(items_sorted) != expected:
-            incomplete.append(int(bucket_open))
-            continue
-        ok = True
-        for idx, bar in enumerate(items_sorted):
-            expected_open = int(bucket_open + idx * TF_TO_MS["1m"])
-            if int(bar["open_time_ms"]) != expected_open:
-                ok = False
-                break
-        if not ok:
-            incomplete.append(int(bucket_open))
-            continue
-        open_val = float(items_sorted[0]["open"])
-        close_val = float(items_sorted[-1]["close"])
-        high_val = max(float(b["high"]) for b in items_sorted)
-        low_val = min(float(b["low"]) for b in items_sorted)
-        volume_val = sum(float(b.get("volume", 0.0)) for b in items_sorted)
-        tick_count_val = sum(int(b.get("tick_count", 0)) for b in items_sorted)
-        close_ms = int(get_bucket_close_ms("15m", int(bucket_open), calendar))
-        aggregated.append(
-            {
-                "open_time": int(bucket_open),
-                "close_time": close_ms,
-                "open": open_val,
-                "high": high_val,
-                "low": low_val,
-                "close": close_val,
-                "volume": float(volume_val),
-                "tick_count": int(tick_count_val),
-                "complete": True,
-                "synthetic": False,
-                "source": "history_agg",
-                "event_ts": close_ms,
-            }
-        )
-    return aggregated, incomplete
+    resampled = resample_ohlcv(OhlcvColumns.from_rows(rows), "15m", calendar)
+    return resampled.bars(source="history_agg"), resampled.incomplete_opens()
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from config.config import Config
+from core.time.buckets import TF_TO_MS
+from core.time.calendar import Calendar
+from observability.metrics import Metrics
+from runtime.status import StatusManager
+
+log = logging.getLogger("reconcile_scheduler")
+
+RECONCILE_CMD = "fxcm_reconcile_tail"
+PREFETCH_CMD = "fxcm_reconcile_prefetch"
+
+_POLL_S = 1.0
+
+
+def is_15m_boundary(close_time_ms: int) -> bool:
+    if close_time_ms <= 0:
+        return False
+    return (int(close_time_ms) + 1) % TF_TO_MS["15m"] == 0
+
+
+def build_reconcile_job_payload(cmd: str, symbols: List[str], end_ms: int, ts_ms: int) -> Dict[str, Any]:
+    return {
+        "cmd": str(cmd),
+        "req_id": f"auto_reconcile:{int(end_ms)}" if cmd == RECONCILE_CMD else f"auto_prefetch:{int(end_ms)}",
+        "ts": int(ts_ms),
+        "args": {
+            "symbols": list(symbols),
+            "end_ms": int(end_ms),
+        },
+    }
+
+
+class ReconcileScheduler:
+    """In-process планувальник auto reconcile на 15m close (без Redis round-trip).
+
+    enqueue() викликається з tick path / таймера закриття барів і лише кладе end_ms
+    у чергу (dedupe по boundary). Фоновий потік передає job у submit (спільний heavy
+    executor CommandBus: пріоритет reconcile, серіалізація per symbol, collapse).
+    prefetch_lead_ms > 0 → за стільки до 15m boundary (ринок відкритий) ставиться
+    prefetch history вікна, тож reconcile на boundary дозавантажує лише останні хвилини.
+    Зовнішній fxcm_reconcile_tail через Redis працює як і раніше.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        calendar: Calendar,
+        status: StatusManager,
+        submit: Callable[[Dict[str, Any]], str],
+        prefetch_lead_ms: int = 0,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.config = config
+        self.calendar = calendar
+        self.status = status
+        self.submit = submit
+        self.prefetch_lead_ms = max(0, int(prefetch_lead_ms))
+        self.metrics = metrics
+        self._pending: Deque[int] = deque()
+        self._last_end_ms = 0
+        self._last_prefetch_end_ms = 0
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="reconcile_scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout_s: float = 2.0) -> None:
+        with self._cond:
+            thread = self._thread
+            self._stop = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout=timeout_s)
+        with self._cond:
+            self._thread = None
+
+    def enqueue(self, end_ms: int) -> bool:
+        """Ставить reconcile для 15m close end_ms; False → не boundary або вже поставлено."""
+        if not is_15m_boundary(int(end_ms)):
+            return False
+        with self._cond:
+            if int(end_ms) <= max(self._last_end_ms, int(self.status.get_reconcile_last_end_ms())):
+                return False
+            self._last_end_ms = int(end_ms)
+            self._pending.append(int(end_ms))
+            self._cond.notify()
+        self.status.record_reconcile_trigger(int(end_ms))
+        return True
+
+    def run_pending(self, now_ms: int) -> List[str]:
+        """Один крок: prefetch (якщо настав час) + усі поставлені reconcile; повертає результати submit."""
+        results: List[str] = []
+        prefetch_end_ms = self._due_prefetch_end_ms(int(now_ms))
+        if prefetch_end_ms is not None:
+            self._last_prefetch_end_ms = prefetch_end_ms
+            results.append(self._submit(PREFETCH_CMD, prefetch_end_ms, now_ms))
+        while True:
+            with self._cond:
+                if not self._pending:
+                    break
+                end_ms = self._pending.popleft()
+            results.append(self._submit(RECONCILE_CMD, end_ms, now_ms))
+        return results
+
+    def next_prefetch_ms(self, now_ms: int) -> Optional[int]:
+        if self.prefetch_lead_ms <= 0:
+            return None
+        tf_ms = TF_TO_MS["15m"]
+        boundary_ms = int(now_ms) - int(now_ms) % tf_ms + tf_ms
+        return boundary_ms - self.prefetch_lead_ms
+
+    def _due_prefetch_end_ms(self, now_ms: int) -> Optional[int]:
+        prefetch_ms = self.next_prefetch_ms(now_ms)
+        if prefetch_ms is None or now_ms < prefetch_ms:
+            return None
+        end_ms = prefetch_ms + self.prefetch_lead_ms - 1
+        if end_ms <= self._last_prefetch_end_ms or end_ms <= self._last_end_ms:
+            return None
+        if not self.calendar.is_open(end_ms):
+            return None
+        return end_ms
+
+    def _submit(self, cmd: str, end_ms: int, now_ms: int) -> str:
+        payload = build_reconcile_job_payload(
+            cmd=cmd,
+            symbols=list(self.config.reconcile_active_symbols),
+            end_ms=end_ms,
+            ts_ms=int(now_ms),
+        )
+        try:
+            result = str(self.submit(payload))
+        except Exception as exc:  # noqa: BLE001
+            result = "error"
+            log.error("reconcile scheduler cmd=%s end_ms=%s error=%s", cmd, end_ms, exc)
+            self.status.append_error(
+                code="reconcile_schedule_error",
+                severity="error",
+                message=str(exc) or type(exc).__name__,
+                context={"cmd": cmd, "end_ms": int(end_ms)},
+            )
+            self.status.mark_degraded("reconcile_schedule_error")
+        if self.metrics is not None:
+            kind = "prefetch" if cmd == PREFETCH_CMD else "reconcile"
+            self.metrics.reconcile_scheduled_total.labels(kind=kind, result=result).inc()
+        return result
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stop:
+                    return
+                if not self._pending:
+                    timeout_s = _POLL_S
+                    now_ms = int(time.time() * 1000)
+                    prefetch_ms = self.next_prefetch_ms(now_ms)
+                    if prefetch_ms is not None and prefetch_ms > now_ms:
+                        timeout_s = min(timeout_s, (prefetch_ms - now_ms) / 1000.0)
+                    self._cond.wait(timeout=timeout_s)
+                if self._stop:
+                    return
+            self.run_pending(int(time.time() * 1000))
@@ -3,14 +3,15 @@ from __future__ import annotations
 import logging
 import time
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from config.config import Config
 from core.time.calendar import Calendar
 from observability.metrics import Metrics
 from runtime.fxcm.history_budget import HistoryBudget, build_history_budget
 from runtime.fxcm.history_provider import FxcmForexConnectHistoryAdapter, FxcmHistoryProvider
-from runtime.history_provider import HistoryProvider, guard_history_ready
+from runtime.history_pipeline import HistoryFetchPipeline
+from runtime.history_provider import HistoryProvider, guard_history_ready, unwrap_history_provider
 from runtime.status import StatusManager
 from store.file_cache import FileCache
 
@@ -34,11 +35,14 @@ def repair_missing_1m(
     history_budget: Optional[HistoryBudget] = None,
 ) -> RepairSummary:
     log = logging.getLogger("repair")
+    base_provider = unwrap_history_provider(provider)
     total_missing = 0
     total_chunks = 0
     now_ms = int(time.time() * 1000)
-    if isinstance(provider, FxcmHistoryProvider) and isinstance(provider.adapter, FxcmForexConnectHistoryAdapter):
-        log.info("FXCM login component=history reason=tail_guard symbol=%s", symbol)
+    if isinstance(base_provider, FxcmHistoryProvider) and isinstance(
+        base_provider.adapter, FxcmForexConnectHistoryAdapter
+    ):
+        log.info("FXCM history session component=history reason=tail_guard symbol=%s", symbol)
     guard_history_ready(
         provider=provider,
         calendar=calendar,
@@ -93,11 +97,16 @@ def repair_missing_1m(
     bars_ingested = 0
     budget = history_budget or build_history_budget(config.max_requests_per_minute)
     use_budget_wrapper = True
-    if isinstance(provider, FxcmHistoryProvider):
-        if provider.budget is None:
-            provider.budget = budget
+    if isinstance(base_provider, FxcmHistoryProvider):
+        if base_provider.budget is None:
+            base_provider.budget = budget
         use_budget_wrapper = False
-    for start_ms, end_ms in ranges:
+    pending_ranges = list(ranges)
+
+    def _next_range() -> Optional[Tuple[int, int]]:
+        if not pending_ranges:
+            return None
+        start_ms, end_ms = pending_ranges.pop(0)
         span_minutes = int((end_ms - start_ms + 1) / 60_000)
         if span_minutes > max_gap_minutes:
             status.append_error(
@@ -114,25 +123,42 @@ def repair_missing_1m(
             )
             status.mark_degraded("repair_range_too_large")
             raise ValueError("repair перевищує ліміт для одного діапазону")
+        return start_ms, end_ms
 
+    def _fetch(start_ms: int, end_ms: int) -> List[Dict[str, Any]]:
+        span_minutes = int((end_ms - start_ms + 1) / 60_000)
         if use_budget_wrapper:
             waited = budget.acquire(symbol)
             _ = waited
         try:
-            bars = provider.fetch_1m_final(symbol, start_ms, end_ms, limit=span_minutes + 5)
+            return provider.fetch_1m_final(symbol, start_ms, end_ms, limit=span_minutes + 5)
         finally:
             if use_budget_wrapper:
                 budget.release(symbol)
-        now_ms = int(time.time() * 1000)
-        for bar in bars:
-            bar["ingest_ts_ms"] = now_ms
-            bar["complete"] = True
-        result = file_cache.append_complete_bars(symbol=symbol, tf="1m", bars=bars, source="history")
-        if result.inserted > 0:
-            windows_repaired += 1
-        bars_ingested += int(result.inserted)
-        if metrics is not None:
-            metrics.store_upserts_total.inc(len(bars))
+
+    # Наступне вікно вже в польоті, поки поточне пишеться у FileCache.
+    pipeline = HistoryFetchPipeline(
+        _next_range,
+        _fetch,
+        depth=int(config.history_pipeline_depth),
+        context="repair",
+        metrics=metrics,
+    )
+    try:
+        for _request, bars in pipeline:
+            with pipeline.stage("persist"):
+                now_ms = int(time.time() * 1000)
+                for bar in bars:
+                    bar["ingest_ts_ms"] = now_ms
+                    bar["complete"] = True
+                result = file_cache.append_complete_bars(symbol=symbol, tf="1m", bars=bars, source="history")
+            if result.inserted > 0:
+                windows_repaired += 1
+            bars_ingested += int(result.inserted)
+            if metrics is not None:
+                metrics.store_upserts_total.inc(len(bars))
+    finally:
+        pipeline.close()
 
     return RepairSummary(windows_repaired=windows_repaired, bars_ingested=bars_ingested)
 
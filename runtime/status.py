@@ -12,14 +12,17 @@ from typing_extensions import Protocol
 
 from config.config import Config
 from core.time.calendar import Calendar
+from core.time.market_state import MarketStateCache
 from core.validation.validator import SchemaValidator
 from observability.metrics import Metrics
+from runtime.command_stream import command_target
 
 STATUS_PUBSUB_MAX_BYTES = 8192
 STATUS_ERRORS_MAX = 20
 STATUS_DEGRADED_MAX = 20
 STATUS_DERIVED_TFS_MAX = 10
 STATUS_DERIVED_ERRORS_MAX = 10
+STATUS_MAINTENANCE_SYMBOLS_MAX = 16
 
 
 class PublisherProtocol(Protocol):
@@ -82,6 +85,7 @@ def build_status_pubsub_payload(snapshot: Dict[str, Any]) -> Dict[str, Any]:
         "republish",
         "reconcile",
         "bootstrap",
+        "maintenance",
     ]:
         value = snapshot.get(key)
         if isinstance(value, dict):
@@ -236,8 +240,11 @@ class StatusManager:
     publisher: PublisherProtocol
     calendar: Calendar
     metrics: Optional[Metrics] = None
+    market_cache: Optional[MarketStateCache] = None
 
     def __post_init__(self) -> None:
+        if self.market_cache is None:
+            self.market_cache = MarketStateCache(calendar=self.calendar)
         self._started_ms = _now_ms()
         self._snapshot: Dict[str, Any] = {}
         self._last_publish_ms = 0
@@ -326,7 +333,7 @@ class StatusManager:
                 "uptime_s": 0.0,
                 "state": "running",
             },
-            "market": self.calendar.market_state(ts_ms),
+            "market": self.market_state(ts_ms),
             "errors": errors,
             "degraded": degraded,
             "price": {
@@ -484,7 +491,7 @@ class StatusManager:
                 "last_error": None,
             },
             "command_bus": {
-                "channel": self.config.ch_commands(),
+                "channel": command_target(self.config),
                 "state": command_bus_state,
                 "last_heartbeat_ts_ms": 0,
                 "last_error": command_bus_error,
@@ -531,6 +538,17 @@ class StatusManager:
             history["last_not_ready_ts_ms"] = _now_ms()
         self._snapshot["history"] = history
 
+    def record_history_progress(self, progress: Dict[str, Any]) -> None:
+        """Прогрес warmup/backfill job у history.progress["SYMBOL:job"]."""
+        history = self._snapshot.get("history")
+        if not isinstance(history, dict):
+            return
+        jobs = history.get("progress")
+        if not isinstance(jobs, dict):
+            jobs = {}
+        jobs[f"{progress.get('symbol', '')}:{progress.get('job', '')}"] = dict(progress)
+        history["progress"] = jobs
+
     def snapshot(self) -> Dict[str, Any]:
         return dict(self._snapshot)
 
@@ -539,11 +557,17 @@ class StatusManager:
         self._snapshot["ts"] = ts_ms
         self._snapshot["process"]["uptime_s"] = uptime_s
         self._snapshot["process"]["state"] = "running"
-        self._snapshot["market"] = self.calendar.market_state(ts_ms, symbol=self._default_market_symbol())
+        self._snapshot["market"] = self.market_state(ts_ms, symbol=self._default_market_symbol())
         self._ensure_calendar_health(ts_ms)
         if self.metrics is not None:
             self.metrics.uptime_seconds.set(uptime_s)
 
+    def market_state(self, ts_ms: int, symbol: Optional[str] = None) -> Dict[str, object]:
+        """Market state через спільний кеш (перерахунок лише на session transitions)."""
+        if self.market_cache is None:
+            return self.calendar.market_state(ts_ms, symbol=symbol)
+        return self.market_cache.market_state(ts_ms, symbol=symbol)
+
     def _default_market_symbol(self) -> Optional[str]:
         symbols = self.config.fxcm_symbols
         if isinstance(symbols, list) and symbols:
@@ -748,6 +772,22 @@ class StatusManager:
             self.metrics.tick_lag_ms.set(lag_ms)
             self.metrics.fxcm_tick_skew_ms.set(skew_ms)
 
+    def record_tick_archive(self, stats: Dict[str, Any]) -> None:
+        """Стан локального архіву тіків (price.archive): черга, writer lag, лічильники."""
+        price = self._ensure_price()
+        price["archive"] = {
+            "state": str(stats.get("state", "stopped")),
+            "pending": int(stats.get("pending", 0)),
+            "lag_ms": int(stats.get("lag_ms", 0)),
+            "written_total": int(stats.get("written_total", 0)),
+            "dropped_total": int(stats.get("dropped_total", 0)),
+            "bytes_total": int(stats.get("bytes_total", 0)),
+            "last_tick_ts_ms": int(stats.get("last_tick_ts_ms", 0)),
+            "last_flush_ts_ms": int(stats.get("last_flush_ts_ms", 0)),
+            "last_error": stats.get("last_error"),
+        }
+        self._snapshot["price"] = price
+
     def record_tick_error(self) -> None:
         price = self._ensure_price()
         price["tick_total"] = int(price.get("tick_total", 0)) + 1
@@ -1341,6 +1381,37 @@ class StatusManager:
             return 0
         return int(reconcile.get("last_end_ms", 0))
 
+    def record_maintenance(
+        self,
+        job: str,
+        started_ms: int,
+        duration_ms: int,
+        workers: int,
+        symbol_ms: Dict[str, int],
+        failed: Dict[str, str],
+    ) -> None:
+        """Останній прогін maintenance job (maintenance[job]): summary + тривалість per symbol.
+
+        symbol_ms обрізається до STATUS_MAINTENANCE_SYMBOLS_MAX найповільніших символів.
+        """
+        slowest = sorted(symbol_ms.items(), key=lambda item: (-int(item[1]), item[0]))
+        maintenance = self._snapshot.get("maintenance")
+        if not isinstance(maintenance, dict):
+            maintenance = {}
+        maintenance[str(job)] = {
+            "state": "error" if failed else "ok",
+            "last_run_ts_ms": int(started_ms),
+            "duration_ms": max(0, int(duration_ms)),
+            "workers": max(1, int(workers)),
+            "symbols_total": len(symbol_ms),
+            "symbols_failed": len(failed),
+            "max_symbol_ms": int(slowest[0][1]) if slowest else 0,
+            "sum_symbol_ms": sum(int(value) for value in symbol_ms.values()),
+            "symbol_ms": {symbol: int(value) for symbol, value in slowest[:STATUS_MAINTENANCE_SYMBOLS_MAX]},
+            "failed": sorted(failed)[:STATUS_MAINTENANCE_SYMBOLS_MAX],
+        }
+        self._snapshot["maintenance"] = maintenance
+
     def record_reconcile_trigger(self, end_ms: int) -> None:
         reconcile = self._snapshot.get("reconcile")
         if not isinstance(reconcile, dict):
@@ -1435,6 +1506,26 @@ class StatusManager:
         }
         self._snapshot["command_bus"] = command_bus
 
+    def record_command_bus_heavy(
+        self,
+        workers: int,
+        queue_depth: int,
+        running: List[str],
+        last_wait_ms: int,
+        max_wait_ms: int,
+    ) -> None:
+        command_bus = self._snapshot.get("command_bus")
+        if not isinstance(command_bus, dict):
+            return
+        command_bus["heavy"] = {
+            "workers": max(0, int(workers)),
+            "queue_depth": max(0, int(queue_depth)),
+            "running": [str(key)[:128] for key in _trim_list(list(running), 16)],
+            "last_wait_ms": max(0, int(last_wait_ms)),
+            "max_wait_ms": max(0, int(max_wait_ms)),
+        }
+        self._snapshot["command_bus"] = command_bus
+
     def set_last_command_running(self, cmd: str, req_id: str, started_ts: int) -> None:
         self._snapshot["last_command"] = {
             "cmd": cmd,
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field, replace
 from typing import Any, Dict, List, Optional, Tuple
 
 from config.config import Config
+from core.market.resample import OhlcvColumns, bucket_bounds, diff_buckets, resample_ohlcv
 from core.time.buckets import TF_TO_MS
 from core.time.calendar import Calendar
-from core.validation.validator import SchemaValidator
+from core.validation.validator import HTF_FINAL_ALLOWLIST, SchemaValidator
 from observability.metrics import Metrics
 from runtime.fxcm.history_budget import HistoryBudget
 from runtime.history_provider import HistoryProvider
@@ -16,6 +17,7 @@ from runtime.repair import RepairSummary, repair_missing_1m
 from runtime.republish import republish_tail
 from runtime.status import StatusManager
 from store.file_cache import FileCache
+from store.file_cache.cache_utils import final_rows_by_open
 
 
 @dataclass
@@ -24,6 +26,7 @@ class TailGuardTfState:
     status: str
     skipped_by_ttl: bool
     missing_ranges: List[Tuple[int, int]]
+    mismatched_buckets: List[Tuple[int, int]] = field(default_factory=list)
 
 
 @dataclass
@@ -40,6 +43,8 @@ class TailGuardMark:
     checked_until_close_ms: int
     etag_last_complete_bar_ms: int
     last_audit_ts_ms: int
+    backfill_seq: int = 0
+    missing_ranges: List[Tuple[int, int]] = field(default_factory=list)
 
 
 def run_tail_guard(
@@ -60,6 +65,7 @@ def run_tail_guard(
     tfs: Optional[List[str]] = None,
     tier: str = "far",
     history_budget: Optional[HistoryBudget] = None,
+    now_ms: Optional[int] = None,
 ) -> TailGuardSummary:
     tf_states: Dict[str, TailGuardTfState] = {}
     repaired = False
@@ -68,7 +74,7 @@ def run_tail_guard(
     all_tfs = list(config.tail_guard_allow_tfs)
     _ = republish_force
 
-    rows, _meta = file_cache.load(symbol, "1m")
+    rows, meta = file_cache.load(symbol, "1m")
     if not rows:
         status.append_error(
             code="ssot_empty",
@@ -93,34 +99,48 @@ def run_tail_guard(
         )
         return TailGuardSummary(tf_states=tf_states, repaired=False)
 
+    final_1m: Optional[OhlcvColumns] = None
     for tf in tfs:
-        if tf != "1m":
+        if tf != "1m" and tf not in HTF_FINAL_ALLOWLIST:
             state = TailGuardTfState(missing_bars=0, status="unsupported", skipped_by_ttl=False, missing_ranges=[])
             tf_states[tf] = state
             status.record_tail_guard_tf(tf=tf, state=state, window_hours=window_hours, tier=tier)
             continue
-        state = _audit_1m(
+        if tf != "1m":
+            if final_1m is None:
+                final_1m = _final_1m_window(rows, meta, window_hours)
+            state = _audit_htf(
+                file_cache=file_cache,
+                calendar=calendar,
+                metrics=metrics,
+                symbol=symbol,
+                tf=tf,
+                final_1m=final_1m,
+            )
+            tf_states[tf] = state
+            status.record_tail_guard_tf(tf=tf, state=state, window_hours=window_hours, tier=tier)
+            continue
+        state, mark = _audit_1m(
             config=config,
             file_cache=file_cache,
             calendar=calendar,
             metrics=metrics,
             symbol=symbol,
             window_hours=window_hours,
+            rows=rows,
+            meta=meta,
+            now_ms=int(time.time() * 1000) if now_ms is None else int(now_ms),
         )
         tf_states[tf] = state
         status.record_tail_guard_tf(tf=tf, state=state, window_hours=window_hours, tier=tier)
+        if mark is not None:
+            status.record_tail_guard_mark(tf=tf, mark=asdict(mark), tier=tier)
 
     if repair:
         now_ms = int(time.time() * 1000)
         if not calendar.is_repair_window(now_ms, config.tail_guard_safe_repair_only_when_market_closed):
             for tf in tf_states:
-                state = tf_states[tf]
-                tf_states[tf] = TailGuardTfState(
-                    missing_bars=state.missing_bars,
-                    status="deferred",
-                    skipped_by_ttl=state.skipped_by_ttl,
-                    missing_ranges=state.missing_ranges,
-                )
+                tf_states[tf] = replace(tf_states[tf], status="deferred")
                 status.record_tail_guard_tf(tf=tf, state=tf_states[tf], window_hours=window_hours, tier=tier)
             status.mark_degraded("repair_deferred_market_open")
             status.record_tail_guard_summary(
@@ -187,26 +207,208 @@ def _audit_1m(
     metrics: Optional[Metrics],
     symbol: str,
     window_hours: int,
-) -> TailGuardTfState:
-    rows = file_cache.query(symbol=symbol, tf="1m", limit=window_hours * 60)
-    if not rows:
-        return TailGuardTfState(missing_bars=0, status="cache_empty", skipped_by_ttl=False, missing_ranges=[])
-    missing_ranges = _find_missing_ranges(rows, calendar, symbol)
+    rows: List[Dict[str, Any]],
+    meta: Dict[str, Any],
+    now_ms: int,
+) -> Tuple[TailGuardTfState, Optional[TailGuardMark]]:
+    """Аудит 1m у вікні window_hours; з валідною позначкою — лише бари після verified_until_ms.
+
+    Позначка (sidecar FileCache) зберігає вже знайдені missing_ranges до verified_until_ms.
+    Вставки в минуле (repair/backfill, meta.backfill_log) відкочують її до бару перед
+    найменшим вставленим open_time; застаріла за tail_guard_ttl_ms позначка → повний аудит.
+    Нових барів немає і перевірка свіжіша за tail_guard_checked_ttl_s → skipped_by_ttl.
+    """
+    limit = window_hours * 60
+    if not rows or limit <= 0:
+        return TailGuardTfState(missing_bars=0, status="cache_empty", skipped_by_ttl=False, missing_ranges=[]), None
+    window_idx = max(0, len(rows) - limit)
+    window_from_ms = int(rows[window_idx]["open_time_ms"])
+    backfill_seq = int(meta.get("backfill_seq", 0))
+    mark = _load_mark(file_cache, symbol, "1m")
+    resume = _resume_from_mark(mark, meta, rows, window_idx, now_ms, int(config.tail_guard_ttl_ms))
+
+    skipped_by_ttl = False
+    if resume is None:
+        verified_from_ms = window_from_ms
+        known_ranges: List[Tuple[int, int]] = []
+        audit_idx = window_idx
+    else:
+        audit_idx, known_ranges = resume
+        verified_from_ms = int(mark.verified_from_ms) if mark is not None else window_from_ms
+        skipped_by_ttl = (
+            mark is not None
+            and audit_idx == len(rows) - 1
+            and backfill_seq == int(mark.backfill_seq)
+            and now_ms - int(mark.last_audit_ts_ms) < int(config.tail_guard_checked_ttl_s) * 1000
+        )
+
+    if skipped_by_ttl and mark is not None:
+        all_ranges = known_ranges
+    else:
+        audit_rows = rows[audit_idx:]
+        all_ranges = known_ranges + _find_missing_ranges(audit_rows, calendar, symbol)
+        mode = "full" if resume is None else "incremental"
+        first_open_ms = int(rows[0]["open_time_ms"])
+        mark = TailGuardMark(
+            verified_from_ms=max(verified_from_ms, first_open_ms),
+            verified_until_ms=int(rows[-1]["open_time_ms"]),
+            checked_until_close_ms=int(rows[-1]["close_time_ms"]),
+            etag_last_complete_bar_ms=int(rows[-1]["open_time_ms"]),
+            last_audit_ts_ms=int(now_ms),
+            backfill_seq=backfill_seq,
+            missing_ranges=[item for item in all_ranges if item[0] > first_open_ms],
+        )
+        file_cache.save_tail_guard_mark(symbol, "1m", asdict(mark))
+        if metrics is not None:
+            metrics.tail_guard_audited_bars_total.labels(tf="1m", mode=mode).inc(len(audit_rows))
+
+    missing_ranges = [item for item in all_ranges if item[0] > window_from_ms]
     missing_bars = sum(int((end - start + 1) / 60_000) for start, end in missing_ranges)
     status = "ok" if missing_bars == 0 else "missing"
-    if metrics is not None:
+    if metrics is not None and not skipped_by_ttl:
         metrics.tail_guard_runs_total.labels(tf="1m").inc()
         if missing_bars:
             metrics.tail_guard_missing_total.inc(missing_bars)
+    return (
+        TailGuardTfState(
+            missing_bars=missing_bars,
+            status=status,
+            skipped_by_ttl=skipped_by_ttl,
+            missing_ranges=missing_ranges,
+        ),
+        mark,
+    )
+
+
+def _final_1m_window(rows: List[Dict[str, Any]], meta: Dict[str, Any], window_hours: int) -> OhlcvColumns:
+    """Final 1m (без stream_close) у тому ж вікні, що й аудит 1m; спільні для всіх HTF."""
+    limit = window_hours * 60
+    if not rows or limit <= 0:
+        return OhlcvColumns.from_rows([])
+    window_rows = rows[max(0, len(rows) - limit) :]
+    start_ms = int(window_rows[0]["open_time_ms"])
+    end_ms = int(window_rows[-1]["open_time_ms"])
+    return OhlcvColumns.from_rows(final_rows_by_open(window_rows, meta, start_ms, end_ms).values())
+
+
+def _audit_htf(
+    file_cache: FileCache,
+    calendar: Calendar,
+    metrics: Optional[Metrics],
+    symbol: str,
+    tf: str,
+    final_1m: OhlcvColumns,
+) -> TailGuardTfState:
+    """Аудит HTF final проти агрегату final 1m: відсутні бакети (coverage) і розбіжні OHLCV.
+
+    Один resample_ohlcv + diff_buckets на все вікно (NumPy, якщо є). Бакети, неповні за 1m
+    (дірки, stream_close, бакет на межі вікна), не перевіряються — це зона аудиту 1m.
+    missing_ranges / mismatched_buckets — (open, close) бакетів для точкового rebuild.
+    """
+    if len(final_1m) == 0:
+        return TailGuardTfState(missing_bars=0, status="ssot_empty", skipped_by_ttl=False, missing_ranges=[])
+    bounds = bucket_bounds(tf, final_1m.open_time_ms[0], final_1m.open_time_ms[-1], calendar)
+    # Інтервали до кінця останнього бакета: бакет, що ще триває, лишається неповним.
+    intervals = calendar.open_intervals_ms(bounds[0][0], bounds[1][-1], symbol=str(symbol))
+    expected = resample_ohlcv(final_1m, tf, calendar, bounds=bounds, open_intervals=intervals)
+    cached_rows, _meta = file_cache.load(symbol, tf)
+    cached = OhlcvColumns.from_rows(cached_rows[_bisect_open(cached_rows, bounds[0][0]) :])
+    missing_opens, mismatched_opens = diff_buckets(expected, cached)
+    close_by_open = dict(zip(expected.open_time, expected.close_time))
+    missing_ranges = [(open_ms, close_by_open[open_ms]) for open_ms in missing_opens]
+    mismatched = [(open_ms, close_by_open[open_ms]) for open_ms in mismatched_opens]
+    if mismatched:
+        state = "mismatch"
+    elif missing_ranges:
+        state = "missing"
+    else:
+        state = "ok"
+    if metrics is not None:
+        metrics.tail_guard_runs_total.labels(tf=tf).inc()
+        metrics.tail_guard_audited_bars_total.labels(tf=tf, mode="full").inc(sum(expected.complete))
+        if missing_ranges:
+            metrics.tail_guard_missing_total.inc(len(missing_ranges))
+        if mismatched:
+            metrics.tail_guard_htf_mismatch_total.labels(tf=tf).inc(len(mismatched))
     return TailGuardTfState(
-        missing_bars=missing_bars,
-        status=status,
+        missing_bars=len(missing_ranges),
+        status=state,
         skipped_by_ttl=False,
         missing_ranges=missing_ranges,
+        mismatched_buckets=mismatched,
     )
 
 
+def _load_mark(file_cache: FileCache, symbol: str, tf: str) -> Optional[TailGuardMark]:
+    payload = file_cache.load_tail_guard_mark(symbol, tf)
+    if payload is None:
+        return None
+    try:
+        return TailGuardMark(
+            verified_from_ms=int(payload["verified_from_ms"]),
+            verified_until_ms=int(payload["verified_until_ms"]),
+            checked_until_close_ms=int(payload["checked_until_close_ms"]),
+            etag_last_complete_bar_ms=int(payload["etag_last_complete_bar_ms"]),
+            last_audit_ts_ms=int(payload["last_audit_ts_ms"]),
+            backfill_seq=int(payload.get("backfill_seq", 0)),
+            missing_ranges=[(int(start), int(end)) for start, end in payload.get("missing_ranges", [])],
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _resume_from_mark(
+    mark: Optional[TailGuardMark],
+    meta: Dict[str, Any],
+    rows: List[Dict[str, Any]],
+    window_idx: int,
+    now_ms: int,
+    ttl_ms: int,
+) -> Optional[Tuple[int, List[Tuple[int, int]]]]:
+    """(індекс бару verified_until, відомі missing_ranges до нього) або None → повний аудит вікна."""
+    if mark is None or now_ms - int(mark.last_audit_ts_ms) > ttl_ms:
+        return None
+    window_from_ms = int(rows[window_idx]["open_time_ms"])
+    if int(mark.verified_from_ms) > window_from_ms:
+        return None
+    until_ms = int(mark.verified_until_ms)
+    known_ranges = list(mark.missing_ranges)
+    backfill_seq = int(meta.get("backfill_seq", 0))
+    if backfill_seq != int(mark.backfill_seq):
+        floors = [int(open_ms) for seq, open_ms in meta.get("backfill_log", []) if int(seq) > int(mark.backfill_seq)]
+        if backfill_seq < int(mark.backfill_seq) or len(floors) != backfill_seq - int(mark.backfill_seq):
+            return None
+        floor_ms = min(floors)
+        if floor_ms <= until_ms:
+            floor_idx = _bisect_open(rows, floor_ms) - 1
+            if floor_idx < 0:
+                return None
+            until_ms = int(rows[floor_idx]["open_time_ms"])
+            known_ranges = [item for item in known_ranges if item[1] < until_ms]
+    until_idx = _bisect_open(rows, until_ms)
+    if until_idx < window_idx or until_idx >= len(rows) or int(rows[until_idx]["open_time_ms"]) != until_ms:
+        return None
+    return until_idx, known_ranges
+
+
+def _bisect_open(rows: List[Dict[str, Any]], open_ms: int) -> int:
+    """Перший індекс з open_time_ms >= open_ms (rows відсортовані)."""
+    lo, hi = 0, len(rows)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if int(rows[mid]["open_time_ms"]) < open_ms:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
 def _find_missing_ranges(rows: List[Dict[str, Any]], calendar: Calendar, symbol: str) -> List[Tuple[int, int]]:
+    """Пропуски 1m між сусідніми барами: хвилини (сітка від попереднього бару), відкриті за календарем.
+
+    Кожен gap перетинається з відкритими інтервалами календаря, тож вартість —
+    O(кількість переходів сесії), а не O(хвилин у gap).
+    """
     rows_sorted = sorted(rows, key=lambda r: int(r["open_time_ms"]))
     missing_ranges: List[Tuple[int, int]] = []
     tf_ms = TF_TO_MS["1m"]
@@ -215,18 +417,17 @@ def _find_missing_ranges(rows: List[Dict[str, Any]], calendar: Calendar, symbol:
         open_ms = int(row["open_time_ms"])
         expected = prev_open + tf_ms
         if open_ms > expected:
-            t = expected
-            range_start: Optional[int] = None
-            while t < open_ms:
-                if calendar.is_open(t, symbol=str(symbol)):
-                    if range_start is None:
-                        range_start = t
+            intervals = calendar.open_intervals_ms(expected, open_ms - 1, symbol=str(symbol), fail_open=False)
+            for interval_start, interval_end in intervals:
+                # Хвилина t пропущена, якщо ринок відкритий у момент t (як calendar.is_open(t)).
+                first = expected + -(-(int(interval_start) - expected) // tf_ms) * tf_ms
+                last = expected + (int(interval_end) - expected) // tf_ms * tf_ms
+                if first > last:
+                    continue
+                end = min(last + tf_ms, open_ms) - 1
+                if missing_ranges and missing_ranges[-1][1] + 1 == first:
+                    missing_ranges[-1] = (missing_ranges[-1][0], end)
                 else:
-                    if range_start is not None:
-                        missing_ranges.append((range_start, t - 1))
-                        range_start = None
-                t += tf_ms
-            if range_start is not None:
-                missing_ranges.append((range_start, open_ms - 1))
+                    missing_ranges.append((first, end))
         prev_open = open_ms
     return missing_ranges
@@ -8,7 +8,10 @@ from config.config import Config
 from core.time.buckets import bucket_close_ms
 from observability.metrics import Metrics
 from runtime.fxcm.history_provider import FxcmForexConnectHistoryAdapter, FxcmHistoryProvider
-from runtime.history_provider import HistoryProvider, guard_history_ready
+from runtime.history_ingest import HistoryIngestJob
+from runtime.history_plan import build_history_fetch_plan, record_history_plan
+from runtime.history_provider import HistoryProvider, guard_history_ready, run_per_symbol, unwrap_history_provider
+from runtime.maintenance import MaintenanceExecutor
 from runtime.status import StatusManager
 from store.file_cache import FileCache
 
@@ -34,61 +37,60 @@ def run_warmup(
     symbols: List[str],
     lookback_days: int,
     publish_callback: Optional[Callable[[str], None]],
+    rebuild_callback: Optional[Callable[[str, int, int, List[str]], None]] = None,
+    rebuild_timeframes: Optional[List[str]] = None,
+    maintenance: Optional[MaintenanceExecutor] = None,
 ) -> None:
     log = logging.getLogger("warmup")
+    base_provider = unwrap_history_provider(provider)
     real_now_ms = int(time.time() * 1000)
     end_close_ms = _resolve_history_end_ms(real_now_ms, status)
     now_ms = end_close_ms
     start_ms = end_close_ms - lookback_days * 24 * 60 * 60 * 1000
-    chunk_ms = config.history_chunk_minutes * 60 * 1000
-    limit = config.history_chunk_limit
 
-    for symbol in symbols:
-        if isinstance(provider, FxcmHistoryProvider) and isinstance(provider.adapter, FxcmForexConnectHistoryAdapter):
-            log.info("FXCM login component=history reason=warmup symbol=%s", symbol)
-        guard_history_ready(
-            provider=provider,
-            calendar=status.calendar,
-            status=status,
-            metrics=metrics,
-            symbol=str(symbol),
-            now_ms=real_now_ms,
-            context="warmup",
+    def _warmup_symbol(symbol: str) -> None:
+        if isinstance(base_provider, FxcmHistoryProvider) and isinstance(
+            base_provider.adapter, FxcmForexConnectHistoryAdapter
+        ):
+            log.info("FXCM history session component=history reason=warmup symbol=%s", symbol)
+        session = file_cache.ingest_session(
+            symbol, "1m", source="history", max_buffer_bars=int(config.history_ingest_max_buffer_bars)
         )
-        t = start_ms
-        while t <= now_ms:
-            end_ms = min(t + chunk_ms - 1, now_ms)
-            if metrics is not None:
-                metrics.warmup_requests_total.inc()
-            bars = provider.fetch_1m_final(symbol, t, end_ms, limit)
-            for bar in bars:
-                bar["ingest_ts_ms"] = int(time.time() * 1000)
-                bar["complete"] = True
-            file_cache.append_complete_bars(symbol=symbol, tf="1m", bars=bars, source="history")
-            if metrics is not None:
-                metrics.store_upserts_total.inc(len(bars))
-            rows, _meta = file_cache.load(symbol, "1m")
-            if rows:
-                first_open = int(rows[0]["open_time_ms"])
-                last_close = int(rows[-1]["close_time_ms"])
-                bars_total = len(rows)
-                coverage_days = int(max(0, last_close - first_open + 1) / (24 * 60 * 60 * 1000))
-                status.record_final_1m_coverage(
-                    first_open_ms=first_open,
-                    last_close_ms=last_close,
-                    bars=int(bars_total),
-                    coverage_days=int(coverage_days),
-                    retention_target_days=int(config.retention_target_days),
+        with session:
+            plan = build_history_fetch_plan(
+                start_ms,
+                now_ms,
+                status.calendar,
+                session.cached_open_ms(),
+                symbol=str(symbol),
+            )
+            record_history_plan(metrics, plan, str(symbol), "warmup")
+            ingest = HistoryIngestJob(config, status, metrics, session, plan, str(symbol), "warmup", start_ms, now_ms)
+            if plan.missing:
+                guard_history_ready(
+                    provider=provider,
+                    calendar=status.calendar,
+                    status=status,
+                    metrics=metrics,
+                    symbol=str(symbol),
+                    now_ms=real_now_ms,
+                    context="warmup",
                 )
-            if publish_callback is not None:
-                publish_callback(symbol)
-            t = end_ms + 60_000
-        rows, _meta = file_cache.load(symbol, "1m")
-        bars_total_est = len(rows)
-        last_close_ms = int(rows[-1]["close_time_ms"]) if rows else 0
+            ingest.run(provider, publish_callback, metrics.warmup_requests_total if metrics is not None else None)
+        if publish_callback is not None:
+            publish_callback(symbol)
+        if rebuild_callback is not None and plan.missing:
+            # HTF перераховуються лише там, де warmup додав нові final 1m.
+            tfs = rebuild_timeframes or ["15m", "1h", "4h", "1d"]
+            rebuild_callback(symbol, int(plan.missing[0][0]), int(plan.missing[-1][1]), tfs)
+        coverage = session.coverage()
         status.record_final_publish(
-            last_complete_bar_ms=last_close_ms,
+            last_complete_bar_ms=coverage[1] if coverage else 0,
             now_ms=now_ms,
             lookback_days=lookback_days,
-            bars_total_est=bars_total_est,
+            bars_total_est=coverage[2] if coverage else 0,
         )
+
+    run_per_symbol(
+        list(symbols), _warmup_symbol, int(config.history_max_inflight), maintenance=maintenance, job="warmup"
+    )
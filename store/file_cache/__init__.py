@@ -1,5 +1,6 @@
 """File cache (CSV + meta.json) для SSOT."""
 
 from store.file_cache.history_cache import FileCache
+from store.file_cache.ingest_session import FileCacheIngestSession
 
-__all__ = ["FileCache"]
+__all__ = ["FileCache", "FileCacheIngestSession"]
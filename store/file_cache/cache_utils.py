@@ -3,12 +3,14 @@ from __future__ import annotations
 import csv
 import json
 import os
-from dataclasses import dataclass
+from bisect import bisect_right
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 from core.time.buckets import TF_TO_MS
+from core.time.calendar import Calendar
 
 CACHE_VERSION = 1
 CACHE_COLUMNS = [
@@ -47,6 +49,7 @@ class FileCacheAppendResult:
     duplicates: int
     total: int
     trimmed: int
+    meta: Dict[str, Any] = field(default_factory=dict)
 
 
 def now_utc_iso() -> str:
@@ -76,10 +79,22 @@ def require_ms_int(value: Any, field: str) -> int:
     return int(value)
 
 
-def validate_geometry(tf: str, open_time_ms: int, close_time_ms: int) -> None:
+def validate_geometry(
+    tf: str,
+    open_time_ms: int,
+    close_time_ms: int,
+    calendar: Optional[Calendar] = None,
+) -> None:
     tf_ms = TF_TO_MS.get(tf)
     if tf_ms is None:
         raise ValueError(f"TF не підтримується: {tf}")
+    if tf == "1d" and calendar is not None:
+        # 1d з calendar (HTF derivation): точна торгова доба trading_day_boundary, DST дає 23h/25h.
+        if open_time_ms != calendar.trading_day_boundary_for(open_time_ms):
+            raise ValueError("open_time_ms для 1d має дорівнювати trading_day_boundary календаря")
+        if close_time_ms != calendar.next_trading_day_boundary_ms(open_time_ms) - 1:
+            raise ValueError("close_time_ms для 1d має дорівнювати next_trading_day_boundary_ms - 1")
+        return
     if open_time_ms % tf_ms != 0:
         raise ValueError("open_time_ms має бути вирівняний по tf_ms")
     expected_close = open_time_ms + tf_ms - 1
@@ -98,12 +113,17 @@ def require_float(value: Any, field: str) -> float:
         raise ValueError(f"{field} має бути числом")
 
 
-def normalize_complete_bar(symbol: str, tf: str, bar: Dict[str, Any]) -> Dict[str, Any]:
+def normalize_complete_bar(
+    symbol: str,
+    tf: str,
+    bar: Dict[str, Any],
+    calendar: Optional[Calendar] = None,
+) -> Dict[str, Any]:
     open_time = bar.get("open_time_ms", bar.get("open_time"))
     close_time = bar.get("close_time_ms", bar.get("close_time"))
     open_time_ms = require_ms_int(open_time, "open_time_ms")
     close_time_ms = require_ms_int(close_time, "close_time_ms")
-    validate_geometry(tf, open_time_ms, close_time_ms)
+    validate_geometry(tf, open_time_ms, close_time_ms, calendar=calendar)
 
     complete_val = bar.get("complete")
     if complete_val is not True:
@@ -166,6 +186,80 @@ def trim_rows(rows: List[Dict[str, Any]], max_bars: int) -> Tuple[List[Dict[str,
     return rows[-max_bars:], trimmed
 
 
+def update_open_ranges(
+    ranges: Iterable[Iterable[int]],
+    opens: Iterable[int],
+    tf_ms: int,
+    mark: bool,
+    min_open_ms: int = 0,
+) -> List[List[int]]:
+    """Інтервали open_time [first, last] (включно) після позначення (mark) або зняття opens.
+
+    Відкриття до min_open_ms (витіснені trim) відкидаються.
+    """
+    marked: Set[int] = set()
+    for item in ranges:
+        first, last = (int(value) for value in item)
+        marked.update(range(first, last + tf_ms, tf_ms))
+    if mark:
+        marked.update(int(value) for value in opens)
+    else:
+        marked.difference_update(int(value) for value in opens)
+    result: List[List[int]] = []
+    for open_ms in sorted(value for value in marked if value >= min_open_ms):
+        if result and result[-1][1] + tf_ms == open_ms:
+            result[-1][1] = open_ms
+        else:
+            result.append([open_ms, open_ms])
+    return result
+
+
+def final_rows_by_open(
+    rows: Iterable[Dict[str, Any]],
+    meta: Dict[str, Any],
+    start_ms: int,
+    end_ms: int,
+) -> Dict[int, Dict[str, Any]]:
+    """Final (history) бари з FileCache у вікні [start_ms, end_ms]; stream_close сюди не потрапляють.
+
+    Без stream_close_ranges у meta (кеш до відстеження джерела) походження невідоме → порожньо.
+    """
+    if "stream_close_ranges" not in meta:
+        return {}
+    stream_ranges = sorted((int(first), int(last)) for first, last in meta.get("stream_close_ranges", []))
+    stream_firsts = [first for first, _last in stream_ranges]
+    result: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        open_ms = int(row["open_time_ms"])
+        if open_ms < start_ms or open_ms > end_ms:
+            continue
+        pos = bisect_right(stream_firsts, open_ms) - 1
+        if pos >= 0 and open_ms <= stream_ranges[pos][1]:
+            continue
+        result[open_ms] = dict(row)
+    return result
+
+
+def rows_in_open_range(rows: List[Dict[str, Any]], start_ms: int, end_ms: int) -> List[Dict[str, Any]]:
+    """Зріз відсортованих rows з open_time у [start_ms, end_ms] (bisect, без повного проходу)."""
+    lo, hi = 0, len(rows)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if int(rows[mid]["open_time_ms"]) < int(start_ms):
+            lo = mid + 1
+        else:
+            hi = mid
+    first = lo
+    hi = len(rows)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if int(rows[mid]["open_time_ms"]) <= int(end_ms):
+            lo = mid + 1
+        else:
+            hi = mid
+    return rows[first:lo]
+
+
 def atomic_write_text(path: Path, content: str) -> None:
     tmp = Path(str(path) + f".tmp.{os.getpid()}")
     tmp.write_text(content, encoding="utf-8")
@@ -6,6 +6,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+from core.time.buckets import TF_TO_MS
+from core.time.calendar import Calendar
 from core.validation.validator import ContractError
 from store.file_cache.cache_utils import (
     CACHE_COLUMNS,
@@ -21,7 +23,11 @@ from store.file_cache.cache_utils import (
     now_utc_iso,
     require_ms_int,
     trim_rows,
+    update_open_ranges,
 )
+from store.file_cache.ingest_session import FileCacheIngestSession
+
+BACKFILL_LOG_MAX = 32
 
 
 @dataclass
@@ -59,31 +65,60 @@ class FileCache:
         bars: List[Dict[str, Any]],
         now_utc: Optional[str] = None,
         source: str = "stream_close",
+        calendar: Optional[Calendar] = None,
     ) -> FileCacheAppendResult:
         sym = normalize_symbol(symbol)
         tf_norm = normalize_tf(tf)
         now_utc_val = now_utc or now_utc_iso()
         rows, meta = self.load(sym, tf_norm)
         incoming: List[Dict[str, Any]] = []
+        stream_opens: List[int] = []
+        final_opens: List[int] = []
         for bar in bars:
             bar_payload = dict(bar)
             bar_payload["complete"] = True
             if "source" not in bar_payload:
                 bar_payload["source"] = source
-            incoming.append(normalize_complete_bar(sym, tf_norm, bar_payload))
+            row = normalize_complete_bar(sym, tf_norm, bar_payload, calendar=calendar)
+            if bar_payload["source"] == "stream_close":
+                stream_opens.append(int(row["open_time_ms"]))
+            else:
+                final_opens.append(int(row["open_time_ms"]))
+            incoming.append(row)
+        backfill_open_ms = self._backfill_open_ms(rows, incoming)
         merged, duplicates = merge_rows_keep_last(rows, incoming)
         merged, trimmed = trim_rows(merged, self.max_bars)
         ensure_sorted_unique(merged)
         inserted = max(0, len(merged) - len(rows))
+        stream_ranges = self._stream_close_ranges(meta, merged, tf_norm, stream_opens, final_opens)
+        backfill_seq = int(meta.get("backfill_seq", 0))
+        backfill_log = list(meta.get("backfill_log", []))
+        if backfill_open_ms is not None:
+            backfill_seq += 1
+            backfill_log = (backfill_log + [[backfill_seq, int(backfill_open_ms)]])[-BACKFILL_LOG_MAX:]
         meta = self._build_meta(merged, meta, now_utc_val, sym, tf_norm, str(source))
+        meta["stream_close_ranges"] = stream_ranges
+        meta["backfill_seq"] = backfill_seq
+        meta["backfill_log"] = backfill_log
         self._save(sym, tf_norm, merged, meta)
         return FileCacheAppendResult(
             inserted=inserted,
             duplicates=duplicates,
             total=len(merged),
             trimmed=trimmed,
+            meta=dict(meta),
         )
 
+    def ingest_session(
+        self,
+        symbol: str,
+        tf: str,
+        source: str = "history",
+        max_buffer_bars: int = 0,
+    ) -> FileCacheIngestSession:
+        """Сесія пакетного інжесту: append_complete_bars один раз на flush, а не на кожен чанк."""
+        return FileCacheIngestSession(self, symbol, tf, source=source, max_buffer_bars=max_buffer_bars)
+
     def query(
         self,
         symbol: str,
@@ -143,12 +178,30 @@ class FileCache:
             "last_close_time_ms": last_close,
         }
 
+    def load_tail_guard_mark(self, symbol: str, tf: str) -> Optional[Dict[str, Any]]:
+        """Збережена позначка tail guard (sidecar поруч з meta.json); None → аудит з нуля."""
+        path = self._tail_guard_path(normalize_symbol(symbol), normalize_tf(tf))
+        if not path.exists():
+            return None
+        try:
+            mark = json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            return None
+        return mark if isinstance(mark, dict) else None
+
+    def save_tail_guard_mark(self, symbol: str, tf: str, mark: Dict[str, Any]) -> None:
+        """Окремий файл, щоб не переписувати meta.json/CSV з потоку tail guard."""
+        atomic_write_json(self._tail_guard_path(normalize_symbol(symbol), normalize_tf(tf)), dict(mark))
+
     def _csv_path(self, symbol: str, tf: str) -> Path:
         return self.root / f"{symbol}_{tf}.csv"
 
     def _meta_path(self, symbol: str, tf: str) -> Path:
         return self.root / f"{symbol}_{tf}.meta.json"
 
+    def _tail_guard_path(self, symbol: str, tf: str) -> Path:
+        return self.root / f"{symbol}_{tf}.tail_guard.json"
+
     def _read_csv(self, path: Path) -> List[Dict[str, Any]]:
         with path.open("r", encoding="utf-8", newline="") as fh:
             reader = csv.DictReader(fh)
@@ -220,6 +273,32 @@ class FileCache:
             "tf": tf,
         }
 
+    def _stream_close_ranges(
+        self,
+        meta: Dict[str, Any],
+        rows: List[Dict[str, Any]],
+        tf: str,
+        stream_opens: List[int],
+        final_opens: List[int],
+    ) -> List[List[int]]:
+        """Які бари ще stream_close (не підтверджені history): інтервали open_time у meta."""
+        tf_ms = int(TF_TO_MS[tf])
+        min_open = int(rows[0]["open_time_ms"]) if rows else 0
+        ranges = update_open_ranges(meta.get("stream_close_ranges", []), final_opens, tf_ms, mark=False)
+        return update_open_ranges(ranges, stream_opens, tf_ms, mark=True, min_open_ms=min_open)
+
+    def _backfill_open_ms(self, rows: List[Dict[str, Any]], incoming: List[Dict[str, Any]]) -> Optional[int]:
+        """Найменший новий open_time, вставлений у минуле (не хвіст): змінює gap-и вже перевірених барів."""
+        if not rows:
+            return None
+        last_open = int(rows[-1]["open_time_ms"])
+        candidates = [int(row["open_time_ms"]) for row in incoming if int(row["open_time_ms"]) < last_open]
+        if not candidates:
+            return None
+        existing = {int(row["open_time_ms"]) for row in rows}
+        inserted = [open_ms for open_ms in candidates if open_ms not in existing]
+        return min(inserted) if inserted else None
+
     def _save(self, symbol: str, tf: str, rows: List[Dict[str, Any]], meta: Dict[str, Any]) -> None:
         csv_path = self._csv_path(symbol, tf)
         meta_path = self._meta_path(symbol, tf)
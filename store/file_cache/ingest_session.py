@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.time.buckets import TF_TO_MS
+from store.file_cache.cache_utils import (
+    FileCacheAppendResult,
+    normalize_complete_bar,
+    normalize_symbol,
+    normalize_tf,
+)
+
+if TYPE_CHECKING:
+    from store.file_cache.history_cache import FileCache
+
+
+class FileCacheIngestSession:
+    """Буферизований інжест history у FileCache: чанки в пам'яті, один merge+write.
+
+    Покриття (first_open/last_close/bars) оновлюється інкрементально без перечитування CSV.
+    cached_open_ms() — лише final бари: stream_close (meta.stream_close_ranges) history має перезаписати.
+    flush() перечитує файл лише раз (щоб не затерти stream_close записи, що прийшли паралельно).
+    """
+
+    def __init__(
+        self,
+        cache: "FileCache",
+        symbol: str,
+        tf: str,
+        source: str = "history",
+        max_buffer_bars: int = 0,
+    ) -> None:
+        self.cache = cache
+        self.symbol = normalize_symbol(symbol)
+        self.tf = normalize_tf(tf)
+        self.source = str(source)
+        self.max_buffer_bars = max(0, int(max_buffer_bars))
+        self.flushes = 0
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        rows, meta = cache.load(self.symbol, self.tf)
+        self._open_ms = {int(row["open_time_ms"]) for row in rows}
+        self._final_open_ms = self._final_opens(meta)
+        self._first_open_ms = int(rows[0]["open_time_ms"]) if rows else 0
+        self._last_open_ms = int(rows[-1]["open_time_ms"]) if rows else 0
+        self._last_close_ms = int(rows[-1]["close_time_ms"]) if rows else 0
+
+    def __enter__(self) -> "FileCacheIngestSession":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        # Вже отримані бари валідні: зберігаємо їх і при помилці посеред інжесту.
+        self.flush()
+
+    def cached_open_ms(self) -> Iterable[int]:
+        return self._final_open_ms
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def add(self, bars: Iterable[Dict[str, Any]]) -> int:
+        """Додає complete бари у буфер; повертає кількість нових open_time у кеші."""
+        added = 0
+        for bar in bars:
+            payload = dict(bar)
+            payload["complete"] = True
+            row = normalize_complete_bar(self.symbol, self.tf, payload)
+            open_ms = int(row["open_time_ms"])
+            self._pending[open_ms] = row
+            if self.source != "stream_close":
+                self._final_open_ms.add(open_ms)
+            if open_ms in self._open_ms:
+                continue
+            self._open_ms.add(open_ms)
+            added += 1
+            if not self._first_open_ms or open_ms < self._first_open_ms:
+                self._first_open_ms = open_ms
+            if open_ms > self._last_open_ms:
+                self._last_open_ms = open_ms
+                self._last_close_ms = int(row["close_time_ms"])
+        if self.max_buffer_bars and len(self._pending) >= self.max_buffer_bars:
+            self.flush()
+        return added
+
+    def _final_opens(self, meta: Dict[str, Any]) -> Set[int]:
+        # Без stream_close_ranges (кеш до відстеження джерела) походження невідоме → не вважаємо final.
+        if "stream_close_ranges" not in meta:
+            return set()
+        tf_ms = int(TF_TO_MS[self.tf])
+        stream_opens: Set[int] = set()
+        for first, last in meta.get("stream_close_ranges", []):
+            stream_opens.update(range(int(first), int(last) + tf_ms, tf_ms))
+        return self._open_ms - stream_opens
+
+    def coverage(self) -> Optional[Tuple[int, int, int]]:
+        """(first_open_ms, last_close_ms, bars) з урахуванням trim до max_bars."""
+        if not self._open_ms:
+            return None
+        bars = len(self._open_ms)
+        first_open = self._first_open_ms
+        if bars > self.cache.max_bars:
+            first_open = sorted(self._open_ms)[-self.cache.max_bars]
+            bars = self.cache.max_bars
+        return first_open, self._last_close_ms, bars
+
+    def flush(self) -> Optional[FileCacheAppendResult]:
+        if not self._pending:
+            return None
+        rows: List[Dict[str, Any]] = [self._pending[key] for key in sorted(self._pending)]
+        self._pending = {}
+        self.flushes += 1
+        return self.cache.append_complete_bars(symbol=self.symbol, tf=self.tf, bars=rows, source=self.source)
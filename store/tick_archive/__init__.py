@@ -0,0 +1,6 @@
+"""Локальний архів тіків (денні бінарні сегменти + хвилинний індекс)."""
+
+from store.tick_archive.segments import apply_retention, read_ticks
+from store.tick_archive.writer import TickArchiveWriter
+
+__all__ = ["TickArchiveWriter", "apply_retention", "read_ticks"]
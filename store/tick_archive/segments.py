@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import os
+import struct
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from core.market.tick import Tick
+from store.file_cache.cache_utils import normalize_symbol
+
+SEGMENT_MAGIC = b"FXTK\x01\x00\x00\x00"
+SEGMENT_SUFFIX = ".ticks"
+INDEX_SUFFIX = ".idx"
+TICK_RECORD = struct.Struct("<qqddd")  # tick_ts_ms, snap_ts_ms, bid, ask, mid
+INDEX_RECORD = struct.Struct("<qq")  # minute_open_ms, record_no
+LATE_TICK_TOLERANCE_MS = 60_000  # тік може прийти із запізненням до хвилини відносно індексу
+
+_DAY_MS = 24 * 60 * 60 * 1000
+
+
+def segment_day(ts_ms: int) -> str:
+    """UTC день сегмента (YYYY-MM-DD) для tick_ts_ms."""
+    return datetime.fromtimestamp(int(ts_ms) / 1000.0, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def segment_paths(root: Path, symbol: str, day: str) -> Tuple[Path, Path]:
+    base = Path(root) / normalize_symbol(symbol)
+    return base / f"{day}{SEGMENT_SUFFIX}", base / f"{day}{INDEX_SUFFIX}"
+
+
+@dataclass
+class TickSegmentWriter:
+    """Append-only денний сегмент: фіксовані записи TICK_RECORD + хвилинний індекс.
+
+    Індекс містить (minute_open_ms, record_no) для першого тіку кожної нової хвилини
+    (монотонно: пізній тік не відкочує індекс). Хвіст після обірваного запису
+    відрізається при відкритті, тож сегмент завжди кратний розміру запису.
+    """
+
+    data_path: Path
+    index_path: Path
+    records: int = 0
+    last_index_minute_ms: int = -1
+    _data: Optional[BinaryIO] = field(default=None, repr=False)
+    _index: Optional[BinaryIO] = field(default=None, repr=False)
+
+    def open(self) -> None:
+        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.data_path.exists() or self.data_path.stat().st_size < len(SEGMENT_MAGIC):
+            with self.data_path.open("wb") as handle:
+                handle.write(SEGMENT_MAGIC)
+            if self.index_path.exists():
+                self.index_path.unlink()
+        self._data = self.data_path.open("r+b")
+        self._data.seek(0, os.SEEK_END)
+        payload = self._data.tell() - len(SEGMENT_MAGIC)
+        self.records = payload // TICK_RECORD.size
+        aligned = len(SEGMENT_MAGIC) + self.records * TICK_RECORD.size
+        if aligned != self._data.tell():
+            self._data.truncate(aligned)
+            self._data.seek(aligned)
+        entries = _read_index(self.index_path, self.records)
+        self._index = self.index_path.open("ab")
+        if entries:
+            self.last_index_minute_ms = entries[-1][0]
+
+    def append(self, ticks: List[Tick]) -> int:
+        if self._data is None or self._index is None:
+            raise RuntimeError("tick segment не відкритий")
+        chunks: List[bytes] = []
+        index_chunks: List[bytes] = []
+        for tick in ticks:
+            minute_ms = int(tick.tick_ts_ms) - int(tick.tick_ts_ms) % 60_000
+            if minute_ms > self.last_index_minute_ms:
+                index_chunks.append(INDEX_RECORD.pack(minute_ms, self.records + len(chunks)))
+                self.last_index_minute_ms = minute_ms
+            chunks.append(TICK_RECORD.pack(int(tick.tick_ts_ms), int(tick.snap_ts_ms), tick.bid, tick.ask, tick.mid))
+        payload = b"".join(chunks)
+        self._data.write(payload)
+        self._data.flush()
+        if index_chunks:
+            self._index.write(b"".join(index_chunks))
+            self._index.flush()
+        self.records += len(chunks)
+        return len(payload)
+
+    def close(self) -> None:
+        for handle in (self._data, self._index):
+            if handle is not None:
+                handle.close()
+        self._data = None
+        self._index = None
+
+
+def _read_index(index_path: Path, records: int) -> List[Tuple[int, int]]:
+    if not index_path.exists():
+        return []
+    raw = index_path.read_bytes()
+    usable = len(raw) - len(raw) % INDEX_RECORD.size
+    entries = [INDEX_RECORD.unpack_from(raw, offset) for offset in range(0, usable, INDEX_RECORD.size)]
+    return [(int(minute), int(record_no)) for minute, record_no in entries if record_no < records]
+
+
+def read_ticks(root: Path, symbol: str, start_ms: int, end_ms: int) -> List[Tick]:
+    """Тіки symbol з tick_ts_ms у [start_ms, end_ms] у порядку запису (по днях)."""
+    if end_ms < start_ms:
+        return []
+    sym = normalize_symbol(symbol)
+    result: List[Tick] = []
+    day_ms = int(start_ms) - int(start_ms) % _DAY_MS
+    while day_ms <= int(end_ms):
+        data_path, index_path = segment_paths(root, sym, segment_day(day_ms))
+        if data_path.exists():
+            result.extend(_read_segment(data_path, index_path, sym, start_ms, end_ms))
+        day_ms += _DAY_MS
+    return result
+
+
+def _read_segment(data_path: Path, index_path: Path, symbol: str, start_ms: int, end_ms: int) -> Iterator[Tick]:
+    with data_path.open("rb") as handle:
+        if handle.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+            raise ValueError(f"tick segment має невідомий формат: {data_path}")
+        handle.seek(0, os.SEEK_END)
+        records = (handle.tell() - len(SEGMENT_MAGIC)) // TICK_RECORD.size
+        entries = _read_index(index_path, records)
+        first_record = 0
+        if entries:
+            minutes = [minute for minute, _record_no in entries]
+            pos = bisect_right(minutes, int(start_ms) - LATE_TICK_TOLERANCE_MS) - 1
+            if pos >= 0:
+                first_record = entries[pos][1]
+        handle.seek(len(SEGMENT_MAGIC) + first_record * TICK_RECORD.size)
+        stop_ms = int(end_ms) + LATE_TICK_TOLERANCE_MS
+        batch = 4096
+        remaining = records - first_record
+        while remaining > 0:
+            count = min(batch, remaining)
+            raw = handle.read(count * TICK_RECORD.size)
+            remaining -= count
+            for tick_ts, snap_ts, bid, ask, mid in TICK_RECORD.iter_unpack(raw):
+                if tick_ts > stop_ms:
+                    return
+                if start_ms <= tick_ts <= end_ms:
+                    yield Tick(
+                        symbol=symbol,
+                        bid=bid,
+                        ask=ask,
+                        mid=mid,
+                        tick_ts_ms=int(tick_ts),
+                        snap_ts_ms=int(snap_ts),
+                    )
+
+
+def list_segments(root: Path) -> Dict[str, List[Path]]:
+    """Денні сегменти (data files) по днях: {YYYY-MM-DD: [paths]}."""
+    days: Dict[str, List[Path]] = {}
+    root_path = Path(root)
+    if not root_path.exists():
+        return days
+    for path in root_path.glob(f"*/*{SEGMENT_SUFFIX}"):
+        days.setdefault(path.stem, []).append(path)
+    return days
+
+
+def apply_retention(
+    root: Path,
+    now_ms: int,
+    retention_days: int,
+    max_bytes: int,
+    keep_days: Optional[Set[str]] = None,
+) -> int:
+    """Видаляє сегменти, старші за retention_days, і найстаріші дні понад max_bytes.
+
+    keep_days (дні з відкритими сегментами) не видаляються ніколи. Повертає кількість
+    видалених data-сегментів.
+    """
+    days = list_segments(root)
+    removed = 0
+    cutoff = ""
+    if retention_days > 0:
+        cutoff = segment_day(int(now_ms) - (int(retention_days) - 1) * _DAY_MS)
+    ordered = sorted(days)
+    sizes = {day: sum(_segment_bytes(path) for path in days[day]) for day in ordered}
+    total = sum(sizes.values())
+    for day in ordered:
+        if keep_days and day in keep_days:
+            continue
+        expired = bool(cutoff) and day < cutoff
+        over_budget = max_bytes > 0 and total > max_bytes
+        if not expired and not over_budget:
+            continue
+        for path in days[day]:
+            path.unlink()
+            index_path = path.with_suffix(INDEX_SUFFIX)
+            if index_path.exists():
+                index_path.unlink()
+            removed += 1
+        total -= sizes[day]
+    return removed
+
+
+def _segment_bytes(path: Path) -> int:
+    index_path = path.with_suffix(INDEX_SUFFIX)
+    size = path.stat().st_size
+    if index_path.exists():
+        size += index_path.stat().st_size
+    return size
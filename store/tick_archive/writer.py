@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from core.market.tick import Tick
+from observability.metrics import Metrics
+from store.file_cache.cache_utils import normalize_symbol
+from store.tick_archive.segments import TickSegmentWriter, apply_retention, segment_day, segment_paths
+
+log = logging.getLogger("tick_archive")
+
+_RETENTION_CHECK_MS = 60 * 60 * 1000
+
+
+@dataclass
+class TickArchiveWriter:
+    """Асинхронний batched запис тіків у денні бінарні сегменти (store/tick_archive).
+
+    submit() лише кладе тік у bounded чергу під коротким lock і ніколи не блокує
+    tick path: при переповненні тік відкидається (dropped_total). Фоновий потік
+    пише пачками (batch_max або раз на flush_interval_s), ротує сегменти по UTC днях
+    і застосовує retention (дні + max_bytes). lag_ms — вік найстарішого тіку в черзі.
+    on_stats (напр. status.record_tick_archive) викликається з фонового потоку після
+    кожного циклу flush, тож tick path не торкається status.
+    """
+
+    root: Path
+    retention_days: int = 7
+    max_bytes: int = 0
+    batch_max: int = 1000
+    flush_interval_s: float = 1.0
+    queue_max: int = 100_000
+    metrics: Optional[Metrics] = None
+    on_stats: Optional[Callable[[Dict[str, Any]], None]] = None
+    _pending: Deque[Tuple[int, Tick]] = field(default_factory=deque, repr=False)
+    _cond: threading.Condition = field(default_factory=threading.Condition, repr=False)
+    _stop: bool = field(default=False, repr=False)
+    _thread: Optional[threading.Thread] = field(default=None, repr=False)
+    _segments: Dict[Tuple[str, str], TickSegmentWriter] = field(default_factory=dict, repr=False)
+    _stats: Dict[str, Any] = field(default_factory=dict, repr=False)
+    _last_retention_ms: int = field(default=0, repr=False)
+
+    def __post_init__(self) -> None:
+        self.root = Path(self.root)
+        self._stats = {
+            "state": "stopped",
+            "pending": 0,
+            "lag_ms": 0,
+            "written_total": 0,
+            "dropped_total": 0,
+            "bytes_total": 0,
+            "last_tick_ts_ms": 0,
+            "last_flush_ts_ms": 0,
+            "last_error": None,
+        }
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stop = False
+            self._stats["state"] = "running"
+            self._thread = threading.Thread(target=self._run, name="tick_archive", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout_s: float = 5.0) -> None:
+        """Дописує чергу і закриває сегменти."""
+        with self._cond:
+            thread = self._thread
+            self._stop = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout=timeout_s)
+        with self._cond:
+            self._thread = None
+            if self._stats["state"] == "running":
+                self._stats["state"] = "stopped"
+
+    def submit(self, symbol: str, bid: float, ask: float, mid: float, tick_ts_ms: int, snap_ts_ms: int) -> bool:
+        """Неблокуючий прийом тіку; False → черга повна або writer зупинений."""
+        tick = Tick(
+            symbol=str(symbol),
+            bid=float(bid),
+            ask=float(ask),
+            mid=float(mid),
+            tick_ts_ms=int(tick_ts_ms),
+            snap_ts_ms=int(snap_ts_ms),
+        )
+        with self._cond:
+            if self._stop or self._thread is None or len(self._pending) >= int(self.queue_max):
+                self._stats["dropped_total"] += 1
+                accepted = False
+            else:
+                self._pending.append((int(time.time() * 1000), tick))
+                accepted = True
+                if len(self._pending) >= int(self.batch_max):
+                    self._cond.notify()
+        if self.metrics is not None:
+            self.metrics.tick_archive_ticks_total.labels(result="queued" if accepted else "dropped").inc()
+        return accepted
+
+    def stats(self, now_ms: Optional[int] = None) -> Dict[str, Any]:
+        """Знімок стану для status (price.archive)."""
+        ts_ms = int(time.time() * 1000) if now_ms is None else int(now_ms)
+        with self._cond:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+            stats["lag_ms"] = max(0, ts_ms - self._pending[0][0]) if self._pending else 0
+        if self.metrics is not None:
+            self.metrics.tick_archive_lag_ms.set(stats["lag_ms"])
+        return stats
+
+    def _run(self) -> None:
+        self._retention(int(time.time() * 1000), force=True)
+        while True:
+            with self._cond:
+                if not self._stop and len(self._pending) < int(self.batch_max):
+                    self._cond.wait(timeout=max(0.01, float(self.flush_interval_s)))
+                batch = list(self._pending)
+                self._pending.clear()
+                stopping = self._stop
+            if batch:
+                self._write(batch)
+            self._report_stats()
+            if stopping:
+                break
+        for writer in self._segments.values():
+            writer.close()
+        self._segments.clear()
+
+    def _report_stats(self) -> None:
+        if self.on_stats is None:
+            return
+        try:
+            self.on_stats(self.stats())
+        except Exception as exc:  # noqa: BLE001
+            log.debug("tick_archive on_stats помилка: %s", exc)
+
+    def _write(self, batch: List[Tuple[int, Tick]]) -> None:
+        grouped: Dict[Tuple[str, str], List[Tick]] = {}
+        for _received_ms, tick in batch:
+            key = (normalize_symbol(tick.symbol), segment_day(tick.tick_ts_ms))
+            grouped.setdefault(key, []).append(tick)
+        written = 0
+        written_bytes = 0
+        last_tick_ts = 0
+        try:
+            for key, ticks in grouped.items():
+                written_bytes += self._segment(key).append(ticks)
+                written += len(ticks)
+                last_tick_ts = max(last_tick_ts, max(tick.tick_ts_ms for tick in ticks))
+            error: Optional[str] = None
+        except Exception as exc:  # noqa: BLE001
+            error = str(exc)
+            log.error("tick_archive write failed: %s", error)
+        now_ms = int(time.time() * 1000)
+        with self._cond:
+            self._stats["written_total"] += written
+            self._stats["bytes_total"] += written_bytes
+            self._stats["dropped_total"] += len(batch) - written
+            self._stats["last_flush_ts_ms"] = now_ms
+            if last_tick_ts:
+                self._stats["last_tick_ts_ms"] = max(int(self._stats["last_tick_ts_ms"]), last_tick_ts)
+            self._stats["last_error"] = error
+            self._stats["state"] = "error" if error else "running"
+        if self.metrics is not None:
+            self.metrics.tick_archive_ticks_total.labels(result="written").inc(written)
+            if len(batch) > written:
+                self.metrics.tick_archive_ticks_total.labels(result="dropped").inc(len(batch) - written)
+        self._retention(now_ms)
+
+    def _segment(self, key: Tuple[str, str]) -> TickSegmentWriter:
+        writer = self._segments.get(key)
+        if writer is not None:
+            return writer
+        symbol, day = key
+        # Ротація: відкритим лишається ще попередній день (для запізнілих тіків).
+        older = sorted(item for item in self._segments if item[0] == symbol and item[1] < day)
+        for stale in older[:-1]:
+            self._segments.pop(stale).close()
+        data_path, index_path = segment_paths(self.root, symbol, day)
+        writer = TickSegmentWriter(data_path=data_path, index_path=index_path)
+        writer.open()
+        self._segments[key] = writer
+        self._last_retention_ms = 0
+        return writer
+
+    def _retention(self, now_ms: int, force: bool = False) -> None:
+        if not force and now_ms - self._last_retention_ms < _RETENTION_CHECK_MS:
+            return
+        self._last_retention_ms = now_ms
+        keep_days = {day for _symbol, day in self._segments}
+        try:
+            removed = apply_retention(
+                self.root,
+                now_ms=now_ms,
+                retention_days=int(self.retention_days),
+                max_bytes=int(self.max_bytes),
+                keep_days=keep_days,
+            )
+        except OSError as exc:
+            log.warning("tick_archive retention failed: %s", exc)
+            return
+        if removed:
+            log.info("tick_archive retention: видалено сегментів=%s", removed)
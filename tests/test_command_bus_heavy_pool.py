@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from prometheus_client import CollectorRegistry
+
+from config.config import Config
+from core.time.calendar import Calendar
+from core.validation.validator import SchemaValidator
+from observability.metrics import create_metrics
+from runtime.command_bus import CommandBus
+from runtime.command_executor import cooperative_yield
+from runtime.history_provider import ProviderNotConfiguredError
+from runtime.status import StatusManager
+
+
+class InMemoryPublisher:
+    def __init__(self) -> None:
+        self.last_snapshot: Optional[str] = None
+
+    def set_snapshot(self, key: str, json_str: str) -> None:
+        self.last_snapshot = json_str
+
+    def publish(self, channel: str, json_str: str) -> None:
+        return None
+
+
+def _build_status(config: Config) -> StatusManager:
+    root_dir = Path(__file__).resolve().parents[1]
+    validator = SchemaValidator(root_dir=root_dir)
+    calendar = Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+    status = StatusManager(
+        config=config,
+        validator=validator,
+        publisher=InMemoryPublisher(),
+        calendar=calendar,
+        metrics=create_metrics(CollectorRegistry()),
+    )
+    status.build_initial_snapshot()
+    return status
+
+
+def _wait_until(predicate: Callable[[], bool], timeout_s: float = 3.0) -> bool:
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_heavy_pool_keeps_bus_thread_free_and_collapses_per_symbol() -> None:
+    config = Config(
+        command_heavy_cmds=["backfill"],
+        command_heavy_workers=2,
+        command_rate_limit_enable=False,
+    )
+    status = _build_status(config)
+    release = threading.Event()
+    calls: List[str] = []
+    light_calls: List[str] = []
+
+    def _heavy(payload: dict) -> None:
+        calls.append(str(payload.get("req_id")))
+        release.wait(timeout=3.0)
+
+    bus = CommandBus(
+        redis_client=None,
+        config=config,
+        validator=status.validator,
+        status=status,
+        metrics=status.metrics,
+        allowlist={"backfill", "ping"},
+        handlers={"backfill": _heavy, "ping": lambda payload: light_calls.append(str(payload.get("req_id")))},
+    )
+    try:
+        bus.handle_payload({"cmd": "backfill", "req_id": "a-0", "ts": 0, "args": {"symbol": "XAUUSD"}})
+        assert _wait_until(lambda: calls == ["a-0"])
+        for i in range(1, 6):
+            bus.handle_payload({"cmd": "backfill", "req_id": f"a-{i}", "ts": i, "args": {"symbol": "XAUUSD"}})
+        bus.handle_payload({"cmd": "backfill", "req_id": "b-0", "ts": 0, "args": {"symbol": "EURUSD"}})
+        bus.handle_payload({"cmd": "ping", "req_id": "p-0", "ts": 0, "args": {}})
+
+        # Light команда виконується одразу на bus thread, heavy для іншого символу — паралельно.
+        assert light_calls == ["p-0"]
+        assert _wait_until(lambda: "b-0" in calls)
+        heavy = status.snapshot()["command_bus"]["heavy"]
+        assert heavy["workers"] == 2
+        assert sorted(heavy["running"]) == ["backfill:EURUSD", "backfill:XAUUSD"]
+
+        release.set()
+        assert _wait_until(lambda: "a-5" in calls)
+        assert calls.count("a-0") == 1
+        assert not any(req in calls for req in ["a-1", "a-2", "a-3", "a-4"])
+        assert _wait_until(lambda: status.snapshot()["command_bus"]["heavy"]["running"] == [])
+        status.validator.validate_status_v2(status.snapshot())
+    finally:
+        release.set()
+        bus.stop()
+
+
+def test_heavy_pool_priority_order_and_cooperative_yield() -> None:
+    config = Config(
+        command_heavy_cmds=["fxcm_warmup", "fxcm_republish_tail", "fxcm_reconcile_tail"],
+        command_heavy_workers=1,
+        command_rate_limit_enable=False,
+    )
+    status = _build_status(config)
+    gate = threading.Event()
+    events: List[str] = []
+
+    def _warmup(payload: dict) -> None:
+        req_id = str(payload.get("req_id"))
+        for chunk in range(3):
+            events.append(f"{req_id}:chunk{chunk}")
+            if req_id == "w-0" and chunk == 0:
+                gate.wait(timeout=3.0)
+            cooperative_yield()
+
+    bus = CommandBus(
+        redis_client=None,
+        config=config,
+        validator=status.validator,
+        status=status,
+        metrics=status.metrics,
+        allowlist={"fxcm_warmup", "fxcm_republish_tail", "fxcm_reconcile_tail"},
+        handlers={
+            "fxcm_warmup": _warmup,
+            "fxcm_republish_tail": lambda payload: events.append(str(payload.get("req_id"))),
+            "fxcm_reconcile_tail": lambda payload: events.append(str(payload.get("req_id"))),
+        },
+    )
+    try:
+        bus.handle_payload({"cmd": "fxcm_warmup", "req_id": "w-0", "ts": 0, "args": {"symbols": ["XAUUSD"]}})
+        assert _wait_until(lambda: events == ["w-0:chunk0"])
+        bus.handle_payload({"cmd": "fxcm_warmup", "req_id": "w-1", "ts": 0, "args": {"symbols": ["EURUSD"]}})
+        bus.handle_payload({"cmd": "fxcm_republish_tail", "req_id": "rp", "ts": 0, "args": {"symbol": "EURUSD"}})
+        bus.handle_payload({"cmd": "fxcm_reconcile_tail", "req_id": "rc", "ts": 0, "args": {"symbols": ["XAUUSD"]}})
+        gate.set()
+        assert _wait_until(lambda: len(events) == 8)
+        # Єдиний worker: reconcile і republish виконуються у точці поступки warmup, до його наступного чанка.
+        assert events[:4] == ["w-0:chunk0", "rc", "rp", "w-0:chunk1"]
+        assert events[-3:] == ["w-1:chunk0", "w-1:chunk1", "w-1:chunk2"]
+        metrics = status.metrics
+        assert metrics is not None
+        assert metrics.command_yields_total.labels(priority="bulk")._value.get() == 2
+    finally:
+        gate.set()
+        bus.stop()
+
+
+def test_submit_internal_bypasses_auth_and_uses_heavy_pool() -> None:
+    config = Config(command_auth_required=True, command_heavy_workers=1)
+    status = _build_status(config)
+    calls: List[str] = []
+    bus = CommandBus(
+        redis_client=None,
+        config=config,
+        validator=status.validator,
+        status=status,
+        metrics=status.metrics,
+        allowlist={"fxcm_reconcile_tail"},
+        handlers={"fxcm_reconcile_tail": lambda payload: calls.append(str(payload.get("req_id")))},
+    )
+    payload = {"cmd": "fxcm_reconcile_tail", "req_id": "auto_reconcile:1", "ts": 0, "args": {"symbols": ["XAUUSD"]}}
+    try:
+        # Redis шлях без auth відхиляється, in-process job — ні.
+        bus.handle_payload(dict(payload, req_id="external"))
+        assert bus.submit_internal(payload) == "queued"
+        assert _wait_until(lambda: calls == ["auto_reconcile:1"])
+        assert _wait_until(lambda: status.snapshot()["last_command"]["state"] == "ok")
+    finally:
+        bus.stop()
+
+
+def test_heavy_pool_survives_provider_not_configured() -> None:
+    config = Config(command_heavy_cmds=["fxcm_warmup"], command_heavy_workers=1, command_rate_limit_enable=False)
+    status = _build_status(config)
+    calls: List[str] = []
+
+    def _warmup(payload: dict) -> None:
+        req_id = str(payload.get("req_id"))
+        calls.append(req_id)
+        if req_id == "bad":
+            raise ProviderNotConfiguredError("provider не налаштований")
+
+    bus = CommandBus(
+        redis_client=None,
+        config=config,
+        validator=status.validator,
+        status=status,
+        metrics=status.metrics,
+        allowlist={"fxcm_warmup"},
+        handlers={"fxcm_warmup": _warmup},
+    )
+    try:
+        bus.handle_payload({"cmd": "fxcm_warmup", "req_id": "bad", "ts": 0, "args": {"symbols": ["XAUUSD"]}})
+        assert _wait_until(lambda: status.snapshot()["last_command"]["state"] == "error")
+        # Наступна heavy команда не «тоне» в зупиненому пулі.
+        bus.handle_payload({"cmd": "fxcm_warmup", "req_id": "ok", "ts": 1, "args": {"symbols": ["XAUUSD"]}})
+        assert _wait_until(lambda: calls == ["bad", "ok"])
+        assert _wait_until(lambda: status.snapshot()["last_command"]["state"] == "ok")
+    finally:
+        bus.stop()
@@ -106,6 +106,7 @@ def test_heavy_command_collapse_to_latest() -> None:
     config = Config(
         command_heavy_collapse_enable=True,
         command_heavy_cmds=["backfill"],
+        command_heavy_workers=0,
         command_coalesce_enable=True,
         command_coalesce_window_s=60,
     )
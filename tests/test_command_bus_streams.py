@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import CollectorRegistry
+
+from config.config import Config
+from core.time.calendar import Calendar
+from core.validation.validator import SchemaValidator
+from observability.metrics import create_metrics
+from runtime.command_bus import CommandBus
+from runtime.command_stream import STREAM_FIELD, publish_command
+from runtime.status import StatusManager
+from ui_lite.server import _publish_command as _ui_publish_command
+
+
+class InMemoryPublisher:
+    def set_snapshot(self, key: str, json_str: str) -> None:
+        return None
+
+    def publish(self, channel: str, json_str: str) -> None:
+        return None
+
+
+class StreamRedisStandIn:
+    """Мінімальний stand-in Redis Streams (XADD/XGROUP/XREADGROUP/XACK/XAUTOCLAIM)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.entries: List[Tuple[str, Dict[bytes, bytes]]] = []
+        self.last_delivered: Dict[str, int] = {}
+        self.pending: Dict[str, Dict[str, Tuple[str, float]]] = {}
+        self.xreadgroup_calls = 0
+        self.xack_calls = 0
+
+    def xgroup_create(self, name: str, groupname: str, id: str = "$", mkstream: bool = False) -> bool:
+        with self._lock:
+            if groupname in self.last_delivered:
+                raise RuntimeError("BUSYGROUP Consumer Group name already exists")
+            self.last_delivered[groupname] = 0
+            self.pending[groupname] = {}
+        return True
+
+    def xadd(self, name: str, fields: Dict[str, str], maxlen: Optional[int] = None, approximate: bool = True) -> str:
+        with self._lock:
+            self._seq += 1
+            entry_id = f"{self._seq}-0"
+            self.entries.append((entry_id, {k.encode(): v.encode() for k, v in fields.items()}))
+        return entry_id
+
+    def xreadgroup(
+        self,
+        groupname: str,
+        consumername: str,
+        streams: Dict[str, str],
+        count: Optional[int] = None,
+        block: Optional[int] = None,
+    ) -> List[Any]:
+        self.xreadgroup_calls += 1
+        name, last_id = next(iter(streams.items()))
+        limit = int(count or 1_000_000)
+        with self._lock:
+            pending = self.pending[groupname]
+            if last_id == "0":
+                own = [entry for entry in self.entries if pending.get(entry[0], ("", 0.0))[0] == consumername]
+                return [[name.encode(), own[:limit]]] if own else []
+            start = self.last_delivered[groupname]
+            batch = [entry for entry in self.entries if int(entry[0].split("-")[0]) > start][:limit]
+            for entry_id, _fields in batch:
+                pending[entry_id] = (consumername, time.monotonic())
+                self.last_delivered[groupname] = int(entry_id.split("-")[0])
+        if not batch:
+            time.sleep(min(0.05, (block or 0) / 1000.0))
+            return []
+        return [[name.encode(), batch]]
+
+    def xack(self, name: str, groupname: str, *ids: str) -> int:
+        self.xack_calls += 1
+        with self._lock:
+            pending = self.pending[groupname]
+            return sum(1 for entry_id in ids if pending.pop(entry_id, None) is not None)
+
+    def xautoclaim(
+        self,
+        name: str,
+        groupname: str,
+        consumername: str,
+        min_idle_time: int,
+        start_id: str = "0-0",
+        count: Optional[int] = None,
+    ) -> List[Any]:
+        now = time.monotonic()
+        with self._lock:
+            pending = self.pending[groupname]
+            claimed = []
+            for entry_id, fields in self.entries:
+                owner = pending.get(entry_id)
+                if owner is None or owner[0] == consumername:
+                    continue
+                if (now - owner[1]) * 1000 < min_idle_time:
+                    continue
+                pending[entry_id] = (consumername, now)
+                claimed.append((entry_id, fields))
+        return [b"0-0", claimed[: int(count or len(claimed) or 1)], []]
+
+
+def _build(config: Config) -> StatusManager:
+    root_dir = Path(__file__).resolve().parents[1]
+    status = StatusManager(
+        config=config,
+        validator=SchemaValidator(root_dir=root_dir),
+        publisher=InMemoryPublisher(),
+        calendar=Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path),
+        metrics=create_metrics(CollectorRegistry()),
+    )
+    status.build_initial_snapshot()
+    return status
+
+
+def _config(**overrides: Any) -> Config:
+    base: Dict[str, Any] = {
+        "command_transport": "streams",
+        "command_stream_consumer": "c1",
+        "command_stream_batch": 64,
+        "command_stream_block_ms": 50,
+        "command_rate_limit_enable": False,
+        "command_auth_enable": False,
+    }
+    base.update(overrides)
+    return Config(**base)
+
+
+def _ping(req_id: str) -> str:
+    return json.dumps({"cmd": "ping", "req_id": req_id, "ts": 1, "args": {}})
+
+
+def _wait_until(predicate: Callable[[], bool], timeout_s: float = 3.0) -> bool:
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _start_bus(redis: StreamRedisStandIn, config: Config, calls: List[str]) -> CommandBus:
+    status = _build(config)
+    bus = CommandBus(
+        redis_client=redis,
+        config=config,
+        validator=status.validator,
+        status=status,
+        metrics=status.metrics,
+        allowlist={"ping"},
+        handlers={"ping": lambda payload: calls.append(str(payload.get("req_id")))},
+    )
+    assert bus.start()
+    return bus
+
+
+def test_streams_commands_published_while_down_are_drained_in_batches() -> None:
+    config = _config()
+    redis = StreamRedisStandIn()
+    redis.xgroup_create(config.key_commands_stream(), config.command_stream_group, id="0", mkstream=True)
+    for i in range(150):
+        publish_command(redis, config, _ping(f"r{i}"))
+
+    calls: List[str] = []
+    bus = _start_bus(redis, config, calls)
+    try:
+        assert _wait_until(lambda: len(calls) == 150)
+        assert calls == [f"r{i}" for i in range(150)]
+        assert _wait_until(lambda: not redis.pending[config.command_stream_group])
+        # 150 записів → 3 batch-читання і 3 batched XACK (а не 150).
+        assert redis.xack_calls <= 4
+    finally:
+        bus.stop()
+
+
+def test_streams_recovers_own_and_stale_pending_entries() -> None:
+    config = _config(command_stream_claim_idle_ms=0)
+    redis = StreamRedisStandIn()
+    stream = config.key_commands_stream()
+    group = config.command_stream_group
+    redis.xgroup_create(stream, group, id="0", mkstream=True)
+    publish_command(redis, config, _ping("own"))
+    redis.xreadgroup(group, "c1", {stream: ">"}, count=1)
+    publish_command(redis, config, _ping("stale"))
+    redis.xreadgroup(group, "dead-consumer", {stream: ">"}, count=1)
+    publish_command(redis, config, _ping("new"))
+
+    calls: List[str] = []
+    bus = _start_bus(redis, config, calls)
+    try:
+        assert _wait_until(lambda: sorted(calls) == ["new", "own", "stale"])
+        assert calls[0] == "own"
+        assert _wait_until(lambda: not redis.pending[group])
+    finally:
+        bus.stop()
+
+
+def test_ui_lite_commands_and_status_follow_streams_transport() -> None:
+    config = _config()
+    redis = StreamRedisStandIn()
+    ok, reason = _ui_publish_command(redis, config, {"cmd": "ping", "req_id": "ui-1", "ts": 1, "args": {}})
+    assert (ok, reason) == (True, "ok")
+    assert json.loads(redis.entries[-1][1][STREAM_FIELD.encode()].decode())["req_id"] == "ui-1"
+    status = _build(config)
+    assert status.snapshot()["command_bus"]["channel"] == config.key_commands_stream()
+
+
+def test_streams_heavy_entry_stays_pending_until_job_finishes() -> None:
+    config = _config()
+    redis = StreamRedisStandIn()
+    group = config.command_stream_group
+    started = threading.Event()
+    release = threading.Event()
+    calls: List[str] = []
+
+    def warmup(payload: Dict[str, Any]) -> None:
+        started.set()
+        release.wait(timeout=5.0)
+        calls.append(str(payload.get("req_id")))
+
+    status = _build(config)
+    bus = CommandBus(
+        redis_client=redis,
+        config=config,
+        validator=status.validator,
+        status=status,
+        metrics=status.metrics,
+        allowlist={"ping", "fxcm_warmup"},
+        handlers={"ping": lambda payload: calls.append(str(payload.get("req_id"))), "fxcm_warmup": warmup},
+    )
+    assert bus.start()
+    try:
+        heavy = {"cmd": "fxcm_warmup", "req_id": "w-1", "ts": 1, "args": {"symbols": ["XAUUSD"]}}
+        heavy_id = redis.xadd(config.key_commands_stream(), {STREAM_FIELD: json.dumps(heavy)})
+        assert started.wait(timeout=3.0)
+        collapsed_id = redis.xadd(config.key_commands_stream(), {STREAM_FIELD: json.dumps(dict(heavy, req_id="w-2"))})
+        publish_command(redis, config, _ping("p-1"))
+        assert _wait_until(lambda: "p-1" in calls)
+        # Job ще виконується: запис pending (crash → recovery), collapsed і ping — ACK.
+        assert _wait_until(lambda: collapsed_id not in redis.pending[group])
+        assert list(redis.pending[group]) == [heavy_id]
+        release.set()
+        assert _wait_until(lambda: not redis.pending[group])
+        assert _wait_until(lambda: calls == ["p-1", "w-1", "w-2"])
+    finally:
+        release.set()
+        bus.stop()
@@ -5,8 +5,9 @@ import os
 import time
 from hashlib import sha256
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
+import pytest
 from prometheus_client import CollectorRegistry
 
 from config.config import Config
@@ -191,3 +192,87 @@ def test_replay_req_id_rejected_setnx_ttl() -> None:
     last = errors[-1]
     assert last.get("code") == "replay_rejected"
     assert last.get("message") == "Команда відхилена"
+
+
+class CountingRedis(FakeRedis):
+    def __init__(self) -> None:
+        super().__init__()
+        self.set_calls = 0
+
+    def set(self, key: str, value: str, nx: bool = False, px: Optional[int] = None) -> bool:
+        self.set_calls += 1
+        return super().set(key, value, nx=nx, px=px)
+
+
+def test_replay_rejected_by_local_nonce_cache_without_redis() -> None:
+    kid = "k1"
+    secret = "s1"
+    os.environ["FXCM_HMAC_KID"] = kid
+    os.environ["FXCM_HMAC_SECRET"] = secret
+
+    config = Config(
+        command_auth_enable=True,
+        command_auth_required=True,
+        command_auth_allowed_kids=[kid],
+        command_rate_limit_enable=False,
+    )
+    status = _build_status(config)
+    redis = CountingRedis()
+    calls = []
+
+    bus = CommandBus(
+        redis_client=redis,
+        config=config,
+        validator=status.validator,
+        status=status,
+        metrics=status.metrics,
+        allowlist={"ping"},
+        handlers={"ping": lambda payload: calls.append(payload.get("req_id"))},
+    )
+
+    ts_ms = int(time.time() * 1000)
+    payload = {"cmd": "ping", "req_id": "r1", "ts": ts_ms, "args": {}}
+    sig = _sign_payload(payload, kid=kid, nonce="n1", secret=secret)
+    payload["auth"] = {"kid": kid, "sig": sig, "nonce": "n1"}
+
+    for _ in range(50):
+        bus.handle_payload(dict(payload))
+
+    assert calls == ["r1"]
+    assert redis.set_calls == 1
+    last = status.snapshot().get("errors", [])[-1]
+    assert last.get("code") == "replay_rejected"
+
+
+def test_secrets_cached_until_explicit_reload(monkeypatch: pytest.MonkeyPatch) -> None:
+    from runtime import command_auth
+
+    kid = "k1"
+    os.environ["FXCM_HMAC_KID"] = kid
+    os.environ["FXCM_HMAC_SECRET"] = "s1"
+    resolve_calls = {"n": 0}
+    original = command_auth._resolve_secrets
+
+    def _counting_resolve(config: Config) -> Tuple[Dict[str, str], Optional[str]]:
+        resolve_calls["n"] += 1
+        return original(config)
+
+    monkeypatch.setattr(command_auth, "_resolve_secrets", _counting_resolve)
+    config = Config(command_auth_enable=True, command_auth_allowed_kids=[kid])
+    state = command_auth.CommandAuthState()
+    redis = FakeRedis()
+    ts_ms = int(time.time() * 1000)
+
+    for i in range(5):
+        payload = {"cmd": "ping", "req_id": f"r{i}", "ts": ts_ms, "args": {}}
+        sig = _sign_payload(payload, kid=kid, nonce=f"n{i}", secret="s1")
+        payload["auth"] = {"kid": kid, "sig": sig, "nonce": f"n{i}"}
+        assert command_auth.verify_command_auth(payload, config, redis, state=state) == (True, "ok")
+    assert resolve_calls["n"] == 1
+
+    state.reload()
+    payload = {"cmd": "ping", "req_id": "r9", "ts": ts_ms, "args": {}}
+    sig = _sign_payload(payload, kid=kid, nonce="n9", secret="s1")
+    payload["auth"] = {"kid": kid, "sig": sig, "nonce": "n9"}
+    assert command_auth.verify_command_auth(payload, config, redis, state=state) == (True, "ok")
+    assert resolve_calls["n"] == 2
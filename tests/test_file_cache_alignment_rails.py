@@ -4,8 +4,12 @@ from pathlib import Path
 
 import pytest
 
+from config.config import Config
+from core.time.calendar import Calendar
 from store.file_cache.history_cache import FileCache
 
+DAY_MS = 24 * 60 * 60 * 1000
+
 
 def test_file_cache_alignment_rails(tmp_path: Path) -> None:
     cache = FileCache(root=tmp_path, max_bars=10, warmup_bars=0, strict=True)
@@ -34,3 +38,45 @@ def test_file_cache_alignment_rails(tmp_path: Path) -> None:
     }
     with pytest.raises(ValueError):
         cache.append_complete_bars(symbol="XAUUSD", tf="1m", bars=[bad_close])
+
+
+def _day_bar(open_ms: int, close_ms: int) -> dict:
+    return {
+        "open_time": open_ms,
+        "close_time": close_ms,
+        "open": 1.0,
+        "high": 1.1,
+        "low": 0.9,
+        "close": 1.05,
+        "volume": 10.0,
+        "complete": True,
+    }
+
+
+def test_file_cache_1d_rails_strict_without_calendar(tmp_path: Path) -> None:
+    config = Config()
+    calendar = Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+    cache = FileCache(root=tmp_path, max_bars=10, warmup_bars=0, strict=True)
+    day_open = calendar.trading_day_boundary_for(1_736_935_200_000)
+    day_close = calendar.next_trading_day_boundary_ms(day_open) - 1
+    assert day_open % DAY_MS != 0
+
+    # Звичайні writers 1d: лише epoch 24h бакет, торгова доба без calendar — відмова.
+    with pytest.raises(ValueError):
+        cache.append_complete_bars(symbol="XAUUSD", tf="1d", bars=[_day_bar(day_open, day_close)])
+    epoch_open = day_open - day_open % DAY_MS
+    cache.append_complete_bars(symbol="XAUUSD", tf="1d", bars=[_day_bar(epoch_open, epoch_open + DAY_MS - 1)])
+
+    # HTF derivation (з calendar): точна trading_day_boundary; зсув на годину — відмова.
+    cache.append_complete_bars(symbol="XAUUSD", tf="1d", bars=[_day_bar(day_open, day_close)], calendar=calendar)
+    with pytest.raises(ValueError):
+        cache.append_complete_bars(
+            symbol="XAUUSD",
+            tf="1d",
+            bars=[_day_bar(day_open + 3_600_000, day_close + 3_600_000)],
+            calendar=calendar,
+        )
+    with pytest.raises(ValueError):
+        cache.append_complete_bars(
+            symbol="XAUUSD", tf="1d", bars=[_day_bar(epoch_open, epoch_open + DAY_MS - 1)], calendar=calendar
+        )
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from runtime.history_plan import build_history_fetch_plan
+from store.file_cache.history_cache import FileCache
+
+
+def _bar(open_ms: int, open_price: float) -> Dict[str, Any]:
+    return {
+        "open_time_ms": open_ms,
+        "close_time_ms": open_ms + 60_000 - 1,
+        "open": open_price,
+        "high": open_price + 1.0,
+        "low": open_price - 1.0,
+        "close": open_price + 0.5,
+        "volume": 10.0,
+        "complete": True,
+    }
+
+
+class CountingFileCache(FileCache):
+    writes = 0
+
+    def append_complete_bars(self, *args: Any, **kwargs: Any) -> Any:
+        self.writes += 1
+        return super().append_complete_bars(*args, **kwargs)
+
+
+def test_ingest_session_single_write_and_incremental_coverage(tmp_path: Path) -> None:
+    cache = CountingFileCache(root=tmp_path, max_bars=150, warmup_bars=0, strict=True)
+    base = 1_700_000_000_000
+    base -= base % 60_000
+    cache.append_complete_bars("XAUUSD", "1m", [_bar(base, 1.0), _bar(base + 60_000, 1.0)], source="history")
+    cache.writes = 0
+
+    with cache.ingest_session("XAUUSD", "1m") as session:
+        assert set(session.cached_open_ms()) == {base, base + 60_000}
+        for chunk in range(10):
+            bars: List[Dict[str, Any]] = [_bar(base + (chunk * 20 + idx) * 60_000, 2.0) for idx in range(20)]
+            session.add(bars)
+            first_open, last_close, total = session.coverage() or (0, 0, 0)
+            # Покриття враховує trim до max_bars (лишаються найновіші бари).
+            assert first_open == base + max(0, chunk * 20 + 20 - 150) * 60_000
+            assert last_close == base + (chunk * 20 + 20) * 60_000 - 1
+            assert total == min(150, chunk * 20 + 20)
+        assert cache.writes == 0
+    assert cache.writes == 1
+
+    rows, meta = cache.load("XAUUSD", "1m")
+    assert len(rows) == 150
+    assert session.coverage() == (int(rows[0]["open_time_ms"]), int(rows[-1]["close_time_ms"]), len(rows))
+    # Дубль open_time перезаписаний новим значенням (keep last), як в append_complete_bars.
+    assert rows[-1]["open"] == 2.0
+    assert meta["last_write_source"] == "history"
+
+
+def test_ingest_session_spills_buffer_and_keeps_bars_on_error(tmp_path: Path) -> None:
+    cache = CountingFileCache(root=tmp_path, max_bars=1000, warmup_bars=0, strict=True)
+    base = 1_700_000_000_000
+    base -= base % 60_000
+    with pytest.raises(RuntimeError):
+        with cache.ingest_session("XAUUSD", "1m", max_buffer_bars=25) as session:
+            for chunk in range(4):
+                session.add([_bar(base + (chunk * 10 + idx) * 60_000, 1.0) for idx in range(10)])
+            raise RuntimeError("fxcm throttled")
+    # 40 барів при буфері 25: проміжний spill на 30 + фінальний flush решти на виході з сесії.
+    assert cache.writes == 2
+    rows, _meta = cache.load("XAUUSD", "1m")
+    assert len(rows) == 40
+
+    with pytest.raises(ValueError):
+        cache.ingest_session("XAUUSD", "1m").add([dict(_bar(base, 1.0), close_time_ms=base + 1)])
+
+
+def test_ingest_session_stream_close_bars_still_planned_for_history(tmp_path: Path) -> None:
+    cache = FileCache(root=tmp_path, max_bars=1000, warmup_bars=0, strict=True)
+    base = 1_736_935_200_000  # 2025-01-15T10:00:00Z (середа)
+    stream = [_bar(base + idx * 60_000, 1.0) for idx in range(30)]
+    cache.append_complete_bars("XAUUSD", "1m", stream, source="stream_close")
+
+    with cache.ingest_session("XAUUSD", "1m") as session:
+        assert set(session.cached_open_ms()) == set()
+        plan = build_history_fetch_plan(base, base + 30 * 60_000 - 1, None, session.cached_open_ms())
+        assert plan.missing == [(base, base + 29 * 60_000)]
+        session.add([_bar(base, 2.0)])
+        assert set(session.cached_open_ms()) == {base}
+
+    # Після history overwrite хвилина final: наступний план її не перезапитує.
+    with cache.ingest_session("XAUUSD", "1m") as session:
+        plan = build_history_fetch_plan(base, base + 30 * 60_000 - 1, None, session.cached_open_ms())
+        assert plan.missing == [(base + 60_000, base + 29 * 60_000)]
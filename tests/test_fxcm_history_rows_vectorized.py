@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import pytest
+
+from core.validation.validator import ContractError
+from runtime.fxcm import history_provider
+from runtime.fxcm.history_provider import _history_to_bars, _rows_to_bars, _rows_to_bars_per_row
+
+BASE = datetime(2026, 2, 2, 0, 0, tzinfo=timezone.utc)
+
+
+def _dict_rows(count: int) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    for idx in range(count):
+        rows.append(
+            {
+                "Date": BASE + timedelta(minutes=idx),
+                "BidOpen": 1.0 + idx * 1e-5,
+                "BidHigh": 1.1 + idx * 1e-5,
+                "BidLow": 0.9 + idx * 1e-5,
+                "BidClose": 1.05 + idx * 1e-5,
+                "AskOpen": 1.0,
+                "AskHigh": 1.1,
+                "AskLow": 0.9,
+                "AskClose": 1.05,
+                "Volume": idx % 17,
+            }
+        )
+    return rows
+
+
+@pytest.fixture(params=["numpy", "pure_python"])
+def numpy_mode(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(history_provider, "_NUMPY_STATE", {})
+    else:
+        monkeypatch.setattr(history_provider, "_NUMPY_STATE", {"module": None})
+    return str(request.param)
+
+
+def test_vectorized_rows_match_per_row_10k(numpy_mode: str) -> None:
+    rows = _dict_rows(10_000)
+    rows[3]["BidOpen"] = None
+    rows[7]["BidOpen"] = None
+    rows[7]["open"] = 2.5
+    rows[11]["Volume"] = None
+    assert _rows_to_bars("EURUSD", rows, 9_000) == _rows_to_bars_per_row("EURUSD", rows, 9_000)
+
+
+def test_vectorized_numeric_and_string_dates_match(numpy_mode: str) -> None:
+    rows = [
+        {"open_time_ms": 1769970000, "open": "1.5", "high": 2, "low": 1, "close": 1.5, "volume": 3},
+        {"open_time_ms": 1769970060000, "open": 1.5, "high": 2, "low": 1, "close": 1.5, "volume": 3},
+        {"open_time_ms": 1769970120000000, "open": 1.5, "high": 2, "low": 1, "close": 1.5, "volume": 3},
+        {"open_time_ms": BASE, "open": 1, "high": 2, "low": 1, "close": 1.5, "volume": 3},
+    ]
+    assert _rows_to_bars("EURUSD", rows, 10) == _rows_to_bars_per_row("EURUSD", rows, 10)
+
+
+def test_vectorized_keeps_error_evidence(numpy_mode: str) -> None:
+    rows = _dict_rows(20)
+    rows[5]["Date"] = None
+    with pytest.raises(ContractError) as fast_exc:
+        _rows_to_bars("EURUSD", rows, 100)
+    with pytest.raises(ContractError) as slow_exc:
+        _rows_to_bars_per_row("EURUSD", rows, 100)
+    assert str(fast_exc.value) == str(slow_exc.value)
+    assert "history_row_missing_date: row_keys" in str(fast_exc.value)
+
+    rows = _dict_rows(20)
+    rows[2]["Date"] = "not-a-date"
+    with pytest.raises(ContractError, match="history_row_date_invalid"):
+        _rows_to_bars("EURUSD", rows, 100)
+
+
+def test_structured_array_columns_converted_in_bulk() -> None:
+    np = pytest.importorskip("numpy")
+    dtype = [
+        ("Date", "datetime64[ms]"),
+        ("BidOpen", "f8"),
+        ("BidHigh", "f8"),
+        ("BidLow", "f8"),
+        ("BidClose", "f8"),
+        ("AskOpen", "f8"),
+        ("AskHigh", "f8"),
+        ("AskLow", "f8"),
+        ("AskClose", "f8"),
+        ("Volume", "i8"),
+    ]
+    count = 10_000
+    history = np.zeros(count, dtype=dtype)
+    start_ms = int(BASE.timestamp() * 1000)
+    history["Date"] = np.arange(start_ms, start_ms + count * 60_000, 60_000).astype("datetime64[ms]")
+    history["BidOpen"] = 1.0
+    history["BidHigh"] = 1.2
+    history["BidLow"] = 0.8
+    history["BidClose"] = 1.1
+    history["Volume"] = 7
+    bars = _history_to_bars("EURUSD", history, 1000)
+    assert len(bars) == 1000
+    assert bars[0]["open_time_ms"] == start_ms
+    assert bars[-1]["close_time_ms"] == start_ms + 1000 * 60_000 - 1
+    assert bars[0]["open"] == 1.0 and bars[0]["high"] == 1.2 and bars[0]["volume"] == 7.0
+    assert isinstance(bars[0]["open_time_ms"], int) and isinstance(bars[0]["open"], float)
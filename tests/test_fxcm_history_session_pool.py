@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import sys
+import time
+import types
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import pytest
+
+from config.config import Config
+from core.validation.validator import ContractError
+from runtime.fxcm.history_provider import FxcmForexConnectHistoryAdapter
+from runtime.fxcm.history_session_pool import ForexConnectSessionPool
+
+
+class FakeForexConnect:
+    logins = 0
+    logouts = 0
+    fail_next_fetch = 0
+    connected = True
+
+    def login(self, *args: Any) -> None:
+        FakeForexConnect.logins += 1
+
+    def logout(self) -> None:
+        FakeForexConnect.logouts += 1
+
+    def is_connected(self) -> bool:
+        return FakeForexConnect.connected
+
+    def get_history(self, instrument: str, tf: str, start_dt: datetime, end_dt: datetime) -> List[Any]:
+        if FakeForexConnect.fail_next_fetch > 0:
+            FakeForexConnect.fail_next_fetch -= 1
+            raise RuntimeError("session lost")
+        rows = []
+        t = start_dt
+        while t <= end_dt:
+            rows.append({"Date": t, "BidOpen": 1.0, "BidHigh": 2.0, "BidLow": 0.5, "BidClose": 1.5, "Volume": 3})
+            t += timedelta(minutes=1)
+        return rows
+
+
+@pytest.fixture
+def fake_forexconnect(monkeypatch: pytest.MonkeyPatch) -> Any:
+    FakeForexConnect.logins = 0
+    FakeForexConnect.logouts = 0
+    FakeForexConnect.fail_next_fetch = 0
+    FakeForexConnect.connected = True
+    module = types.ModuleType("forexconnect")
+    module.ForexConnect = FakeForexConnect  # type: ignore[attr-defined]
+    monkeypatch.setitem(sys.modules, "forexconnect", module)
+    return FakeForexConnect
+
+
+def _adapter(**overrides: Any) -> FxcmForexConnectHistoryAdapter:
+    base: Dict[str, Any] = {"fxcm_backend": "forexconnect", "fxcm_username": "u", "fxcm_password": "p"}
+    base.update(overrides)
+    return FxcmForexConnectHistoryAdapter(config=Config(**base))
+
+
+def test_history_session_reused_across_chunks(fake_forexconnect: Any) -> None:
+    adapter = _adapter()
+    start_ms = 1_768_000_000_000 - 1_768_000_000_000 % 60_000
+    for idx in range(50):
+        chunk_start = start_ms + idx * 24 * 60_000
+        bars = adapter.fetch_1m("EURUSD", chunk_start, chunk_start + 23 * 60_000, 1000)
+        assert len(bars) == 24
+    assert fake_forexconnect.logins == 1
+    assert fake_forexconnect.logouts == 0
+    adapter.close()
+    assert fake_forexconnect.logouts == 1
+
+
+def test_history_session_relogin_on_failure_and_health(fake_forexconnect: Any) -> None:
+    adapter = _adapter(history_session_health_check_s=0)
+    start_ms = 1_768_000_000_000 - 1_768_000_000_000 % 60_000
+    adapter.fetch_1m("EURUSD", start_ms, start_ms + 60_000, 10)
+    assert fake_forexconnect.logins == 1
+
+    # Перевикористана сесія впала → прозорий re-login і повтор запиту.
+    fake_forexconnect.fail_next_fetch = 1
+    bars = adapter.fetch_1m("EURUSD", start_ms, start_ms + 60_000, 10)
+    assert len(bars) == 2
+    assert fake_forexconnect.logins == 2
+
+    # Health check не пройшов → стара сесія закривається без запиту.
+    fake_forexconnect.connected = False
+    adapter.fetch_1m("EURUSD", start_ms, start_ms + 60_000, 10)
+    fake_forexconnect.connected = True
+    assert fake_forexconnect.logins == 3
+
+    # Свіжа сесія впала → помилка без нескінченного re-login.
+    adapter.close()
+    adapter = _adapter()
+    fake_forexconnect.fail_next_fetch = 2
+    with pytest.raises(ContractError):
+        adapter.fetch_1m("EURUSD", start_ms, start_ms + 60_000, 10)
+    assert fake_forexconnect.logins == 4
+
+
+def test_history_session_idle_timeout(fake_forexconnect: Any) -> None:
+    pool = ForexConnectSessionPool(login=fake_forexconnect, idle_timeout_s=0.05)
+    with pool.lease():
+        pass
+    assert pool.idle_count() == 1
+    time.sleep(0.1)
+    with pool.lease():
+        pass
+    assert pool.logins_total == 2
+    assert fake_forexconnect.logouts == 1
+    pool.close()
+
+
+def test_history_session_idle_reaped_without_new_lease(fake_forexconnect: Any) -> None:
+    now = [1_000.0]
+    pool = ForexConnectSessionPool(
+        login=fake_forexconnect, idle_timeout_s=300.0, clock=lambda: now[0], reap_interval_s=0.01
+    )
+    with pool.lease():
+        pass
+    time.sleep(0.05)
+    assert pool.idle_count() == 1 and fake_forexconnect.logouts == 0
+    # Тиха пауза без history запитів: reaper сам закриває сесію після idle_timeout_s.
+    now[0] += 301.0
+    deadline = time.time() + 2.0
+    while pool.idle_count() and time.time() < deadline:
+        time.sleep(0.01)
+    assert pool.idle_count() == 0 and fake_forexconnect.logouts == 1
+    pool.close()
+    assert fake_forexconnect.logouts == 1
+
+
+def test_history_session_pool_covers_max_inflight(fake_forexconnect: Any) -> None:
+    assert _adapter(history_max_inflight=3).session_pool()._max_sessions == 3
+    assert _adapter(history_max_inflight=1, history_session_pool_size=2).session_pool()._max_sessions == 2
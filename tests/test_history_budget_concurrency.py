@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from runtime.fxcm.history_budget import build_history_budget
+from runtime.fxcm.history_provider import FxcmHistoryAdapter, FxcmHistoryProvider
+from runtime.history_provider import run_per_symbol
+
+
+class SleepAdapter(FxcmHistoryAdapter):
+    def __init__(self, sleep_s: float) -> None:
+        self._sleep_s = sleep_s
+        self._lock = threading.Lock()
+        self.active: Dict[str, int] = {}
+        self.max_parallel = 0
+        self.same_symbol_overlap = False
+
+    def fetch_1m(self, symbol: str, start_ms: int, end_ms: int, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self.active.get(symbol):
+                self.same_symbol_overlap = True
+            self.active[symbol] = self.active.get(symbol, 0) + 1
+            self.max_parallel = max(self.max_parallel, sum(self.active.values()))
+        time.sleep(self._sleep_s)
+        with self._lock:
+            self.active[symbol] -= 1
+        return []
+
+
+def test_history_budget_max_inflight_per_symbol_exclusive() -> None:
+    budget = build_history_budget(600, max_inflight=2)
+    assert budget.acquire("EURUSD") is False
+    assert budget.acquire("XAUUSD") is False
+    assert budget.inflight_count() == 2
+
+    acquired = threading.Event()
+
+    def _third() -> None:
+        budget.acquire("EURUSD")
+        acquired.set()
+        budget.release("EURUSD")
+
+    thread = threading.Thread(target=_third)
+    thread.start()
+    time.sleep(0.1)
+    # Ліміт 2 вичерпано і EURUSD вже в польоті → чекає.
+    assert not acquired.is_set()
+    budget.release("XAUUSD")
+    time.sleep(0.1)
+    # Глобальний слот звільнився, але EURUSD досі зайнятий.
+    assert not acquired.is_set()
+    budget.release("EURUSD")
+    assert acquired.wait(timeout=1.0)
+    thread.join(timeout=1.0)
+
+
+def test_run_per_symbol_fans_out_under_budget() -> None:
+    symbols = ["EURUSD", "XAUUSD", "GBPUSD", "USDJPY"]
+    adapter = SleepAdapter(sleep_s=0.1)
+    provider = FxcmHistoryProvider(adapter=adapter, budget=build_history_budget(600, max_inflight=4))
+
+    def _fetch(symbol: str) -> None:
+        for idx in range(3):
+            provider._fetch_chunk(symbol, idx * 60_000, idx * 60_000 + 59_999, 10)
+
+    started = time.monotonic()
+    run_per_symbol(symbols, _fetch, max_workers=4)
+    elapsed = time.monotonic() - started
+    # Послідовно було б 4 × 3 × 0.1 = 1.2 с.
+    assert elapsed < 0.8
+    assert adapter.max_parallel >= 2
+    assert not adapter.same_symbol_overlap
+
+
+def test_run_per_symbol_raises_first_error_after_all_symbols() -> None:
+    done: List[str] = []
+
+    def _fn(symbol: str) -> None:
+        if symbol == "B":
+            raise ValueError("boom")
+        time.sleep(0.05)
+        done.append(symbol)
+
+    with pytest.raises(ValueError):
+        run_per_symbol(["A", "B", "C"], _fn, max_workers=3)
+    assert sorted(done) == ["A", "C"]
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from config.config import Config
+from core.time.calendar import Calendar
+from core.validation.validator import SchemaValidator
+from observability.metrics import create_metrics
+from runtime.backfill import run_backfill
+from runtime.status import StatusManager
+from store.file_cache import FileCache
+
+# 2026-01-20 (вівторок) 00:00 UTC: перші 10 годин ринок відкритий.
+DAY_START_MS = 1_768_867_200_000
+
+
+class InMemoryPublisher:
+    def set_snapshot(self, key: str, json_str: str) -> None:
+        return None
+
+    def publish(self, channel: str, json_str: str) -> None:
+        return None
+
+
+class ThrottledProvider:
+    """Віддає бар на кожну хвилину; після fail_after запитів падає (throttle)."""
+
+    def __init__(self, fail_after: int = 0) -> None:
+        self.fail_after = fail_after
+        self.requests: List[Tuple[int, int]] = []
+
+    def fetch_1m_final(self, symbol: str, start_ms: int, end_ms: int, limit: int) -> List[Dict[str, Any]]:
+        if self.fail_after and len(self.requests) >= self.fail_after:
+            raise RuntimeError("fxcm throttled")
+        self.requests.append((start_ms, end_ms))
+        return [
+            {
+                "open_time_ms": open_ms,
+                "close_time_ms": open_ms + 59_999,
+                "open": 1.0,
+                "high": 1.0,
+                "low": 1.0,
+                "close": 1.0,
+                "volume": 1.0,
+            }
+            for open_ms in range(start_ms, end_ms, 60_000)
+        ]
+
+    def is_history_ready(self) -> Tuple[bool, str]:
+        return True, ""
+
+    def should_backoff(self, now_ms: int) -> bool:
+        return False
+
+    def note_not_ready(self, now_ms: int, reason: str) -> int:
+        return now_ms
+
+
+def _status(config: Config) -> StatusManager:
+    root_dir = Path(__file__).resolve().parents[1]
+    status = StatusManager(
+        config=config,
+        validator=SchemaValidator(root_dir=root_dir),
+        publisher=InMemoryPublisher(),
+        calendar=Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path),
+        metrics=create_metrics(CollectorRegistry()),
+    )
+    status.build_initial_snapshot()
+    return status
+
+
+def test_backfill_resumes_from_checkpoint_after_throttle(tmp_path: Path) -> None:
+    config = Config(
+        cache_root=str(tmp_path),
+        history_chunk_minutes=60,
+        history_chunk_adaptive=False,
+        history_checkpoint_interval_s=0,
+    )
+    status = _status(config)
+    cache = FileCache(root=tmp_path, max_bars=60_000, warmup_bars=0, strict=True)
+    start_ms = DAY_START_MS
+    end_ms = DAY_START_MS + 10 * 60 * 60_000
+    kwargs: Dict[str, Any] = {
+        "config": config,
+        "file_cache": cache,
+        "status": status,
+        "metrics": status.metrics,
+        "symbol": "XAUUSD",
+        "start_ms": start_ms,
+        "end_ms": end_ms,
+        "publish_callback": None,
+        "force": True,
+    }
+
+    throttled = ThrottledProvider(fail_after=4)
+    with pytest.raises(RuntimeError):
+        run_backfill(provider=throttled, **kwargs)
+    # Вже отримані 4 чанки записані у FileCache, checkpoint — на кінці 4-го чанку.
+    rows, _meta = cache.load("XAUUSD", "1m")
+    assert len(rows) == 4 * 60
+    checkpoints = json.loads((tmp_path / config.history_checkpoint_file).read_text(encoding="utf-8"))
+    saved = checkpoints["jobs"]["XAUUSD:backfill"]
+    assert saved["done_until_ms"] == start_ms + 4 * 60 * 60_000 - 1
+    assert saved["completed"] is False
+    failed = status.snapshot()["history"]["progress"]["XAUUSD:backfill"]
+    assert failed["state"] == "failed" and failed["percent"] == 40.0
+
+    # Повторна команда (force=True ігнорує кеш) продовжує з checkpoint.
+    resumed = ThrottledProvider()
+    run_backfill(provider=resumed, **kwargs)
+    assert resumed.requests[0][0] == start_ms + 4 * 60 * 60_000
+    assert len(resumed.requests) == 6
+    rows, _meta = cache.load("XAUUSD", "1m")
+    assert len(rows) == 10 * 60
+    progress = status.snapshot()["history"]["progress"]["XAUUSD:backfill"]
+    assert progress["state"] == "done" and progress["percent"] == 100.0
+    assert progress["resumed"] is True and progress["bars"] == 6 * 60
+    assert status.metrics is not None
+    assert status.metrics.history_resumes_total.labels(context="backfill")._value.get() == 1
+    status.publish_snapshot()
+
+    # Завершений checkpoint не скорочує наступний force backfill.
+    again = ThrottledProvider()
+    run_backfill(provider=again, **kwargs)
+    assert len(again.requests) == 10
+
+
+def test_force_backfill_of_other_range_ignores_stale_checkpoint(tmp_path: Path) -> None:
+    config = Config(
+        cache_root=str(tmp_path),
+        history_chunk_minutes=60,
+        history_chunk_adaptive=False,
+        history_checkpoint_interval_s=0,
+    )
+    status = _status(config)
+    cache = FileCache(root=tmp_path, max_bars=60_000, warmup_bars=0, strict=True)
+    kwargs: Dict[str, Any] = {
+        "config": config,
+        "file_cache": cache,
+        "status": status,
+        "metrics": status.metrics,
+        "symbol": "XAUUSD",
+        "publish_callback": None,
+        "force": True,
+    }
+    with pytest.raises(RuntimeError):
+        run_backfill(
+            provider=ThrottledProvider(fail_after=4),
+            start_ms=DAY_START_MS,
+            end_ms=DAY_START_MS + 10 * 60 * 60_000,
+            **kwargs,
+        )
+
+    # Інша force команда (ширше вікно, з того ж start) перезапитує все, а не з done_until_ms.
+    other = ThrottledProvider()
+    run_backfill(provider=other, start_ms=DAY_START_MS, end_ms=DAY_START_MS + 9 * 60 * 60_000 + 30 * 60_000, **kwargs)
+    assert other.requests[0][0] == DAY_START_MS
+    assert len(other.requests) == 10
+    progress = status.snapshot()["history"]["progress"]["XAUUSD:backfill"]
+    assert progress["resumed"] is False
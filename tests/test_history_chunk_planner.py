@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from core.validation.validator import ContractError
+from observability.metrics import create_metrics
+from runtime.fxcm.history_budget import build_history_budget
+from runtime.fxcm.history_chunk_planner import (
+    OUTCOME_OK,
+    OUTCOME_SLOW,
+    OUTCOME_TRUNCATED,
+    HistoryChunkPlanner,
+)
+from runtime.fxcm.history_provider import FxcmHistoryAdapter, FxcmHistoryProvider, HistoryChunkSizeError
+
+START_MS = 1_768_003_200_000
+
+
+class MinuteAdapter(FxcmHistoryAdapter):
+    """Повертає бар на кожну хвилину; чанки довші за max_ok_minutes падають (timeout)."""
+
+    def __init__(self, max_ok_minutes: int = 10_000) -> None:
+        self.max_ok_minutes = max_ok_minutes
+        self.calls: List[int] = []
+
+    def fetch_1m(self, symbol: str, start_ms: int, end_ms: int, limit: int) -> List[Dict[str, Any]]:
+        minutes = (end_ms - start_ms + 1) // 60_000
+        self.calls.append(int(minutes))
+        if minutes > self.max_ok_minutes:
+            raise HistoryChunkSizeError("fxcm history fetch failed: timeout")
+        bars = []
+        # Як FXCM: початок діапазону округлюється до хвилини.
+        for open_ms in range(start_ms - start_ms % 60_000, end_ms, 60_000):
+            bars.append({"open_time_ms": open_ms, "close_time_ms": open_ms + 59_999})
+        return bars[:limit]
+
+
+def test_chunk_planner_grows_shrinks_and_persists(tmp_path: Path) -> None:
+    state_path = tmp_path / "plan.json"
+    planner = HistoryChunkPlanner(initial_minutes=24, state_path=state_path)
+    assert planner.chunk_minutes("EURUSD", limit=1000) == 24
+    for _ in range(20):
+        planner.record("EURUSD", planner.chunk_minutes("EURUSD", 1000), OUTCOME_OK, limit=1000)
+    # Росте, але не більше limit барів за запит.
+    assert planner.chunk_minutes("EURUSD", limit=1000) == 1000
+    planner.record("EURUSD", 1000, OUTCOME_SLOW, limit=1000)
+    assert planner.chunk_minutes("EURUSD", limit=1000) == 500
+    planner.record("EURUSD", 500, OUTCOME_TRUNCATED, limit=1000)
+    assert planner.chunk_minutes("EURUSD", limit=1000) == 250
+    assert planner.chunk_minutes("XAUUSD", limit=1000) == 24
+
+    restored = HistoryChunkPlanner(initial_minutes=24, state_path=state_path)
+    assert restored.chunk_minutes("EURUSD", limit=1000) == 250
+    assert restored.chunk_minutes("XAUUSD", limit=1000) == 24
+
+
+def test_adaptive_fetch_reduces_requests_and_recovers_from_errors() -> None:
+    metrics = create_metrics(CollectorRegistry())
+    adapter = MinuteAdapter(max_ok_minutes=300)
+    planner = HistoryChunkPlanner(initial_minutes=24, min_minutes=5, max_minutes=1000, metrics=metrics)
+    provider = FxcmHistoryProvider(
+        adapter=adapter,
+        budget=build_history_budget(100_000),
+        chunk_planner=planner,
+        metrics=metrics,
+    )
+    end_ms = START_MS + 7 * 24 * 60 * 60_000 - 1
+    bars = provider.fetch_1m_final("EURUSD", START_MS, end_ms, 1000)
+
+    opens = [int(bar["open_time_ms"]) for bar in bars]
+    assert opens == list(range(START_MS, end_ms, 60_000))
+    # Статичні 24 хв дали б 420 запитів.
+    assert len(adapter.calls) < 80
+    # Після timeout розмір тримається біля межі адаптера (≤ 300 x grow_factor).
+    assert 150 <= planner.chunk_minutes("EURUSD", 1000) <= 450
+    assert metrics.fxcm_history_requests_total.labels(symbol="EURUSD", outcome="error")._value.get() >= 1
+    assert metrics.fxcm_history_chunk_minutes.labels(symbol="EURUSD")._value.get() == planner.chunk_minutes(
+        "EURUSD", 1000
+    )
+
+
+class NotReadyAdapter(FxcmHistoryAdapter):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def fetch_1m(self, symbol: str, start_ms: int, end_ms: int, limit: int) -> List[Dict[str, Any]]:
+        self.calls += 1
+        if self.calls == 1:
+            return [{"open_time_ms": end_ms - 59_999, "close_time_ms": end_ms}]
+        raise ContractError("fxcm_secrets_missing")
+
+
+def test_adaptive_fetch_does_not_shrink_on_non_size_errors() -> None:
+    adapter = NotReadyAdapter()
+    planner = HistoryChunkPlanner(initial_minutes=240, min_minutes=5, max_minutes=1000)
+    provider = FxcmHistoryProvider(adapter=adapter, budget=build_history_budget(100_000), chunk_planner=planner)
+    with pytest.raises(ContractError) as info:
+        provider.fetch_1m_final("EURUSD", START_MS, START_MS + 24 * 60 * 60_000 - 1, 1000)
+    assert not isinstance(info.value, HistoryChunkSizeError)
+    # probe + один запит: без повторів і без зменшення вивченого розміру.
+    assert adapter.calls == 2
+    assert planner.chunk_minutes("EURUSD", 1000) == 240
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+from prometheus_client import CollectorRegistry
+
+from config.config import Config
+from core.time.calendar import Calendar
+from core.validation.validator import SchemaValidator
+from observability.metrics import create_metrics
+from runtime.history_plan import build_history_fetch_plan
+from runtime.status import StatusManager
+from runtime.warmup import run_warmup
+from store.file_cache import FileCache
+
+# 2026-01-19 (понеділок) 00:00 UTC
+WEEK_START_MS = 1_768_780_800_000
+
+
+class InMemoryPublisher:
+    def set_snapshot(self, key: str, json_str: str) -> None:
+        return None
+
+    def publish(self, channel: str, json_str: str) -> None:
+        return None
+
+
+class CalendarProvider:
+    """Повертає 1m бар на кожну відкриту хвилину календаря і рахує запити."""
+
+    def __init__(self, calendar: Calendar) -> None:
+        self._calendar = calendar
+        self.requests: List[Tuple[int, int]] = []
+
+    def fetch_1m_final(self, symbol: str, start_ms: int, end_ms: int, limit: int) -> List[Dict[str, Any]]:
+        self.requests.append((start_ms, end_ms))
+        bars = []
+        for open_ms in range(start_ms - start_ms % 60_000, end_ms, 60_000):
+            if not self._calendar.is_open(open_ms):
+                continue
+            bars.append(
+                {
+                    "symbol": symbol,
+                    "open_time_ms": open_ms,
+                    "close_time_ms": open_ms + 59_999,
+                    "open": 1.0,
+                    "high": 1.0,
+                    "low": 1.0,
+                    "close": 1.0,
+                    "volume": 1.0,
+                    "complete": True,
+                    "source": "history",
+                }
+            )
+        return bars
+
+    def is_history_ready(self) -> Tuple[bool, str]:
+        return True, ""
+
+    def should_backoff(self, now_ms: int) -> bool:
+        return False
+
+    def note_not_ready(self, now_ms: int, reason: str) -> int:
+        return now_ms
+
+
+def _calendar() -> Calendar:
+    config = Config()
+    return Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+
+
+def test_plan_skips_closed_market_and_cached_minutes() -> None:
+    calendar = _calendar()
+    end_ms = WEEK_START_MS + 7 * 24 * 60 * 60_000 - 1
+    cold = build_history_fetch_plan(WEEK_START_MS, end_ms, calendar, [])
+    assert cold.total_minutes == 7 * 24 * 60
+    # Вихідні + daily break: ~30% тижня ринок закритий.
+    assert 0.25 <= cold.closed_minutes / cold.total_minutes <= 0.40
+    assert cold.missing_minutes == cold.total_minutes - cold.closed_minutes
+
+    day_start = WEEK_START_MS + 24 * 60 * 60_000
+    cached = [day_start + idx * 60_000 for idx in range(0, 24 * 60, 2)]
+    plan = build_history_fetch_plan(day_start, day_start + 24 * 60 * 60_000 - 1, calendar, cached)
+    missing: Set[int] = set()
+    for first, last in plan.missing:
+        missing.update(range(first, last + 1, 60_000))
+    for idx in range(24 * 60):
+        open_ms = day_start + idx * 60_000
+        expected = calendar.is_open(open_ms) and open_ms not in set(cached)
+        assert (open_ms in missing) == expected
+
+    requests = []
+    while True:
+        request = plan.next_request(240 * 60_000)
+        if request is None:
+            break
+        requests.append(request)
+    assert all(end - start + 1 <= 240 * 60_000 for start, end in requests)
+    assert all(start % 60_000 == 0 and end % 60_000 == 59_999 for start, end in requests)
+    # Дрібні дірки через хвилину зливаються у великі запити.
+    assert len(requests) <= 8
+
+
+def test_warm_restart_costs_no_history_requests(tmp_path: Path) -> None:
+    config = Config(cache_root=str(tmp_path), history_chunk_minutes=240)
+    root_dir = Path(__file__).resolve().parents[1]
+    calendar = _calendar()
+    status = StatusManager(
+        config=config,
+        validator=SchemaValidator(root_dir=root_dir),
+        publisher=InMemoryPublisher(),
+        calendar=calendar,
+        metrics=create_metrics(CollectorRegistry()),
+    )
+    status.build_initial_snapshot()
+    cache = FileCache(root=tmp_path, max_bars=60_000, warmup_bars=0, strict=True)
+    provider = CalendarProvider(calendar)
+    published: List[str] = []
+    kwargs: Dict[str, Any] = {
+        "config": config,
+        "file_cache": cache,
+        "provider": provider,
+        "status": status,
+        "metrics": status.metrics,
+        "symbols": ["XAUUSD"],
+        "lookback_days": 2,
+        "publish_callback": published.append,
+    }
+    run_warmup(**kwargs)
+    cold_requests = len(provider.requests)
+    assert 0 < cold_requests <= 2 * 24 * 60 // 240 + 2
+    rows, _meta = cache.load("XAUUSD", "1m")
+    assert rows and all(calendar.is_open(int(row["open_time_ms"])) for row in rows)
+    # Ingest сесія: один publish tail на символ, а не на кожен чанк.
+    assert published == ["XAUUSD"]
+
+    provider.requests.clear()
+    run_warmup(**kwargs)
+    # Може лишитися лише щойно закрита хвилина між запусками.
+    assert len(provider.requests) <= 1
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from observability.metrics import create_metrics
+from runtime.command_executor import current_priority_class, priority_scope
+from runtime.history_pipeline import HistoryFetchPipeline
+
+
+def _requests(count: int) -> List[Tuple[int, int]]:
+    return [(idx * 60_000, idx * 60_000 + 59_999) for idx in range(count)]
+
+
+def test_pipeline_overlaps_fetch_with_persist() -> None:
+    metrics = create_metrics(CollectorRegistry())
+    pending = _requests(6)
+    fetch_started: List[float] = []
+    fetch_threads = set()
+    fetch_priority: List[str] = []
+
+    def _next() -> Optional[Tuple[int, int]]:
+        return pending.pop(0) if pending else None
+
+    def _fetch(start_ms: int, end_ms: int) -> List[Dict[str, Any]]:
+        fetch_started.append(time.monotonic())
+        fetch_threads.add(threading.get_ident())
+        fetch_priority.append(current_priority_class())
+        time.sleep(0.03)
+        return [{"open_time_ms": start_ms}]
+
+    pipeline = HistoryFetchPipeline(_next, _fetch, depth=2, context="warmup", metrics=metrics)
+    windows: List[Tuple[float, float]] = []
+    seen: List[int] = []
+    with priority_scope("repair"):
+        for (start_ms, _end_ms), bars in pipeline:
+            with pipeline.stage("persist"):
+                began = time.monotonic()
+                time.sleep(0.03)
+                windows.append((began, time.monotonic()))
+            seen.append(int(bars[0]["open_time_ms"]))
+
+    assert seen == [idx * 60_000 for idx in range(6)]
+    assert threading.get_ident() not in fetch_threads
+    # Клас пріоритету викликача переходить у fetch потік (HistoryBudget).
+    assert set(fetch_priority) == {"repair"}
+    # Наступний чанк запитується, поки поточний ще пишеться.
+    overlapped = sum(1 for began, ended in windows if any(began < ts < ended for ts in fetch_started))
+    assert overlapped >= 3
+
+    seconds = metrics.history_pipeline_seconds_total
+    assert seconds.labels(context="warmup", stage="fetch", state="busy")._value.get() > 0
+    assert seconds.labels(context="warmup", stage="persist", state="busy")._value.get() > 0
+    items = metrics.history_pipeline_items_total
+    assert items.labels(context="warmup", stage="fetch")._value.get() == 6
+    assert items.labels(context="warmup", stage="persist")._value.get() == 6
+
+
+def test_pipeline_error_after_earlier_chunks_and_sequential_mode() -> None:
+    for depth in (0, 2):
+        pending = _requests(5)
+        fetched: List[int] = []
+
+        def _next() -> Optional[Tuple[int, int]]:
+            return pending.pop(0) if pending else None
+
+        def _fetch(start_ms: int, end_ms: int) -> List[Dict[str, Any]]:
+            if start_ms == 3 * 60_000:
+                raise RuntimeError("fxcm throttled")
+            fetched.append(threading.get_ident())
+            return [{"open_time_ms": start_ms}]
+
+        processed: List[int] = []
+        pipeline = HistoryFetchPipeline(_next, _fetch, depth=depth, context="backfill")
+        with pytest.raises(RuntimeError, match="fxcm throttled"):
+            for (start_ms, _end_ms), _bars in pipeline:
+                processed.append(start_ms)
+        # Вже отримані чанки обробляються до помилки, і в тому ж порядку.
+        assert processed == [0, 60_000, 120_000]
+        if depth == 0:
+            assert set(fetched) == {threading.get_ident()}
+
+
+def test_pipeline_close_stops_producer_when_consumer_fails() -> None:
+    pending = _requests(50)
+    calls: List[int] = []
+
+    def _next() -> Optional[Tuple[int, int]]:
+        return pending.pop(0) if pending else None
+
+    def _fetch(start_ms: int, end_ms: int) -> List[Dict[str, Any]]:
+        calls.append(start_ms)
+        return []
+
+    pipeline = HistoryFetchPipeline(_next, _fetch, depth=2, context="repair")
+    with pytest.raises(ValueError):
+        for _request, _bars in pipeline:
+            raise ValueError("persist failed")
+    pipeline.close()
+    # Producer зупинився: не більше depth + кілька чанків наперед.
+    assert len(calls) <= 5
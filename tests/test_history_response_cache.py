@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Tuple
+
+from prometheus_client import CollectorRegistry
+
+from observability.metrics import create_metrics
+from runtime.history_provider import unwrap_history_provider
+from runtime.history_response_cache import CachedHistoryProvider
+
+
+class CountingProvider:
+    """Бар на кожну хвилину, крім skip_minutes (закритий ринок / без торгів)."""
+
+    def __init__(self) -> None:
+        self.requests: List[Tuple[int, int]] = []
+        self.skip_minutes: List[int] = []
+        self.chunk_planner = None
+
+    def fetch_1m_final(self, symbol: str, start_ms: int, end_ms: int, limit: int) -> List[Dict[str, Any]]:
+        self.requests.append((start_ms, end_ms))
+        return [
+            {"open_time_ms": open_ms, "close_time_ms": open_ms + 59_999, "close": float(len(self.requests))}
+            for open_ms in range(start_ms - start_ms % 60_000, end_ms, 60_000)
+            if open_ms not in self.skip_minutes
+        ][:limit]
+
+    def is_history_ready(self) -> Tuple[bool, str]:
+        return True, ""
+
+    def should_backoff(self, now_ms: int) -> bool:
+        return False
+
+    def note_not_ready(self, now_ms: int, reason: str) -> int:
+        return now_ms
+
+
+def test_overlapping_windows_fetch_only_missing_minutes() -> None:
+    metrics = create_metrics(CollectorRegistry())
+    inner = CountingProvider()
+    provider = CachedHistoryProvider(inner=inner, safety_lag_ms=10 * 60_000, metrics=metrics)
+    base = int(time.time() * 1000) - 2 * 24 * 60 * 60_000
+    base -= base % 60_000
+    inner.skip_minutes = [base + 5 * 60_000]
+
+    # Reconcile: вікно 20 хв, наступний запуск через 15 хв перекриває 5 хв.
+    first = provider.fetch_1m_final("XAUUSD", base, base + 20 * 60_000 - 1, 1000)
+    assert len(first) == 19
+    second = provider.fetch_1m_final("XAUUSD", base + 15 * 60_000, base + 35 * 60_000 - 1, 1000)
+    assert inner.requests[-1] == (base + 20 * 60_000, base + 35 * 60_000 - 1)
+    assert [int(bar["open_time_ms"]) for bar in second] == list(range(base + 15 * 60_000, base + 35 * 60_000, 60_000))
+
+    # Repair того ж діапазону (разом із порожньою хвилиною) — без запиту до provider.
+    repaired = provider.fetch_1m_final("XAUUSD", base, base + 35 * 60_000 - 1, 1000)
+    assert len(inner.requests) == 2
+    assert len(repaired) == 34
+    repaired[0]["complete"] = True
+    assert "complete" not in provider.fetch_1m_final("XAUUSD", base, base + 59_999, 1000)[0]
+
+    requests = metrics.history_response_cache_requests_total
+    assert requests.labels(result="miss")._value.get() == 1
+    assert requests.labels(result="partial")._value.get() == 1
+    assert requests.labels(result="hit")._value.get() == 2
+    assert metrics.history_response_cache_saved_minutes_total._value.get() == 5 + 35 + 1
+
+
+def test_recent_minutes_expire_and_truncated_responses_not_cached() -> None:
+    inner = CountingProvider()
+    provider = CachedHistoryProvider(inner=inner, safety_lag_ms=10 * 60_000, recent_ttl_ms=0)
+    assert unwrap_history_provider(provider) is inner
+    assert provider.chunk_planner is None
+
+    now_ms = int(time.time() * 1000)
+    recent = now_ms - now_ms % 60_000 - 5 * 60_000
+    provider.fetch_1m_final("XAUUSD", recent, recent + 3 * 60_000 - 1, 1000)
+    provider.fetch_1m_final("XAUUSD", recent, recent + 3 * 60_000 - 1, 1000)
+    # Свіжі хвилини (ближче до now, ніж safety lag) з TTL=0 запитуються повторно.
+    assert len(inner.requests) == 2
+
+    old = recent - 24 * 60 * 60_000
+    provider.fetch_1m_final("XAUUSD", old, old + 10 * 60_000 - 1, 4)
+    provider.fetch_1m_final("XAUUSD", old, old + 10 * 60_000 - 1, 1000)
+    # Відповідь обрізана limit → кешовано лише до останнього отриманого бару.
+    assert inner.requests[-1] == (old + 4 * 60_000, old + 10 * 60_000 - 1)
+
+
+def test_empty_old_minute_is_refetched_after_ttl() -> None:
+    inner = CountingProvider()
+    provider = CachedHistoryProvider(inner=inner, safety_lag_ms=10 * 60_000, recent_ttl_ms=0)
+    base = int(time.time() * 1000) - 24 * 60 * 60_000
+    base -= base % 60_000
+    late = base + 3 * 60_000
+    inner.skip_minutes = [late]
+    assert len(provider.fetch_1m_final("XAUUSD", base, base + 10 * 60_000 - 1, 1000)) == 9
+
+    # FXCM віддав хвилину пізніше: repair перезапитує лише її, а не відповідає з пам'яті.
+    inner.skip_minutes = []
+    healed = provider.fetch_1m_final("XAUUSD", base, base + 10 * 60_000 - 1, 1000)
+    assert inner.requests[-1] == (late, late + 59_999)
+    assert late in [int(bar["open_time_ms"]) for bar in healed]
+    provider.fetch_1m_final("XAUUSD", base, base + 10 * 60_000 - 1, 1000)
+    assert len(inner.requests) == 2
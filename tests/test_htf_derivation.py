@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from prometheus_client import CollectorRegistry
+
+from config.config import Config
+from core.time.calendar import Calendar
+from core.validation.validator import SchemaValidator
+from observability.metrics import create_metrics
+from runtime.htf_derivation import HtfDerivationEngine
+from store.file_cache import FileCache
+from store.file_cache.cache_utils import final_rows_by_open, rows_in_open_range
+
+DAY_10UTC = 1_736_935_200_000  # 2025-01-15T10:00:00Z (середа)
+
+
+class CapturingPublisher:
+    def __init__(self) -> None:
+        self.batches: List[Tuple[str, List[Dict[str, Any]]]] = []
+
+    def publish_ohlcv_final_htf(
+        self,
+        symbol: str,
+        tf: str,
+        bars: List[Dict[str, Any]],
+        validator: SchemaValidator,
+    ) -> None:
+        validator.validate_ohlcv_final_htf_batch(
+            {
+                "symbol": symbol,
+                "tf": tf,
+                "source": "history_agg",
+                "complete": True,
+                "synthetic": False,
+                "bars": bars,
+            }
+        )
+        self.batches.append((tf, bars))
+
+    def bars(self, tf: str) -> List[Dict[str, Any]]:
+        return [bar for batch_tf, bars in self.batches if batch_tf == tf for bar in bars]
+
+
+def _bar(open_ms: int, price: float) -> Dict[str, Any]:
+    return {
+        "open_time_ms": open_ms,
+        "close_time_ms": open_ms + 59_999,
+        "open": price,
+        "high": price + 1.0,
+        "low": price - 1.0,
+        "close": price + 0.5,
+        "volume": 2.0,
+        "tick_count": 3,
+        "complete": True,
+    }
+
+
+def _setup(tmp_path: Path) -> Tuple[FileCache, Calendar, CapturingPublisher, HtfDerivationEngine]:
+    config = Config()
+    calendar = Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+    cache = FileCache(root=tmp_path, max_bars=5000, warmup_bars=0)
+    publisher = CapturingPublisher()
+    validator = SchemaValidator(root_dir=Path(__file__).resolve().parents[1])
+    engine = HtfDerivationEngine(
+        file_cache=cache,
+        calendar=calendar,
+        publisher=publisher,
+        validator=validator,
+        metrics=create_metrics(CollectorRegistry()),
+        tfs=["15m", "1h", "4h", "1d"],
+    )
+    return cache, calendar, publisher, engine
+
+
+def test_htf_derivation_recomputes_only_touched_buckets(tmp_path: Path) -> None:
+    cache, _calendar, publisher, engine = _setup(tmp_path)
+    bars = [_bar(DAY_10UTC + idx * 60_000, 2000.0 + idx) for idx in range(60)]
+    cache.append_complete_bars("XAUUSD", "1m", bars, source="history")
+    # Наступна година: остання хвилина ще stream_close → бакет не final.
+    next_hour = [_bar(DAY_10UTC + 3_600_000 + idx * 60_000, 2100.0) for idx in range(60)]
+    cache.append_complete_bars("XAUUSD", "1m", next_hour[:-1], source="history")
+    cache.append_complete_bars("XAUUSD", "1m", next_hour[-1:], source="stream_close")
+
+    summary = engine.derive_range("XAUUSD", DAY_10UTC + 59 * 60_000, DAY_10UTC + 61 * 60_000)
+    assert summary.buckets_touched == {"15m": 2, "1h": 2, "4h": 1, "1d": 1}
+    assert summary.published == {"15m": 2, "1h": 1, "4h": 0, "1d": 0}
+    assert summary.incomplete == {"15m": 0, "1h": 1, "4h": 1, "1d": 1}
+    hour = publisher.bars("1h")[0]
+    assert (hour["open_time"], hour["close_time"]) == (DAY_10UTC, DAY_10UTC + 3_599_999)
+    assert (hour["open"], hour["high"], hour["low"], hour["close"]) == (2000.0, 2060.0, 1999.0, 2059.5)
+    assert hour["volume"] == 120.0 and hour["event_ts"] == hour["close_time"]
+    rows, meta = cache.load("XAUUSD", "1h")
+    assert [row["open_time_ms"] for row in rows] == [DAY_10UTC]
+    assert meta["last_published_open_time_ms"] == DAY_10UTC and meta["last_write_source"] == "history_agg"
+
+    # Незмінений бакет не публікується повторно; виправлений 1m → лише його бакети.
+    again = engine.derive_range("XAUUSD", DAY_10UTC, DAY_10UTC + 60_000)
+    assert again.published == {"15m": 1, "1h": 0, "4h": 0, "1d": 0}
+    assert again.unchanged == {"15m": 0, "1h": 1, "4h": 0, "1d": 0}
+    fixed = _bar(DAY_10UTC + 5 * 60_000, 2000.0)
+    fixed["high"] = 2500.0
+    cache.append_complete_bars("XAUUSD", "1m", [fixed], source="history")
+    publisher.batches.clear()
+    engine.derive_range("XAUUSD", DAY_10UTC + 5 * 60_000, DAY_10UTC + 5 * 60_000)
+    assert [bar["high"] for bar in publisher.bars("15m")] == [2500.0]
+    assert [bar["high"] for bar in publisher.bars("1h")] == [2500.0]
+
+
+def test_htf_derivation_1d_uses_calendar_trading_day(tmp_path: Path) -> None:
+    cache, calendar, publisher, engine = _setup(tmp_path)
+    day_open = calendar.trading_day_boundary_for(DAY_10UTC)
+    day_close = calendar.next_trading_day_boundary_ms(day_open) - 1
+    opens: List[int] = []
+    for first, last in calendar.open_intervals_ms(day_open, day_close, symbol="XAUUSD"):
+        start = first + (-first) % 60_000
+        opens.extend(range(start, last + 1, 60_000))
+    cache.append_complete_bars("XAUUSD", "1m", [_bar(open_ms, 2000.0) for open_ms in opens], source="history")
+
+    summary = engine.derive_range("XAUUSD", opens[-1], opens[-1], tfs=["1d"])
+    assert summary.published == {"1d": 1}
+    day = publisher.bars("1d")[0]
+    assert (day["open_time"], day["close_time"]) == (day_open, day_close)
+    assert day["volume"] == 2.0 * len(opens)
+    rows, _meta = cache.load("XAUUSD", "1d")
+    assert [(row["open_time_ms"], row["close_time_ms"]) for row in rows] == [(day_open, day_close)]
+
+
+def test_final_rows_window_slice_matches_full_scan() -> None:
+    rows = [{"open_time_ms": DAY_10UTC + idx * 60_000} for idx in range(500) if idx % 7]
+    meta = {"stream_close_ranges": [[DAY_10UTC + 60_000, DAY_10UTC + 5 * 60_000], [DAY_10UTC + 300 * 60_000] * 2]}
+    start_ms, end_ms = DAY_10UTC + 3 * 60_000, DAY_10UTC + 302 * 60_000
+    sliced = rows_in_open_range(rows, start_ms, end_ms)
+    assert sliced == [row for row in rows if start_ms <= row["open_time_ms"] <= end_ms]
+    final = final_rows_by_open(sliced, meta, start_ms, end_ms)
+    assert min(final) == DAY_10UTC + 6 * 60_000 and DAY_10UTC + 300 * 60_000 not in final
+    assert DAY_10UTC + 302 * 60_000 in final
+    assert rows_in_open_range(rows, end_ms + 10**9, end_ms + 2 * 10**9) == []
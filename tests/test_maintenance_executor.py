@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from config.config import Config
+from core.time.calendar import Calendar
+from core.validation.validator import SchemaValidator
+from observability.metrics import create_metrics
+from runtime.command_executor import current_priority_class, priority_scope
+from runtime.history_provider import run_per_symbol
+from runtime.maintenance import MaintenanceExecutor
+from runtime.status import StatusManager, build_status_pubsub_payload
+
+
+class InMemoryPublisher:
+    def __init__(self) -> None:
+        self.last_snapshot: Optional[str] = None
+
+    def set_snapshot(self, key: str, json_str: str) -> None:
+        self.last_snapshot = json_str
+
+    def publish(self, channel: str, json_str: str) -> None:
+        return None
+
+
+def _status() -> StatusManager:
+    config = Config()
+    status = StatusManager(
+        config=config,
+        validator=SchemaValidator(root_dir=Path(__file__).resolve().parents[1]),
+        publisher=InMemoryPublisher(),
+        calendar=Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path),
+        metrics=None,
+    )
+    status.build_initial_snapshot()
+    return status
+
+
+def test_maintenance_runs_symbols_in_parallel_and_reports_status() -> None:
+    status = _status()
+    metrics = create_metrics(CollectorRegistry())
+    executor = MaintenanceExecutor(max_workers=4, status=status, metrics=metrics)
+    symbols = ["XAUUSD", "EURUSD", "GBPUSD", "USDJPY"]
+    classes: List[str] = []
+
+    def _job(symbol: str) -> None:
+        classes.append(current_priority_class())
+        time.sleep(0.2)
+
+    started = time.monotonic()
+    with priority_scope("repair"):
+        results = executor.run("tail_guard", symbols, _job)
+    elapsed = time.monotonic() - started
+    executor.shutdown()
+
+    assert elapsed < 0.6
+    assert [item.symbol for item in results] == symbols
+    assert all(item.state == "ok" and item.duration_ms >= 190 for item in results)
+    # HistoryBudget у помічниках бачить клас пріоритету викликача.
+    assert classes == ["repair"] * 4
+
+    payload = build_status_pubsub_payload(status.snapshot())
+    status.validator.validate_status_v2(payload)
+    summary = payload["maintenance"]["tail_guard"]
+    assert summary["state"] == "ok" and summary["symbols_total"] == 4 and summary["workers"] == 4
+    assert set(summary["symbol_ms"]) == set(symbols)
+    assert summary["sum_symbol_ms"] >= 4 * summary["duration_ms"] // 2
+    assert metrics.maintenance_symbol_seconds.labels(job="tail_guard", result="ok")._sum.get() > 0
+
+
+def test_maintenance_finishes_other_symbols_and_raises_first_error() -> None:
+    status = _status()
+    executor = MaintenanceExecutor(max_workers=2, status=status)
+    done: List[str] = []
+
+    def _job(symbol: str) -> None:
+        if symbol in {"EURUSD", "USDJPY"}:
+            raise ValueError(f"range_too_large {symbol}")
+        done.append(symbol)
+
+    with pytest.raises(ValueError, match="EURUSD"):
+        executor.run("reconcile", ["XAUUSD", "EURUSD", "GBPUSD", "USDJPY", "XAUUSD"], _job)
+    executor.shutdown()
+
+    assert sorted(done) == ["GBPUSD", "XAUUSD"]
+    summary = status.snapshot()["maintenance"]["reconcile"]
+    assert summary["state"] == "error"
+    assert summary["failed"] == ["EURUSD", "USDJPY"]
+
+
+def test_maintenance_caller_progresses_when_shared_pool_is_busy() -> None:
+    executor = MaintenanceExecutor(max_workers=2)
+    release = threading.Event()
+    blockers = [
+        threading.Thread(target=executor.run, args=(job, ["A", "B"], lambda symbol: release.wait(5.0)))
+        for job in ("auto_warmup", "auto_republish")
+    ]
+    for blocker in blockers:
+        blocker.start()
+    time.sleep(0.05)
+    finished: List[str] = []
+    started = time.monotonic()
+    executor.run("reconcile", ["XAUUSD", "EURUSD"], finished.append)
+    # Спільний пул зайнятий довгим warmup, але reconcile виконує сам викликач.
+    assert sorted(finished) == ["EURUSD", "XAUUSD"]
+    assert time.monotonic() - started < 1.0
+    release.set()
+    for blocker in blockers:
+        blocker.join(timeout=5.0)
+    executor.shutdown()
+
+
+def test_maintenance_surfaces_helper_failure() -> None:
+    executor = MaintenanceExecutor(max_workers=2)
+    both_running = threading.Barrier(2, timeout=2.0)
+
+    def _job(symbol: str) -> None:
+        both_running.wait()
+        if threading.current_thread().name.startswith("maintenance"):
+            # BaseException поза per-symbol try: не можна мовчки загубити у future.
+            raise SystemExit(f"helper crash {symbol}")
+
+    with pytest.raises(SystemExit, match="helper crash"):
+        executor.run("tail_guard", ["XAUUSD", "EURUSD"], _job)
+    executor.shutdown()
+
+
+def test_history_fan_out_uses_shared_executor_with_job_cap() -> None:
+    status = _status()
+    executor = MaintenanceExecutor(max_workers=4, status=status)
+    lock = threading.Lock()
+    active = [0, 0]
+
+    def _job(symbol: str) -> None:
+        with lock:
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+
+    run_per_symbol(["A", "B", "C", "D"], _job, 2, maintenance=executor, job="warmup")
+    executor.shutdown()
+    # history_max_inflight обмежує job навіть у ширшому спільному пулі.
+    assert active[1] == 2
+    assert status.snapshot()["maintenance"]["warmup"]["workers"] == 2
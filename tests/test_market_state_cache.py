@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from core.time.calendar import Calendar
+from core.time.market_state import MarketStateCache
+from core.time.timestamps import to_epoch_ms_utc
+
+
+def _ms(year: int, month: int, day: int, hour: int, minute: int, second: int = 0) -> int:
+    return to_epoch_ms_utc(datetime(year, month, day, hour, minute, second, tzinfo=timezone.utc))
+
+
+def test_market_state_cache_matches_calendar_over_week() -> None:
+    calendar = Calendar(calendar_tag="fxcm_calendar_v1_ny")
+    cache = MarketStateCache(calendar=calendar)
+    start_ms = _ms(2026, 1, 16, 0, 0)
+    for step in range(0, 7 * 24 * 60, 7):
+        ts_ms = start_ms + step * 60_000 + 123
+        assert cache.market_state(ts_ms) == calendar.market_state(ts_ms)
+        assert cache.is_open(ts_ms) == calendar.is_open(ts_ms)
+        assert cache.next_open_ms(ts_ms) == calendar.next_open_ms(ts_ms)
+        assert cache.next_pause_ms(ts_ms) == calendar.next_pause_ms(ts_ms)
+    # Перерахунок лише на transitions: тиждень має ~12 переходів, а не ~1440 викликів.
+    assert cache.misses_total <= 20
+    assert cache.hits_total > cache.misses_total
+
+
+def test_market_state_cache_recomputes_at_transition() -> None:
+    calendar = Calendar(calendar_tag="fxcm_calendar_v1_ny")
+    cache = MarketStateCache(calendar=calendar)
+    before_break_ms = _ms(2026, 1, 20, 21, 59, 30)
+    break_start_ms = _ms(2026, 1, 20, 22, 0, 0)
+    assert cache.is_open(before_break_ms) is True
+    assert cache.next_transition_ms(before_break_ms) == break_start_ms
+    misses = cache.misses_total
+    assert cache.is_open(break_start_ms - 1) is True
+    assert cache.misses_total == misses
+    assert cache.is_open(break_start_ms) is False
+    assert cache.misses_total == misses + 1
+    assert cache.next_open_ms(break_start_ms) == _ms(2026, 1, 20, 22, 5, 0)
+
+
+def test_market_state_cache_init_error_is_passthrough() -> None:
+    calendar = Calendar(calendar_tag="no_such_calendar_tag")
+    assert calendar.health_error()
+    cache = MarketStateCache(calendar=calendar)
+    ts_ms = _ms(2026, 1, 20, 12, 0)
+    assert cache.market_state(ts_ms) == calendar.market_state(ts_ms)
+    assert cache.is_open(ts_ms) is False
+    assert cache.next_transition_ms(ts_ms) == ts_ms
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List
+
+import pytest
+
+from config.config import Config
+from core.market import resample
+from core.market.resample import OhlcvColumns, bucket_bounds, open_minutes, resample_ohlcv
+from core.time.buckets import get_bucket_open_ms
+from core.time.calendar import Calendar
+
+START = 1_736_726_400_000  # 2025-01-13T00:00:00Z (понеділок)
+
+
+@pytest.fixture(params=["numpy", "pure_python"])
+def numpy_mode(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(resample, "_NUMPY_STATE", {})
+    else:
+        monkeypatch.setattr(resample, "_NUMPY_STATE", {"module": None})
+    return str(request.param)
+
+
+def _calendar() -> Calendar:
+    config = Config()
+    return Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+
+
+def _rows(days: int, drop_every: int = 0, seed: int = 7) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    rows: List[Dict[str, Any]] = []
+    for idx in range(days * 1440):
+        if drop_every and idx % drop_every == 0:
+            continue
+        price = 2000.0 + rnd.random() * 10.0
+        rows.append(
+            {
+                "open_time_ms": START + idx * 60_000,
+                "open": price,
+                "high": price + rnd.random(),
+                "low": price - rnd.random(),
+                "close": price + rnd.random() - 0.5,
+                "volume": rnd.random() * 3.0,
+                "tick_count": rnd.randint(1, 40),
+            }
+        )
+    return rows
+
+
+def _reference(rows: List[Dict[str, Any]], tf: str, calendar: Calendar) -> Dict[int, Dict[str, Any]]:
+    grouped: Dict[int, List[Dict[str, Any]]] = {}
+    for row in rows:
+        grouped.setdefault(get_bucket_open_ms(tf, row["open_time_ms"], calendar), []).append(row)
+    return {
+        open_ms: {
+            "open": items[0]["open"],
+            "high": max(item["high"] for item in items),
+            "low": min(item["low"] for item in items),
+            "close": items[-1]["close"],
+            "volume": sum(item["volume"] for item in items),
+            "tick_count": sum(item["tick_count"] for item in items),
+            "count": len(items),
+        }
+        for open_ms, items in grouped.items()
+    }
+
+
+@pytest.mark.parametrize("tf", ["5m", "15m", "1h", "4h", "1d"])
+def test_resample_matches_reference(numpy_mode: str, tf: str) -> None:
+    calendar = _calendar()
+    rows = _rows(days=3, drop_every=97)
+    result = resample_ohlcv(OhlcvColumns.from_rows(rows), tf, calendar)
+    expected = _reference(rows, tf, calendar)
+    assert result.open_time == sorted(expected)
+    for idx, open_ms in enumerate(result.open_time):
+        ref = expected[open_ms]
+        got = {
+            "open": result.open[idx],
+            "high": result.high[idx],
+            "low": result.low[idx],
+            "close": result.close[idx],
+            "volume": result.volume[idx],
+            "tick_count": result.tick_count[idx],
+            "count": result.count[idx],
+        }
+        assert got == ref
+        assert result.complete[idx] == (result.count[idx] == result.expected[idx])
+    # Пропущена хвилина робить бакет неповним; 1d межа — trading_day_boundary календаря.
+    assert not all(result.complete)
+    if tf == "1d":
+        assert all(open_ms == calendar.trading_day_boundary_for(open_ms) for open_ms in result.open_time)
+
+
+def test_numpy_and_pure_python_paths_are_identical(monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("numpy")
+    calendar = _calendar()
+    rows = _rows(days=5, drop_every=61, seed=11)
+    columns = OhlcvColumns.from_rows(rows)
+    intervals = calendar.open_intervals_ms(START, START + 5 * 1440 * 60_000 - 1, symbol="XAUUSD")
+    for tf in ("5m", "15m", "1h", "4h", "1d"):
+        monkeypatch.setattr(resample, "_NUMPY_STATE", {})
+        fast = resample_ohlcv(columns, tf, calendar, open_intervals=intervals)
+        monkeypatch.setattr(resample, "_NUMPY_STATE", {"module": None})
+        slow = resample_ohlcv(columns, tf, calendar, open_intervals=intervals)
+        assert fast == slow
+        assert all(isinstance(value, float) for value in fast.volume)
+        assert all(isinstance(value, int) for value in fast.open_time)
+
+
+def test_resample_calendar_completeness_and_explicit_bounds(numpy_mode: str) -> None:
+    calendar = _calendar()
+    day_open = calendar.trading_day_boundary_for(START + 36 * 3_600_000)
+    day_close = calendar.next_trading_day_boundary_ms(day_open) - 1
+    intervals = calendar.open_intervals_ms(day_open, day_close, symbol="XAUUSD")
+    rows = [row for row in _rows(days=3) if day_open <= row["open_time_ms"] <= day_close]
+    columns = OhlcvColumns.from_rows(rows)
+
+    # Хвилини щоденної паузи є у даних, але повнота рахується лише по відкритих.
+    daily = resample_ohlcv(columns, "1d", calendar, open_intervals=intervals)
+    assert daily.open_time == [day_open] and daily.close_time == [day_close]
+    assert daily.count == [1440] and daily.expected == [open_minutes(intervals, day_open, day_close)]
+    assert daily.expected[0] < 1440 and daily.complete == [True]
+
+    hour_bounds = bucket_bounds("1h", day_open + 3_600_000, day_open + 3 * 3_600_000 - 1)
+    hourly = resample_ohlcv(columns, "1h", calendar, bounds=hour_bounds, open_intervals=intervals)
+    assert hourly.open_time == [day_open + 3_600_000, day_open + 2 * 3_600_000]
+    bars = hourly.bars()
+    assert [bar["event_ts"] for bar in bars] == hourly.close_time
+    assert all(bar["source"] == "history_agg" and bar["complete"] is True for bar in bars)
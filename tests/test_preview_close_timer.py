@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import replace
+from typing import List
+
+from prometheus_client import CollectorRegistry
+
+from config.config import Config
+from core.time.calendar import Calendar
+from observability.metrics import create_metrics
+from runtime.ohlcv_preview import PreviewCandleBuilder, PreviewCloseTimer
+from runtime.preview_builder import ClosedPreviewBar, OhlcvCache
+
+WED_10UTC = 1_736_935_200_000  # 2025-01-15T10:00:00Z (середа)
+FRI_20UTC = WED_10UTC + 2 * 86_400_000 + 10 * 3_600_000  # 2025-01-17T20:00:00Z (п'ятниця)
+GRACE_MS = 1500
+
+
+def _builder(tfs: List[str]) -> PreviewCandleBuilder:
+    config = replace(Config(), ohlcv_preview_tfs=tfs, ohlcv_preview_close_grace_ms=GRACE_MS)
+    calendar = Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+    return PreviewCandleBuilder(config=config, cache=OhlcvCache(), calendar=calendar)
+
+
+def test_timer_closes_bar_at_close_time_plus_grace_and_drops_late_ticks() -> None:
+    builder = _builder(["1m"])
+    builder.on_tick("XAUUSD", 2000.0, WED_10UTC + 1_000)
+    builder.on_tick("XAUUSD", 2003.0, WED_10UTC + 30_000)
+    close_ms = WED_10UTC + 59_999
+    assert builder.next_close_due_ms() == close_ms + GRACE_MS
+
+    closed: List[ClosedPreviewBar] = []
+    timer = PreviewCloseTimer(
+        builder=builder,
+        on_closed=closed.extend,
+        lock=threading.Lock(),
+        metrics=create_metrics(CollectorRegistry()),
+    )
+    assert timer.run_once(close_ms + GRACE_MS - 1) == []
+    timer.run_once(close_ms + GRACE_MS)
+    assert [(item.symbol, item.tf) for item in closed] == [("XAUUSD", "1m")]
+    bar = closed[0].bar
+    assert (bar["open_time"], bar["close_time"], bar["close"], bar["tick_count"]) == (WED_10UTC, close_ms, 2003.0, 2)
+    assert builder.next_close_due_ms() is None
+
+    # Тік після закриття не мутує закритий бар; наступна хвилина відкриває новий.
+    builder.on_tick("XAUUSD", 2100.0, WED_10UTC + 59_000)
+    builder.on_tick("XAUUSD", 2004.0, WED_10UTC + 60_500)
+    state = builder._inner.get_stream_state("XAUUSD", "1m")
+    assert state is not None and state.late_ticks_dropped_total == 1
+    tail = builder.cache.get_tail("XAUUSD", "1m", limit=10)
+    assert [(item["open_time"], item["close"]) for item in tail] == [(WED_10UTC, 2003.0), (WED_10UTC + 60_000, 2004.0)]
+    assert timer.run_once(close_ms + GRACE_MS + 1) == []
+
+
+def test_timer_close_is_market_aware() -> None:
+    builder = _builder(["4h"])
+    calendar = builder.calendar
+    # Середа: щоденна пауза всередині 4h bucket, ринок відкривається знову → звичайний close_time.
+    builder.on_tick("XAUUSD", 2000.0, WED_10UTC + 10 * 3_600_000 + 60_000)
+    assert builder.next_close_due_ms() == WED_10UTC + 14 * 3_600_000 - 1 + GRACE_MS
+
+    # П'ятниця: ринок закривається до кінця bucket → бар закривається о pause - 1.
+    builder = _builder(["4h"])
+    tick_ts = FRI_20UTC + 60_000
+    pause_ms = calendar.next_pause_ms(tick_ts)
+    assert pause_ms < FRI_20UTC + 4 * 3_600_000
+    builder.on_tick("XAUUSD", 2000.0, tick_ts)
+    assert builder.next_close_due_ms() == pause_ms - 1 + GRACE_MS
+    closed = builder.close_due(pause_ms - 1 + GRACE_MS)
+    assert [item.bar["close_time"] for item in closed] == [FRI_20UTC + 4 * 3_600_000 - 1]
+
+
+def test_timer_skips_while_preview_paused() -> None:
+    builder = _builder(["1m"])
+    builder.on_tick("XAUUSD", 2000.0, WED_10UTC + 1_000)
+    paused = [True]
+    closed: List[ClosedPreviewBar] = []
+    timer = PreviewCloseTimer(
+        builder=builder, on_closed=closed.extend, lock=threading.Lock(), is_paused=lambda: paused[0]
+    )
+    assert timer.run_once(WED_10UTC + 120_000) == [] and closed == []
+    paused[0] = False
+    assert len(timer.run_once(WED_10UTC + 120_000)) == 1 and len(closed) == 1
@@ -7,7 +7,7 @@ from typing import List, Optional, Tuple
 from config.config import Config
 from core.time.calendar import Calendar
 from core.validation.validator import SchemaValidator
-from runtime.reconcile_finalizer import reconcile_final_tail
+from runtime.reconcile_finalizer import prefetch_reconcile_window, reconcile_final_tail
 from runtime.status import StatusManager
 from store.file_cache.history_cache import FileCache
 
@@ -189,3 +189,127 @@ def test_reconcile_triggers_htf_rebuild_history_agg() -> None:
     assert publisher.final_htf
     assert len(rows) == 1
     assert meta.get("last_write_source") == "history_agg"
+
+
+class CountingHistoryProvider(DummyHistoryProvider):
+    def __init__(self, bars: List[dict]) -> None:
+        super().__init__(bars)
+        self.requests: List[Tuple[int, int]] = []
+
+    def fetch_1m_final(self, symbol: str, start_ms: int, end_ms: int, limit: int) -> List[dict]:
+        self.requests.append((int(start_ms), int(end_ms)))
+        return super().fetch_1m_final(symbol, start_ms, end_ms, limit)
+
+
+def test_reconcile_fetches_only_missing_or_stream_close_minutes() -> None:
+    config = Config(reconcile_enable=True)
+    root_dir = Path(__file__).resolve().parents[1]
+    validator = SchemaValidator(root_dir=root_dir)
+    calendar = Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+    status = StatusManager(
+        config=config,
+        validator=validator,
+        publisher=InMemoryPublisher(),
+        calendar=calendar,
+        metrics=None,
+    )
+    status.build_initial_snapshot()
+
+    base_open = 1_700_000_000_000
+    base_open -= base_open % 900_000
+    provider = CountingHistoryProvider([_history_bar(base_open - 15 * 60_000 + i * 60_000) for i in range(45)])
+    stream_bars = [
+        dict(_history_bar(base_open - 15 * 60_000 + i * 60_000), complete=True, source="stream_close")
+        for i in range(45)
+    ]
+
+    def _run(cache: FileCache, publisher: DummyPublisher, bucket_index: int) -> None:
+        reconcile_final_tail(
+            config=config,
+            file_cache=cache,
+            provider=provider,
+            publisher=publisher,
+            validator=validator,
+            status=status,
+            metrics=None,
+            symbol="XAUUSD",
+            lookback_minutes=20,
+            req_id="test",
+            target_close_ms=int(base_open + (bucket_index + 1) * 15 * 60_000 - 1),
+        )
+
+    with TemporaryDirectory() as tmp_dir:
+        cache = FileCache(root=Path(tmp_dir), max_bars=200, warmup_bars=0, strict=True)
+        cache.append_complete_bars("XAUUSD", "1m", stream_bars[:30], source="stream_close")
+        publisher = DummyPublisher()
+        _run(cache, publisher, 0)
+        # Холодний кеш (лише stream_close) → усе вікно з history.
+        assert provider.requests == [(base_open - 5 * 60_000, base_open + 15 * 60_000 - 1)]
+        _rows, meta = cache.load("XAUUSD", "1m")
+        assert meta["stream_close_ranges"] == [[base_open - 15 * 60_000, base_open - 6 * 60_000]]
+
+        cache.append_complete_bars("XAUUSD", "1m", stream_bars[30:], source="stream_close")
+        _run(cache, publisher, 1)
+        # Наступний 15m цикл: лише нові stream_close хвилини, один запит.
+        assert provider.requests[1:] == [(base_open + 15 * 60_000, base_open + 30 * 60_000 - 1)]
+        _run(cache, publisher, 1)
+        assert len(provider.requests) == 2
+        _rows, meta = cache.load("XAUUSD", "1m")
+        assert meta["stream_close_ranges"] == [[base_open - 15 * 60_000, base_open - 6 * 60_000]]
+
+    assert [bar["open_time"] for bar in publisher.final_htf] == [base_open, base_open + 15 * 60_000]
+    assert len(publisher.final_1m) == 35
+
+
+def test_reconcile_prefetch_leaves_only_last_minute_for_boundary() -> None:
+    config = Config(reconcile_enable=True)
+    root_dir = Path(__file__).resolve().parents[1]
+    validator = SchemaValidator(root_dir=root_dir)
+    calendar = Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+    status = StatusManager(
+        config=config,
+        validator=validator,
+        publisher=InMemoryPublisher(),
+        calendar=calendar,
+        metrics=None,
+    )
+    status.build_initial_snapshot()
+
+    base_open = 1_700_000_000_000
+    base_open -= base_open % 900_000
+    close_ms = int(base_open + 15 * 60_000 - 1)
+    provider = CountingHistoryProvider([_history_bar(base_open - 5 * 60_000 + i * 60_000) for i in range(20)])
+
+    with TemporaryDirectory() as tmp_dir:
+        cache = FileCache(root=Path(tmp_dir), max_bars=200, warmup_bars=0, strict=True)
+        prefetched = prefetch_reconcile_window(
+            file_cache=cache,
+            provider=provider,
+            status=status,
+            metrics=None,
+            symbol="XAUUSD",
+            lookback_minutes=20,
+            target_close_ms=close_ms,
+            now_ms=close_ms + 1 - 10_000,
+        )
+        # Поточна (ще відкрита) хвилина не prefetch-иться.
+        assert prefetched == 19
+        assert provider.requests == [(base_open - 5 * 60_000, close_ms - 60_000)]
+        publisher = DummyPublisher()
+        reconcile_final_tail(
+            config=config,
+            file_cache=cache,
+            provider=provider,
+            publisher=publisher,
+            validator=validator,
+            status=status,
+            metrics=None,
+            symbol="XAUUSD",
+            lookback_minutes=20,
+            req_id="test",
+            target_close_ms=close_ms,
+        )
+
+    assert provider.requests[1:] == [(close_ms + 1 - 60_000, close_ms)]
+    assert len(publisher.final_1m) == 20
+    assert [bar["open_time"] for bar in publisher.final_htf] == [base_open]
@@ -1,21 +1,15 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional
 
-from app.composition import _publish_reconcile_command
 from config.config import Config
 from core.time.calendar import Calendar
 from core.validation.validator import SchemaValidator
+from runtime.reconcile_scheduler import PREFETCH_CMD, RECONCILE_CMD, ReconcileScheduler
 from runtime.status import StatusManager
 
-
-class DummyRedis:
-    def __init__(self) -> None:
-        self.published: List[Tuple[str, str]] = []
-
-    def publish(self, channel: str, json_str: str) -> None:
-        self.published.append((channel, json_str))
+WED_10UTC = 1_736_935_200_000  # 2025-01-15T10:00:00Z (середа, ринок відкритий)
 
 
 class InMemoryPublisher:
@@ -30,8 +24,8 @@ class InMemoryPublisher:
         self.last_channel = channel
 
 
-def test_15m_boundary_emits_reconcile_command_once() -> None:
-    config = Config(reconcile_enable=True)
+def _scheduler(prefetch_lead_ms: int = 0) -> tuple:
+    config = Config(reconcile_enable=True, reconcile_auto_enable=True)
     root_dir = Path(__file__).resolve().parents[1]
     validator = SchemaValidator(root_dir=root_dir)
     calendar = Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
@@ -43,28 +37,50 @@ def test_15m_boundary_emits_reconcile_command_once() -> None:
         metrics=None,
     )
     status.build_initial_snapshot()
+    submitted: List[Dict[str, Any]] = []
 
-    redis_client = DummyRedis()
-    base = 1_700_000_000_000
-    base -= base % 900_000
-    end_ms = int(base + 900_000 - 1)
+    def _submit(payload: Dict[str, Any]) -> str:
+        submitted.append(payload)
+        return "queued"
 
-    published_first = _publish_reconcile_command(
-        redis_client=redis_client,
-        config=config,
-        validator=validator,
-        status=status,
-        end_ms=end_ms,
-    )
-    published_second = _publish_reconcile_command(
-        redis_client=redis_client,
+    scheduler = ReconcileScheduler(
         config=config,
-        validator=validator,
+        calendar=calendar,
         status=status,
-        end_ms=end_ms,
+        submit=_submit,
+        prefetch_lead_ms=prefetch_lead_ms,
     )
+    return scheduler, status, validator, submitted
+
+
+def test_15m_boundary_enqueues_reconcile_job_once() -> None:
+    scheduler, status, validator, submitted = _scheduler()
+    end_ms = WED_10UTC + 900_000 - 1
 
-    assert published_first is True
-    assert published_second is False
-    assert len(redis_client.published) == 1
+    assert scheduler.enqueue(end_ms - 60_000) is False
+    assert scheduler.enqueue(end_ms) is True
+    assert scheduler.enqueue(end_ms) is False
     assert status.get_reconcile_last_end_ms() == end_ms
+
+    assert scheduler.run_pending(end_ms + 1) == ["queued"]
+    assert scheduler.run_pending(end_ms + 2) == []
+    assert [payload["cmd"] for payload in submitted] == [RECONCILE_CMD]
+    # Той самий payload, що й зовнішня Redis команда.
+    validator.validate_commands_v1(submitted[0])
+    assert submitted[0]["args"] == {"symbols": ["XAUUSD"], "end_ms": end_ms}
+
+
+def test_prefetch_runs_once_before_boundary() -> None:
+    scheduler, _status, _validator, submitted = _scheduler(prefetch_lead_ms=5_000)
+    boundary_ms = WED_10UTC + 900_000
+
+    assert scheduler.next_prefetch_ms(WED_10UTC + 60_000) == boundary_ms - 5_000
+    assert scheduler.run_pending(boundary_ms - 5_001) == []
+    assert scheduler.run_pending(boundary_ms - 5_000) == ["queued"]
+    assert scheduler.run_pending(boundary_ms - 1_000) == []
+    scheduler.enqueue(boundary_ms - 1)
+    scheduler.run_pending(boundary_ms + 1_500)
+    assert [(payload["cmd"], payload["args"]["end_ms"]) for payload in submitted] == [
+        (PREFETCH_CMD, boundary_ms - 1),
+        (RECONCILE_CMD, boundary_ms - 1),
+    ]
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.config import Config
+from core.time.calendar import Calendar
+from runtime.tail_guard import _find_missing_ranges
+
+WED_10UTC = 1_736_935_200_000  # 2025-01-15T10:00:00Z (середа)
+DAY_MS = 86_400_000
+
+
+def _minutewise_missing_ranges(rows: List[Dict[str, Any]], calendar: Calendar, symbol: str) -> List[Tuple[int, int]]:
+    """Еталон: похвилинний обхід gap з calendar.is_open(t)."""
+    rows_sorted = sorted(rows, key=lambda r: int(r["open_time_ms"]))
+    missing_ranges: List[Tuple[int, int]] = []
+    prev_open = int(rows_sorted[0]["open_time_ms"])
+    for row in rows_sorted[1:]:
+        open_ms = int(row["open_time_ms"])
+        t = prev_open + 60_000
+        range_start: Optional[int] = None
+        while t < open_ms:
+            if calendar.is_open(t, symbol=symbol):
+                if range_start is None:
+                    range_start = t
+            elif range_start is not None:
+                missing_ranges.append((range_start, t - 1))
+                range_start = None
+            t += 60_000
+        if range_start is not None:
+            missing_ranges.append((range_start, open_ms - 1))
+        prev_open = open_ms
+    return missing_ranges
+
+
+def _calendar() -> Calendar:
+    config = Config()
+    return Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+
+
+def test_interval_gap_detection_matches_minutewise_reference() -> None:
+    calendar = _calendar()
+    rng = random.Random(48)
+    # Тиждень з випадковими дірками: щоденні паузи, вихідні, довгі та короткі gap.
+    opens = [WED_10UTC - 3 * DAY_MS + idx * 60_000 for idx in range(7 * 1440)]
+    kept: List[int] = []
+    idx = 0
+    while idx < len(opens):
+        kept.append(opens[idx])
+        idx += 1 + (rng.choice([0, 0, 0, 1, 5, 90, 600, 3000]) if rng.random() < 0.05 else 0)
+    rows = [{"open_time_ms": open_ms} for open_ms in kept]
+
+    expected = _minutewise_missing_ranges(rows, calendar, "XAUUSD")
+    assert expected
+    assert _find_missing_ranges(rows, calendar, "XAUUSD") == expected
+
+    # Сітка, зсунута відносно хвилин (бар з секундами), теж збігається.
+    shifted = [{"open_time_ms": row["open_time_ms"] + 30_000} for row in rows[::7]]
+    assert _find_missing_ranges(shifted, calendar, "XAUUSD") == _minutewise_missing_ranges(shifted, calendar, "XAUUSD")
+
+
+def test_weekend_and_holiday_gap_reports_only_open_minutes() -> None:
+    calendar = _calendar()
+    friday = WED_10UTC + 2 * DAY_MS
+    tuesday = WED_10UTC + 6 * DAY_MS
+    rows = [{"open_time_ms": friday}, {"open_time_ms": tuesday}]
+    ranges = _find_missing_ranges(rows, calendar, "XAUUSD")
+    assert ranges == _minutewise_missing_ranges(rows, calendar, "XAUUSD")
+    # 2025-01-20 — закрита дата в calendar overrides; сесія вівторка з 00:00 теж пропущена.
+    tuesday_open = tuesday - 10 * 3_600_000
+    assert calendar.next_open_ms(tuesday_open - 3_600_000) == tuesday_open
+    assert ranges[0][0] == friday + 60_000
+    assert ranges[-1] == (tuesday_open, tuesday - 1)
+    assert all(calendar.is_open(start) and calendar.is_open(end - 59_999) for start, end in ranges)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+from config.config import Config
+from core.market.resample import OhlcvColumns, _diff_python, diff_buckets, resample_ohlcv
+from core.time.calendar import Calendar
+from runtime.tail_guard import _audit_htf, _final_1m_window
+from store.file_cache.history_cache import FileCache
+
+WED_10UTC = 1_736_935_200_000  # 2025-01-15T10:00:00Z (середа)
+HOUR_MS = 3_600_000
+
+
+def _bar(open_ms: int, idx: int) -> Dict[str, Any]:
+    price = 2000.0 + (idx % 17) * 0.25
+    return {
+        "open_time": open_ms,
+        "close_time": open_ms + 59_999,
+        "open": price,
+        "high": price + 1.0,
+        "low": price - 1.0,
+        "close": price + 0.5,
+        "volume": 1.0 + (idx % 5) * 0.1,
+        "tick_count": 3,
+        "complete": True,
+    }
+
+
+def test_htf_audit_reports_only_missing_and_mismatching_buckets(tmp_path: Path) -> None:
+    config = Config()
+    calendar = Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+    cache = FileCache(root=tmp_path, max_bars=10_000, warmup_bars=0)
+    # 3.5 години final 1m: останній 1h бакет ще триває.
+    bars = [_bar(WED_10UTC + idx * 60_000, idx) for idx in range(210)]
+    cache.append_complete_bars("XAUUSD", "1m", bars, source="history")
+    rows, meta = cache.load("XAUUSD", "1m")
+    final_1m = _final_1m_window(rows, meta, window_hours=24)
+
+    derived: Dict[str, List[Dict[str, Any]]] = {}
+    for tf in ("15m", "1h"):
+        derived[tf] = resample_ohlcv(OhlcvColumns.from_rows(rows), tf, calendar).bars()
+    assert len(derived["15m"]) == 14 and len(derived["1h"]) == 3
+    corrupted = dict(derived["15m"][5], high=derived["15m"][5]["high"] + 0.5)
+    cache.append_complete_bars("XAUUSD", "15m", derived["15m"][:5] + [corrupted] + derived["15m"][6:], "history_agg")
+    cache.append_complete_bars("XAUUSD", "1h", [derived["1h"][0], derived["1h"][2]], "history_agg")
+
+    state_15m = _audit_htf(cache, calendar, None, "XAUUSD", "15m", final_1m)
+    assert state_15m.status == "mismatch" and state_15m.missing_bars == 0
+    assert state_15m.mismatched_buckets == [(corrupted["open_time"], corrupted["close_time"])]
+
+    state_1h = _audit_htf(cache, calendar, None, "XAUUSD", "1h", final_1m)
+    assert state_1h.status == "missing" and state_1h.mismatched_buckets == []
+    assert state_1h.missing_ranges == [(WED_10UTC + HOUR_MS, WED_10UTC + 2 * HOUR_MS - 1)]
+
+    # 4h бакет неповний за 1m вікна → не перевіряється; stream_close 1m у вікні не є truth.
+    state_4h = _audit_htf(cache, calendar, None, "XAUUSD", "4h", final_1m)
+    assert state_4h.status == "ok"
+    cache.append_complete_bars("XAUUSD", "1m", [_bar(WED_10UTC + 210 * 60_000, 0)], source="stream_close")
+    rows, meta = cache.load("XAUUSD", "1m")
+    assert len(_final_1m_window(rows, meta, window_hours=24)) == 210
+
+
+def test_diff_buckets_numpy_matches_python_path() -> None:
+    config = Config()
+    calendar = Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+    rows = [
+        {**_bar(WED_10UTC + idx * 60_000, idx), "open_time_ms": WED_10UTC + idx * 60_000}
+        for idx in range(600)
+        if idx not in (40, 41)
+    ]
+    intervals = calendar.open_intervals_ms(WED_10UTC, WED_10UTC + 12 * HOUR_MS, symbol="XAUUSD")
+    expected = resample_ohlcv(OhlcvColumns.from_rows(rows), "15m", calendar, open_intervals=intervals)
+    actual_rows = [
+        {**bar, "open_time_ms": bar["open_time"], "volume": bar["volume"] + (0.001 if idx == 7 else 0.0)}
+        for idx, bar in enumerate(expected.bars())
+        if idx != 20
+    ]
+    result = diff_buckets(expected, OhlcvColumns.from_rows(actual_rows))
+    assert result == _diff_python(expected, OhlcvColumns.from_rows(actual_rows))
+    missing, mismatched = result
+    assert missing == [expected.bars()[20]["open_time"]]
+    assert mismatched == [expected.bars()[7]["open_time"]]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List
+
+from prometheus_client import CollectorRegistry
+
+from config.config import Config
+from core.time.calendar import Calendar
+from observability.metrics import create_metrics
+from runtime.tail_guard import _audit_1m, _find_missing_ranges
+from store.file_cache.history_cache import FileCache
+
+WED_10UTC = 1_736_935_200_000  # 2025-01-15T10:00:00Z (середа)
+
+
+def _bar(open_ms: int) -> Dict[str, object]:
+    return {
+        "open_time": open_ms,
+        "close_time": open_ms + 59_999,
+        "open": 2000.0,
+        "high": 2001.0,
+        "low": 1999.0,
+        "close": 2000.5,
+        "volume": 1.0,
+        "tick_count": 1,
+        "complete": True,
+    }
+
+
+def _opens(start_ms: int, count: int, holes: List[int]) -> List[int]:
+    return [start_ms + idx * 60_000 for idx in range(count) if idx not in holes]
+
+
+def test_incremental_audit_matches_full_and_skips_by_ttl(tmp_path: Path) -> None:
+    config = Config()
+    calendar = Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+    cache = FileCache(root=tmp_path, max_bars=10_000, warmup_bars=0)
+    registry = CollectorRegistry()
+    metrics = create_metrics(registry)
+    now_ms = WED_10UTC + 6 * 3_600_000
+
+    def audit(now: int, window_hours: int = 2):
+        rows, meta = cache.load("XAUUSD", "1m")
+        state, mark = _audit_1m(config, cache, calendar, metrics, "XAUUSD", window_hours, rows, meta, now)
+        window = rows[-window_hours * 60 :]
+        assert state.missing_ranges == _find_missing_ranges(window, calendar, "XAUUSD")
+        return state, mark
+
+    def audited(mode: str) -> float:
+        value = registry.get_sample_value("connector_tail_guard_audited_bars_total", {"tf": "1m", "mode": mode})
+        return float(value or 0.0)
+
+    cache.append_complete_bars("XAUUSD", "1m", [_bar(t) for t in _opens(WED_10UTC, 300, [10, 11, 200])])
+    state, mark = audit(now_ms)
+    assert audited("full") == 120 and state.missing_bars == 1 and not state.skipped_by_ttl
+    assert mark is not None and cache.load_tail_guard_mark("XAUUSD", "1m") is not None
+
+    # Без нових барів у межах tail_guard_checked_ttl_s → аудит пропущено.
+    state, _mark = audit(now_ms + 1_000)
+    assert state.skipped_by_ttl and state.missing_bars == 1 and audited("incremental") == 0
+
+    # Нові бари з дірою → перевіряються лише вони (+ останній перевірений бар).
+    cache.append_complete_bars("XAUUSD", "1m", [_bar(t) for t in _opens(WED_10UTC + 300 * 60_000, 20, [5, 6])])
+    state, mark = audit(now_ms + 2_000)
+    assert audited("incremental") == 19 and not state.skipped_by_ttl
+    assert state.missing_bars == 3
+
+    # Вставка в минуле (repair) відкочує позначку до бару перед вставкою.
+    cache.append_complete_bars("XAUUSD", "1m", [_bar(WED_10UTC + 200 * 60_000)])
+    state, _mark = audit(now_ms + 3_000)
+    assert audited("incremental") == 19 + 119 and state.missing_bars == 2
+    assert audited("full") == 120
+
+    # Ширше вікно, ніж позначка, або прострочений TTL → повний аудит.
+    audit(now_ms + 4_000, window_hours=4)
+    assert audited("full") == 120 + 240
+    audit(now_ms + 4_000 + config.tail_guard_ttl_ms + 1)
+    assert audited("full") == 120 + 240 + 120
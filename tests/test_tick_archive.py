@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import CollectorRegistry
+
+from config.config import Config
+from core.market.preview_1m_builder import Preview1mBuilder
+from core.time.calendar import Calendar
+from core.validation.validator import SchemaValidator
+from observability.metrics import create_metrics
+from runtime.status import StatusManager, build_status_pubsub_payload
+from store.tick_archive import TickArchiveWriter, apply_retention, read_ticks
+from store.tick_archive.segments import TICK_RECORD, segment_paths
+
+DAY_MS = 24 * 60 * 60 * 1000
+DAY_START = 1_736_985_600_000  # 2025-01-16T00:00:00Z
+
+
+class InMemoryPublisher:
+    def __init__(self) -> None:
+        self.last_snapshot: Optional[str] = None
+
+    def set_snapshot(self, key: str, json_str: str) -> None:
+        self.last_snapshot = json_str
+
+    def publish(self, channel: str, json_str: str) -> None:
+        return None
+
+
+def _submit(writer: TickArchiveWriter, ts_ms: int, mid: float) -> bool:
+    return writer.submit("XAU/USD", mid - 0.1, mid + 0.1, mid, ts_ms, ts_ms + 5)
+
+
+def test_tick_archive_roundtrip_rotation_and_1m_rebuild(tmp_path: Path) -> None:
+    metrics = create_metrics(CollectorRegistry())
+    writer = TickArchiveWriter(root=tmp_path, retention_days=0, batch_max=3, flush_interval_s=0.05, metrics=metrics)
+    writer.start()
+    # Останні хвилини дня + початок наступного (ротація сегмента по UTC днях).
+    base = DAY_START + DAY_MS - 2 * 60_000
+    stamps = [base + idx * 20_000 for idx in range(12)]
+    for idx, ts_ms in enumerate(stamps):
+        assert _submit(writer, ts_ms, 2000.0 + idx)
+    writer.stop()
+
+    stats = writer.stats()
+    assert stats["written_total"] == 12 and stats["pending"] == 0 and stats["lag_ms"] == 0
+    assert stats["last_tick_ts_ms"] == stamps[-1]
+    for day in ("2025-01-16", "2025-01-17"):
+        data_path, index_path = segment_paths(tmp_path, "XAUUSD", day)
+        assert data_path.exists() and index_path.exists()
+
+    ticks = read_ticks(tmp_path, "XAUUSD", base + 60_000, base + 3 * 60_000 - 1)
+    assert [tick.tick_ts_ms for tick in ticks] == stamps[3:9]
+    assert ticks[0].symbol == "XAUUSD" and ticks[0].snap_ts_ms == stamps[3] + 5
+
+    builder = Preview1mBuilder()
+    bars: Dict[int, Dict[str, Any]] = {}
+    for tick in ticks:
+        state = builder.on_tick(tick)
+        bars[state.open_time] = state.to_dict()
+    first = bars[base + 60_000]
+    assert (first["open"], first["high"], first["low"], first["close"]) == (2003.0, 2005.0, 2003.0, 2005.0)
+    assert first["tick_count"] == 3
+    assert metrics.tick_archive_ticks_total.labels(result="written")._value.get() == 12
+
+
+def test_tick_archive_never_blocks_and_reports_lag(tmp_path: Path) -> None:
+    writer = TickArchiveWriter(root=tmp_path, queue_max=2, batch_max=100, flush_interval_s=60.0)
+    # Без запущеного writer тік одразу відкидається.
+    assert _submit(writer, DAY_START, 2000.0) is False
+    writer.start()
+    accepted = [_submit(writer, DAY_START + idx, 2000.0) for idx in range(4)]
+    assert accepted == [True, True, False, False]
+    stats = writer.stats(now_ms=int(10**13))
+    assert stats["pending"] == 2 and stats["dropped_total"] == 3 and stats["lag_ms"] > 0
+
+    status = StatusManager(
+        config=Config(),
+        validator=SchemaValidator(root_dir=Path(__file__).resolve().parents[1]),
+        publisher=InMemoryPublisher(),
+        calendar=Calendar(calendar_tag=Config().calendar_tag, overrides_path=Config().calendar_path),
+        metrics=None,
+    )
+    status.build_initial_snapshot()
+    status.record_tick_archive(stats)
+    payload = build_status_pubsub_payload(status.snapshot())
+    status.validator.validate_status_v2(payload)
+    assert payload["price"]["archive"]["pending"] == 2
+    writer.stop()
+    assert writer.stats()["written_total"] == 2
+
+
+def test_tick_archive_reports_stats_from_writer_thread(tmp_path: Path) -> None:
+    reports: List[Dict[str, Any]] = []
+    writer = TickArchiveWriter(root=tmp_path, batch_max=2, flush_interval_s=0.05, on_stats=reports.append)
+    writer.start()
+    assert _submit(writer, DAY_START, 2000.0) and _submit(writer, DAY_START + 1, 2000.0)
+    # submit() лише кладе тік у чергу; status оновлює фоновий потік після flush.
+    writer.stop()
+    assert reports and reports[-1]["written_total"] == 2 and reports[-1]["pending"] == 0
+
+
+def test_tick_archive_truncates_torn_tail_and_applies_retention(tmp_path: Path) -> None:
+    writer = TickArchiveWriter(root=tmp_path, retention_days=0, flush_interval_s=0.01)
+    writer.start()
+    for day in range(4):
+        _submit(writer, DAY_START + day * DAY_MS, 2000.0)
+    writer.stop()
+
+    data_path, _index_path = segment_paths(tmp_path, "XAUUSD", "2025-01-19")
+    with data_path.open("ab") as handle:
+        handle.write(b"\x01" * (TICK_RECORD.size // 2))
+    writer = TickArchiveWriter(root=tmp_path, retention_days=0, flush_interval_s=0.01)
+    writer.start()
+    _submit(writer, DAY_START + 3 * DAY_MS + 60_000, 2001.0)
+    writer.stop()
+    restored: List[Any] = read_ticks(tmp_path, "XAUUSD", DAY_START + 3 * DAY_MS, DAY_START + 4 * DAY_MS - 1)
+    assert [tick.mid for tick in restored] == [2000.0, 2001.0]
+
+    now_ms = DAY_START + 3 * DAY_MS + 120_000
+    assert apply_retention(tmp_path, now_ms=now_ms, retention_days=2, max_bytes=0) == 2
+    remaining = sorted(path.name for path in (tmp_path / "XAUUSD").glob("*.ticks"))
+    assert remaining == ["2025-01-18.ticks", "2025-01-19.ticks"]
+    keep = {"2025-01-19"}
+    assert apply_retention(tmp_path, now_ms=now_ms, retention_days=0, max_bytes=1, keep_days=keep) == 1
+    assert sorted(path.name for path in (tmp_path / "XAUUSD").glob("*")) == ["2025-01-19.idx", "2025-01-19.ticks"]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+from runtime.fxcm.history_provider import (
+    _history_to_bars,
+    _rows_to_bars,
+    _rows_to_bars_per_row,
+    _try_import_numpy,
+)
+
+
+def _dict_rows(count: int) -> List[Dict[str, Any]]:
+    base = datetime(2026, 2, 2, tzinfo=timezone.utc)
+    return [
+        {
+            "Date": base + timedelta(minutes=idx),
+            "BidOpen": 1.0,
+            "BidHigh": 1.2,
+            "BidLow": 0.8,
+            "BidClose": 1.1,
+            "AskOpen": 1.0,
+            "AskHigh": 1.2,
+            "AskLow": 0.8,
+            "AskClose": 1.1,
+            "Volume": idx % 17,
+        }
+        for idx in range(count)
+    ]
+
+
+def _best_ms(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - started) * 1000.0)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark нормалізації history відповіді (_rows_to_bars)")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = _dict_rows(args.rows)
+    limit = args.rows
+    per_row_ms = _best_ms(lambda: _rows_to_bars_per_row("EURUSD", rows, limit), args.repeat)
+    columns_ms = _best_ms(lambda: _rows_to_bars("EURUSD", rows, limit), args.repeat)
+    print(f"rows={args.rows} dict rows: per_row={per_row_ms:.1f}ms columns={columns_ms:.1f}ms")
+
+    np = _try_import_numpy()
+    if np is None:
+        print("numpy недоступний: structured array benchmark пропущено")
+        return 0
+    dtype = [("Date", "datetime64[ms]")] + [
+        (name, "f8")
+        for name in ["BidOpen", "BidHigh", "BidLow", "BidClose", "AskOpen", "AskHigh", "AskLow", "AskClose"]
+    ]
+    dtype.append(("Volume", "i8"))
+    history = np.zeros(args.rows, dtype=dtype)
+    start_ms = 1_770_000_000_000 - 1_770_000_000_000 % 60_000
+    history["Date"] = np.arange(start_ms, start_ms + args.rows * 60_000, 60_000).astype("datetime64[ms]")
+    history["BidOpen"] = 1.0
+    history["BidHigh"] = 1.2
+    history["BidLow"] = 0.8
+    history["BidClose"] = 1.1
+    legacy_ms = _best_ms(lambda: _rows_to_bars_per_row("EURUSD", list(history), limit), args.repeat)
+    vector_ms = _best_ms(lambda: _history_to_bars("EURUSD", history, limit), args.repeat)
+    print(f"rows={args.rows} structured array: per_row={legacy_ms:.1f}ms numpy={vector_ms:.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+from config.config import Config
+from core.market import resample
+from core.market.resample import OhlcvColumns, resample_ohlcv
+from core.time.calendar import Calendar
+
+_TFS = ["5m", "15m", "1h", "4h", "1d"]
+
+
+def _columns(days: int, start_ms: int) -> OhlcvColumns:
+    times = [start_ms + idx * 60_000 for idx in range(days * 1440)]
+    prices = [2000.0 + (idx % 977) * 0.01 for idx in range(len(times))]
+    return OhlcvColumns(
+        open_time_ms=times,
+        open=prices,
+        high=[price + 0.5 for price in prices],
+        low=[price - 0.5 for price in prices],
+        close=[price + 0.1 for price in prices],
+        volume=[float(idx % 17) + 0.25 for idx in range(len(times))],
+        tick_count=[idx % 40 for idx in range(len(times))],
+    )
+
+
+def _best_ms(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - started) * 1000.0)
+    return best
+
+
+def _all_tfs(source: OhlcvColumns, calendar: Calendar, intervals: List[Any]) -> Dict[str, int]:
+    # Свіжий OhlcvColumns: у замір входить і одноразова конвертація колонок у NumPy.
+    columns = OhlcvColumns(
+        open_time_ms=source.open_time_ms,
+        open=source.open,
+        high=source.high,
+        low=source.low,
+        close=source.close,
+        volume=source.volume,
+        tick_count=source.tick_count,
+    )
+    return {tf: len(resample_ohlcv(columns, tf, calendar, open_intervals=intervals)) for tf in _TFS}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark resampling 1m → 5m/15m/1h/4h/1d (core.market.resample)")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--symbol", default="XAUUSD")
+    args = parser.parse_args()
+
+    config = Config()
+    calendar = Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+    start_ms = 1_735_689_600_000  # 2025-01-01T00:00:00Z
+    columns = _columns(args.days, start_ms)
+    intervals = calendar.open_intervals_ms(start_ms, columns.open_time_ms[-1] + 59_999, symbol=args.symbol)
+    print(f"rows={len(columns)} days={args.days} tfs={','.join(_TFS)}")
+
+    if resample._try_import_numpy() is not None:
+        buckets = _all_tfs(columns, calendar, intervals)
+        numpy_ms = _best_ms(lambda: _all_tfs(columns, calendar, intervals), args.repeat)
+        print(f"numpy: {numpy_ms:.1f}ms buckets={buckets}")
+    else:
+        print("numpy недоступний: векторний шлях пропущено")
+    resample._NUMPY_STATE["module"] = None
+    python_ms = _best_ms(lambda: _all_tfs(columns, calendar, intervals), 1)
+    print(f"pure_python: {python_ms:.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
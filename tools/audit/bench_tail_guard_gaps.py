@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.config import Config
+from core.time.calendar import Calendar
+from runtime.tail_guard import _find_missing_ranges
+
+
+def _minutewise_missing_ranges(rows: List[Dict[str, Any]], calendar: Calendar, symbol: str) -> List[Tuple[int, int]]:
+    """Попередній алгоритм: похвилинний обхід gap з calendar.is_open(t)."""
+    missing_ranges: List[Tuple[int, int]] = []
+    prev_open = int(rows[0]["open_time_ms"])
+    for row in rows[1:]:
+        open_ms = int(row["open_time_ms"])
+        t = prev_open + 60_000
+        range_start: Optional[int] = None
+        while t < open_ms:
+            if calendar.is_open(t, symbol=symbol):
+                if range_start is None:
+                    range_start = t
+            elif range_start is not None:
+                missing_ranges.append((range_start, t - 1))
+                range_start = None
+            t += 60_000
+        if range_start is not None:
+            missing_ranges.append((range_start, open_ms - 1))
+        prev_open = open_ms
+    return missing_ranges
+
+
+def _rows(calendar: Calendar, symbol: str, start_ms: int, hours: int, holes: int) -> List[Dict[str, Any]]:
+    """1m open_time лише у відкриті хвилини (як у FileCache) + випадкові дірки і два довгі простої."""
+    opens: List[int] = []
+    for first, last in calendar.open_intervals_ms(start_ms, start_ms + hours * 3_600_000 - 1, symbol=symbol):
+        opens.extend(range(first + (-first) % 60_000, last + 1, 60_000))
+    rng = random.Random(hours)
+    for idx in range(holes):
+        pos = rng.randrange(1, max(2, len(opens) - 1))
+        size = rng.randint(360, 720) if idx < 2 else rng.randint(1, 30)
+        del opens[pos : pos + size]
+    return [{"open_time_ms": open_ms} for open_ms in opens]
+
+
+def _best_ms(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - started) * 1000.0)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark gap detection tail_guard (інтервали vs похвилинно)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--symbol", default="XAUUSD")
+    parser.add_argument("--holes", type=int, default=20)
+    args = parser.parse_args()
+
+    config = Config()
+    calendar = Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+    # 48h — будні (щоденні паузи); 30d — з вихідними і святом 2025-01-20.
+    windows = (("48h", 1_736_812_800_000, 48), ("30d", 1_736_467_200_000, 30 * 24))
+    for label, start_ms, hours in windows:
+        rows = _rows(calendar, args.symbol, start_ms, hours, args.holes)
+        ranges = _find_missing_ranges(rows, calendar, args.symbol)
+        if ranges != _minutewise_missing_ranges(rows, calendar, args.symbol):
+            print(f"{label}: РОЗБІЖНІСТЬ з похвилинним алгоритмом")
+            return 1
+        interval_ms = _best_ms(lambda: _find_missing_ranges(rows, calendar, args.symbol), args.repeat)
+        minutewise_ms = _best_ms(lambda: _minutewise_missing_ranges(rows, calendar, args.symbol), 1)
+        print(
+            f"{label}: rows={len(rows)} ranges={len(ranges)} "
+            f"intervals={interval_ms:.1f}ms minutewise={minutewise_ms:.1f}ms "
+            f"speedup={minutewise_ms / max(interval_ms, 1e-6):.0f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -22,9 +22,11 @@ from config.config import Config, load_config
 from core.env_loader import load_env
 from core.time.buckets import TF_TO_MS, get_bucket_open_ms
 from core.time.calendar import Calendar
+from core.time.market_state import MarketStateCache
 from core.time.sessions import _to_utc_iso
 from core.validation.validator import ContractError, SchemaValidator
 from runtime.command_auth import _canonical_payload, _resolve_secrets
+from runtime.command_stream import publish_command
 
 log = logging.getLogger("ui_lite")
 if not logging.getLogger().handlers:
@@ -137,6 +139,7 @@ class UiLiteState:
     subscribed_channel: str
     preview_publish_interval_ms: int = 0
     calendar: Optional[Calendar] = None
+    market_cache: Optional[MarketStateCache] = None
     redis_rx_total: int = 0
     redis_json_err_total: int = 0
     redis_contract_err_total: int = 0
@@ -296,7 +299,7 @@ def _publish_command(redis_client: redis.Redis, config: Config, payload: Dict[st
     except Exception:
         return False, "command_encode_failed"
     try:
-        redis_client.publish(config.ch_commands(), raw)
+        publish_command(redis_client, config, raw)
     except Exception:
         return False, "command_publish_failed"
     return True, "ok"
@@ -691,6 +694,16 @@ async def _broadcaster(
                     _update_ws_clients(clients)
 
 
+def _resolve_market_open(market: Any, now_ms: int) -> bool:
+    """market.is_open зі status; без market-блоку — спільний MarketStateCache."""
+    if isinstance(market, dict) and "is_open" in market:
+        return bool(market.get("is_open", True))
+    market_cache = _STATE.market_cache
+    if market_cache is not None:
+        return bool(market_cache.is_open(now_ms))
+    return True
+
+
 def _build_health_payload(now_ms: int) -> Dict[str, Any]:
     with _STATE.lock:
         status_payload = dict(_STATE.last_status_snapshot) if _STATE.last_status_snapshot else {}
@@ -698,7 +711,7 @@ def _build_health_payload(now_ms: int) -> Dict[str, Any]:
         last_status_ts_ms = int(_STATE.last_status_ts_ms)
         status_age_ms = int(now_ms - last_status_ts_ms) if status_ok and last_status_ts_ms > 0 else None
         market = status_payload.get("market")
-        market_open = bool(market.get("is_open", True)) if isinstance(market, dict) else True
+        market_open = _resolve_market_open(market, now_ms)
         heartbeat_warn_ms = int(_STATE.status_fresh_warn_ms)
         heartbeat_hard_warn_ms = int(_STATE.status_publish_period_ms) * 10
         if market_open:
@@ -811,7 +824,7 @@ async def _log_state(stop_event: threading.Event) -> None:
         tick_lag_ms = int(price.get("tick_lag_ms", 0))
         tick_lag_s = tick_lag_ms / 1000.0 if tick_lag_ms > 0 else 0.0
         fxcm_state = str(fxcm.get("state", ""))
-        market_open = bool(market.get("is_open", True))
+        market_open = _resolve_market_open(market_raw, now_ms)
         next_open_utc = str(market.get("next_open_utc", ""))
         late_drop = int(preview.get("late_ticks_dropped_total", 0))
         misalign = int(preview.get("misaligned_open_time_total", 0))
@@ -1045,7 +1058,12 @@ async def _log_state(stop_event: threading.Event) -> None:
         last_rails = (late_drop, misalign, past_mut)
 
 
-async def _run_server(config: Config, redis_client: redis.Redis, stop_event: threading.Event) -> None:
+async def _run_server(
+    config: Config,
+    redis_client: redis.Redis,
+    stop_event: threading.Event,
+    market_cache: Optional[MarketStateCache] = None,
+) -> None:
     clients: Set[WebSocketServerProtocol] = set()
     queue: asyncio.Queue = asyncio.Queue()
     dedup = DedupIndex()
@@ -1058,6 +1076,7 @@ async def _run_server(config: Config, redis_client: redis.Redis, stop_event: thr
         _STATE.status_fresh_warn_ms = int(config.status_fresh_warn_ms)
         _STATE.status_publish_period_ms = int(config.status_publish_period_ms)
         _STATE.calendar = Calendar(calendar_tag=config.calendar_tag, overrides_path=config.calendar_path)
+        _STATE.market_cache = market_cache or MarketStateCache(calendar=_STATE.calendar)
     log.debug("UI Lite startup: redis_channel=%s", config.ch_ohlcv())
     _start_redis_subscriber(
         redis_client,
@@ -1130,11 +1149,15 @@ async def _stopper(stop_event: threading.Event) -> None:
         await asyncio.sleep(0.2)
 
 
-def start_ui_lite(config: Config, redis_client: redis.Redis) -> UiLiteHandle:
+def start_ui_lite(
+    config: Config,
+    redis_client: redis.Redis,
+    market_cache: Optional[MarketStateCache] = None,
+) -> UiLiteHandle:
     stop_event = threading.Event()
 
     def _runner() -> None:
-        asyncio.run(_run_server(config, redis_client, stop_event))
+        asyncio.run(_run_server(config, redis_client, stop_event, market_cache=market_cache))
 
     thread = threading.Thread(target=_runner, name="ui_lite", daemon=True)
     thread.start()